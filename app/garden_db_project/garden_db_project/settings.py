@@ -38,9 +38,11 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres", # Trigram lookups for plant name resolution
     "rest_framework", # Added Django REST framework
     "rest_framework.authtoken", # Added DRF Token Authentication
     "graphene_django", # Added Graphene-Django
+    "django_filters", # FilterSets of the REST API viewsets
     "corsheaders", # Added CORS headers for frontend
     # Local apps
     "horticulture.apps.HorticultureConfig",
@@ -90,11 +92,19 @@ DATABASES = {
         "NAME": os.environ.get('POSTGRES_DB'),
         "USER": os.environ.get('POSTGRES_USER'),
         "PASSWORD": os.environ.get('POSTGRES_PASSWORD'),
-        "HOST": "db",  # Changed from localhost to match docker-compose service name
-        "PORT": "5432",
+        "HOST": os.environ.get('POSTGRES_HOST', 'db'),  # Defaults to the docker-compose service name
+        "PORT": os.environ.get('POSTGRES_PORT', '5432'),
     }
 }
 
+# Point SQLITE_PATH at a database file to run against SQLite instead, e.g. to
+# compare backends with the benchmark_import_suite command
+if os.environ.get('SQLITE_PATH'):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ['SQLITE_PATH'],
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -159,6 +169,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'horticulture.permissions.IsAdminOrReadOnly',
     ],
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
@@ -171,6 +184,45 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Number of records per staged chunk for background bulk imports
+BULK_IMPORT_CHUNK_SIZE = 500
+
+# Validate simple list imports with compiled per-model validators and write them
+# with bulk_create; set to False to save every record through its serializer
+BULK_IMPORT_FAST_PATH = True
+
+# Seconds of recent changes the sync API holds back until the next sync, so
+# rows committed late by transactions that started earlier are not skipped
+SYNC_SETTLE_SECONDS = 2
+
+# Seconds precomputed plant detail documents stay cached; changes to the
+# records they show drop them sooner (see horticulture.plant_details)
+PLANT_DETAIL_CACHE_SECONDS = 24 * 60 * 60
+
+# Seconds FirstAdminMiddleware caches that a superuser exists, 0 to query the
+# database on every request. User changes clear the shared cache at once;
+# other processes may keep their memory copy for up to this long
+FIRST_ADMIN_CACHE_SECONDS = 300
+
+# Rows of a GraphQL connection page without first or last, and the most a
+# page may hold (see horticulture.graphql_connections)
+GRAPHQL_PAGE_SIZE = 20
+GRAPHQL_MAX_PAGE_SIZE = 100
+
+# Deepest nesting and highest static cost (rows a query may read) of GraphQL
+# queries; queries over either are rejected. Seconds the row counts used to
+# price lists are reused (see horticulture.graphql_limits)
+GRAPHQL_MAX_DEPTH = 10
+GRAPHQL_MAX_QUERY_COST = 10000
+GRAPHQL_TABLE_SIZE_SECONDS = 300
+
+# Parsed GraphQL documents cached in each process, seconds persisted queries
+# are kept in the shared cache, and seconds CDNs may cache anonymous GETs of
+# persisted queries (see horticulture.graphql_documents)
+GRAPHQL_DOCUMENT_CACHE_SIZE = 500
+GRAPHQL_PERSISTED_QUERY_SECONDS = 30 * 24 * 60 * 60
+GRAPHQL_GET_CACHE_SECONDS = 60
+
 # CORS settings for frontend
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
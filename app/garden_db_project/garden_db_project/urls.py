@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt # Added for GraphQL
-from graphene_django.views import GraphQLView # Added for GraphQL
+from horticulture.graphql_view import GardenGraphQLView # GraphQLView with depth and cost limits
 from rest_framework.authtoken import views as authtoken_views # Added for DRF token auth
 from django.conf import settings
 from django.conf.urls.static import static
@@ -36,7 +36,7 @@ urlpatterns = [
     # API endpoints
     path('api/v1/', include('horticulture.urls')),
     path('api/v1/auth/token/', authtoken_views.obtain_auth_token), # Added DRF token auth endpoint
-    path("graphql", csrf_exempt(GraphQLView.as_view(graphiql=True))), # Added GraphQL endpoint
+    path("graphql", csrf_exempt(GardenGraphQLView.as_view(graphiql=True))), # Added GraphQL endpoint
 
     # Web UI endpoints
     path('', HomeView.as_view(), name='home'),
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Region, SoilProfile, Fertilizer, Pest, Disease, Plant, Seed, Companionship, PlantPest, PlantDisease, UserContribution
+from .models import Region, SoilProfile, Fertilizer, Pest, Disease, Plant, Seed, Companionship, PlantPest, PlantDisease, UserContribution, ImportJob
 
 # @admin.register(UserProfile)
 # class UserProfileAdmin(admin.ModelAdmin):
@@ -60,3 +60,8 @@ class PlantDiseaseAdmin(admin.ModelAdmin):
 class UserContributionAdmin(admin.ModelAdmin):
     list_display = ('user', 'entity_type', 'status', 'submitted_at')
     search_fields = ('user__username', 'entity_type')
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'entity_type', 'status', 'total_records', 'user', 'created_at')
+    list_filter = ('status', 'entity_type')
@@ -0,0 +1,149 @@
+"""
+Synthetic datasets for import benchmarks
+
+generate_dataset() builds a comprehensive import document shaped like
+sample_data/sample_comprehensive.json: plants with the usual descriptive
+fields, pests and diseases that name the plants they affect, and companion
+relationships between plants that share a pool of interaction mechanisms.
+The output only depends on the plant count and the seed, so results of
+different commits are measured on the same data.
+"""
+
+import random
+
+# Named dataset sizes (number of plants) accepted by the benchmark suite
+SCALES = {
+    '1k': 1000,
+    '10k': 10000,
+    '100k': 100000,
+}
+
+# Section sizes relative to the number of plants
+PESTS_PER_PLANT = 0.1
+DISEASES_PER_PLANT = 0.1
+COMPANIONS_PER_PLANT = 1
+
+# Distinct interaction mechanisms shared by the companion relationships
+INTERACTION_COUNT = 50
+
+GENERA = (
+    ('Solanum', 'Solanaceae'), ('Capsicum', 'Solanaceae'), ('Brassica', 'Brassicaceae'),
+    ('Raphanus', 'Brassicaceae'), ('Cucurbita', 'Cucurbitaceae'), ('Cucumis', 'Cucurbitaceae'),
+    ('Phaseolus', 'Fabaceae'), ('Pisum', 'Fabaceae'), ('Allium', 'Amaryllidaceae'),
+    ('Daucus', 'Apiaceae'), ('Ocimum', 'Lamiaceae'), ('Tagetes', 'Asteraceae'),
+    ('Lactuca', 'Asteraceae'), ('Zea', 'Poaceae'), ('Beta', 'Amaranthaceae'),
+)
+EPITHETS = ('vulgaris', 'sativa', 'officinalis', 'annuum', 'oleracea', 'pepo', 'maxima', 'patula', 'cepa', 'carota')
+PEST_CATEGORIES = ('INS', 'MAM', 'MOL')
+DISEASE_CATEGORIES = ('FUN', 'BAC', 'VIR')
+INTERACTION_TYPES = ('BEN', 'BEN', 'BEN', 'DET', 'NEU')
+MECHANISMS = (
+    'repels aphids with aromatic oils', 'attracts pollinators to nearby flowers', 'fixes nitrogen for heavy feeders',
+    'shades the soil and keeps roots cool', 'traps flea beetles away from the crop', 'competes for shallow soil moisture',
+    'suppresses weeds as living mulch', 'hosts predatory wasps', 'releases allelopathic compounds',
+)
+
+
+def _choice(rng, choices):
+    return choices[rng.randrange(len(choices))]
+
+
+def _plant(rng, index):
+    genus, family = _choice(rng, GENERA)
+    species = f'{_choice(rng, EPITHETS)}{index}'
+    maturity = rng.randint(40, 120)
+    ph_min = round(rng.uniform(5.5, 6.5), 1)
+    return {
+        'common_name': f'{genus} {index}',
+        'scientific_name': f'{genus} {species}',
+        'description': f'Synthetic {family} plant number {index} generated for import benchmarks.',
+        'family': family,
+        'genus': genus,
+        'species': species,
+        'lifecycle_type': _choice(rng, ('AN', 'PE', 'BI')),
+        'growth_habit': _choice(rng, ('VI', 'SH', 'HB', 'GC')),
+        'avg_height_inches': rng.randint(6, 120),
+        'avg_spread_inches': rng.randint(6, 48),
+        'days_to_maturity_min': maturity,
+        'days_to_maturity_max': maturity + rng.randint(5, 40),
+        'sunlight_requirements': _choice(rng, ('FS', 'PS', 'SH')),
+        'moisture_requirements': _choice(rng, ('LO', 'MO', 'HI')),
+        'soil_ph_min': ph_min,
+        'soil_ph_max': round(ph_min + rng.uniform(0.5, 1.5), 1),
+        'npk_preference': f'{rng.randint(1, 10)}-{rng.randint(1, 10)}-{rng.randint(1, 10)}',
+    }
+
+
+def _affected_plants(rng, names):
+    return rng.sample(names, min(len(names), rng.randint(1, 5)))
+
+
+def generate_dataset(plant_count, seed=0):
+    """
+    Builds a comprehensive import document with plant_count plants.
+
+    Args:
+        plant_count (int): Number of plants; the other sections are sized
+            relative to it (see PESTS_PER_PLANT and friends)
+        seed (int): Seed of the random generator
+
+    Returns:
+        dict: Sections 'plants', 'pests', 'diseases' and 'companion_relationships'
+    """
+    rng = random.Random(seed)
+    plants = [_plant(rng, index) for index in range(plant_count)]
+    names = [plant['scientific_name'] for plant in plants]
+
+    pests = [
+        {
+            'common_name': f'Synthetic Pest {index}',
+            'scientific_name': f'Pestis synthetica{index}',
+            'description': 'Synthetic pest generated for import benchmarks.',
+            'category': _choice(rng, PEST_CATEGORIES),
+            'symptoms': 'Chewed leaves, stunted growth.',
+            'affected_plants': _affected_plants(rng, names),
+        }
+        for index in range(int(plant_count * PESTS_PER_PLANT))
+    ]
+    diseases = [
+        {
+            'common_name': f'Synthetic Disease {index}',
+            'scientific_name': f'Morbus syntheticus{index}',
+            'description': 'Synthetic disease generated for import benchmarks.',
+            'category': _choice(rng, DISEASE_CATEGORIES),
+            'symptoms': 'Leaf spots, wilting.',
+            'affected_plants': _affected_plants(rng, names),
+        }
+        for index in range(int(plant_count * DISEASES_PER_PLANT))
+    ]
+
+    # The first 20 characters of a mechanism description make its interaction code unique
+    interactions = [
+        {
+            'interaction_type': _choice(rng, INTERACTION_TYPES),
+            'mechanism_description': f'Mechanism {index:04d} - {_choice(rng, MECHANISMS)}.',
+        }
+        for index in range(INTERACTION_COUNT)
+    ]
+    companion_relationships = []
+    if plant_count > 1:
+        pairs = set()
+        wanted = int(plant_count * COMPANIONS_PER_PLANT)
+        while len(pairs) < wanted:
+            subject, target = rng.randrange(plant_count), rng.randrange(plant_count)
+            if subject != target:
+                pairs.add((subject, target))
+        for subject, target in sorted(pairs):
+            companion_relationships.append({
+                'plant_subject': names[subject],
+                'plant_object': names[target],
+                'interactions': [dict(interaction) for interaction in rng.sample(interactions, rng.randint(1, 2))],
+                'notes': 'Synthetic companion relationship.',
+            })
+
+    return {
+        'plants': plants,
+        'pests': pests,
+        'diseases': diseases,
+        'companion_relationships': companion_relationships,
+    }
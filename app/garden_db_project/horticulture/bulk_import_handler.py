@@ -7,13 +7,17 @@ from JSON data, with proper handling of relationships and error reporting.
 
 import logging
 import json
+from django.core.exceptions import FieldDoesNotExist
 from django.db import transaction
 from django.utils import timezone
 
+from .import_planner import plan_import
+from .json_stream import JSONStream, StreamedSection, iter_batches
 from .models import (
     Plant, Seed, Fertilizer, Region, SoilProfile, Pest, Disease, Companionship,
     CompanionPlantingInteraction, PlantPest, PlantDisease
 )
+from .signals import invalidate_derived_data
 
 logger = logging.getLogger(__name__)
 
@@ -23,14 +27,24 @@ class BulkImportHandler:
     Provides methods for importing different entity types and managing relationships.
     """
     
-    def __init__(self, update_existing=False):
+    # Default chunk size for the batched upsert mode
+    DEFAULT_BATCH_SIZE = 500
+
+    def __init__(self, update_existing=False, batch_size=None, stream=False):
         """
         Initialize the handler.
-        
+
         Args:
             update_existing (bool): Whether to update existing records or skip them
+            batch_size (int): If set, plants, pests and diseases are imported in
+                chunks of this size using set-based upserts instead of one
+                lookup and save per record
+            stream (bool): If set, the file is parsed incrementally and records are
+                imported as they are read instead of loading the whole document
         """
         self.update_existing = update_existing
+        self.batch_size = batch_size
+        self.stream = stream
         self.result = {
             'success': False,
             'message': '',
@@ -45,6 +59,10 @@ class BulkImportHandler:
         self.created_pests = {}   # common_name -> Pest object
         self.created_diseases = {} # common_name -> Disease object
         self.created_interactions = {} # code -> Interaction object
+        self.missing_plants = set()    # scientific names known not to exist
+        # Links to affected plants, applied once per import by _resolve_plant_links
+        self.pending_pest_links = {}     # pest pk -> (Pest object, plant names)
+        self.pending_disease_links = {}  # disease pk -> (Disease object, plant names)
     
     def process_json_file(self, json_file, entity_type):
         """
@@ -59,7 +77,10 @@ class BulkImportHandler:
         """
         try:
             # Read and parse JSON file
-            data = json.loads(json_file.read().decode('utf-8'))
+            if self.stream:
+                data = self._open_stream(json_file)
+            else:
+                data = json.loads(json_file.read().decode('utf-8'))
             logger.info(f"Parsed JSON data type: {type(data).__name__}")
             
             # Process the data based on entity type
@@ -85,6 +106,11 @@ class BulkImportHandler:
                 else:
                     self.result['message'] = f'Unsupported entity type: {entity_type}'
                     return self.result
+
+                # Link pests and diseases to their affected plants in one pass
+                self._resolve_plant_links()
+
+                invalidate_derived_data()
                 
                 # If any errors occurred, roll back the transaction
                 if self.result['errors'] and not self.result['created'] and not self.result['updated']:
@@ -102,9 +128,30 @@ class BulkImportHandler:
             
         return self.result
     
+    def _open_stream(self, json_file):
+        """
+        Open the file for incremental parsing.
+
+        Returns a StreamedSection for a root array, a dict of top-level members
+        (arrays as StreamedSection objects) for a root object, or the decoded
+        value for anything else, mirroring the shapes json.loads would give.
+        """
+        stream = JSONStream(json_file)
+        if stream.root_type == 'list':
+            return stream.items()
+        if stream.root_type == 'dict':
+            return stream.sections()
+        return stream.load()
+
     def _process_comprehensive_import(self, data):
         """
         Process a comprehensive import containing multiple entity types.
+
+        The document is scanned for the plants and interactions it references
+        first (see import_planner). Entity types are then imported in
+        dependency order with the references resolved in bulk, so in batched
+        mode the number of queries grows with the number of chunks rather than
+        with the number of records.
         
         Args:
             data: The parsed JSON data
@@ -112,7 +159,7 @@ class BulkImportHandler:
         logger.info("Processing comprehensive import")
         
         # Handle both dict and list formats
-        if isinstance(data, list):
+        if isinstance(data, (list, StreamedSection)):
             logger.info("Converting list data to comprehensive format")
             data = {"plants": data}
         
@@ -122,44 +169,116 @@ class BulkImportHandler:
         
         # Log the keys in the data
         logger.info(f"Comprehensive import data keys: {list(data.keys())}")
-        
-        # Extract data for each entity type
-        plants_data = data.get('plants', [])
-        logger.info(f"Found {len(plants_data)} plants in the import data")
-        
-        pests_data = data.get('pests', [])
-        logger.info(f"Found {len(pests_data)} pests in the import data")
-        
-        diseases_data = data.get('diseases', [])
-        logger.info(f"Found {len(diseases_data)} diseases in the import data")
-        
-        companions_data = data.get('companion_relationships', [])
-        logger.info(f"Found {len(companions_data)} companion relationships in the import data")
-        
-        # Import plants first (needed for relationships)
-        if plants_data:
-            self.result['total'] += len(plants_data)
-            for plant_data in plants_data:
-                self._import_plant(plant_data)
-        
-        # Import pests
-        if pests_data:
-            self.result['total'] += len(pests_data)
-            for pest_data in pests_data:
-                self._import_pest(pest_data)
-        
-        # Import diseases
-        if diseases_data:
-            self.result['total'] += len(diseases_data)
-            for disease_data in diseases_data:
-                self._import_disease(disease_data)
-        
-        # Import companion relationships (depends on plants)
-        if companions_data:
-            self.result['total'] += len(companions_data)
-            for companion_data in companions_data:
-                self._import_companionship(companion_data)
-    
+
+        # Scan the document once for every plant and interaction it references
+        plan = plan_import(data, {
+            'pests': self._affected_plant_references,
+            'diseases': self._affected_plant_references,
+            'companion_relationships': self._companion_references,
+        })
+        importers = {
+            'plants': ('plants', self._import_plant),
+            'pests': ('pests', self._import_pest),
+            'diseases': ('diseases', self._import_disease),
+            'companion_relationships': ('companion relationships', self._import_companionship),
+        }
+
+        # Import each entity type after the types it references
+        for step in plan.steps:
+            if step == 'interactions':
+                self._prefetch_interactions(plan.referenced('interactions'))
+                continue
+
+            label, import_func = importers[step]
+            count = self._import_section(data.get(step, []), import_func)
+            logger.info(f"Processed {count} {label} from the import data")
+
+            if step == 'plants':
+                # Resolve the referenced plants that were not part of the import
+                self._prefetch_plants(plan.referenced('plants'))
+
+    @staticmethod
+    def _affected_plant_references(item):
+        """Returns the plant references of a pest or disease record."""
+        plant_names = item.get('affected_plants')
+        if not isinstance(plant_names, list):
+            return []
+        return [('plants', name, None) for name in plant_names if isinstance(name, str)]
+
+    @classmethod
+    def _companion_references(cls, item):
+        """Returns the plant and interaction references of a companionship record."""
+        references = [
+            ('plants', item.get(key), None)
+            for key in ('plant_subject', 'plant_object')
+            if isinstance(item.get(key), str)
+        ]
+        interactions_data = item.get('interactions')
+        if isinstance(interactions_data, list):
+            for interaction_data in interactions_data:
+                if not isinstance(interaction_data, dict):
+                    continue
+                interaction_type = interaction_data.get('interaction_type')
+                mechanism_description = interaction_data.get('mechanism_description')
+                if isinstance(interaction_type, str) and isinstance(mechanism_description, str) and interaction_type and mechanism_description:
+                    code = cls._interaction_code(interaction_type, mechanism_description)
+                    references.append(('interactions', code, (interaction_type, mechanism_description)))
+        return references
+
+    def _prefetch_plants(self, plant_names):
+        """
+        Load the given plants into the plant cache with a single query.
+
+        Names that are neither cached nor in the database are remembered, so
+        they are not looked up again by later chunks.
+
+        Args:
+            plant_names: Iterable of plant scientific names
+        """
+        unresolved = [
+            name for name in plant_names
+            if name not in self.created_plants and name not in self.missing_plants
+        ]
+        if not unresolved:
+            return
+
+        found = Plant.objects.only('id', 'scientific_name').in_bulk(unresolved, field_name='scientific_name')
+        self.created_plants.update(found)
+        self.missing_plants.update(name for name in unresolved if name not in found)
+
+    def _prefetch_interactions(self, interactions):
+        """
+        Load the given interactions into the interaction cache, creating the
+        missing ones with a single bulk insert.
+
+        Args:
+            interactions (dict): interaction code -> (interaction_type, mechanism_description)
+        """
+        missing = [code for code in interactions if code not in self.created_interactions]
+        if not missing:
+            return
+
+        found = CompanionPlantingInteraction.objects.in_bulk(missing, field_name='interaction_code')
+        new_interactions = [
+            CompanionPlantingInteraction(
+                interaction_code=code,
+                interaction_type=interactions[code][0],
+                mechanism_description=interactions[code][1],
+            )
+            for code in missing
+            if code not in found
+        ]
+        if new_interactions:
+            CompanionPlantingInteraction.objects.bulk_create(
+                new_interactions, batch_size=self.batch_size, ignore_conflicts=True
+            )
+            # Conflict-handling inserts don't return primary keys, so fetch them
+            found.update(CompanionPlantingInteraction.objects.in_bulk(
+                [interaction.interaction_code for interaction in new_interactions], field_name='interaction_code'
+            ))
+            logger.info(f"Created {len(new_interactions)} companion planting interactions")
+        self.created_interactions.update(found)
+
     def _process_simple_import(self, data, import_func):
         """
         Process a simple import of a single entity type.
@@ -168,14 +287,203 @@ class BulkImportHandler:
             data: The parsed JSON data
             import_func: The function to use for importing each item
         """
-        if not isinstance(data, list):
+        if not isinstance(data, (list, StreamedSection)):
             self.result['message'] = 'Invalid JSON format. Expected a list of objects.'
             return
-        
-        self.result['total'] = len(data)
-        for item in data:
-            import_func(item)
-    
+
+        self._import_section(data, import_func)
+
+    def _import_section(self, items, import_func):
+        """
+        Import the records of one section, a fixed-size batch at a time.
+
+        Works the same for parsed lists and streamed sections, so only one
+        batch of raw records is held in memory when streaming.
+
+        Args:
+            items: List or StreamedSection of records
+            import_func: The per-record import function for this entity type
+
+        Returns:
+            int: Number of records processed
+        """
+        count = 0
+        for batch in iter_batches(items, self.batch_size or self.DEFAULT_BATCH_SIZE):
+            count += len(batch)
+            self.result['total'] += len(batch)
+            self._import_many(batch, import_func)
+        return count
+
+    def _import_many(self, items, import_func):
+        """
+        Import a list of items, using the batched upsert path when enabled.
+
+        Args:
+            items (list): The records to import
+            import_func: The per-record import function for this entity type
+        """
+        batch_specs = {
+            self._import_plant: (Plant, 'scientific_name', 'plant', self.created_plants, None),
+            self._import_pest: (Pest, 'common_name', 'pest', self.created_pests, self._link_pest_to_plants),
+            self._import_disease: (Disease, 'common_name', 'disease', self.created_diseases, self._link_disease_to_plants),
+        }
+        spec = batch_specs.get(import_func)
+        is_companionship = import_func == self._import_companionship
+
+        if not self.batch_size or (spec is None and not is_companionship):
+            for item in items:
+                import_func(item)
+            return
+
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start:start + self.batch_size]
+            if is_companionship:
+                written = self._bulk_import_companionships(chunk)
+            else:
+                written = self._bulk_import_chunk(chunk, *spec)
+            if not written:
+                # Replay the chunk record by record so per-record errors are reported
+                for item in chunk:
+                    import_func(item)
+
+    def _bulk_import_chunk(self, chunk, model, key_field, label, cache, link_func):
+        """
+        Upsert one chunk of records with a constant number of queries.
+
+        Existing rows are pre-loaded with a single ``__in`` query, new rows are
+        written with ``bulk_create`` and changed rows with ``bulk_update``.
+        Counters and errors are only merged into the result once the chunk has
+        been written, so a failed write can be replayed by the per-record path.
+
+        Args:
+            chunk (list): The records to import
+            model: The model class being imported
+            key_field (str): The unique field used to match existing records
+            label (str): Entity name used in messages
+            cache (dict): Handler cache to store imported objects in
+            link_func: Optional function linking the object to affected plants
+
+        Returns:
+            bool: True if the chunk was written, False if it must be replayed
+        """
+        counts = {'created': 0, 'updated': 0, 'skipped': 0}
+        errors = []
+        prepared = []
+
+        for item in chunk:
+            if not isinstance(item, dict):
+                errors.append(f'Error processing {label}: expected an object, got {type(item).__name__}: {item}')
+                counts['skipped'] += 1
+                continue
+            key = item.get(key_field)
+            if isinstance(key, (list, dict)):
+                errors.append(f'Error processing {label}: {key_field} must be a value, got {type(key).__name__}: {item}')
+                counts['skipped'] += 1
+                continue
+            if not key:
+                errors.append(f'Missing {key_field} in {label} data: {item}')
+                counts['skipped'] += 1
+                continue
+            data = item.copy()
+            affected_plants = data.pop('affected_plants', []) if link_func else []
+            prepared.append((key, data, affected_plants))
+
+        existing = model.objects.in_bulk([key for key, _, _ in prepared], field_name=key_field)
+
+        to_create = {}  # key -> new instance
+        to_update = {}  # key -> existing instance
+        create_fields = set()
+        update_fields = set()
+        imported = []  # (key, affected_plants) in input order
+
+        for key, data, affected_plants in prepared:
+            try:
+                instance = existing.get(key) or to_create.get(key)
+                if instance is None:
+                    logger.debug(f"Creating new {label}: {key}")
+                    to_create[key] = model(**data)
+                    create_fields.update(self._concrete_field_names(model, data))
+                    counts['created'] += 1
+                elif self.update_existing:
+                    logger.debug(f"Updating existing {label}: {key}")
+                    for field_name, value in data.items():
+                        if hasattr(instance, field_name) and field_name != 'id':
+                            setattr(instance, field_name, value)
+                    if key not in to_create:
+                        to_update[key] = instance
+                        update_fields.update(self._concrete_field_names(model, data))
+                    counts['updated'] += 1
+                else:
+                    logger.debug(f"Skipping existing {label}: {key}")
+                    counts['skipped'] += 1
+                    continue
+                imported.append((key, affected_plants))
+            except Exception as e:
+                logger.error(f"Error processing {label}: {str(e)}")
+                errors.append(f'Error processing {label}: {str(e)}')
+                counts['skipped'] += 1
+
+        try:
+            with transaction.atomic():
+                if to_create:
+                    conflict_fields = sorted(create_fields - {key_field})
+                    if self.update_existing and conflict_fields:
+                        conflict_options = {
+                            'update_conflicts': True,
+                            'unique_fields': [key_field],
+                            'update_fields': conflict_fields + ['updated_at'],
+                        }
+                    else:
+                        conflict_options = {'ignore_conflicts': True}
+                    model.objects.bulk_create(to_create.values(), batch_size=self.batch_size, **conflict_options)
+                    # Conflict-handling inserts don't return primary keys, so fetch them
+                    created_ids = dict(
+                        model.objects.filter(**{f'{key_field}__in': list(to_create)}).values_list(key_field, 'pk')
+                    )
+                    for key, instance in to_create.items():
+                        instance.pk = created_ids.get(key)
+                        instance._state.adding = False
+                if to_update:
+                    now = timezone.now()
+                    for instance in to_update.values():
+                        instance.updated_at = now
+                    model.objects.bulk_update(
+                        to_update.values(), sorted(update_fields | {'updated_at'}), batch_size=self.batch_size
+                    )
+        except Exception as e:
+            logger.warning(f"Batched {label} import failed, retrying {len(chunk)} records one by one: {str(e)}")
+            return False
+
+        logger.info(f"Batched {label} import: {len(to_create)} created, {len(to_update)} updated, {counts['skipped']} skipped")
+        for name, value in counts.items():
+            self.result[name] += value
+        self.result['errors'].extend(errors)
+
+        for key, affected_plants in imported:
+            instance = to_create.get(key) or existing[key]
+            if self.stream:
+                # Keep only the key and pk around so the cache stays small
+                instance = model(pk=instance.pk, **{key_field: key})
+            cache[key] = instance
+            if link_func:
+                link_func(instance, affected_plants)
+        return True
+
+    @staticmethod
+    def _concrete_field_names(model, data):
+        """
+        Return the names of the concrete, non-primary-key model fields set in data.
+        """
+        names = set()
+        for field_name in data:
+            try:
+                field = model._meta.get_field(field_name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.primary_key and not field.many_to_many:
+                names.add(field.name)
+        return names
+
     def _import_plant(self, plant_data):
         """
         Import a single plant.
@@ -285,39 +593,19 @@ class BulkImportHandler:
     
     def _link_pest_to_plants(self, pest, plant_names):
         """
-        Link a pest to plants.
-        
+        Queue the links between a pest and its affected plants.
+
+        Links are applied for the whole import by _resolve_plant_links.
+
         Args:
             pest: The Pest object
             plant_names (list): List of plant scientific names
         """
         if not plant_names:
             return
-        
-        logger.info(f"Linking pest {pest.common_name} to {len(plant_names)} plants")
-        
-        # First, remove existing relationships
-        deleted_count, _ = PlantPest.objects.filter(pest=pest).delete()
-        logger.info(f"Deleted {deleted_count} existing plant-pest relationships")
-        
-        # Then, add new relationships
-        for plant_name in plant_names:
-            logger.info(f"Looking for plant: {plant_name}")
-            
-            # Try to find the plant in our created plants first
-            plant = self.created_plants.get(plant_name)
-            
-            # If not found, try to find it in the database
-            if not plant:
-                plant = Plant.objects.filter(scientific_name=plant_name).first()
-            
-            if plant:
-                logger.info(f"Found plant {plant_name}, creating PlantPest link")
-                link, created = PlantPest.objects.get_or_create(plant=plant, pest=pest)
-                logger.info(f"PlantPest link created: {created}, ID: {link.id}")
-            else:
-                logger.error(f"Plant not found for pest {pest.common_name}: {plant_name}")
-                self.result['errors'].append(f'Plant not found for pest {pest.common_name}: {plant_name}')
+
+        logger.debug(f"Queueing links for pest {pest.common_name} to {len(plant_names)} plants")
+        self.pending_pest_links[pest.pk] = (pest, plant_names)
     
     def _import_disease(self, disease_data):
         """
@@ -381,39 +669,96 @@ class BulkImportHandler:
     
     def _link_disease_to_plants(self, disease, plant_names):
         """
-        Link a disease to plants.
-        
+        Queue the links between a disease and its affected plants.
+
+        Links are applied for the whole import by _resolve_plant_links.
+
         Args:
             disease: The Disease object
             plant_names (list): List of plant scientific names
         """
         if not plant_names:
             return
-        
-        logger.info(f"Linking disease {disease.common_name} to {len(plant_names)} plants")
-        
-        # First, remove existing relationships
-        deleted_count, _ = PlantDisease.objects.filter(disease=disease).delete()
-        logger.info(f"Deleted {deleted_count} existing plant-disease relationships")
-        
-        # Then, add new relationships
-        for plant_name in plant_names:
-            logger.info(f"Looking for plant: {plant_name}")
-            
-            # Try to find the plant in our created plants first
-            plant = self.created_plants.get(plant_name)
-            
-            # If not found, try to find it in the database
-            if not plant:
-                plant = Plant.objects.filter(scientific_name=plant_name).first()
-            
-            if plant:
-                logger.info(f"Found plant {plant_name}, creating PlantDisease link")
-                link, created = PlantDisease.objects.get_or_create(plant=plant, disease=disease)
-                logger.info(f"PlantDisease link created: {created}, ID: {link.id}")
-            else:
-                logger.error(f"Plant not found for disease {disease.common_name}: {plant_name}")
-                self.result['errors'].append(f'Plant not found for disease {disease.common_name}: {plant_name}')
+
+        logger.debug(f"Queueing links for disease {disease.common_name} to {len(plant_names)} plants")
+        self.pending_disease_links[disease.pk] = (disease, plant_names)
+
+    def _resolve_plant_links(self):
+        """
+        Apply all queued pest and disease links with a constant number of queries.
+
+        Every plant name referenced by the import is resolved with a single
+        ``scientific_name__in`` query. The desired links are then diffed against
+        the existing PlantPest/PlantDisease rows so only missing links are
+        inserted and stale ones deleted.
+        """
+        if not self.pending_pest_links and not self.pending_disease_links:
+            return
+
+        plant_ids = {name: plant.pk for name, plant in self.created_plants.items()}
+        unresolved = {
+            name
+            for pending in (self.pending_pest_links, self.pending_disease_links)
+            for _, plant_names in pending.values()
+            for name in plant_names
+            if name not in plant_ids
+        }
+        if unresolved:
+            plant_ids.update(
+                Plant.objects.filter(scientific_name__in=unresolved).values_list('scientific_name', 'pk')
+            )
+
+        self._apply_plant_links(PlantPest, 'pest', self.pending_pest_links, plant_ids)
+        self._apply_plant_links(PlantDisease, 'disease', self.pending_disease_links, plant_ids)
+        self.pending_pest_links = {}
+        self.pending_disease_links = {}
+
+    def _apply_plant_links(self, through_model, owner_field, pending, plant_ids):
+        """
+        Diff and write the queued links for one through model.
+
+        Args:
+            through_model: PlantPest or PlantDisease
+            owner_field (str): The through model field pointing at the owner ('pest' or 'disease')
+            pending (dict): owner pk -> (owner object, list of plant scientific names)
+            plant_ids (dict): plant scientific name -> plant pk
+        """
+        if not pending:
+            return
+
+        desired = set()
+        for owner_id, (owner, plant_names) in pending.items():
+            for plant_name in plant_names:
+                plant_id = plant_ids.get(plant_name)
+                if plant_id:
+                    desired.add((owner_id, plant_id))
+                else:
+                    logger.error(f"Plant not found for {owner_field} {owner.common_name}: {plant_name}")
+                    self.result['errors'].append(f'Plant not found for {owner_field} {owner.common_name}: {plant_name}')
+
+        owner_id_field = f'{owner_field}_id'
+        existing = {
+            (owner_id, plant_id): link_id
+            for link_id, owner_id, plant_id in through_model.objects.filter(
+                **{f'{owner_id_field}__in': list(pending)}
+            ).values_list('id', owner_id_field, 'plant_id')
+        }
+
+        stale_ids = [link_id for pair, link_id in existing.items() if pair not in desired]
+        if stale_ids:
+            through_model.objects.filter(id__in=stale_ids).delete()
+
+        new_links = [
+            through_model(**{owner_id_field: owner_id, 'plant_id': plant_id})
+            for owner_id, plant_id in desired
+            if (owner_id, plant_id) not in existing
+        ]
+        through_model.objects.bulk_create(new_links, batch_size=self.batch_size, ignore_conflicts=True)
+
+        logger.info(
+            f"Linked {len(pending)} {owner_field}s to plants: {len(new_links)} links created, "
+            f"{len(stale_ids)} stale links deleted"
+        )
     
     def _import_companionship(self, companion_data):
         """
@@ -521,8 +866,7 @@ class BulkImportHandler:
                 self.result['errors'].append(f'Missing interaction_type or mechanism_description in interaction data: {interaction_data}')
                 continue
             
-            # Generate a consistent code for the interaction
-            inter_code = f"{interaction_type}_{mechanism_description[:20]}".replace(" ", "_").upper()
+            inter_code = self._interaction_code(interaction_type, mechanism_description)
             
             # Check if we've already created this interaction
             interaction = self.created_interactions.get(inter_code)
@@ -541,6 +885,148 @@ class BulkImportHandler:
             # Add the interaction to the companionship
             companionship.interactions.add(interaction)
     
+    def _bulk_import_companionships(self, chunk):
+        """
+        Upsert one chunk of companionships with a constant number of queries.
+
+        The related plants and interactions are resolved from the handler
+        caches, which are filled for the whole chunk with one query each.
+        Existing pairings are pre-loaded with a single query, new ones written
+        with ``bulk_create`` and the ``interactions`` through rows replaced in
+        bulk. Like _bulk_import_chunk, the result is only updated once the
+        chunk has been written so it can be replayed record by record.
+
+        Args:
+            chunk (list): The companionship records to import
+
+        Returns:
+            bool: True if the chunk was written, False if it must be replayed
+        """
+        counts = {'created': 0, 'updated': 0, 'skipped': 0}
+        errors = []
+        prepared = []
+
+        references = [
+            reference for item in chunk if isinstance(item, dict) for reference in self._companion_references(item)
+        ]
+        self._prefetch_plants(key for entity, key, _ in references if entity == 'plants')
+        self._prefetch_interactions({key: detail for entity, key, detail in references if entity == 'interactions'})
+
+        for item in chunk:
+            if not isinstance(item, dict):
+                errors.append(f'Invalid companionship data: {item}')
+                counts['skipped'] += 1
+                continue
+            plant_subject_name = item.get('plant_subject')
+            plant_object_name = item.get('plant_object')
+            if not isinstance(plant_subject_name, str) or not isinstance(plant_object_name, str) or not plant_subject_name or not plant_object_name:
+                errors.append(f'Missing plant_subject or plant_object in companionship data: {item}')
+                counts['skipped'] += 1
+                continue
+
+            plant_subject = self.created_plants.get(plant_subject_name)
+            plant_object = self.created_plants.get(plant_object_name)
+            if not plant_subject or not plant_object:
+                errors.append(f'Plant not found: {plant_subject_name} or {plant_object_name}')
+                counts['skipped'] += 1
+                continue
+            prepared.append(((plant_subject.pk, plant_object.pk), item))
+
+        existing = {
+            (companionship.plant_subject_id, companionship.plant_object_id): companionship
+            for companionship in Companionship.objects.filter(
+                plant_subject_id__in={subject_id for (subject_id, _), _ in prepared}
+            )
+        }
+
+        to_create = {}  # (subject pk, object pk) -> new instance
+        to_update = {}  # (subject pk, object pk) -> existing instance
+        interaction_sets = {}  # (subject pk, object pk) -> interaction pks
+
+        for pair, item in prepared:
+            instance = existing.get(pair) or to_create.get(pair)
+            if instance is None:
+                to_create[pair] = Companionship(
+                    plant_subject_id=pair[0], plant_object_id=pair[1], notes=item.get('notes', '')
+                )
+                counts['created'] += 1
+            elif self.update_existing:
+                instance.notes = item.get('notes', '')
+                if pair not in to_create:
+                    to_update[pair] = instance
+                counts['updated'] += 1
+            else:
+                counts['skipped'] += 1
+                continue
+
+            interactions_data = item.get('interactions')
+            if interactions_data and not isinstance(interactions_data, list):
+                errors.append(f'Invalid interactions in companionship data: {item}')
+            elif interactions_data:
+                interaction_ids = []
+                for interaction_data in interactions_data:
+                    if isinstance(interaction_data, dict):
+                        interaction_type = interaction_data.get('interaction_type')
+                        mechanism_description = interaction_data.get('mechanism_description')
+                    else:
+                        interaction_type = mechanism_description = None
+                    # Must match _companion_references, which prefetched the interactions
+                    if not isinstance(interaction_type, str) or not isinstance(mechanism_description, str) or not interaction_type or not mechanism_description:
+                        errors.append(f'Missing interaction_type or mechanism_description in interaction data: {interaction_data}')
+                        continue
+                    code = self._interaction_code(interaction_type, mechanism_description)
+                    interaction_ids.append(self.created_interactions[code].pk)
+                interaction_sets[pair] = interaction_ids
+
+        try:
+            with transaction.atomic():
+                if to_create:
+                    Companionship.objects.bulk_create(to_create.values(), batch_size=self.batch_size, ignore_conflicts=True)
+                    # Conflict-handling inserts don't return primary keys, so fetch them
+                    created_ids = {
+                        (subject_id, object_id): pk
+                        for subject_id, object_id, pk in Companionship.objects.filter(
+                            plant_subject_id__in={subject_id for subject_id, _ in to_create}
+                        ).values_list('plant_subject_id', 'plant_object_id', 'pk')
+                    }
+                    for pair, instance in to_create.items():
+                        instance.pk = created_ids.get(pair)
+                        instance._state.adding = False
+                if to_update:
+                    now = timezone.now()
+                    for instance in to_update.values():
+                        instance.updated_at = now
+                    Companionship.objects.bulk_update(to_update.values(), ['notes', 'updated_at'], batch_size=self.batch_size)
+                if interaction_sets:
+                    through_model = Companionship.interactions.through
+                    companionship_ids = {
+                        pair: (to_create.get(pair) or existing[pair]).pk for pair in interaction_sets
+                    }
+                    through_model.objects.filter(companionship_id__in=companionship_ids.values()).delete()
+                    through_model.objects.bulk_create(
+                        [
+                            through_model(companionship_id=companionship_ids[pair], companionplantinginteraction_id=interaction_id)
+                            for pair, interaction_ids in interaction_sets.items()
+                            for interaction_id in set(interaction_ids)
+                        ],
+                        batch_size=self.batch_size,
+                        ignore_conflicts=True,
+                    )
+        except Exception as e:
+            logger.warning(f"Batched companionship import failed, retrying {len(chunk)} records one by one: {str(e)}")
+            return False
+
+        logger.info(f"Batched companionship import: {len(to_create)} created, {len(to_update)} updated, {counts['skipped']} skipped")
+        for name, value in counts.items():
+            self.result[name] += value
+        self.result['errors'].extend(errors)
+        return True
+
+    @staticmethod
+    def _interaction_code(interaction_type, mechanism_description):
+        """Generate a consistent code for an interaction."""
+        return f"{interaction_type}_{mechanism_description[:20]}".replace(" ", "_").upper()
+
     def _import_seed(self, seed_data):
         """
         Import a single seed.
@@ -0,0 +1,441 @@
+"""
+In-memory companion graph and garden bed solver
+
+CompanionGraph keeps the pairings of Companionship as bitsets per plant of
+its beneficial, detrimental and neutral partners, with Python ints as the
+bitsets. A pairing is detrimental if any of its interactions is (see
+compatibility.pairing_type), and pairings in both directions between two
+plants are merged the same way. Besides the solver, the bitsets back the
+network traversals of companion_network where recursive CTEs are not used.
+
+The graph is loaded once per process and then refreshed incrementally:
+every read first applies the companionships and interactions changed since
+the previous check, found through their (updated_at, id) indexes, and the
+deletes recorded in the sync deletion log. Bulk imports, whose writes send
+no signals and may replace interactions without touching updated_at, start
+a new generation in the shared cache, and the next read of every process
+reloads the graph.
+
+solve_beds() groups candidate plants into beds, keeping detrimental pairs
+apart and as many beneficial pairs together as it can. Grouping is NP-hard,
+so it places plants greedily and improves the grouping by moving single
+plants for at most SOLVER_TIME_BUDGET seconds; 200 plants take well under a
+second.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .compatibility import InteractionType, pairing_type
+from .models import Companionship, CompanionPlantingInteraction, DeletionLog
+from .sync import SETTLE_SECONDS
+
+# Shared cache key of the generation bulk writes bump
+GENERATION_KEY = 'companion_graph:generation'
+
+# Seconds the solver may spend improving the greedy grouping
+SOLVER_TIME_BUDGET = 0.5
+
+# Candidate plants per solver request
+MAX_SOLVER_PLANTS = 500
+
+# Matrix values of a pair of plants
+BENEFICIAL, NEUTRAL, DETRIMENTAL = 1, 0, -1
+
+
+class CompanionGraph:
+    """
+    Beneficial and detrimental partners of every plant as bitsets.
+
+    Plants get a bit position when they first show up in a pairing; bit j
+    of beneficial[i] is set if the plants at positions i and j are paired
+    beneficially.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reloaded_for = set()  # Deletion log pks of interactions the graph was reloaded for
+        self.reset()
+
+    def reset(self):
+        """Drops the graph; the next read loads it from the database."""
+        self.positions = {}      # plant pk -> bit position
+        self.plant_ids = []      # bit position -> plant pk
+        self.beneficial = []     # bit position -> bitset of beneficial partners
+        self.detrimental = []    # bit position -> bitset of detrimental partners
+        self.neutral = []        # bit position -> bitset of neutral partners
+        self.pairings = {}       # companionship pk -> (position, position, interaction type)
+        self.pairs = {}          # (position, position) -> {companionship pk: interaction type}
+        self.checked_at = None
+        self.generation = None
+
+    # --- Loading ---
+
+    def refresh(self):
+        """Applies the changes made since the previous refresh, or loads the graph."""
+        with self._lock:
+            generation = cache.get(GENERATION_KEY)
+            if generation is None:
+                generation = time.time_ns()
+                cache.add(GENERATION_KEY, generation, None)
+            if self.checked_at is None or generation != self.generation:
+                self._load(generation)
+            else:
+                self._apply_changes()
+
+    def _load(self, generation):
+        self.reset()
+        self.generation = generation
+        self.checked_at = timezone.now()
+        rows = Companionship.objects.filter(
+            plant_subject__isnull=False, plant_object__isnull=False
+        ).values_list('pk', 'plant_subject_id', 'plant_object_id')
+        self._upsert(rows, self._interaction_types())
+
+    def _apply_changes(self):
+        # Rows committed late by transactions that started before the
+        # previous check are caught by looking back the sync settle window;
+        # applying a pairing twice is harmless
+        settle = getattr(settings, 'SYNC_SETTLE_SECONDS', SETTLE_SECONDS)
+        since = self.checked_at - timedelta(seconds=settle)
+        self.checked_at = timezone.now()
+
+        deleted = DeletionLog.objects.filter(
+            deleted_at__gte=since, entity_type__in=('companionship', 'companioninteraction')
+        ).values_list('pk', 'entity_type', 'object_id')
+        deleted_pairings = []
+        for log_pk, entity_type, object_id in deleted:
+            if entity_type == 'companioninteraction':
+                if log_pk not in self.reloaded_for:
+                    # Its M2M rows went without a trace, so the pairings it was in are unknown
+                    self.reloaded_for.add(log_pk)
+                    self._load(self.generation)
+                    return
+            else:
+                deleted_pairings.append(object_id)
+        for pk in deleted_pairings:
+            self._remove(pk)
+
+        changed = Q(updated_at__gte=since)
+        interactions = list(CompanionPlantingInteraction.objects.filter(updated_at__gte=since).values_list('pk', flat=True))
+        if interactions:
+            changed |= Q(interactions__in=interactions)
+        rows = list(Companionship.objects.filter(changed).distinct().values_list('pk', 'plant_subject_id', 'plant_object_id'))
+        if rows:
+            self._upsert(rows, self._interaction_types([pk for pk, _, _ in rows]))
+
+    @staticmethod
+    def _interaction_types(pks=None):
+        """Interaction types per companionship pk, of the given companionships or of all."""
+        through = Companionship.interactions.through.objects.all()
+        if pks is not None:
+            through = through.filter(companionship_id__in=pks)
+        types = {}
+        for pk, interaction_type in through.values_list('companionship_id', 'companionplantinginteraction__interaction_type'):
+            types.setdefault(pk, []).append(interaction_type)
+        return types
+
+    # --- Updates ---
+
+    def _position(self, plant_id):
+        position = self.positions.get(plant_id)
+        if position is None:
+            position = self.positions[plant_id] = len(self.plant_ids)
+            self.plant_ids.append(plant_id)
+            self.beneficial.append(0)
+            self.detrimental.append(0)
+            self.neutral.append(0)
+        return position
+
+    def _upsert(self, rows, types):
+        for pk, subject_id, object_id in rows:
+            self._remove(pk)
+            if subject_id is None or object_id is None or subject_id == object_id:
+                continue
+            a, b = sorted((self._position(subject_id), self._position(object_id)))
+            interaction_type = pairing_type(types.get(pk, ()))
+            self.pairings[pk] = (a, b, interaction_type)
+            self.pairs.setdefault((a, b), {})[pk] = interaction_type
+            self._update_pair(a, b)
+
+    def _remove(self, pk):
+        pairing = self.pairings.pop(pk, None)
+        if pairing is None:
+            return
+        a, b, _ = pairing
+        pair = self.pairs[(a, b)]
+        del pair[pk]
+        if not pair:
+            del self.pairs[(a, b)]
+        self._update_pair(a, b)
+
+    def _update_pair(self, a, b):
+        """Sets the bits of a pair from the pairings between its plants."""
+        pair = self.pairs.get((a, b), {})
+        interaction_type = pairing_type(pair.values()) if pair else None
+        for row, column in ((a, b), (b, a)):
+            bit = 1 << column
+            self.beneficial[row] &= ~bit
+            self.detrimental[row] &= ~bit
+            self.neutral[row] &= ~bit
+            if interaction_type == InteractionType.BENEFICIAL:
+                self.beneficial[row] |= bit
+            elif interaction_type == InteractionType.DETRIMENTAL:
+                self.detrimental[row] |= bit
+            elif interaction_type == InteractionType.NEUTRAL:
+                self.neutral[row] |= bit
+
+    # --- Reads ---
+
+    def subgraph(self, plant_ids):
+        """
+        Returns the (beneficial, detrimental) bitsets of the given plants
+        over their own indices, i.e. bit j of beneficial[i] is set if
+        plant_ids[i] and plant_ids[j] are paired beneficially.
+        """
+        self.refresh()
+        with self._lock:
+            local = {}
+            for index, plant_id in enumerate(plant_ids):
+                position = self.positions.get(plant_id)
+                if position is not None:
+                    local[position] = index
+            beneficial, detrimental = [0] * len(plant_ids), [0] * len(plant_ids)
+            for position, index in local.items():
+                for row, rows in ((self.beneficial, beneficial), (self.detrimental, detrimental)):
+                    bits = row[position]
+                    while bits:
+                        low = bits & -bits
+                        partner = local.get(low.bit_length() - 1)
+                        if partner is not None:
+                            rows[index] |= 1 << partner
+                        bits ^= low
+            return beneficial, detrimental
+
+    def _partners(self, interaction_type):
+        """Returns a function from a bit position to its partners of a type, or of any type for None."""
+        if interaction_type == InteractionType.BENEFICIAL:
+            return self.beneficial.__getitem__
+        if interaction_type == InteractionType.DETRIMENTAL:
+            return self.detrimental.__getitem__
+        if interaction_type == InteractionType.NEUTRAL:
+            return self.neutral.__getitem__
+        return lambda position: self.beneficial[position] | self.detrimental[position] | self.neutral[position]
+
+    def _plant_ids(self, bits):
+        while bits:
+            low = bits & -bits
+            yield self.plant_ids[low.bit_length() - 1]
+            bits ^= low
+
+    def neighborhood(self, plant_id, hops, interaction_type=None):
+        """
+        Returns plant pk -> distance of the plants within hops pairings of
+        a type (any type for None) of a plant, by a breadth-first search
+        over the bitsets; None for hops walks the whole component.
+        """
+        self.refresh()
+        with self._lock:
+            start = self.positions.get(plant_id)
+            if start is None:
+                return {}
+            partners = self._partners(interaction_type)
+            seen = frontier = 1 << start
+            distances, depth = {}, 0
+            while frontier and (hops is None or depth < hops):
+                depth += 1
+                reached = 0
+                bits = frontier
+                while bits:
+                    low = bits & -bits
+                    reached |= partners(low.bit_length() - 1)
+                    bits ^= low
+                frontier = reached & ~seen
+                seen |= frontier
+                distances.update(dict.fromkeys(self._plant_ids(frontier), depth))
+            return distances
+
+    def shared_partners(self, plant_id, interaction_type=None):
+        """Returns plant pk -> pks of the partners it shares with a plant, by pairings of a type."""
+        self.refresh()
+        with self._lock:
+            start = self.positions.get(plant_id)
+            if start is None:
+                return {}
+            partners = self._partners(interaction_type)
+            shared = {}
+            for partner in self._plant_ids(partners(start)):
+                for other in self._plant_ids(partners(self.positions[partner]) & ~(1 << start)):
+                    shared.setdefault(other, []).append(partner)
+            return shared
+
+    def components(self, interaction_type=None):
+        """Returns the connected components of pairings of a type with two or more plants, as lists of pks."""
+        self.refresh()
+        with self._lock:
+            parent = list(range(len(self.plant_ids)))
+
+            def root(position):
+                while parent[position] != position:
+                    parent[position] = parent[parent[position]]
+                    position = parent[position]
+                return position
+
+            for (a, b), pair in self.pairs.items():
+                if interaction_type is None or pairing_type(pair.values()) == interaction_type:
+                    parent[root(a)] = root(b)
+            groups = {}
+            for (a, b), pair in self.pairs.items():
+                if interaction_type is None or pairing_type(pair.values()) == interaction_type:
+                    groups.setdefault(root(a), set()).update((self.plant_ids[a], self.plant_ids[b]))
+            return [sorted(members) for members in groups.values()]
+
+
+companion_graph = CompanionGraph()
+
+
+def _new_generation():
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate_companion_graph():
+    """
+    Makes every process reload the graph on its next read, e.g. after a
+    bulk import; again once the current transaction commits, in case a
+    process reloaded before the writes were visible.
+    """
+    _new_generation()
+    transaction.on_commit(_new_generation)
+
+
+# --- Solver ---
+
+def _score(members, beneficial, detrimental):
+    """(beneficial pairs, detrimental pairs) within a group bitset."""
+    good = bad = 0
+    bits = members
+    while bits:
+        low = bits & -bits
+        index = low.bit_length() - 1
+        good += (beneficial[index] & members).bit_count()
+        bad += (detrimental[index] & members).bit_count()
+        bits ^= low
+    return good // 2, bad // 2
+
+
+def _group_plants(beneficial, detrimental, bed_size, beds, deadline):
+    """
+    Groups indices 0..n-1 into bitsets, greedily and then by single moves
+    that lower the detrimental pairs within groups or keep them and raise
+    the beneficial ones.
+    """
+    count = len(beneficial)
+    bed_size = bed_size or count
+    groups, sizes = [], []
+    assignment = [None] * count
+
+    # Plants with the most beneficial partners first, so they seed the groups
+    order = sorted(range(count), key=lambda index: (-beneficial[index].bit_count(), detrimental[index].bit_count(), index))
+    for index in order:
+        best, best_key = None, None
+        for group, members in enumerate(groups):
+            if sizes[group] >= bed_size:
+                continue
+            key = (-(detrimental[index] & members).bit_count(), (beneficial[index] & members).bit_count())
+            if best_key is None or key > best_key:
+                best, best_key = group, key
+        can_open = beds is None or len(groups) < beds
+        if best is None or (can_open and best_key <= (0, 0)):
+            if not can_open and best is None:
+                # Every bed is full: overfill the least conflicting one
+                best = min(range(len(groups)), key=lambda group: ((detrimental[index] & groups[group]).bit_count(), sizes[group]))
+            else:
+                groups.append(0)
+                sizes.append(0)
+                best = len(groups) - 1
+        groups[best] |= 1 << index
+        sizes[best] += 1
+        assignment[index] = best
+
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for index in range(count):
+            bit = 1 << index
+            current = assignment[index]
+            others = groups[current] & ~bit
+            stay = ((detrimental[index] & others).bit_count(), (beneficial[index] & others).bit_count())
+            best, best_gain = None, (0, 0)
+            for group, members in enumerate(groups):
+                if group == current or sizes[group] >= bed_size:
+                    continue
+                gain = (stay[0] - (detrimental[index] & members).bit_count(), (beneficial[index] & members).bit_count() - stay[1])
+                if gain > best_gain:
+                    best, best_gain = group, gain
+            if best is None and stay[0] and (beds is None or len(groups) < beds) and sizes[current] > 1:
+                groups.append(0)
+                sizes.append(0)
+                best = len(groups) - 1
+            if best is not None:
+                groups[current] &= ~bit
+                sizes[current] -= 1
+                groups[best] |= bit
+                sizes[best] += 1
+                assignment[index] = best
+                improved = True
+            if time.monotonic() >= deadline:
+                break
+    return [members for members in groups if members]
+
+
+def solve_beds(plant_ids, bed_size=None, beds=None, include_matrix=True, time_budget=SOLVER_TIME_BUDGET):
+    """
+    Groups candidate plants into garden beds.
+
+    Args:
+        plant_ids (list): Primary keys of the candidate plants, without duplicates
+        bed_size (int): Maximum plants per bed, or None for no limit
+        beds (int): Maximum number of beds, or None for no limit
+        include_matrix (bool): Whether to return the pairwise matrix
+        time_budget (float): Seconds to spend improving the greedy grouping
+
+    Returns:
+        dict: 'beds' (plants, beneficial_pairs and detrimental_pairs of each
+        bed, largest first), the totals 'beneficial_pairs' and
+        'detrimental_pairs', and 'matrix' (rows of BENEFICIAL, NEUTRAL or
+        DETRIMENTAL in the order of plant_ids; NEUTRAL also for unpaired plants)
+    """
+    deadline = time.monotonic() + time_budget
+    beneficial, detrimental = companion_graph.subgraph(plant_ids)
+    groups = _group_plants(beneficial, detrimental, bed_size, beds, deadline)
+
+    result_beds = []
+    for members in groups:
+        good, bad = _score(members, beneficial, detrimental)
+        result_beds.append({
+            'plants': [plant_id for index, plant_id in enumerate(plant_ids) if members >> index & 1],
+            'beneficial_pairs': good,
+            'detrimental_pairs': bad,
+        })
+    result_beds.sort(key=lambda bed: (-len(bed['plants']), bed['plants']))
+    result = {
+        'beds': result_beds,
+        'beneficial_pairs': sum(bed['beneficial_pairs'] for bed in result_beds),
+        'detrimental_pairs': sum(bed['detrimental_pairs'] for bed in result_beds),
+    }
+    if include_matrix:
+        result['matrix'] = [
+            [
+                BENEFICIAL if beneficial[row] >> column & 1 else DETRIMENTAL if detrimental[row] >> column & 1 else NEUTRAL
+                for column in range(len(plant_ids))
+            ]
+            for row in range(len(plant_ids))
+        ]
+    return result
@@ -0,0 +1,165 @@
+"""
+Traversals of the companion network
+
+Plants are linked by their companionships in either direction; a link has
+the type of its pairings as in compatibility.pairing_type (detrimental over
+beneficial over neutral). Three traversals are offered, each optionally
+restricted to links of one type:
+
+- neighborhood(): the plants within k links of a plant, with their distance
+- shared_partners(): the plants sharing partners with a plant
+- components(): the connected components of the network, or of one plant
+
+On Postgres they run as recursive CTEs walking the companionship table
+through its plant_subject and plant_object indexes, so only the part of the
+network they reach is read. Elsewhere they run on the in-memory companion
+graph (see companion_graph), whose bitset rows serve as its adjacency lists.
+All components of the network are always listed from the graph: a union
+find over it is linear, while a recursive CTE would join every plant with
+every other one of its component.
+"""
+
+from django.db import connection
+
+from .companion_graph import companion_graph
+from .compatibility import InteractionType
+from .models import Plant, Companionship, CompanionPlantingInteraction
+
+# Largest k of a neighborhood
+MAX_HOPS = 4
+
+# Values of the type query parameter
+INTERACTION_TYPES = {
+    'any': None,
+    'beneficial': InteractionType.BENEFICIAL,
+    'detrimental': InteractionType.DETRIMENTAL,
+    'neutral': InteractionType.NEUTRAL,
+}
+
+# Ranks of the interaction types in SQL, MAX() of which gives the type of a link
+_RANKS = {InteractionType.NEUTRAL: 0, InteractionType.BENEFICIAL: 1, InteractionType.DETRIMENTAL: 2}
+
+
+def _tables():
+    through = Companionship.interactions.through
+    return {
+        'companionship': Companionship._meta.db_table,
+        'through': through._meta.db_table,
+        'through_interaction': through._meta.get_field('companionplantinginteraction').column,
+        'interaction': CompanionPlantingInteraction._meta.db_table,
+    }
+
+
+# Recursive step from the plant in walk w over a companionship c to the other
+# plant; the type of the link is that of the pairings of both directions
+_STEP = '''
+    FROM walk w
+    JOIN {companionship} c ON (c.plant_subject_id = w.plant_id OR c.plant_object_id = w.plant_id)
+    WHERE c.plant_subject_id <> c.plant_object_id {type_condition}
+'''
+
+_OTHER = 'CASE WHEN c.plant_subject_id = w.plant_id THEN c.plant_object_id ELSE c.plant_subject_id END'
+
+_LINK_RANK = '''COALESCE((
+        SELECT MAX(CASE i.interaction_type WHEN 'DET' THEN 2 WHEN 'BEN' THEN 1 ELSE 0 END)
+        FROM {through} t
+        JOIN {interaction} i ON i.id = t.{through_interaction}
+        JOIN {companionship} p ON p.id = t.companionship_id
+        WHERE (p.plant_subject_id = c.plant_subject_id AND p.plant_object_id = c.plant_object_id)
+           OR (p.plant_subject_id = c.plant_object_id AND p.plant_object_id = c.plant_subject_id)
+    ), 0)'''
+
+
+def _query(template, interaction_type, start, bounds=()):
+    """Runs a walk query; start fills the parameters before the step, bounds those after it."""
+    tables = _tables()
+    type_condition, params = '', [*start]
+    if interaction_type is not None:
+        type_condition = f'AND {_LINK_RANK.format(**tables)} = %s'
+        params.append(_RANKS[interaction_type])
+    params.extend(bounds)
+    sql = template.format(step=_STEP.format(type_condition=type_condition, **tables), other=_OTHER)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _sql_neighborhood(plant_id, hops, interaction_type):
+    if hops is None:
+        rows = _query('''
+            WITH RECURSIVE walk(plant_id) AS (
+                SELECT CAST(%s AS bigint)
+                UNION
+                SELECT {other} {step}
+            )
+            SELECT plant_id, 0 FROM walk
+        ''', interaction_type, [plant_id])
+    else:
+        rows = _query('''
+            WITH RECURSIVE walk(plant_id, depth) AS (
+                SELECT CAST(%s AS bigint), 0
+                UNION
+                SELECT {other}, w.depth + 1 {step} AND w.depth < %s
+            )
+            SELECT plant_id, MIN(depth) FROM walk GROUP BY plant_id
+        ''', interaction_type, [plant_id], [hops])
+    return {pk: depth for pk, depth in rows if pk != plant_id}
+
+
+def _sql_shared_partners(plant_id, interaction_type):
+    rows = _query('''
+        WITH RECURSIVE walk(plant_id, depth, via) AS (
+            SELECT CAST(%s AS bigint), 0, CAST(NULL AS bigint)
+            UNION
+            SELECT {other}, w.depth + 1, CASE WHEN w.depth = 0 THEN {other} ELSE w.via END {step} AND w.depth < %s
+        )
+        SELECT plant_id, via FROM walk WHERE depth = 2
+    ''', interaction_type, [plant_id], [2])
+    shared = {}
+    for pk, partner in sorted(rows, key=lambda row: row[1]):
+        if pk != plant_id:
+            shared.setdefault(pk, []).append(partner)
+    return shared
+
+
+def use_sql():
+    """Whether the traversals run as recursive CTEs on this database."""
+    return connection.vendor == 'postgresql'
+
+
+def neighborhood(plant_id, hops, interaction_type=None, sql=None):
+    """
+    Returns plant pk -> distance of the plants within hops links of a plant.
+
+    Args:
+        plant_id (int): Primary key of the plant
+        hops (int): Largest distance, or None for the whole component
+        interaction_type (str): Link type to follow, or None for any
+        sql (bool): Run as a recursive CTE; defaults to use_sql()
+    """
+    if use_sql() if sql is None else sql:
+        return _sql_neighborhood(plant_id, hops, interaction_type)
+    return companion_graph.neighborhood(plant_id, hops, interaction_type)
+
+
+def shared_partners(plant_id, interaction_type=None, sql=None):
+    """Returns plant pk -> sorted pks of the partners it shares with a plant (see neighborhood)."""
+    if use_sql() if sql is None else sql:
+        return _sql_shared_partners(plant_id, interaction_type)
+    return {pk: sorted(partners) for pk, partners in companion_graph.shared_partners(plant_id, interaction_type).items()}
+
+
+def components(interaction_type=None, plant_id=None, sql=None):
+    """
+    Returns connected components with two or more plants as sorted lists
+    of pks, largest first; only the component of plant_id if given.
+    """
+    if plant_id is not None:
+        members = neighborhood(plant_id, None, interaction_type, sql=sql)
+        return [sorted([plant_id, *members])] if members else []
+    return sorted(companion_graph.components(interaction_type), key=lambda members: (-len(members), members))
+
+
+def plant_names(pks):
+    """Returns pk -> common name of the given plants with one query."""
+    return dict(Plant.objects.filter(pk__in=pks).values_list('pk', 'common_name'))
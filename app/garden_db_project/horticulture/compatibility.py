@@ -0,0 +1,101 @@
+"""
+Companion compatibility of plants
+
+plant_compatibility() answers for any number of plants with a fixed number
+of queries: the plants, their companionships in either direction (one query
+using the plant_subject and plant_object indexes, with both plants joined)
+and the prefetched interactions of those companionships.
+
+A pairing is reported as an antagonist if any of its interactions is
+detrimental, and as a companion otherwise.
+"""
+
+from django.db.models import Q
+
+from .models import Plant, Companionship, CompanionPlantingInteraction
+
+InteractionType = CompanionPlantingInteraction.InteractionType
+
+# Plants per batch compatibility request
+MAX_BATCH_PLANTS = 200
+
+
+def pairing_type(interaction_types):
+    """Overall interaction type of a pairing: detrimental wins over beneficial over neutral."""
+    types = set(interaction_types)
+    for interaction_type in (InteractionType.DETRIMENTAL, InteractionType.BENEFICIAL):
+        if interaction_type in types:
+            return interaction_type
+    return InteractionType.NEUTRAL
+
+
+def _partner(companionship, other_plant, interactions, interaction_type, prefix):
+    return {
+        f'{prefix}_plant_id': other_plant.pk,
+        f'{prefix}_common_name': other_plant.common_name,
+        'interaction_type': InteractionType(interaction_type).label,
+        'strength_confidence': companionship.strength_confidence,
+        'notes': companionship.notes,
+        'interactions': [
+            {
+                'interaction_code': interaction.interaction_code,
+                'interaction_type': interaction.interaction_type,
+                'mechanism_description': interaction.mechanism_description,
+            }
+            for interaction in interactions
+        ],
+    }
+
+
+def plant_compatibility(plant_ids):
+    """
+    Returns the compatibility data of the given plants.
+
+    Args:
+        plant_ids (iterable): Primary keys of the plants
+
+    Returns:
+        dict: Plant pk -> {plant_id, common_name, scientific_name,
+        ph_minimum, ph_maximum, companions, antagonists}; plants that do
+        not exist are left out
+    """
+    plant_ids = set(plant_ids)
+    plants = Plant.objects.filter(pk__in=plant_ids).only(
+        'common_name', 'scientific_name', 'soil_ph_min', 'soil_ph_max'
+    )
+    results = {
+        plant.pk: {
+            'plant_id': plant.pk,
+            'common_name': plant.common_name,
+            'scientific_name': plant.scientific_name,
+            'ph_minimum': plant.soil_ph_min,
+            'ph_maximum': plant.soil_ph_max,
+            'companions': [],
+            'antagonists': [],
+        }
+        for plant in plants
+    }
+    if not results:
+        return results
+
+    companionships = Companionship.objects.filter(
+        Q(plant_subject_id__in=results) | Q(plant_object_id__in=results)
+    ).select_related('plant_subject', 'plant_object').only(
+        'strength_confidence', 'notes',
+        'plant_subject__common_name', 'plant_object__common_name',
+    ).prefetch_related('interactions').order_by('pk')
+
+    for companionship in companionships:
+        interactions = list(companionship.interactions.all())
+        interaction_type = pairing_type(interaction.interaction_type for interaction in interactions)
+        for plant, other_plant in (
+            (companionship.plant_subject, companionship.plant_object),
+            (companionship.plant_object, companionship.plant_subject),
+        ):
+            if plant is None or other_plant is None or plant.pk not in results:
+                continue
+            if interaction_type == InteractionType.DETRIMENTAL:
+                results[plant.pk]['antagonists'].append(_partner(companionship, other_plant, interactions, interaction_type, 'antagonist'))
+            else:
+                results[plant.pk]['companions'].append(_partner(companionship, other_plant, interactions, interaction_type, 'companion'))
+    return results
@@ -0,0 +1,143 @@
+"""
+FilterSets of the REST API viewsets
+
+Filters on the large tables map to lookups an index can answer: exact
+matches on indexed columns and foreign keys, range lookups on indexed numbers,
+and q, which goes through the full-text search index (see
+search_index.search()). Partial matches on names go through q instead of
+icontains lookups, which scan the whole table.
+"""
+
+from django.db.models import Q
+from django_filters import rest_framework as filters
+
+from .models import (
+    Region, SoilProfile, Plant, Fertilizer, Pest, Disease, Seed,
+    Companionship, PlantPest, PlantDisease, CompanionPlantingInteraction
+)
+from .search_index import search_scored
+
+
+class SearchFilterSet(filters.FilterSet):
+    """
+    FilterSet with a q filter searching the full-text index of its model.
+    Matches are annotated with search_score, which KeysetPagination pages by.
+    """
+
+    q = filters.CharFilter(method='filter_search', label='Search')
+
+    def filter_search(self, queryset, name, value):
+        return search_scored(queryset, value)
+
+
+class RegionFilter(filters.FilterSet):
+    class Meta:
+        model = Region
+        fields = ['zone_system', 'zone_identifier']
+
+
+class SoilProfileFilter(filters.FilterSet):
+    class Meta:
+        model = SoilProfile
+        fields = ['name', 'soil_type']
+
+
+class PlantFilter(SearchFilterSet):
+    # Plants whose preferred pH range includes this value
+    ph = filters.NumberFilter(method='filter_ph', label='Tolerates soil pH')
+
+    class Meta:
+        model = Plant
+        fields = {
+            'scientific_name': ['exact'],
+            'family': ['exact'],
+            'genus': ['exact'],
+            'lifecycle_type': ['exact'],
+            'growth_habit': ['exact'],
+            'sunlight_requirements': ['exact'],
+            'moisture_requirements': ['exact'],
+            'suitable_region': ['exact'],
+            'soil_preference': ['exact'],
+            'days_to_maturity_min': ['gte', 'lte'],
+        }
+
+    def filter_ph(self, queryset, name, value):
+        return queryset.filter(
+            Q(soil_ph_min__isnull=True) | Q(soil_ph_min__lte=value),
+            Q(soil_ph_max__isnull=True) | Q(soil_ph_max__gte=value),
+        )
+
+
+class SeedFilter(SearchFilterSet):
+    class Meta:
+        model = Seed
+        fields = {
+            'plant': ['exact'],
+            'seed_type': ['exact'],
+        }
+
+
+class PestFilter(SearchFilterSet):
+    plant = filters.NumberFilter(field_name='plants', label='Affects plant')
+
+    class Meta:
+        model = Pest
+        fields = {
+            'common_name': ['exact'],
+            'category': ['exact'],
+        }
+
+
+class DiseaseFilter(SearchFilterSet):
+    plant = filters.NumberFilter(field_name='plants', label='Affects plant')
+
+    class Meta:
+        model = Disease
+        fields = {
+            'common_name': ['exact'],
+            'category': ['exact'],
+        }
+
+
+class FertilizerFilter(SearchFilterSet):
+    class Meta:
+        model = Fertilizer
+        fields = {
+            'base_type': ['exact'],
+            'form': ['exact'],
+            'brand': ['exact'],
+        }
+
+
+class CompanionshipFilter(filters.FilterSet):
+    # Relationships in either direction
+    plant = filters.NumberFilter(method='filter_plant', label='Involves plant')
+    interaction_type = filters.ChoiceFilter(
+        field_name='interactions__interaction_type', distinct=True,
+        choices=CompanionPlantingInteraction.InteractionType.choices,
+    )
+
+    class Meta:
+        model = Companionship
+        fields = ['plant_subject', 'plant_object', 'strength_confidence']
+
+    def filter_plant(self, queryset, name, value):
+        return queryset.filter(Q(plant_subject=value) | Q(plant_object=value))
+
+
+class PlantPestFilter(filters.FilterSet):
+    class Meta:
+        model = PlantPest
+        fields = ['plant', 'pest']
+
+
+class PlantDiseaseFilter(filters.FilterSet):
+    class Meta:
+        model = PlantDisease
+        fields = ['plant', 'disease']
+
+
+class CompanionPlantingInteractionFilter(filters.FilterSet):
+    class Meta:
+        model = CompanionPlantingInteraction
+        fields = ['interaction_code', 'interaction_type']
@@ -0,0 +1,108 @@
+"""
+Relay connections of the GraphQL API
+
+The all* list fields return every row of their table in one response. The
+connection fields (plants, pests, ...) return pages of at most
+GRAPHQL_MAX_PAGE_SIZE rows instead, taking first and after (or last and
+before). They page by the same unique, indexed keys and cursors as the REST
+API's KeysetPagination, so a page deep into a table costs the same as the
+first one, and they filter with the FilterSets of the REST viewsets (see
+filters.py), which keep to indexed columns and the search index.
+"""
+
+from functools import partial
+
+import graphene
+from django.conf import settings
+from graphene_django.filter.fields import convert_enum
+from graphene_django.filter.utils import get_filtering_args_from_filterset
+from graphql import GraphQLError
+
+from .graphql_loaders import get_loaders
+from .graphql_optimizer import connection_nodes, optimize
+from .pagination import ORDERING_BY_CREATION, ORDERING_BY_RANK, after_key, decode_key, encode_key
+
+# Rows of a page without first or last
+GRAPHQL_PAGE_SIZE = 20
+
+# Largest page; larger first or last are cut down to it
+GRAPHQL_MAX_PAGE_SIZE = 100
+
+
+class KeysetConnectionField(graphene.relay.ConnectionField):
+    """
+    Connection over the rows returned by its resolver, filtered with a
+    FilterSet and paged by a keyset ordering (see pagination.py).
+    """
+
+    def __init__(self, node_type, filterset_class=None, ordering=ORDERING_BY_CREATION, **kwargs):
+        name = node_type._meta.name.removesuffix('Type')
+        connection = graphene.relay.Connection.create_type(f'{name}Connection', node=node_type)
+        self.filterset_class = filterset_class
+        self.ordering = ordering
+        self.filtering_args = get_filtering_args_from_filterset(filterset_class, node_type) if filterset_class else {}
+        super().__init__(connection, **self.filtering_args, **kwargs)
+
+    def wrap_resolve(self, parent_resolver):
+        # Skips ConnectionField.wrap_resolve, which slices the rows into a page by offset
+        resolver = graphene.Field.wrap_resolve(self, parent_resolver)
+        return partial(self.resolve_page, resolver)
+
+    def _filter(self, queryset, info, args):
+        if self.filterset_class is None:
+            return queryset
+        data = {name: convert_enum(value) for name, value in args.items() if name in self.filtering_args}
+        filterset = self.filterset_class(data=data, queryset=queryset, request=info.context)
+        if not filterset.is_valid():
+            raise GraphQLError(f'Invalid filters: {filterset.errors.as_json()}')
+        return filterset.qs
+
+    def resolve_page(self, resolver, root, info, first=None, last=None, after=None, before=None, **args):
+        if first is not None and last is not None:
+            raise GraphQLError('Pass either first or last, not both')
+        backward = last is not None or (first is None and before is not None)
+        size = last if backward else first
+        if size is None:
+            size = getattr(settings, 'GRAPHQL_PAGE_SIZE', GRAPHQL_PAGE_SIZE)
+        if size < 0:
+            raise GraphQLError('first and last must not be negative')
+        size = min(size, getattr(settings, 'GRAPHQL_MAX_PAGE_SIZE', GRAPHQL_MAX_PAGE_SIZE))
+
+        queryset = self._filter(resolver(root, info, **args), info, args)
+        key = ORDERING_BY_RANK if 'search_score' in queryset.query.annotations else self.ordering
+        cursor = before if backward else after
+        if cursor is not None:
+            try:
+                values, _ = decode_key(cursor, len(key))
+            except ValueError:
+                raise GraphQLError('Invalid cursor')
+            queryset = queryset.filter(after_key(key, values, backward))
+
+        order_by = key
+        if backward:
+            order_by = [field[1:] if field.startswith('-') else f'-{field}' for field in key]
+        columns = [field.lstrip('-') for field in key if field.lstrip('-') != 'search_score']
+        queryset = optimize(queryset, info, connection_nodes(info), required=columns)
+
+        # One row past the page tells whether there is another page
+        rows = list(queryset.order_by(*order_by)[:size + 1])
+        has_more = len(rows) > size
+        page = get_loaders(info).register(rows[:size])
+        if backward:
+            page.reverse()
+
+        connection = self.type
+        edges = [
+            connection.Edge(node=row, cursor=encode_key([getattr(row, field.lstrip('-')) for field in key]))
+            for row in page
+        ]
+        return connection(
+            edges=edges,
+            page_info=graphene.relay.PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                # Rows on the far side of a cursor are assumed, as in KeysetPagination
+                has_next_page=before is not None if backward else has_more,
+                has_previous_page=has_more if backward else after is not None,
+            ),
+        )
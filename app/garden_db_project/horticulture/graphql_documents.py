@@ -0,0 +1,85 @@
+"""
+Persisted queries and parsed documents of the GraphQL endpoint
+
+Clients send the same few documents over and over. Two caches spare the
+work of receiving and checking them each time:
+
+- Automatic persisted queries, as in Apollo's protocol: a client sends
+  extensions.persistedQuery {version: 1, sha256Hash} in place of the query.
+  A hash the server does not know yet is answered with a
+  PersistedQueryNotFound error, after which the client sends the query along
+  with its hash, and the query is kept in the shared cache under its hash
+  for GRAPHQL_PERSISTED_QUERY_SECONDS. Since the hash alone names the query,
+  persisted queries can be sent as GETs and cached by a CDN (see
+  graphql_view).
+- parse_and_validate() keeps the parsed documents of the most recent
+  GRAPHQL_DOCUMENT_CACHE_SIZE queries of each process, with the result of
+  their validation against the GraphQL rules. The depth and cost limits are
+  cheap and depend on settings, so they are checked on every request.
+"""
+
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from graphql import GraphQLError, parse, validate
+
+# Seconds a persisted query is kept after it was last registered
+GRAPHQL_PERSISTED_QUERY_SECONDS = 30 * 24 * 60 * 60
+
+# Parsed and validated documents kept in each process
+GRAPHQL_DOCUMENT_CACHE_SIZE = 500
+
+PERSISTED_QUERY_CACHE_KEY = 'graphql:persisted-query:{}'
+
+
+def persisted_query(extensions, query):
+    """
+    Returns the query of a request and the hash it is persisted under, None
+    if it does not use a persisted query.
+
+    Args:
+        extensions (dict): Extensions of the request
+        query (str): Query of the request, None if only its hash was sent
+
+    Raises:
+        GraphQLError: If the hash is unknown or does not match the query
+    """
+    persisted = extensions.get('persistedQuery') if isinstance(extensions, dict) else None
+    if not persisted:
+        return query, None
+    if not isinstance(persisted, dict) or persisted.get('version') != 1:
+        raise GraphQLError('Unsupported persisted query version', extensions={'code': 'PERSISTED_QUERY_NOT_SUPPORTED'})
+    digest = persisted.get('sha256Hash')
+    if not isinstance(digest, str):
+        raise GraphQLError('Persisted query without sha256Hash', extensions={'code': 'BAD_REQUEST'})
+
+    if query is None:
+        query = cache.get(PERSISTED_QUERY_CACHE_KEY.format(digest))
+        if query is None:
+            # Apollo clients answer this message by sending the query
+            raise GraphQLError('PersistedQueryNotFound', extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+    elif hashlib.sha256(query.encode('utf-8')).hexdigest() != digest:
+        raise GraphQLError('provided sha does not match query', extensions={'code': 'BAD_REQUEST'})
+    return query, digest
+
+
+def persist_query(digest, query):
+    """Keeps a valid query under its hash for later persisted query requests."""
+    timeout = getattr(settings, 'GRAPHQL_PERSISTED_QUERY_SECONDS', GRAPHQL_PERSISTED_QUERY_SECONDS)
+    cache.set(PERSISTED_QUERY_CACHE_KEY.format(digest), query, timeout)
+
+
+@lru_cache(maxsize=getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', GRAPHQL_DOCUMENT_CACHE_SIZE))
+def parse_and_validate(schema, query):
+    """
+    Returns the parsed document of a query, None if it does not parse, and
+    its errors against the GraphQL validation rules. Both are cached, so a
+    document must not be changed by its users.
+    """
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, (error,)
+    return document, tuple(validate(schema, document))
@@ -0,0 +1,210 @@
+"""
+Depth and cost limits of GraphQL queries
+
+Each nesting level of a query over the companion network multiplies the
+rows it reads: 100 plants with 20 companionships each, whose plants have
+20 pests each, whose pests affect 20 plants each, make 800,000 rows. The
+GraphQL view (see graphql_view) therefore validates every query against
+two rules before executing it:
+
+- graphene's depth_limit_validator, rejecting queries nested deeper than
+  GRAPHQL_MAX_DEPTH fields
+- cost_limit_validator, rejecting queries whose static cost is over
+  GRAPHQL_MAX_QUERY_COST
+
+The cost of a query is the number of rows it may read, each weighted by its
+field (GRAPHQL_FIELD_COSTS, 1 by default). A field returning a row counts
+once per row of its parent, a list field multiplies that by the rows it may
+return: first or last for connections (their page size if not given, their
+largest if passed as a variable), RELATION_LIST_SIZE for the rows related
+to a row and the rows of the table for the deprecated all* lists. A
+relation never reads more rows than its table holds, so the rows of a
+relation list are capped at the size of its table (the through table of an
+M2M). Table sizes are counted at most once every GRAPHQL_TABLE_SIZE_SECONDS.
+Scalars, pageInfo and the edges and node wrappers of connections cost
+nothing.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from graphene.utils.str_converters import to_snake_case
+from graphql import GraphQLError, GraphQLList, GraphQLNonNull, get_named_type
+from graphql.language import (
+    FieldNode, FragmentDefinitionNode, FragmentSpreadNode, InlineFragmentNode, IntValueNode, OperationDefinitionNode
+)
+from graphql.validation import ValidationRule
+
+from .graphql_connections import GRAPHQL_MAX_PAGE_SIZE, GRAPHQL_PAGE_SIZE
+from .graphql_loaders import relation_fields
+
+# Deepest nesting of fields in a query
+GRAPHQL_MAX_DEPTH = 10
+
+# Highest cost of a query, None for no limit
+GRAPHQL_MAX_QUERY_COST = 10000
+
+# Rows assumed for a list of the rows related to one row (the pests of a plant)
+RELATION_LIST_SIZE = 20
+
+# Rows assumed for a list of a whole table (allPlants) whose model is not known
+UNBOUNDED_LIST_SIZE = 1000
+
+# Seconds the row count of a table is reused to price the lists reading it
+GRAPHQL_TABLE_SIZE_SECONDS = 300
+
+TABLE_SIZE_CACHE_KEY = 'graphql:table-size:{}'
+
+# Weights of fields other than 1, as 'TypeName.fieldName': weight
+GRAPHQL_FIELD_COSTS = {}
+
+
+def table_size(model):
+    """Returns the number of rows of a model's table, counted at most once every GRAPHQL_TABLE_SIZE_SECONDS."""
+    key = TABLE_SIZE_CACHE_KEY.format(model._meta.label_lower)
+    size = cache.get(key)
+    if size is None:
+        size = model._default_manager.count()
+        cache.set(key, size, getattr(settings, 'GRAPHQL_TABLE_SIZE_SECONDS', GRAPHQL_TABLE_SIZE_SECONDS))
+    return size
+
+
+def _model(graphql_type):
+    """Returns the model of a DjangoObjectType, None for other types."""
+    meta = getattr(getattr(graphql_type, 'graphene_type', None), '_meta', None)
+    return getattr(meta, 'model', None)
+
+
+def _relation_table(field):
+    """Returns the model whose rows a list relation reads: the related model, or the through model of an M2M."""
+    if field.many_to_many:
+        return field.remote_field.through if field.concrete else field.through
+    return field.related_model
+
+
+def _is_connection(graphql_type):
+    return 'edges' in getattr(graphql_type, 'fields', {}) and 'pageInfo' in graphql_type.fields
+
+
+def _is_edge(graphql_type):
+    return 'node' in getattr(graphql_type, 'fields', {}) and 'cursor' in graphql_type.fields
+
+
+def _is_list(graphql_type):
+    if isinstance(graphql_type, GraphQLNonNull):
+        graphql_type = graphql_type.of_type
+    return isinstance(graphql_type, GraphQLList)
+
+
+def _page_size(node):
+    """Rows a connection field may return: its first or last argument, capped at the largest page."""
+    largest = getattr(settings, 'GRAPHQL_MAX_PAGE_SIZE', GRAPHQL_MAX_PAGE_SIZE)
+    size = getattr(settings, 'GRAPHQL_PAGE_SIZE', GRAPHQL_PAGE_SIZE)
+    for argument in node.arguments:
+        if argument.name.value in ('first', 'last'):
+            # A variable may hold the largest page
+            size = int(argument.value.value) if isinstance(argument.value, IntValueNode) else largest
+    return min(max(size, 0), largest)
+
+
+class _CostCounter:
+    def __init__(self, context):
+        self.schema = context.schema
+        self.fragments = {
+            definition.name.value: definition for definition in context.document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+        self.costs = getattr(settings, 'GRAPHQL_FIELD_COSTS', GRAPHQL_FIELD_COSTS)
+        self.table_sizes = {}
+
+    def table_size(self, model):
+        if model not in self.table_sizes:
+            self.table_sizes[model] = table_size(model)
+        return self.table_sizes[model]
+
+    def list_rows(self, parent_type, name, field_type, rows, root):
+        """Returns the rows a list field may return for rows rows of its parent."""
+        if root:
+            model = _model(field_type)
+            return rows * (self.table_size(model) if model is not None else UNBOUNDED_LIST_SIZE)
+        model = _model(parent_type)
+        relation = relation_fields(model).get(to_snake_case(name)) if model is not None else None
+        if relation is None:
+            return rows * RELATION_LIST_SIZE
+        return min(rows * RELATION_LIST_SIZE, self.table_size(_relation_table(relation)))
+
+    def operation(self, operation):
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is None:
+            return 0
+        return self.selection_set(operation.selection_set, root_type, 1, root=True)
+
+    def selection_set(self, selection_set, parent_type, rows, root=False):
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                cost += self.field(selection, parent_type, rows, root)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is not None:
+                    fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                    cost += self.selection_set(fragment.selection_set, fragment_type, rows, root)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                cost += self.selection_set(selection.selection_set, fragment_type, rows, root)
+        return cost
+
+    def field(self, node, parent_type, rows, root):
+        name = node.name.value
+        field = getattr(parent_type, 'fields', {}).get(name)
+        if field is None or node.selection_set is None or name.startswith('__'):
+            return 0
+        field_type = get_named_type(field.type)
+        if _is_connection(parent_type) and name == 'pageInfo':
+            return 0
+        if (_is_connection(parent_type) and name == 'edges') or (_is_edge(parent_type) and name == 'node'):
+            return self.selection_set(node.selection_set, field_type, rows)
+
+        if _is_connection(field_type):
+            rows *= _page_size(node)
+        elif _is_list(field.type):
+            rows = self.list_rows(parent_type, name, field_type, rows, root)
+        weight = self.costs.get(f'{parent_type.name}.{name}', 1)
+        return weight * rows + self.selection_set(node.selection_set, field_type, rows)
+
+
+def query_costs(context):
+    """Returns operation name ('anonymous' if unnamed) -> cost of the operations of a validated document."""
+    counter = _CostCounter(context)
+    return {
+        definition.name.value if definition.name else 'anonymous': counter.operation(definition)
+        for definition in context.document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+    }
+
+
+def cost_limit_validator(max_cost, callback=None):
+    """
+    Returns a validation rule rejecting operations that cost more than
+    max_cost (None for no limit); callback is called with the costs of the
+    operations, as with graphene's depth_limit_validator.
+    """
+
+    class CostLimitValidator(ValidationRule):
+        def __init__(self, validation_context):
+            super().__init__(validation_context)
+            costs = query_costs(validation_context)
+            if callable(callback):
+                callback(costs)
+            for definition in validation_context.document.definitions:
+                if not isinstance(definition, OperationDefinitionNode) or max_cost is None:
+                    continue
+                name = definition.name.value if definition.name else 'anonymous'
+                if costs[name] > max_cost:
+                    validation_context.report_error(GraphQLError(
+                        f"'{name}' costs {costs[name]}, over the maximum query cost of {max_cost}.",
+                        [definition],
+                    ))
+
+    return CostLimitValidator
@@ -0,0 +1,150 @@
+"""
+Batched loading of the relations of GraphQL types
+
+GraphQL resolves a field once per row, so a relation of a list (the pests
+of every plant, the plant_object of every companionship) would cost one
+query per row. Instead every relation of a BatchedDjangoObjectType is
+resolved through a per-request RelationLoader, which loads it for all rows
+of its model seen so far in the request with one prefetch_related_objects()
+query. Rows are seen when a list resolver passes them to register(), and
+when a loader returns them, so each nesting level of a query costs one
+query per relation however many rows it has, and the next level starts
+out knowing all of its rows.
+
+Execution is synchronous, so a loader cannot wait for its siblings to
+queue up their keys like a promise based DataLoader; knowing the rows
+ahead is what lets the first of them load the relation for all of them.
+Relations the root resolvers prefetched (see graphql_optimizer) are taken
+from their rows as they are.
+"""
+
+from django.db.models import prefetch_related_objects
+from graphene_django import DjangoObjectType
+
+
+class RelationLoader:
+    """Loads one relation of one model for every registered row."""
+
+    def __init__(self, loaders, model, field):
+        self.loaders = loaders
+        self.model = model
+        self.field = field
+        self.accessor = field.name if field.concrete else field.get_accessor_name()
+        # id() of a registered row -> its related row(s)
+        self.values = {}
+
+    def _value(self, instance):
+        if self.field.many_to_many or self.field.one_to_many:
+            return list(getattr(instance, self.accessor).all())
+        try:
+            return getattr(instance, self.accessor)
+        except self.field.related_model.DoesNotExist:
+            # Missing reverse one-to-one
+            return None
+
+    def _fetched(self, instance):
+        if self.field.many_to_many or self.field.one_to_many:
+            return self.accessor in getattr(instance, '_prefetched_objects_cache', {})
+        return getattr(type(instance), self.accessor).is_cached(instance)
+
+    def _loadable(self, row):
+        # A forward FK of a row loaded with only() may be deferred, and would
+        # then be read with a query of its own
+        if not self.field.concrete or self.field.many_to_many:
+            return True
+        return self.field.attname not in row.get_deferred_fields()
+
+    def load(self, instance):
+        """Returns the related row(s) of an instance, loading them for all pending rows at once."""
+        if id(instance) not in self.values:
+            if self._fetched(instance):
+                # Prefetched by the optimizer along with its siblings
+                pending = [instance]
+            else:
+                self.loaders.register([instance])
+                pending = [
+                    row for row in self.loaders.rows(self.model).values()
+                    if id(row) not in self.values and (row is instance or self._loadable(row))
+                ]
+                prefetch_related_objects(pending, self.accessor)
+            related = []
+            for row in pending:
+                value = self._value(row)
+                self.values[id(row)] = value
+                if isinstance(value, list):
+                    related.extend(value)
+                elif value is not None:
+                    related.append(value)
+            self.loaders.register(related)
+        return self.values[id(instance)]
+
+
+class Loaders:
+    """Rows seen and relation loaders of one GraphQL request."""
+
+    def __init__(self):
+        # Rows by model and id(), each instance kept so its id() stays its own;
+        # a row read twice (as a plant and as a companion) is two instances,
+        # each with the columns and prefetches of its own selection
+        self._rows = {}
+        self._loaders = {}
+
+    def rows(self, model):
+        return self._rows.setdefault(model, {})
+
+    def register(self, instances):
+        """Records rows whose relations may be resolved later; returns them as a list."""
+        instances = list(instances)
+        for instance in instances:
+            self.rows(type(instance)).setdefault(id(instance), instance)
+        return instances
+
+    def loader(self, model, field):
+        key = (model, field.name)
+        if key not in self._loaders:
+            self._loaders[key] = RelationLoader(self, model, field)
+        return self._loaders[key]
+
+
+def get_loaders(info):
+    """Returns the loaders of the request being executed, kept on its context."""
+    context = info.context
+    if context is None:
+        # Executed without a context (schema.execute() in a shell): nothing to share
+        return Loaders()
+    loaders = getattr(context, '_graphql_loaders', None)
+    if loaders is None:
+        loaders = Loaders()
+        context._graphql_loaders = loaders
+    return loaders
+
+
+def relation_fields(model):
+    """Returns GraphQL field name -> relation of a model: its name for forward relations, its accessor for reverse ones."""
+    return {
+        field.name if field.concrete else field.get_accessor_name(): field
+        for field in model._meta.get_fields()
+        if field.is_relation
+    }
+
+
+def _relation_resolver(field):
+    def resolve(root, info, **kwargs):
+        return get_loaders(info).loader(type(root), field).load(root)
+    resolve._bypass_get_queryset = True
+    return resolve
+
+
+class BatchedDjangoObjectType(DjangoObjectType):
+    """DjangoObjectType whose FK, reverse FK and M2M fields are resolved through the request's loaders."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def __init_subclass_with_meta__(cls, model=None, **options):
+        super().__init_subclass_with_meta__(model=model, **options)
+        relations = relation_fields(model)
+        for name in cls._meta.fields:
+            if name in relations and not hasattr(cls, f'resolve_{name}'):
+                setattr(cls, f'resolve_{name}', staticmethod(_relation_resolver(relations[name])))
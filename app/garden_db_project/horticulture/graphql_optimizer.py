@@ -0,0 +1,126 @@
+"""
+Selection set driven querysets for GraphQL resolvers
+
+optimize() reads the fields a query selects below a resolver and shapes its
+queryset to match, so a row is read once, with only the columns asked for:
+
+- columns become only(), keeping wide rows like Plant (JSON fields, long
+  descriptions) down to what the client renders
+- forward FKs become select_related(), with only() of their own columns
+- reverse FKs and M2Ms become prefetch_related() of a Prefetch whose
+  queryset is optimized the same way, recursively
+
+Relations the optimizer prefetches are already fetched when the loaders of
+graphql_loaders reach them, so they cost no further query. When a selection
+includes a field that is not a column (a field computed by its type), the
+type may read any column, so its rows are loaded whole.
+"""
+
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode, SelectionSetNode
+
+from .graphql_loaders import relation_fields
+
+
+def _selections(selection_set, info):
+    """Yields the field nodes of a selection set, with fragments expanded."""
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            yield selection
+        elif isinstance(selection, FragmentSpreadNode):
+            yield from _selections(info.fragments[selection.name.value].selection_set, info)
+        elif isinstance(selection, InlineFragmentNode):
+            yield from _selections(selection.selection_set, info)
+
+
+def _merged_fields(selection_set, info):
+    """
+    Returns field name -> selection set of the fields of a selection set.
+    A field selected more than once, under aliases or through fragments,
+    gets the union of its selections, so it is planned as a single lookup.
+    """
+    fields = {}
+    for node in _selections(selection_set, info):
+        name = to_snake_case(node.name.value)
+        previous = fields.get(name)
+        if previous is not None and node.selection_set is not None:
+            fields[name] = SelectionSetNode(selections=previous.selections + node.selection_set.selections)
+        elif previous is None:
+            fields[name] = node.selection_set
+    return fields
+
+
+def _plan(model, selection_set, info, prefix=''):
+    """
+    Returns the only(), select_related() and prefetch_related() arguments
+    for a selection on a model; only is None if the rows must be loaded whole.
+    """
+    columns = {field.name for field in model._meta.concrete_fields}
+    relations = relation_fields(model)
+    only, select_related, prefetch_related = [], [], []
+    whole = False
+
+    for name, field_selection in _merged_fields(selection_set, info).items():
+        if name.startswith('__'):
+            continue
+        field = relations.get(name)
+        if field is None:
+            if name in columns:
+                only.append(prefix + name)
+            else:
+                whole = True
+        elif field.many_to_one or field.one_to_one:
+            select_related.append(prefix + name)
+            if field.concrete:
+                only.append(prefix + name)
+            related_only, related_select, related_prefetch = _plan(
+                field.related_model, field_selection, info, f'{prefix}{name}__'
+            )
+            # A related model left out of only() is loaded whole
+            only.extend(related_only or ())
+            select_related.extend(related_select)
+            prefetch_related.extend(related_prefetch)
+        else:
+            # The rows of a reverse FK need their FK to be matched to their parents
+            required = [field.field.name] if field.one_to_many else []
+            queryset = optimize(field.related_model._default_manager.all(), info, field_selection, required)
+            prefetch_related.append(Prefetch(prefix + name, queryset=queryset))
+
+    return (None if whole else only), select_related, prefetch_related
+
+
+def optimize(queryset, info, selection_set=None, required=()):
+    """
+    Returns a queryset loading what a GraphQL selection reads.
+
+    Args:
+        queryset (QuerySet): Rows returned by the resolver
+        info (ResolveInfo): Resolve info of the resolver
+        selection_set (SelectionSetNode): Selection on the rows; defaults
+            to that of the field being resolved
+        required (iterable): Columns to load whether selected or not
+    """
+    if selection_set is None:
+        selection_set = info.field_nodes[0].selection_set
+    only, select_related, prefetch_related = _plan(queryset.model, selection_set, info)
+    if only is not None:
+        queryset = queryset.only(*only, *required)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+def connection_nodes(info):
+    """Returns the selection on the nodes of the connection being resolved, from all its edges { node }."""
+    selections = []
+    for field_node in info.field_nodes:
+        for edges in _selections(field_node.selection_set, info):
+            if edges.name.value != 'edges':
+                continue
+            for node in _selections(edges.selection_set, info):
+                if node.name.value == 'node':
+                    selections.extend(node.selection_set.selections)
+    return SelectionSetNode(selections=tuple(selections))
@@ -0,0 +1,152 @@
+"""
+GraphQL endpoint
+
+GardenGraphQLView is graphene-django's GraphQLView with the depth and cost
+limits of graphql_limits: a query is parsed, validated against the GraphQL
+rules and then against the limits, and only executed if it passes all of
+them. The cost of the query is reported in the extensions of the response,
+along with the largest cost allowed, so clients can see how close they are.
+
+Queries may be sent as persisted queries, and their parsed documents are
+cached (see graphql_documents). Anonymous GETs of persisted queries that
+succeed are marked cacheable for GRAPHQL_GET_CACHE_SECONDS, so a CDN can
+answer repeated reads.
+"""
+
+import json
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from graphene.validation import depth_limit_validator
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, get_operation_ast, validate
+from graphql.error import GraphQLError
+from graphql.execution import execute_sync
+
+from .graphql_documents import parse_and_validate, persist_query, persisted_query
+from .graphql_limits import GRAPHQL_MAX_DEPTH, GRAPHQL_MAX_QUERY_COST, cost_limit_validator
+
+# Seconds shared caches may keep the response to an anonymous GET of a persisted query
+GRAPHQL_GET_CACHE_SECONDS = 60
+
+
+class GardenGraphQLView(GraphQLView):
+    """
+    GraphQLView rejecting queries over the depth and cost limits before
+    executing them, with persisted queries and cached parsed documents.
+    """
+
+    # Cost of the operation of the request, once validated
+    query_cost = None
+    # Whether shared caches may keep the response
+    cacheable = False
+
+    def get_validation_rules(self, operation_name):
+        def record_cost(costs):
+            if operation_name in costs:
+                self.query_cost = costs[operation_name]
+            elif len(costs) == 1:
+                self.query_cost, = costs.values()
+
+        return (
+            depth_limit_validator(getattr(settings, 'GRAPHQL_MAX_DEPTH', GRAPHQL_MAX_DEPTH)),
+            cost_limit_validator(getattr(settings, 'GRAPHQL_MAX_QUERY_COST', GRAPHQL_MAX_QUERY_COST), record_cost),
+        )
+
+    @staticmethod
+    def get_extensions(request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        return extensions
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        sent = query is not None
+        try:
+            query, digest = persisted_query(self.get_extensions(request, data), query)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+        document, errors = parse_and_validate(schema, query)
+        if document is None:
+            return ExecutionResult(errors=list(errors))
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if request.method.lower() == "get" and operation_ast and operation_ast.operation != OperationType.QUERY:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseNotAllowed(
+                ["POST"], f"Can only perform a {operation_ast.operation.value} operation from a POST request."
+            ))
+
+        # The limits walk the document, so it has to be valid GraphQL first
+        errors = list(errors) or validate(schema, document, self.get_validation_rules(operation_name))
+        if errors:
+            return ExecutionResult(errors=errors)
+        if digest is not None and sent:
+            persist_query(digest, query)
+
+        options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+            "execution_context_class": self.execution_context_class,
+        }
+        try:
+            if (
+                operation_ast
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute_sync(schema, document, **options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+            result = execute_sync(schema, document, **options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        # A persisted query names its document in the URL of a GET, so the
+        # response can be shared, unless it depends on the user
+        self.cacheable = (
+            digest is not None
+            and request.method.lower() == "get"
+            and not result.errors
+            and not request.user.is_authenticated
+        )
+        return result
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if self.cacheable and response.status_code == 200:
+            patch_cache_control(response, public=True, max_age=getattr(settings, 'GRAPHQL_GET_CACHE_SECONDS', GRAPHQL_GET_CACHE_SECONDS))
+            # The same URL shows GraphiQL to browsers
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+    def json_encode(self, request, d, pretty=False):
+        if self.query_cost is not None:
+            cost = {
+                'requested': self.query_cost,
+                'maximum': getattr(settings, 'GRAPHQL_MAX_QUERY_COST', GRAPHQL_MAX_QUERY_COST),
+            }
+            d = {**d, 'extensions': {**d.get('extensions', {}), 'cost': cost}}
+        return super().json_encode(request, d, pretty)
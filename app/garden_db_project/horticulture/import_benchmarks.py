@@ -0,0 +1,263 @@
+"""
+Import benchmark suite
+
+Runs a synthetic comprehensive dataset (see benchmark_data) through every
+import entry point and measures wall time, query count and peak resident set
+size of each run:
+
+- handler: BulkImportHandler in batched mode
+- task: tasks.process_bulk_import, as run for synchronous API imports
+- command: the import_json_data management command on a directory
+- api: the JSON BulkImportView behind /api/v1/imports/
+- upload: the NewBulkImportView upload form, which streams the file
+
+Every run happens in a transaction that is rolled back, so the suite can be
+pointed at a database with data in it. Runs are isolated in a forked process
+where possible, so the peak RSS of one run does not hide the next one.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import RequestFactory
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .bulk_import_handler import BulkImportHandler
+
+# Relative increase over the baseline reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+# Measurements compared against a baseline
+COMPARED_METRICS = ('wall_time_s', 'queries', 'peak_rss_kb')
+
+
+class _Rollback(Exception):
+    """Raised to roll back a benchmark run."""
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _benchmark_user():
+    return get_user_model().objects.create_user(
+        username='import-benchmark', email='import-benchmark@example.com', password='benchmark', is_staff=True
+    )
+
+
+def _run_handler(payload, workdir):
+    result = BulkImportHandler(update_existing=True, batch_size=BulkImportHandler.DEFAULT_BATCH_SIZE).process_json_file(
+        io.BytesIO(payload), 'comprehensive'
+    )
+    return len(result['errors'])
+
+
+def _run_task(payload, workdir):
+    from .tasks import process_bulk_import
+    result = process_bulk_import('plant', [json.loads(payload)])
+    return len(result.get('errors', [])) if not result['success'] else 0
+
+
+def _run_command(payload, workdir):
+    directory = os.path.join(workdir, 'import')
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'comprehensive.json'), 'wb') as f:
+        f.write(payload)
+    call_command('import_json_data', directory=directory, stdout=io.StringIO(), stderr=io.StringIO())
+    return 0
+
+
+def _run_api(payload, workdir):
+    from .views import BulkImportView
+    body = b'{"entity_type": "plant", "data": [' + payload + b']}'
+    request = APIRequestFactory().post('/api/v1/imports/', body, content_type='application/json')
+    force_authenticate(request, user=_benchmark_user())
+    response = BulkImportView.as_view()(request)
+    return 0 if response.status_code < 400 else len(response.data.get('errors', [])) or 1
+
+
+def _run_upload(payload, workdir):
+    from .new_bulk_import_view import NewBulkImportView
+    request = RequestFactory().post('/bulk-import/', {
+        'entity_type': 'comprehensive',
+        'update_existing': 'on',
+        'json_file': SimpleUploadedFile('comprehensive.json', payload, content_type='application/json'),
+    })
+    request.user = _benchmark_user()
+    response = NewBulkImportView.as_view()(request)
+    return 0 if response.status_code < 400 else 1
+
+
+# Import entry points by the names used on the command line and in results
+IMPORT_PATHS = {
+    'handler': _run_handler,
+    'task': _run_task,
+    'command': _run_command,
+    'api': _run_api,
+    'upload': _run_upload,
+}
+
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(path, payload):
+    """
+    Runs one import path on a JSON encoded dataset in the current process and rolls it back.
+
+    Returns:
+        dict: wall_time_s, queries, start_rss_kb, peak_rss_kb and errors of the run
+    """
+    counter = QueryCounter()
+    workdir = tempfile.mkdtemp(prefix='import-benchmark-')
+    start_rss = _peak_rss_kb()
+    try:
+        with transaction.atomic():
+            start = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                errors = IMPORT_PATHS[path](payload, workdir)
+            elapsed = time.perf_counter() - start
+            raise _Rollback
+    except _Rollback:
+        pass
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'wall_time_s': round(elapsed, 4),
+        'queries': counter.count,
+        'start_rss_kb': start_rss,
+        'peak_rss_kb': _peak_rss_kb(),
+        'errors': errors,
+    }
+
+
+def _measure_in_child(path, payload, sender):
+    try:
+        sender.send(measure(path, payload))
+    except Exception:
+        sender.send({'exception': traceback.format_exc()})
+    finally:
+        connections.close_all()
+        sender.close()
+
+
+def can_isolate():
+    """Whether runs can be isolated in forked processes on this platform."""
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def measure_isolated(path, payload):
+    """
+    Like measure(), but in a forked process so peak RSS only covers this run.
+    The child inherits the payload instead of receiving a copy.
+
+    Raises:
+        RuntimeError: If the run failed in the child process
+    """
+    # Connections must not be shared with the child
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_in_child, args=(path, payload, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {'exception': f'benchmark process exited with code {process.exitcode}'}
+    process.join()
+    if 'exception' in result:
+        raise RuntimeError(f"Benchmark of the {path} import failed:\n{result['exception']}")
+    return result
+
+
+def dataset_size(dataset):
+    """Returns the number of records of a comprehensive dataset."""
+    return sum(len(items) for items in dataset.values() if isinstance(items, list))
+
+
+def run_benchmarks(datasets, paths, isolate=True, on_result=None):
+    """
+    Measures each import path on each dataset.
+
+    Args:
+        datasets (iterable): (scale name, comprehensive dataset) pairs; a
+            generator keeps only one dataset in memory at a time
+        paths (list): Names from IMPORT_PATHS
+        isolate (bool): Run every measurement in a forked process
+        on_result (callable): Called with each result as it is measured
+
+    Returns:
+        list: One dict per (scale, path) run
+    """
+    results = []
+    for scale, dataset in datasets:
+        payload = json.dumps(dataset).encode('utf-8')
+        records = dataset_size(dataset)
+        for path in paths:
+            measured = measure_isolated(path, payload) if isolate else measure(path, payload)
+            result = {
+                'path': path,
+                'scale': scale,
+                'records': records,
+                **measured,
+                'records_per_s': round(records / measured['wall_time_s'], 1) if measured['wall_time_s'] else None,
+            }
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def compare_results(baseline, results, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compares results with the results of an earlier report.
+
+    Runs are matched by database vendor, path and scale. A metric regressed
+    if it grew by more than threshold (a fraction) over the baseline.
+
+    Returns:
+        list: One dict per matched run with the ratio of each metric and the
+        names of the regressed metrics
+    """
+    if baseline.get('metadata', {}).get('vendor') != results['metadata'].get('vendor'):
+        return []
+    previous = {(result['path'], result['scale']): result for result in baseline.get('results', [])}
+    comparisons = []
+    for result in results['results']:
+        before = previous.get((result['path'], result['scale']))
+        if before is None:
+            continue
+        ratios = {
+            metric: round(result[metric] / before[metric], 3)
+            for metric in COMPARED_METRICS if before.get(metric)
+        }
+        comparisons.append({
+            'path': result['path'],
+            'scale': result['scale'],
+            'ratios': ratios,
+            'regressions': [metric for metric, ratio in ratios.items() if ratio > 1 + threshold],
+        })
+    return comparisons
@@ -0,0 +1,218 @@
+"""
+Staging and progress reporting of bulk imports for the chunked Celery pipeline
+
+Large imports are not sent through the broker. The payload is split into
+chunks that are written to the default storage, one ImportChunk checkpoint row
+per file, and the Celery tasks in tasks.py only pass job and chunk ids around.
+"""
+
+import json
+import logging
+import time
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ImportJob, ImportChunk
+
+logger = logging.getLogger(__name__)
+
+# Storage directory staged chunk files are written to
+STAGING_DIR = 'bulk_imports'
+
+# Default number of records per chunk, overridable with BULK_IMPORT_CHUNK_SIZE
+DEFAULT_CHUNK_SIZE = 500
+
+# Sections of a complex plant import and the phase they run in. Pests and
+# diseases need the plants to exist, companionships come last like in
+# process_bulk_import.
+COMPLEX_IMPORT_PHASES = (
+    ('plants', 0),
+    ('pests', 1),
+    ('diseases', 1),
+    ('companion_relationships', 2),
+)
+
+# Entity type reported in progress for each section of a complex import
+SECTION_ENTITIES = {
+    'plants': 'plant',
+    'pests': 'pest',
+    'diseases': 'disease',
+    'companion_relationships': 'companionship',
+}
+
+
+def build_progress(total, processed, entities, elapsed):
+    """
+    Builds the progress state reported for running imports.
+
+    Args:
+        total (int): Number of records in the import
+        processed (int): Number of records processed so far
+        entities (dict): entity type -> {'created', 'updated', 'failed'} counts
+        elapsed (float): Seconds since the import started
+
+    Returns:
+        dict: Counters plus throughput in records/s and the ETA in seconds
+    """
+    throughput = processed / elapsed if elapsed > 0 else 0.0
+    remaining = max(total - processed, 0)
+    eta = remaining / throughput if throughput else None
+    return {
+        'records_total': total,
+        'records_processed': processed,
+        'percent': round(100.0 * processed / total, 1) if total else 100.0,
+        'entities': entities,
+        'throughput': round(throughput, 2),
+        'elapsed_seconds': round(elapsed, 1),
+        'eta_seconds': round(eta, 1) if eta is not None else None,
+    }
+
+
+class ImportProgress:
+    """
+    Counts processed records and their outcome per entity type.
+
+    If a report callback is given it receives build_progress() snapshots, at
+    most once every interval seconds while records are being processed.
+    """
+
+    OUTCOMES = ('created', 'updated', 'failed')
+
+    def __init__(self, total=0, report=None, interval=1.0):
+        self.total = total
+        self.processed = 0
+        self.entities = {}
+        self.report = report
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last_report = None
+
+    def record(self, entity, outcome):
+        """Counts one record of entity with the given outcome."""
+        counts = self.entities.setdefault(entity, dict.fromkeys(self.OUTCOMES, 0))
+        counts[outcome] += 1
+
+    def advance(self, count=1):
+        """Marks records as processed and reports if the interval has passed."""
+        self.processed += count
+        if self.report and (self.last_report is None or time.monotonic() - self.last_report >= self.interval):
+            self.last_report = time.monotonic()
+            self.report(self.as_dict())
+
+    def as_dict(self):
+        return build_progress(self.total, self.processed, self.entities, time.monotonic() - self.started)
+
+
+def job_progress(job):
+    """
+    Builds the progress state of a staged ImportJob from its chunk checkpoints.
+    Records of failed chunks were rolled back and are counted as failed.
+    """
+    processed = 0
+    entities = {}
+    for chunk in job.chunks.exclude(status='pending').only('section', 'status', 'record_count', 'result'):
+        processed += chunk.record_count
+        if chunk.status == 'failed':
+            entity = SECTION_ENTITIES.get(chunk.section, job.entity_type)
+            chunk_entities = {entity: {'failed': chunk.record_count}}
+        else:
+            chunk_entities = chunk.result.get('entities', {})
+        for entity, counts in chunk_entities.items():
+            totals = entities.setdefault(entity, dict.fromkeys(ImportProgress.OUTCOMES, 0))
+            for outcome, value in counts.items():
+                totals[outcome] += value
+
+    if job.started_at is None:
+        elapsed = 0.0
+    else:
+        finished = job.updated_at if job.status in ('completed', 'failed') else timezone.now()
+        elapsed = (finished - job.started_at).total_seconds()
+    return build_progress(job.total_records, processed, entities, elapsed)
+
+
+def is_complex_plant_import(entity_type, data_list):
+    """Checks if data_list looks like the complex structure (has 'plants' key)."""
+    return (
+        entity_type == 'plant' and
+        isinstance(data_list, list) and len(data_list) == 1 and
+        isinstance(data_list[0], dict) and
+        'plants' in data_list[0] # Key indicator
+    )
+
+
+def _import_sections(entity_type, data_list):
+    """Returns the (section, phase, records) of an import; a simple import is a single section."""
+    if is_complex_plant_import(entity_type, data_list):
+        return [(section, phase, data_list[0].get(section) or []) for section, phase in COMPLEX_IMPORT_PHASES]
+    return [('', 0, data_list)]
+
+
+def import_record_count(entity_type, data_list):
+    """Returns the number of records of an import, across the sections of a complex import."""
+    return sum(len(items) for _, _, items in _import_sections(entity_type, data_list))
+
+
+def stage_import_job(entity_type, data_list, user=None, task_id=None, chunk_size=None):
+    """
+    Writes the import payload to storage in chunks and records the job.
+
+    Args:
+        entity_type (str): Entity type as accepted by process_bulk_import
+        data_list (list): The records to import
+        user: Optional user starting the import
+        task_id (str): Optional id of the Celery task that will run the job
+        chunk_size (int): Records per chunk, defaults to BULK_IMPORT_CHUNK_SIZE
+
+    Returns:
+        ImportJob: The staged job with its pending chunks
+    """
+    chunk_size = chunk_size or getattr(settings, 'BULK_IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+    sections = _import_sections(entity_type, data_list)
+
+    with transaction.atomic():
+        job = ImportJob.objects.create(
+            user=user,
+            entity_type=entity_type,
+            task_id=task_id,
+            total_records=sum(len(items) for _, _, items in sections),
+        )
+        chunks = []
+        for section, phase, items in sections:
+            for start in range(0, len(items), chunk_size):
+                records = items[start:start + chunk_size]
+                index = len(chunks)
+                name = default_storage.save(
+                    f'{STAGING_DIR}/{job.pk}/chunk-{index:05d}.json',
+                    ContentFile(json.dumps(records).encode('utf-8'))
+                )
+                chunks.append(ImportChunk(
+                    job=job,
+                    index=index,
+                    phase=phase,
+                    section=section,
+                    start_index=start,
+                    record_count=len(records),
+                    payload=name,
+                ))
+        ImportChunk.objects.bulk_create(chunks)
+
+    logger.info(f"Staged import job {job.pk}: {job.total_records} {entity_type} records in {len(chunks)} chunks")
+    return job
+
+
+def load_chunk_records(chunk):
+    """Reads the staged records of a chunk."""
+    with default_storage.open(chunk.payload, 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def delete_chunk_payload(chunk):
+    """Removes the staged file of a chunk that no longer needs to be replayed."""
+    try:
+        default_storage.delete(chunk.payload)
+    except Exception as e:
+        logger.warning(f"Could not delete staged import chunk {chunk.payload}: {e}")
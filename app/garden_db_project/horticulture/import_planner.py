@@ -0,0 +1,85 @@
+"""
+Dependency-aware planning of comprehensive imports
+
+A comprehensive import document holds several entity types that reference each
+other: pests and diseases name the plants they affect, companion relationships
+name two plants and the interactions between them. Instead of resolving those
+references record by record, the importers scan the document once with
+plan_import(). The plan lists the entity types in dependency order together
+with every key referenced per entity type, so each type can be loaded or
+created with a few set-based queries before the relationships are wired in a
+final pass.
+"""
+
+from graphlib import TopologicalSorter
+
+from .json_stream import StreamedSection
+
+# Entity types of a comprehensive import and the entity types they reference.
+# Interactions have no section of their own, they are referenced from the
+# companion relationships.
+IMPORT_DEPENDENCIES = {
+    'plants': (),
+    'pests': ('plants',),
+    'diseases': ('plants',),
+    'interactions': (),
+    'companion_relationships': ('plants', 'interactions'),
+}
+
+
+class ImportPlan:
+    """
+    Result of scanning a comprehensive import document.
+
+    Attributes:
+        steps (list): Entity types to process, every type after the types it references
+        references (dict): entity type -> {referenced key: detail of its first reference}
+    """
+
+    def __init__(self, steps, references):
+        self.steps = steps
+        self.references = references
+
+    def referenced(self, entity_type):
+        """Returns the referenced keys of entity_type mapped to their details."""
+        return self.references.get(entity_type, {})
+
+
+def import_order(entity_types, dependencies=IMPORT_DEPENDENCIES):
+    """
+    Orders entity types so that each comes after the types it depends on.
+    Types without an entry in dependencies are left out.
+    """
+    wanted = set(entity_types)
+    return [entity_type for entity_type in TopologicalSorter(dependencies).static_order() if entity_type in wanted]
+
+
+def plan_import(data, reference_extractors, dependencies=IMPORT_DEPENDENCIES):
+    """
+    Scans a comprehensive import document for the keys its records reference.
+
+    Each section with an extractor is read once, so streamed sections are not
+    held in memory.
+
+    Args:
+        data (dict): Section name -> list or StreamedSection of records
+        reference_extractors (dict): Section name -> function returning the
+            (entity type, key, detail) references of one record
+        dependencies (dict): Entity type -> entity types it references
+
+    Returns:
+        ImportPlan: The steps to run and the referenced keys per entity type
+    """
+    references = {}
+    for section, extract in reference_extractors.items():
+        items = data.get(section)
+        if not isinstance(items, (list, StreamedSection)):
+            continue
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            for entity_type, key, detail in extract(item):
+                references.setdefault(entity_type, {}).setdefault(key, detail)
+
+    steps = import_order(set(data) | set(references), dependencies)
+    return ImportPlan(steps, references)
@@ -0,0 +1,274 @@
+"""
+Compiled validators for simple list imports
+
+The serializer path of process_bulk_import builds a ModelSerializer for every
+record and saves it, running field validation plus one query per unique field
+and related object for each record. A CompiledValidator is built once per model
+from its field metadata and checks types, choices, lengths and required fields
+in memory. Related objects and uniqueness are checked for a whole batch with
+one query per field, so valid records can be written with bulk_create.
+"""
+
+import functools
+from django.core import validators
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+# Conversion error messages of the serializer fields ModelSerializer maps model fields to
+INVALID_MESSAGES = (
+    (models.BooleanField, 'Must be a valid boolean.'),
+    (models.IntegerField, 'A valid integer is required.'),
+    (models.FloatField, 'A valid number is required.'),
+    (models.DecimalField, 'A valid number is required.'),
+)
+
+
+class CompiledField:
+    """
+    Conversion and checks for one writable model field, following the rules
+    ModelSerializer derives from the same field.
+    """
+
+    def __init__(self, field, required):
+        self.field = field
+        self.name = field.name
+        self.attname = field.attname
+        self.required = required
+        self.many = field.many_to_many
+        self.related_model = field.related_model if field.is_relation else None
+        self.is_text = isinstance(field, (models.CharField, models.TextField))
+        self.is_decimal = isinstance(field, models.DecimalField)
+        self.choices = {str(key): key for key, _ in field.flatchoices} if field.choices else None
+        # Report conversion errors with the messages of the matching serializer field
+        self.invalid_message = next(
+            (message for field_class, message in INVALID_MESSAGES if isinstance(field, field_class)), None
+        )
+
+    def clean(self, value):
+        """
+        Converts a JSON value to the value stored on the model.
+
+        Raises:
+            ValidationError: With the messages to report for this field
+        """
+        if value is None:
+            if self.field.null:
+                return None
+            raise ValidationError('This field may not be null.')
+
+        if self.related_model is not None:
+            if not self.many:
+                return self._related_pk(value)
+            if not isinstance(value, list):
+                raise ValidationError(f'Expected a list of items but got type "{type(value).__name__}".')
+            if not value and not self.field.blank:
+                raise ValidationError('This list may not be empty.')
+            return [self._related_pk(item) for item in value]
+
+        if self.is_text:
+            if isinstance(value, (bool, dict, list)):
+                raise ValidationError('Not a valid string.')
+            value = str(value).strip()
+            if value == '':
+                if self.field.blank:
+                    return value
+                raise ValidationError('This field may not be blank.')
+            if self.field.max_length and len(value) > self.field.max_length:
+                raise ValidationError(f'Ensure this field has no more than {self.field.max_length} characters.')
+
+        if self.choices is not None:
+            if str(value) not in self.choices:
+                raise ValidationError(f'"{value}" is not a valid choice.')
+            return self.choices[str(value)]
+
+        if self.is_decimal and isinstance(value, float):
+            # Like the serializer, convert floats by their repr and not their binary value
+            value = str(value)
+        try:
+            value = self.field.to_python(value)
+        except ValidationError:
+            if self.invalid_message is None:
+                raise
+            raise ValidationError(self.invalid_message)
+        if value not in validators.EMPTY_VALUES:
+            self.field.run_validators(value)
+        return value
+
+    def _related_pk(self, value):
+        if isinstance(value, (bool, dict, list)):
+            raise ValidationError(f'Incorrect type. Expected pk value, received {type(value).__name__}.')
+        try:
+            return self.related_model._meta.pk.to_python(value)
+        except ValidationError:
+            raise ValidationError(f'Incorrect type. Expected pk value, received {type(value).__name__}.')
+
+
+class CompiledValidator:
+    """
+    Validates batches of import records for one model without serializers.
+
+    Use compiled_validator(model) to get the cached instance of a model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.unique_together = [tuple(names) for names in model._meta.unique_together]
+        together_names = {name for names in self.unique_together for name in names}
+
+        self.fields = []
+        for field in model._meta.get_fields():
+            if field.auto_created and not field.concrete:
+                continue  # Reverse relations
+            if field.primary_key or not getattr(field, 'editable', False):
+                continue  # Read-only in the serializer, e.g. auto_now timestamps
+            if field.many_to_many and not field.remote_field.through._meta.auto_created:
+                continue  # Relations with an explicit through model are read-only too
+            required = not (field.has_default() or field.blank or field.null)
+            if field.name in together_names and not field.has_default():
+                required = True
+            self.fields.append(CompiledField(field, required))
+
+        self.unique_fields = [
+            compiled for compiled in self.fields
+            if getattr(compiled.field, 'unique', False) and not compiled.many
+        ]
+
+    def validate(self, records):
+        """
+        Validates a batch of records.
+
+        Args:
+            records (list): The raw JSON records
+
+        Returns:
+            Tuple: (cleaned, errors) where cleaned holds a dict of field name ->
+            value for each valid record (None for invalid ones) and errors maps
+            the position of each invalid record to its field errors
+        """
+        cleaned = []
+        errors = {}
+        for position, record in enumerate(records):
+            values, record_errors = self._clean_record(record)
+            cleaned.append(values)
+            if record_errors:
+                errors[position] = record_errors
+
+        self._check_related_objects(cleaned, errors)
+        self._check_unique_fields(cleaned, errors)
+        self._check_unique_together(cleaned, errors)
+        return [None if position in errors else values for position, values in enumerate(cleaned)], errors
+
+    def build(self, values):
+        """
+        Returns an unsaved model instance for cleaned values and the related
+        pks of its many-to-many fields.
+        """
+        instance = self.model()
+        many = {}
+        for compiled in self.fields:
+            if compiled.name not in values:
+                continue
+            if compiled.many:
+                many[compiled.field] = values[compiled.name]
+            else:
+                setattr(instance, compiled.attname, values[compiled.name])
+        return instance, many
+
+    def _clean_record(self, record):
+        if not isinstance(record, dict):
+            return {}, {'non_field_errors': ['Invalid data. Expected a dictionary, but got {}.'.format(type(record).__name__)]}
+
+        values = {}
+        record_errors = {}
+        for compiled in self.fields:
+            if compiled.name not in record:
+                if compiled.required:
+                    record_errors[compiled.name] = ['This field is required.']
+                continue
+            try:
+                values[compiled.name] = compiled.clean(record[compiled.name])
+            except ValidationError as e:
+                record_errors[compiled.name] = e.messages
+        return values, record_errors
+
+    def _check_related_objects(self, cleaned, errors):
+        """
+        Checks that referenced objects exist, with one query per relation.
+        Like the serializer's related fields, this runs for every value that
+        could be converted, even if other fields of the record are invalid.
+        """
+        for compiled in self.fields:
+            if compiled.related_model is None:
+                continue
+            referenced = {
+                pk for values in cleaned if values.get(compiled.name) is not None
+                for pk in (values[compiled.name] if compiled.many else [values[compiled.name]])
+            }
+            if not referenced:
+                continue
+            existing = set(compiled.related_model._default_manager.filter(pk__in=referenced).values_list('pk', flat=True))
+            for position, values in enumerate(cleaned):
+                if values.get(compiled.name) is None:
+                    continue
+                pks = values[compiled.name] if compiled.many else [values[compiled.name]]
+                missing = [pk for pk in pks if pk not in existing]
+                if missing:
+                    errors.setdefault(position, {})[compiled.name] = [f'Invalid pk "{missing[0]}" - object does not exist.']
+
+    def _check_unique_fields(self, cleaned, errors):
+        """
+        Checks unique fields against the database with one query per field.
+        Within the batch the first record with a value wins, as it would be
+        saved before the later ones are validated.
+        """
+        for compiled in self.unique_fields:
+            values = {
+                values[compiled.name] for position, values in enumerate(cleaned)
+                if position not in errors and values.get(compiled.name) is not None
+            }
+            if not values:
+                continue
+            taken = set(self.model._default_manager.filter(**{f'{compiled.name}__in': values}).values_list(compiled.name, flat=True))
+            message = f'{self.model._meta.verbose_name} with this {compiled.field.verbose_name} already exists.'
+            for position, values in enumerate(cleaned):
+                value = values.get(compiled.name)
+                if position in errors or value is None:
+                    continue
+                if value in taken:
+                    errors[position] = {compiled.name: [message]}
+                else:
+                    taken.add(value)
+
+    def _check_unique_together(self, cleaned, errors):
+        """Checks unique_together sets, loading candidate rows with one query per set."""
+        for names in self.unique_together:
+            combinations = {}
+            for position, values in enumerate(cleaned):
+                if position in errors:
+                    continue
+                combination = tuple(
+                    values[name] if name in values else self.model._meta.get_field(name).get_default()
+                    for name in names
+                )
+                if None not in combination:
+                    combinations[position] = combination
+            if not combinations:
+                continue
+            taken = set(self.model._default_manager.filter(
+                **{f'{names[0]}__in': {combination[0] for combination in combinations.values()}}
+            ).values_list(*names))
+            message = f"The fields {', '.join(names)} must make a unique set."
+            for position, combination in combinations.items():
+                if position in errors:
+                    continue
+                if combination in taken:
+                    errors[position] = {'non_field_errors': [message]}
+                else:
+                    taken.add(combination)
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_validator(model):
+    """Returns the CompiledValidator of a model, built on first use."""
+    return CompiledValidator(model)
@@ -0,0 +1,253 @@
+"""
+Incremental JSON reader for Garden Database import files
+
+This module lets the bulk importers walk very large JSON documents without
+loading the whole file or the fully parsed tree into memory. Only the root
+array, or the arrays stored under the keys of a root object, are streamed;
+every element is decoded on its own with the standard library decoder.
+"""
+
+import codecs
+import json
+
+# Number of characters read from the file at a time
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Largest single JSON value we are willing to buffer before giving up
+MAX_VALUE_SIZE = 64 * 1024 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _Reader:
+    """
+    Buffered tokenizer over a file object.
+
+    Keeps only the unconsumed tail of the file in memory and decodes one value
+    at a time with ``json.JSONDecoder.raw_decode``.
+    """
+
+    def __init__(self, fileobj, chunk_size):
+        self._file = fileobj
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._started = False
+
+    def _fill(self):
+        """Read more data into the buffer. Returns False at end of file."""
+        if self._eof:
+            return False
+        # Grow reads with the pending value so large values don't parse quadratically
+        size = max(self._chunk_size, len(self._buffer) - self._pos)
+        chunk = self._file.read(size)
+        if isinstance(chunk, bytes):
+            chunk = self._utf8.decode(chunk, final=not chunk)
+        if not chunk:
+            self._eof = True
+        if not self._started and chunk:
+            chunk = chunk.lstrip('\ufeff')
+            self._started = True
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return not self._eof
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self):
+        """Skip whitespace and return the next character, or '' at end of file."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def consume(self, char):
+        """Consume the next non-whitespace character, which must be char."""
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}' delimiter")
+        self._pos += 1
+
+    def decode_value(self):
+        """Decode and return the next complete JSON value."""
+        if not self.peek():
+            raise self._error('Expecting value')
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if len(self._buffer) - self._pos > MAX_VALUE_SIZE or not self._fill():
+                    raise
+                continue
+            # A value ending exactly at the buffer end may be a truncated number
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self):
+        """Yield the elements of the array starting at the current position."""
+        self.consume('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            char = self.peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                self._pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+    def iter_object(self):
+        """
+        Yield the keys of the object starting at the current position.
+
+        After each key the reader is positioned at the value, which the caller
+        must consume (with decode_value, iter_array or skip_value) before
+        asking for the next key.
+        """
+        self.consume('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error('Expecting property name enclosed in double quotes')
+            key = self.decode_value()
+            self.consume(':')
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                self._pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+    def skip_value(self):
+        """Consume the next value without keeping nested containers in memory."""
+        char = self.peek()
+        if char == '[':
+            for _ in self.iter_array():
+                pass
+        elif char == '{':
+            for _ in self.iter_object():
+                self.skip_value()
+        else:
+            self.decode_value()
+
+    def expect_end(self):
+        """Raise if anything but whitespace follows the root value."""
+        if self.peek():
+            raise self._error('Extra data')
+
+
+class StreamedSection:
+    """
+    Re-iterable view of a JSON array inside an import file.
+
+    Every iteration re-reads the file from the start, so only one element is
+    held in memory at a time.
+    """
+
+    def __init__(self, stream, key=None):
+        self._stream = stream
+        self.key = key
+
+    def __iter__(self):
+        return self._stream._iter_section(self.key)
+
+
+class JSONStream:
+    """
+    Incremental reader for a seekable JSON file.
+
+    ``root_type`` reports whether the document is a 'list' or a 'dict' (or
+    'other'), ``items()`` streams the root array and ``sections()`` maps the
+    keys of a root object to StreamedSection objects for array values and to
+    the decoded value for everything else.
+    """
+
+    def __init__(self, fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+        self._file = fileobj
+        self._chunk_size = chunk_size
+        self._root_type = None
+        self._sections = None
+
+    def _reader(self):
+        self._file.seek(0)
+        return _Reader(self._file, self._chunk_size)
+
+    @property
+    def root_type(self):
+        if self._root_type is None:
+            char = self._reader().peek()
+            if not char:
+                raise json.JSONDecodeError('Expecting value', '', 0)
+            self._root_type = {'[': 'list', '{': 'dict'}.get(char, 'other')
+        return self._root_type
+
+    def load(self):
+        """Decode the whole document, for roots that are a single small value."""
+        reader = self._reader()
+        value = reader.decode_value()
+        reader.expect_end()
+        return value
+
+    def items(self):
+        """Return a StreamedSection over the elements of the root array."""
+        return StreamedSection(self)
+
+    def sections(self):
+        """
+        Return the top-level members of the root object.
+
+        Array values are returned as StreamedSection objects; other values are
+        decoded. The file is scanned once and the result cached.
+        """
+        if self._sections is None:
+            reader = self._reader()
+            sections = {}
+            for key in reader.iter_object():
+                if reader.peek() == '[':
+                    reader.skip_value()
+                    sections[key] = StreamedSection(self, key)
+                else:
+                    sections[key] = reader.decode_value()
+            reader.expect_end()
+            self._sections = sections
+        return self._sections
+
+    def _iter_section(self, key):
+        reader = self._reader()
+        if key is None:
+            yield from reader.iter_array()
+            return
+        for current_key in reader.iter_object():
+            if current_key == key and reader.peek() == '[':
+                yield from reader.iter_array()
+                return
+            reader.skip_value()
+
+
+def iter_batches(items, size):
+    """
+    Group an iterable into lists of at most size items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
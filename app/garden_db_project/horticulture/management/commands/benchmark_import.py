@@ -0,0 +1,102 @@
+"""
+Management command to benchmark the BulkImportHandler import paths.
+
+Imports a synthetic comprehensive dataset once record by record and once in
+batched mode, reporting wall time and the number of queries per 1k records.
+The simple list import of tasks.process_bulk_import is compared the same way
+between the serializer path and the compiled validator fast path.
+Every run is rolled back, so the command can be pointed at a live database.
+"""
+
+import io
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from horticulture.benchmark_data import generate_dataset
+from horticulture.bulk_import_handler import BulkImportHandler
+from horticulture.import_benchmarks import QueryCounter
+from horticulture.import_jobs import ImportProgress
+from horticulture.tasks import _import_simple_items
+
+
+class _Rollback(Exception):
+    """Raised to roll back a benchmark run."""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark BulkImportHandler and the simple list import paths (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--records',
+            type=int,
+            default=1000,
+            help='Number of plants to generate (see horticulture.benchmark_data for the other sections)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BulkImportHandler.DEFAULT_BATCH_SIZE,
+            help='Chunk size for the batched mode',
+        )
+
+    def handle(self, *args, **options):
+        records = options['records']
+        batch_size = options['batch_size']
+        dataset = generate_dataset(records)
+        payload = json.dumps(dataset).encode('utf-8')
+
+        for label, handler_batch_size in (('per-record', None), ('batched', batch_size)):
+            result, elapsed, query_count = self._run(payload, handler_batch_size)
+            total = result['total'] or 1
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}: {result['total']} records in {elapsed:.2f}s, "
+                f"{query_count} queries ({query_count * 1000 / total:.1f} per 1k records), "
+                f"created={result['created']} updated={result['updated']} skipped={result['skipped']} "
+                f"errors={len(result['errors'])}"
+            ))
+
+        plants = dataset['plants']
+        throughputs = {}
+        for label, use_serializer in (('simple serializer', True), ('simple compiled', False)):
+            saved, errors, elapsed, query_count = self._run_simple(plants, use_serializer)
+            throughputs[label] = saved / elapsed if elapsed else 0.0
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}: {saved} records in {elapsed:.2f}s ({throughputs[label]:.0f} records/s), "
+                f"{query_count} queries ({query_count * 1000 / (len(plants) or 1):.1f} per 1k records), "
+                f"errors={errors}"
+            ))
+        if throughputs['simple serializer']:
+            speedup = throughputs['simple compiled'] / throughputs['simple serializer']
+            self.stdout.write(f"compiled validator throughput: {speedup:.1f}x the serializer path")
+
+    def _run(self, payload, batch_size):
+        handler = BulkImportHandler(update_existing=True, batch_size=batch_size)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                with connection.execute_wrapper(counter):
+                    result = handler.process_json_file(io.BytesIO(payload), 'comprehensive')
+                elapsed = time.perf_counter() - start
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result, elapsed, counter.count
+
+    def _run_simple(self, plants, use_serializer):
+        items = [dict(item) for item in plants]
+        errors = []
+        counter = QueryCounter()
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                with connection.execute_wrapper(counter):
+                    saved = _import_simple_items('plant', items, errors, [], progress=ImportProgress(), use_serializer=use_serializer)
+                elapsed = time.perf_counter() - start
+                raise _Rollback
+        except _Rollback:
+            pass
+        return saved, len(errors), elapsed, counter.count
@@ -0,0 +1,138 @@
+"""
+Management command running the import benchmark suite.
+
+Generates synthetic comprehensive datasets at the requested scales, runs them
+through every import path (see horticulture.import_benchmarks) and reports
+wall time, query count and peak RSS per run. Results can be written to a JSON
+file and compared with the file of an earlier commit. Every run is rolled back.
+
+The suite measures the configured default database. To compare backends, run
+it once against Postgres and once with SQLITE_PATH set, e.g.:
+
+    python manage.py benchmark_import_suite --scales 1k 10k --output pg.json
+    SQLITE_PATH=/tmp/bench.sqlite3 python manage.py migrate
+    SQLITE_PATH=/tmp/bench.sqlite3 python manage.py benchmark_import_suite --scales 1k 10k --output sqlite.json
+"""
+
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from horticulture.benchmark_data import SCALES, generate_dataset
+from horticulture.import_benchmarks import (
+    DEFAULT_REGRESSION_THRESHOLD, IMPORT_PATHS, can_isolate, compare_results, run_benchmarks
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every import path on synthetic datasets (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            nargs='+',
+            choices=list(SCALES),
+            default=['1k'],
+            help='Dataset sizes to run, by number of plants',
+        )
+        parser.add_argument(
+            '--paths',
+            nargs='+',
+            choices=list(IMPORT_PATHS),
+            default=list(IMPORT_PATHS),
+            help='Import paths to benchmark (default: all)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the dataset generator')
+        parser.add_argument('--output', type=str, help='Write the results to this JSON file')
+        parser.add_argument('--baseline', type=str, help='JSON results of an earlier run to compare with')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=DEFAULT_REGRESSION_THRESHOLD,
+            help='Relative increase over the baseline reported as a regression (default: 0.2)',
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error if a metric regressed against the baseline',
+        )
+        parser.add_argument(
+            '--no-isolate',
+            action='store_true',
+            help='Run in this process instead of a forked process per run (peak RSS then accumulates)',
+        )
+
+    def handle(self, *args, **options):
+        isolate = not options['no_isolate'] and can_isolate()
+        if not options['no_isolate'] and not isolate:
+            self.stdout.write(self.style.WARNING('Process isolation is not available, peak RSS accumulates across runs.'))
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline {options['baseline']}: {e}")
+
+        datasets = ((scale, generate_dataset(SCALES[scale], seed=options['seed'])) for scale in options['scales'])
+        report = {
+            'metadata': self._metadata(options['seed'], isolate),
+            'results': run_benchmarks(datasets, options['paths'], isolate=isolate, on_result=self._write_result),
+        }
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            self._compare(baseline, report, options['threshold'], options['fail_on_regression'])
+
+    def _write_result(self, result):
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['scale']:>5} {result['path']:<8} {result['records']} records in {result['wall_time_s']:.2f}s "
+            f"({result['records_per_s'] or 0:.0f} records/s), {result['queries']} queries, "
+            f"peak RSS {result['peak_rss_kb'] / 1024:.1f} MiB, errors={result['errors']}"
+        ))
+
+    def _compare(self, baseline, report, threshold, fail_on_regression):
+        comparisons = compare_results(baseline, report, threshold)
+        if not comparisons:
+            self.stdout.write(self.style.WARNING('No runs of the baseline match these results (same vendor, path and scale).'))
+            return
+        regressed = []
+        for comparison in comparisons:
+            ratios = ', '.join(f'{metric} x{ratio:.2f}' for metric, ratio in comparison['ratios'].items())
+            line = f"{comparison['scale']:>5} {comparison['path']:<8} {ratios}"
+            if comparison['regressions']:
+                regressed.append(comparison)
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSED: {', '.join(comparison['regressions'])}"))
+            else:
+                self.stdout.write(line)
+        if regressed and fail_on_regression:
+            raise CommandError(f'{len(regressed)} benchmark run(s) regressed by more than {threshold:.0%}.')
+
+    @staticmethod
+    def _metadata(seed, isolate):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created_at': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'seed': seed,
+            'isolated': isolate,
+        }
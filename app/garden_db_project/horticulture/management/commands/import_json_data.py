@@ -1,9 +1,14 @@
+import functools
+import io
 import os
 import json
 import re # Moved import here
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import django
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from django.db import IntegrityError, transaction, models
+from django.db import IntegrityError, connections, transaction, models
+from django.utils import timezone
 from django.db.models import Q # Added for OR query
 from django.core.exceptions import FieldDoesNotExist # Added for generic field handling
 
@@ -13,6 +18,10 @@ from horticulture.models import (
     Plant, PlantDisease, Pest, Disease, Seed, Region, SoilProfile, ProblemCategory,
     PlantPest, Companionship, CompanionPlantingInteraction # Added models for comprehensive import
 )
+from horticulture.import_planner import plan_import
+from horticulture.json_stream import JSONStream, StreamedSection, iter_batches
+from horticulture.signals import invalidate_derived_data
+from horticulture.plant_name_index import IMPORT_SIMILARITY_THRESHOLD, PlantNameIndex
 
 class Command(BaseCommand):
     help = 'Imports data from JSON files located in a specified directory into the database.'
@@ -31,12 +40,23 @@ class Command(BaseCommand):
     # Mapping for keys within a comprehensive JSON file
     COMPREHENSIVE_KEYS_MAPPING = {
         'plants': {'model': Plant, 'json_key': 'scientific_name', 'model_field': 'scientific_name'},
-        'diseases': {'model': Disease, 'json_key': 'Scientific Name (Pathogen)', 'model_field': 'scientific_name', 'link_func': '_link_disease_to_plants', 'link_key': 'affected_plants'},
-        'pests': {'model': Pest, 'json_key': 'scientific_name', 'model_field': 'scientific_name', 'link_func': '_link_pest_to_plants', 'link_key': 'affected_plants'}, # Assuming 'affected_plants' key for pests
-        'companion_relationships': {'model': Companionship, 'import_func': '_import_companionship'}, # Special handling
+        'diseases': {'model': Disease, 'json_key': 'Scientific Name (Pathogen)', 'model_field': 'scientific_name', 'link_model': PlantDisease, 'link_field': 'disease', 'link_key': 'affected_plants'},
+        'pests': {'model': Pest, 'json_key': 'scientific_name', 'model_field': 'scientific_name', 'link_model': PlantPest, 'link_field': 'pest', 'link_key': 'affected_plants'}, # Assuming 'affected_plants' key for pests
+        'companion_relationships': {'model': Companionship}, # Special handling, see _import_companionships_in_bulk
         # Add other types like fertilizers, amendments if they become part of comprehensive files
     }
 
+    # Records per set-based query in comprehensive imports
+    COMPREHENSIVE_BATCH_SIZE = 500
+    # Plant types matched per query; each type adds two OR'ed lookups
+    PLANT_TYPE_BATCH_SIZE = 100
+
+    # Single-type files that link to plants, imported after plant and comprehensive files
+    LINKING_PREFIXES = {'diseases'}
+
+    # Fuzzy index of the plant names, see _plant_name_index()
+    _plant_names = None
+
     def add_arguments(self, parser):
         # Group for directory-based import
         group_dir = parser.add_argument_group('Directory Import Options')
@@ -46,6 +66,12 @@ class Command(BaseCommand):
             # Removed default='jsons' to make it explicitly optional unless no other args given
             help='Directory containing the JSON files, relative to the project root. Use this OR --type/--path.',
         )
+        group_dir.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes importing single-type files in parallel. Comprehensive files are always imported one at a time.',
+        )
 
         # Group for single file import
         group_file = parser.add_argument_group('Single File Import Options')
@@ -118,52 +144,100 @@ class Command(BaseCommand):
 
             self.stdout.write(f"Starting import process from directory: {source_directory}")
 
-            for filename in os.listdir(source_directory):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(source_directory, filename)
-                    self.stdout.write(f"\nProcessing file: {filename}...")
-
-                    # Try comprehensive first, then fallback to prefix matching
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        if isinstance(data, dict) and any(key in data for key in self.COMPREHENSIVE_KEYS_MAPPING):
-                             self.stdout.write(self.style.NOTICE(f"Detected comprehensive structure in {filename} during directory scan."))
-                             self._import_comprehensive_data(data, filename)
-                             continue # Move to next file after comprehensive import
-                        else:
-                             # If not comprehensive, proceed to prefix matching
-                             self.stdout.write(self.style.NOTICE(f"File {filename} not comprehensive, attempting prefix match..."))
-                             pass # Fall through to prefix matching logic
-                    except json.JSONDecodeError as e:
-                        self.stdout.write(self.style.ERROR(f"Error parsing JSON in {filename}: {e}. Skipping file."))
-                        continue
-                    except Exception as e: # Catch other file reading errors
-                        self.stdout.write(self.style.ERROR(f"Error reading file {filename}: {e}. Skipping file."))
-                        continue
+            if options['workers'] > 1 and connections['default'].vendor == 'sqlite':
+                self.stdout.write(self.style.WARNING("SQLite does not support concurrent writers, importing with a single worker."))
+                options['workers'] = 1
 
-                    # --- Prefix Matching Logic (Fallback) ---
-                    matched = False
-                    for prefix, mapping in self.MODEL_MAPPING.items():
-                        # Ensure prefix matching is robust (e.g., 'pests_' vs 'pests_extra_')
-                        # Also allow exact match like 'pests.json'
-                        if filename.startswith(prefix + '_') or filename == prefix + '.json':
-                            model_class = mapping['model']
-                            json_key = mapping['json_key']
-                            model_field = mapping['model_field']
-                            # Call import_data with specific type info for single-type import
-                            self.import_data(file_path, model_class, json_key, model_field, filename, force_single_type=True)
-                            matched = True
-                            break # Stop checking prefixes once a match is found
-
-                    if not matched:
-                        self.stdout.write(self.style.WARNING(f"Skipped {filename}: Not comprehensive and no matching model prefix found."))
-                else:
-                     self.stdout.write(self.style.NOTICE(f"Skipped non-JSON file: {filename}"))
+            # Files are imported in stages so that files linking to plants run
+            # after the files that create them; each stage may use a process pool
+            for files, parallel in self._plan_directory_import(source_directory):
+                self._run_import_stage(files, options['workers'] if parallel else 1)
 
+        invalidate_derived_data()
         self.stdout.write(self.style.SUCCESS("\nImport process finished."))
 
 
+    def _plan_directory_import(self, source_directory):
+        """
+        Sorts the JSON files of a directory into import stages.
+
+        Returns a list of (files, parallel) stages, where files are
+        (file_path, filename, prefix) tuples and prefix is None for
+        comprehensive files. Independent single-type files come first,
+        comprehensive files (which link across entity types) run one by one
+        after them, and single-type files linking to plants come last.
+        """
+        independent, comprehensive, linking = [], [], []
+
+        for filename in sorted(os.listdir(source_directory)):
+            if not filename.endswith('.json'):
+                self.stdout.write(self.style.NOTICE(f"Skipped non-JSON file: {filename}"))
+                continue
+            file_path = os.path.join(source_directory, filename)
+
+            # Try comprehensive first, then fallback to prefix matching
+            try:
+                with open(file_path, 'rb') as f:
+                    stream = JSONStream(f)
+                    is_comprehensive = stream.root_type == 'dict' and any(key in stream.sections() for key in self.COMPREHENSIVE_KEYS_MAPPING)
+            except json.JSONDecodeError as e:
+                self.stdout.write(self.style.ERROR(f"Error parsing JSON in {filename}: {e}. Skipping file."))
+                continue
+            except Exception as e: # Catch other file reading errors
+                self.stdout.write(self.style.ERROR(f"Error reading file {filename}: {e}. Skipping file."))
+                continue
+
+            if is_comprehensive:
+                self.stdout.write(self.style.NOTICE(f"Detected comprehensive structure in {filename} during directory scan."))
+                comprehensive.append((file_path, filename, None))
+                continue
+
+            # --- Prefix Matching Logic (Fallback) ---
+            # Ensure prefix matching is robust (e.g., 'pests_' vs 'pests_extra_')
+            # Also allow exact match like 'pests.json'
+            prefix = next(
+                (prefix for prefix in self.MODEL_MAPPING if filename.startswith(prefix + '_') or filename == prefix + '.json'),
+                None
+            )
+            if prefix is None:
+                self.stdout.write(self.style.WARNING(f"Skipped {filename}: Not comprehensive and no matching model prefix found."))
+            elif prefix in self.LINKING_PREFIXES:
+                linking.append((file_path, filename, prefix))
+            else:
+                independent.append((file_path, filename, prefix))
+
+        return [(independent, True), (comprehensive, False), (linking, True)]
+
+    def _run_import_stage(self, files, workers):
+        """Imports the files of one stage, in a process pool if workers > 1."""
+        if workers <= 1 or len(files) <= 1:
+            for file_path, filename, prefix in files:
+                self._import_file(file_path, filename, prefix)
+            return
+
+        # Workers must not share the parent's connections; each opens its own
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_import_worker) as pool:
+            futures = {
+                pool.submit(_import_file_in_worker, file_path, filename, prefix): filename
+                for file_path, filename, prefix in files
+            }
+            for future in as_completed(futures):
+                try:
+                    self.stdout.write(future.result(), ending='')
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Worker failed importing {futures[future]}: {e}"))
+
+    def _import_file(self, file_path, filename, prefix):
+        """Imports one file, as single-type if a MODEL_MAPPING prefix is given."""
+        self.stdout.write(f"\nProcessing file: {filename}...")
+        if prefix is None:
+            self.import_data(file_path, None, None, None, filename)
+            return
+        mapping = self.MODEL_MAPPING[prefix]
+        # Call import_data with specific type info for single-type import
+        self.import_data(file_path, mapping['model'], mapping['json_key'], mapping['model_field'], filename, force_single_type=True)
+
     # Helper function to transform JSON keys (Correctly indented)
     def transform_json_key(self, json_key):
         # Basic transformation: lowercase, replace spaces with underscores
@@ -184,89 +258,100 @@ class Command(BaseCommand):
         Detects comprehensive structure unless force_single_type is True.
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            # The file stays open while importing: list sections are streamed from it
+            with open(file_path, 'rb') as f:
+                stream = JSONStream(f)
                 try:
-                    data = json.load(f)
+                    root_type = stream.root_type
+                    data = stream.sections() if root_type == 'dict' else None
                 except json.JSONDecodeError as e:
                     self.stdout.write(self.style.ERROR(f"Error parsing JSON in {filename}: {e}"))
                     return # Skip this file
 
-            # --- Structure Detection ---
-            is_comprehensive = False
-            if not force_single_type and isinstance(data, dict):
-                # Check if top-level keys match our comprehensive structure definition
-                comprehensive_keys_present = [key for key in self.COMPREHENSIVE_KEYS_MAPPING if key in data]
-                if comprehensive_keys_present:
-                    # Consider it comprehensive if at least one known section key is present
-                    is_comprehensive = True
-                    self.stdout.write(self.style.NOTICE(f"Detected comprehensive file structure in {filename}. Processing sections: {', '.join(comprehensive_keys_present)}"))
-                    self._import_comprehensive_data(data, filename)
-                    return # Exit after processing comprehensive data
-
-            # --- Fallback or Forced Single-Type Import Logic ---
-            if not is_comprehensive:
-                if not model_class or not json_key or not model_field:
-                     # This can happen if called from directory scan without a prefix match but file wasn't comprehensive
-                     self.stdout.write(self.style.WARNING(f"Skipping {filename}: Not comprehensive and no type info provided for single-type import."))
-                     return
-
-                self.stdout.write(self.style.NOTICE(f"Processing {filename} as single-type: {model_class.__name__}"))
-                imported_count = 0
-                failed_count = 0
-
-                items = []
-                # Determine the list of items based on expected structure for the model type
-                if model_class in [Pest, Disease, Seed]: # Types expecting a list within a dict
-                    if isinstance(data, dict):
-                        found_list = False
-                        for value in data.values():
-                            if isinstance(value, list):
-                                items = value
-                                found_list = True
-                                break
-                        if not found_list:
-                             self.stdout.write(self.style.ERROR(f"Skipped {filename}: Expected a list of items within the top-level JSON object for {model_class.__name__}, but none found."))
-                             return
-                    else:
-                        self.stdout.write(self.style.ERROR(f"Skipped {filename}: Expected a top-level JSON object for {model_class.__name__}, but found {type(data).__name__}."))
-                        return
-                else: # Types expecting a list directly, or a single object
-                    if isinstance(data, dict):
-                        items = [data] # Treat single object as a list with one item
-                    elif isinstance(data, list):
-                        items = data
-                    else:
-                        self.stdout.write(self.style.ERROR(f"Skipped {filename}: JSON root must be an object or a list of objects for {model_class.__name__}."))
-                        return
-
-                # Get the set of valid field names for the model
-                valid_field_names = set(f.name for f in model_class._meta.get_fields())
-
-                # Loop through items
-                for item_data in items:
-                    obj, created, error = self._import_single_item(
-                        model_class=model_class,
-                        item_data=item_data,
-                        unique_key_json=json_key,
-                        unique_key_model=model_field,
-                        valid_field_names=valid_field_names,
-                        filename=filename
-                    )
-
-                    if obj:
-                        imported_count += 1
-                        # --- Link relationships for single-type imports (currently only Disease) ---
-                        if model_class == Disease:
-                            affected_plants_key = "Affected Host Plants" # Specific to current Disease JSON structure
-                            if affected_plants_key in item_data and isinstance(item_data[affected_plants_key], list):
-                                self._link_disease_to_plants(obj, item_data[affected_plants_key], filename)
-                        # Add similar blocks here if other single-type imports need linking (e.g., Pests if they have a single-type format)
-                    else:
-                        failed_count += 1
-                        # Error message already printed by _import_single_item
+                # --- Structure Detection ---
+                is_comprehensive = False
+                if not force_single_type and root_type == 'dict':
+                    # Check if top-level keys match our comprehensive structure definition
+                    comprehensive_keys_present = [key for key in self.COMPREHENSIVE_KEYS_MAPPING if key in data]
+                    if comprehensive_keys_present:
+                        # Consider it comprehensive if at least one known section key is present
+                        is_comprehensive = True
+                        self.stdout.write(self.style.NOTICE(f"Detected comprehensive file structure in {filename}. Processing sections: {', '.join(comprehensive_keys_present)}"))
+                        self._import_comprehensive_data(data, filename)
+                        return # Exit after processing comprehensive data
+
+                # --- Fallback or Forced Single-Type Import Logic ---
+                if not is_comprehensive:
+                    if not model_class or not json_key or not model_field:
+                         # This can happen if called from directory scan without a prefix match but file wasn't comprehensive
+                         self.stdout.write(self.style.WARNING(f"Skipping {filename}: Not comprehensive and no type info provided for single-type import."))
+                         return
+
+                    self.stdout.write(self.style.NOTICE(f"Processing {filename} as single-type: {model_class.__name__}"))
+                    imported_count = 0
+                    failed_count = 0
+
+                    items = []
+                    # Determine the list of items based on expected structure for the model type
+                    if model_class in [Pest, Disease, Seed]: # Types expecting a list within a dict
+                        if root_type == 'dict':
+                            found_list = False
+                            for value in data.values():
+                                if isinstance(value, StreamedSection):
+                                    items = value
+                                    found_list = True
+                                    break
+                            if not found_list:
+                                 self.stdout.write(self.style.ERROR(f"Skipped {filename}: Expected a list of items within the top-level JSON object for {model_class.__name__}, but none found."))
+                                 return
+                        else:
+                            self.stdout.write(self.style.ERROR(f"Skipped {filename}: Expected a top-level JSON object for {model_class.__name__}, but found {root_type}."))
+                            return
+                    else: # Types expecting a list directly, or a single object
+                        if root_type == 'dict':
+                            items = [stream.load()] # Treat single object as a list with one item
+                        elif root_type == 'list':
+                            items = stream.items()
+                        else:
+                            self.stdout.write(self.style.ERROR(f"Skipped {filename}: JSON root must be an object or a list of objects for {model_class.__name__}."))
+                            return
+
+                    # Get the set of valid field names for the model
+                    valid_field_names = set(f.name for f in model_class._meta.get_fields())
+
+                    # Disease -> host plant links, written in one pass once all items are imported
+                    links = []
+                    plant_types = set()
+
+                    # Loop through items
+                    for item_data in items:
+                        obj, created, error = self._import_single_item(
+                            model_class=model_class,
+                            item_data=item_data,
+                            unique_key_json=json_key,
+                            unique_key_model=model_field,
+                            valid_field_names=valid_field_names,
+                            filename=filename
+                        )
+
+                        if obj:
+                            imported_count += 1
+                            # --- Link relationships for single-type imports (currently only Disease) ---
+                            if model_class == Disease:
+                                affected_plants_key = "Affected Host Plants" # Specific to current Disease JSON structure
+                                if affected_plants_key in item_data and isinstance(item_data[affected_plants_key], list):
+                                    links.append((obj.pk, item_data[affected_plants_key]))
+                                    plant_types.update(plant_type for _, plant_type, _ in self._plant_type_references(item_data, affected_plants_key))
+                            # Add similar blocks here if other single-type imports need linking (e.g., Pests if they have a single-type format)
+                        else:
+                            failed_count += 1
+                            # Error message already printed by _import_single_item
 
-                # Success message for the file
-                self.stdout.write(self.style.SUCCESS(f"Finished processing {filename}: Imported/Updated {imported_count} records, Failed {failed_count} records."))
+                    if links:
+                        self._link_to_plant_types('diseases', links, self._match_plant_types(plant_types, filename), filename)
+
+                    # Success message for the file
+                    self.stdout.write(self.style.SUCCESS(f"Finished processing {filename}: Imported/Updated {imported_count} records, Failed {failed_count} records."))
 
         # Outer exception handling
         except FileNotFoundError:
@@ -293,105 +378,13 @@ class Command(BaseCommand):
             Tuple: (object_instance, created_boolean, error_message_string or None)
                    Returns (None, False, error_message) on failure.
         """
-        if not isinstance(item_data, dict):
-            error_msg = f"Skipping non-object item in {filename}."
-            self.stdout.write(self.style.WARNING(error_msg))
-            return None, False, error_msg
-
-        unique_field_value = item_data.get(unique_key_json)
-        if unique_field_value is None:
-            error_msg = f"Skipping record in {filename}: Unique JSON key '{unique_key_json}' not found or is null."
-            self.stdout.write(self.style.WARNING(error_msg))
+        unique_field_value, defaults, error_msg = self._build_item_defaults(
+            model_class, item_data, unique_key_json, unique_key_model, valid_field_names, filename
+        )
+        if error_msg:
             return None, False, error_msg
-
-        defaults = {}
-        for current_json_key, value in item_data.items():
-            # Skip the key used for the unique identifier and relationship keys handled later
-            if current_json_key == unique_key_json or current_json_key in ['Affected Host Plants', 'affected_plants', 'interactions', 'plant_subject', 'plant_object']:
-                continue
-
-            processed_specifically = False
-            # --- START: Model-specific mapping (e.g., Disease) ---
-            if model_class == Disease: # Example specific handling
-                if current_json_key == "Pathogen Type":
-                    category_map = {
-                        "Fungal": ProblemCategory.FUNGAL, "Bacterial": ProblemCategory.BACTERIAL,
-                        "Viral": ProblemCategory.VIRAL, # Add others as needed
-                    }
-                    defaults['category'] = category_map.get(str(value), ProblemCategory.UNKNOWN)
-                    processed_specifically = True
-                elif current_json_key == "Disease Cycle/Epidemiology":
-                    defaults['description'] = str(value)
-                    processed_specifically = True
-                elif current_json_key == "Symptoms":
-                    if isinstance(value, dict):
-                        defaults['symptoms'] = "\n".join([f"{k}: {v}" for k, v in value.items()])
-                    elif isinstance(value, str):
-                         defaults['symptoms'] = value
-                    processed_specifically = True # Mark as processed even if type wasn't dict/str
-                elif current_json_key == "Management Strategies":
-                    if isinstance(value, (dict, list)):
-                        defaults['treatment_strategies'] = value
-                    processed_specifically = True
-                elif current_json_key == "Conditions Favoring Disease Development":
-                    defaults['conditions_favoring'] = str(value)
-                    processed_specifically = True
-                elif current_json_key == "Geographic Distribution":
-                    defaults['geographic_distribution'] = str(value)
-                    processed_specifically = True
-                elif current_json_key == "Transmission Methods":
-                    if isinstance(value, list):
-                        defaults['transmission_methods'] = value
-                    processed_specifically = True
-            # --- END: Model-specific mapping ---
-            # Add elif blocks here for Pest-specific mappings if needed
-            elif model_class == Pest:
-                 # Example: Map 'Control Methods' to a specific field if needed
-                 if current_json_key == "Control Methods":
-                     if isinstance(value, (dict, list)):
-                         defaults['control_methods'] = value # Assuming a JSONField 'control_methods'
-                     elif isinstance(value, str):
-                          defaults['control_methods_text'] = value # Assuming a TextField fallback
-                     processed_specifically = True
-                 # Add other Pest specific mappings
-
-            # --- START: Generic mapping (if not processed specifically) ---
-            if not processed_specifically:
-                potential_model_field = self.transform_json_key(current_json_key)
-                if potential_model_field in valid_field_names and potential_model_field != unique_key_model:
-                    # Basic type handling for common cases (can be expanded)
-                    try:
-                        field_object = model_class._meta.get_field(potential_model_field)
-                        # Handle JSONField specifically if needed, otherwise basic assignment
-                        if isinstance(field_object, models.JSONField):
-                             defaults[potential_model_field] = value # Assign directly
-                        elif isinstance(field_object, (models.CharField, models.TextField)):
-                             defaults[potential_model_field] = str(value) # Ensure string
-                        elif isinstance(field_object, models.IntegerField):
-                             try:
-                                 defaults[potential_model_field] = int(value)
-                             except (ValueError, TypeError):
-                                 self.stdout.write(self.style.WARNING(f"  Could not convert value '{value}' to int for field '{potential_model_field}' in {filename}. Skipping field."))
-                        elif isinstance(field_object, models.FloatField):
-                             try:
-                                 defaults[potential_model_field] = float(value)
-                             except (ValueError, TypeError):
-                                 self.stdout.write(self.style.WARNING(f"  Could not convert value '{value}' to float for field '{potential_model_field}' in {filename}. Skipping field."))
-                        elif isinstance(field_object, models.BooleanField):
-                             # Handle common boolean representations
-                             if isinstance(value, str):
-                                 defaults[potential_model_field] = value.lower() in ['true', 'yes', '1']
-                             else:
-                                 defaults[potential_model_field] = bool(value)
-                        # Add handling for DateField, DateTimeField if needed
-                        # elif isinstance(field_object, models.DateField): ...
-                        else:
-                             # For other types (ForeignKey, ManyToMany are handled separately), assign directly
-                             defaults[potential_model_field] = value
-                    except FieldDoesNotExist:
-                         self.stdout.write(self.style.WARNING(f"  Field '{potential_model_field}' (from JSON key '{current_json_key}') does not exist in model {model_class.__name__}. Skipping."))
-                # Optional: Add warnings for skipped keys
-            # --- END: Generic mapping ---
+        if model_class is Plant:
+            self._plant_names = None
 
         try:
             with transaction.atomic():
@@ -492,291 +485,564 @@ class Command(BaseCommand):
              self.stdout.write(self.style.ERROR(error_msg))
              return None, False, error_msg
 
-    def _link_disease_to_plants(self, disease_obj, plant_identifiers, filename):
-        """Links a Disease object to Plant objects based on identifiers."""
-        if not isinstance(plant_identifiers, list):
-            self.stdout.write(self.style.WARNING(f"  'Affected Host Plants' is not a list for disease '{disease_obj}' in {filename}. Skipping linking."))
-            return
+    def _build_item_defaults(self, model_class, item_data, unique_key_json, unique_key_model, valid_field_names, filename):
+        """
+        Maps the JSON keys of a single item onto the fields of model_class.
 
-        total_linked = 0
-        total_errors = 0
-        processed_identifiers = set()
+        Returns:
+            Tuple: (unique_field_value, defaults_dict, error_message_string or None)
+                   Returns (None, None, error_message) if the item cannot be imported.
+        """
+        if not isinstance(item_data, dict):
+            error_msg = f"Skipping non-object item in {filename}."
+            self.stdout.write(self.style.WARNING(error_msg))
+            return None, None, error_msg
 
-        for identifier in plant_identifiers:
-            if not isinstance(identifier, str):
-                self.stdout.write(self.style.WARNING(f"  Skipping non-string plant identifier '{identifier}' for disease '{disease_obj}'."))
-                continue
+        unique_field_value = item_data.get(unique_key_json)
+        if unique_field_value is None:
+            error_msg = f"Skipping record in {filename}: Unique JSON key '{unique_key_json}' not found or is null."
+            self.stdout.write(self.style.WARNING(error_msg))
+            return None, None, error_msg
 
-            # Avoid processing the same general type multiple times if listed redundantly
-            general_plant_type = identifier.split('(')[0].strip()
-            if not general_plant_type or general_plant_type in processed_identifiers:
+        defaults = {}
+        for current_json_key, value in item_data.items():
+            # Skip the key used for the unique identifier and relationship keys handled later
+            if current_json_key == unique_key_json or current_json_key in ['Affected Host Plants', 'affected_plants', 'interactions', 'plant_subject', 'plant_object']:
                 continue
-            processed_identifiers.add(general_plant_type)
 
-            try:
-                # Find plants where common_name *contains* the general type (case-insensitive)
-                # Or where scientific_name *starts with* the general type (case-insensitive) - common for genus matching
-                matching_plants = Plant.objects.filter(
-                    Q(common_name__icontains=general_plant_type) |
-                    Q(scientific_name__istartswith=general_plant_type)
-                ).distinct()
-
-                if not matching_plants.exists():
-                    self.stdout.write(self.style.WARNING(f"  No existing plants found matching general type '{general_plant_type}' for disease '{disease_obj}'. No links created for this identifier."))
-                else:
-                    self.stdout.write(self.style.NOTICE(f"  Found {matching_plants.count()} existing plant(s) matching type '{general_plant_type}' for disease '{disease_obj}'. Linking..."))
-                    linked_count = 0
-                    link_errors = 0
-                    for plant_instance in matching_plants:
-                        try:
-                            with transaction.atomic():
-                                pd_obj, pd_created = PlantDisease.objects.update_or_create(
-                                    plant=plant_instance,
-                                    disease=disease_obj,
-                                    # Add defaults for PlantDisease if any are needed
-                                )
-                                linked_count += 1
-                        except IntegrityError as e_pd_integrity:
-                            self.stdout.write(self.style.ERROR(f"    Integrity error creating relationship for {plant_instance} <-> {disease_obj}: {e_pd_integrity}"))
-                            link_errors += 1
-                        except Exception as e_pd_create:
-                            self.stdout.write(self.style.ERROR(f"    Error creating relationship for {plant_instance} <-> {disease_obj}: {e_pd_create}"))
-                            link_errors += 1
-
-                    if linked_count > 0:
-                         self.stdout.write(self.style.SUCCESS(f"    Successfully linked/updated {linked_count} plant(s) of type '{general_plant_type}' to disease '{disease_obj}'."))
-                         total_linked += linked_count
-                    if link_errors > 0:
-                         self.stdout.write(self.style.ERROR(f"    Failed to link {link_errors} plant(s) of type '{general_plant_type}' to disease '{disease_obj}' due to errors."))
-                         total_errors += link_errors
-
-            except Exception as e_plant_lookup:
-                self.stdout.write(self.style.ERROR(f"  Error querying plants matching type '{general_plant_type}' for identifier '{identifier}': {e_plant_lookup}"))
-                total_errors += 1 # Count query error as a failure
-                continue
+            processed_specifically = False
+            # --- START: Model-specific mapping (e.g., Disease) ---
+            if model_class == Disease: # Example specific handling
+                if current_json_key == "Pathogen Type":
+                    category_map = {
+                        "Fungal": ProblemCategory.FUNGAL, "Bacterial": ProblemCategory.BACTERIAL,
+                        "Viral": ProblemCategory.VIRAL, # Add others as needed
+                    }
+                    defaults['category'] = category_map.get(str(value), ProblemCategory.UNKNOWN)
+                    processed_specifically = True
+                elif current_json_key == "Disease Cycle/Epidemiology":
+                    defaults['description'] = str(value)
+                    processed_specifically = True
+                elif current_json_key == "Symptoms":
+                    if isinstance(value, dict):
+                        defaults['symptoms'] = "\n".join([f"{k}: {v}" for k, v in value.items()])
+                    elif isinstance(value, str):
+                         defaults['symptoms'] = value
+                    processed_specifically = True # Mark as processed even if type wasn't dict/str
+                elif current_json_key == "Management Strategies":
+                    if isinstance(value, (dict, list)):
+                        defaults['treatment_strategies'] = value
+                    processed_specifically = True
+                elif current_json_key == "Conditions Favoring Disease Development":
+                    defaults['conditions_favoring'] = str(value)
+                    processed_specifically = True
+                elif current_json_key == "Geographic Distribution":
+                    defaults['geographic_distribution'] = str(value)
+                    processed_specifically = True
+                elif current_json_key == "Transmission Methods":
+                    if isinstance(value, list):
+                        defaults['transmission_methods'] = value
+                    processed_specifically = True
+            # --- END: Model-specific mapping ---
+            # Add elif blocks here for Pest-specific mappings if needed
+            elif model_class == Pest:
+                 # Example: Map 'Control Methods' to a specific field if needed
+                 if current_json_key == "Control Methods":
+                     if isinstance(value, (dict, list)):
+                         defaults['control_methods'] = value # Assuming a JSONField 'control_methods'
+                     elif isinstance(value, str):
+                          defaults['control_methods_text'] = value # Assuming a TextField fallback
+                     processed_specifically = True
+                 # Add other Pest specific mappings
+
+            # --- START: Generic mapping (if not processed specifically) ---
+            if not processed_specifically:
+                potential_model_field = self.transform_json_key(current_json_key)
+                if potential_model_field in valid_field_names and potential_model_field != unique_key_model:
+                    # Basic type handling for common cases (can be expanded)
+                    try:
+                        field_object = model_class._meta.get_field(potential_model_field)
+                        # Handle JSONField specifically if needed, otherwise basic assignment
+                        if isinstance(field_object, models.JSONField):
+                             defaults[potential_model_field] = value # Assign directly
+                        elif isinstance(field_object, (models.CharField, models.TextField)):
+                             defaults[potential_model_field] = str(value) # Ensure string
+                        elif isinstance(field_object, models.IntegerField):
+                             try:
+                                 defaults[potential_model_field] = int(value)
+                             except (ValueError, TypeError):
+                                 self.stdout.write(self.style.WARNING(f"  Could not convert value '{value}' to int for field '{potential_model_field}' in {filename}. Skipping field."))
+                        elif isinstance(field_object, models.FloatField):
+                             try:
+                                 defaults[potential_model_field] = float(value)
+                             except (ValueError, TypeError):
+                                 self.stdout.write(self.style.WARNING(f"  Could not convert value '{value}' to float for field '{potential_model_field}' in {filename}. Skipping field."))
+                        elif isinstance(field_object, models.BooleanField):
+                             # Handle common boolean representations
+                             if isinstance(value, str):
+                                 defaults[potential_model_field] = value.lower() in ['true', 'yes', '1']
+                             else:
+                                 defaults[potential_model_field] = bool(value)
+                        # Add handling for DateField, DateTimeField if needed
+                        # elif isinstance(field_object, models.DateField): ...
+                        else:
+                             # For other types (ForeignKey, ManyToMany are handled separately), assign directly
+                             defaults[potential_model_field] = value
+                    except FieldDoesNotExist:
+                         self.stdout.write(self.style.WARNING(f"  Field '{potential_model_field}' (from JSON key '{current_json_key}') does not exist in model {model_class.__name__}. Skipping."))
+                # Optional: Add warnings for skipped keys
+            # --- END: Generic mapping ---
 
-        self.stdout.write(f"  Finished linking plants for disease '{disease_obj}'. Total linked: {total_linked}, Total errors: {total_errors}.")
+        return unique_field_value, defaults, None
 
     def _import_comprehensive_data(self, data, filename):
-        """Processes a dictionary assumed to be from a comprehensive JSON file."""
+        """
+        Processes a dictionary assumed to be from a comprehensive JSON file.
+
+        The file is scanned for the plants, plant types and interactions it
+        references first (see horticulture.import_planner). Sections are then
+        imported in dependency order, COMPREHENSIVE_BATCH_SIZE records per
+        set-based upsert, and pests and diseases are linked to their plants in
+        a final pass. The number of queries grows with the number of batches
+        and entity types rather than with the number of records.
+        """
         self.stdout.write(self.style.NOTICE(f"--- Starting Comprehensive Import: {filename} ---"))
-        processed_objects = {} # Store created/updated objects {section_key: {unique_id: obj}}
-
-        # Define processing order - ensure plants are processed first if present
-        processing_order = ['plants'] + [k for k in self.COMPREHENSIVE_KEYS_MAPPING if k != 'plants']
-
-        for section_key in processing_order:
-            if section_key not in data:
-                continue # Skip sections not present in this file
 
+        for section_key in data:
             if section_key not in self.COMPREHENSIVE_KEYS_MAPPING:
                 self.stdout.write(self.style.WARNING(f"Skipping unknown section '{section_key}' in {filename}."))
-                continue
-
-            mapping = self.COMPREHENSIVE_KEYS_MAPPING[section_key]
-            section_data = data[section_key]
 
-            if not isinstance(section_data, list):
-                self.stdout.write(self.style.ERROR(f"Expected a list for section '{section_key}' in {filename}, found {type(section_data).__name__}. Skipping section."))
+        reference_extractors = {'companion_relationships': self._companion_references}
+        for section_key, mapping in self.COMPREHENSIVE_KEYS_MAPPING.items():
+            if mapping.get('link_key'):
+                reference_extractors[section_key] = functools.partial(self._plant_type_references, link_key=mapping['link_key'])
+        plan = plan_import(data, reference_extractors)
+        plant_ids = {} # scientific_name -> pk of the plants referenced by companionships
+        interaction_ids = {} # interaction_type -> pk of the first interaction of that type
+        pending_links = {} # section_key -> [(object pk, plant identifiers)]
+
+        for section_key in plan.steps:
+            if section_key == 'interactions':
+                interaction_ids = self._load_interaction_ids(plan.referenced('interactions'))
                 continue
 
-            self.stdout.write(f"\nProcessing section: '{section_key}' ({len(section_data)} items)...")
-            processed_objects[section_key] = {}
-            section_imported_count = 0
-            section_failed_count = 0
-
-            # --- Special handling for sections with custom import functions ---
-            if 'import_func' in mapping:
-                import_function = getattr(self, mapping['import_func'], None)
-                if import_function:
-                    for item_data in section_data:
-                        # Custom import functions should return (success_boolean, error_message_or_None)
-                        success, error = import_function(item_data, filename)
-                        if success:
-                            section_imported_count += 1
-                        else:
-                            section_failed_count += 1
-                            # Error should be logged within the import function
+            if section_key in data:
+                section_data = data[section_key]
+                if not isinstance(section_data, (list, StreamedSection)):
+                    self.stdout.write(self.style.ERROR(f"Expected a list for section '{section_key}' in {filename}, found {type(section_data).__name__}. Skipping section."))
                 else:
-                    self.stdout.write(self.style.ERROR(f"Configured import function '{mapping['import_func']}' not found for section '{section_key}'. Skipping section."))
-                    continue # Skip to next section
-            # --- Standard handling using _import_single_item ---
-            else:
-                model_class = mapping['model']
-                default_json_key = mapping['json_key'] # Get the default key from mapping
-                model_field = mapping['model_field']
-                valid_field_names = set(f.name for f in model_class._meta.get_fields())
-
-                for item_data in section_data:
-                    # Determine the correct JSON key based on section
-                    current_json_key = "scientific_name" if section_key == 'diseases' else default_json_key
-
-                    obj, created, error = self._import_single_item(
-                        model_class=model_class,
-                        item_data=item_data,
-                        unique_key_json=current_json_key, # Use the determined key
-                        unique_key_model=model_field,
-                        valid_field_names=valid_field_names,
-                        filename=filename
-                    )
-                    if obj:
-                        # Store successfully processed object using its unique model field value as the key
-                        processed_objects[section_key][getattr(obj, model_field)] = obj
-                        section_imported_count += 1
-
-                        # --- START: Inline Linking for Comprehensive Import ---
-                        # If this is the diseases section, perform linking immediately
-                        if section_key == 'diseases':
-                            link_key_json = mapping.get('link_key') # e.g., "Affected Host Plants"
-                            link_func_name = mapping.get('link_func') # e.g., "_link_disease_to_plants"
-                            link_function = getattr(self, link_func_name, None) if link_func_name else None
-
-                            if link_key_json and link_function:
-                                link_identifiers = item_data.get(link_key_json)
-                                if link_identifiers:
-                                    self.stdout.write(self.style.NOTICE(f"  Attempting inline linking for disease '{obj}'..."))
-                                    link_function(obj, link_identifiers, filename)
-                                else:
-                                    # Log if linking key is missing for this item, but don't fail import
-                                    self.stdout.write(self.style.NOTICE(f"  No '{link_key_json}' data found for disease '{obj}' in {filename}. Skipping inline linking for this item."))
-                            elif not link_key_json:
-                                self.stdout.write(self.style.WARNING(f"  Cannot perform inline linking for disease '{obj}': 'link_key' not defined in COMPREHENSIVE_KEYS_MAPPING for 'diseases'."))
-                            elif not link_function:
-                                self.stdout.write(self.style.WARNING(f"  Cannot perform inline linking for disease '{obj}': Link function '{link_func_name}' not found."))
-                        # Add elif section_key == 'some_other_type': for other inline linking if needed
-                        # --- END: Inline Linking ---
+                    self.stdout.write(f"\nProcessing section: '{section_key}'...")
+                    if section_key == 'companion_relationships':
+                        section_imported_count, section_failed_count = self._import_companionships_in_bulk(
+                            section_data, plant_ids, interaction_ids, filename
+                        )
                     else:
-                        section_failed_count += 1
+                        section_imported_count, section_failed_count, pending_links[section_key] = self._import_section_in_bulk(
+                            section_key, section_data, filename
+                        )
+                    self.stdout.write(self.style.SUCCESS(f"Finished section '{section_key}': Imported/Updated {section_imported_count}, Failed {section_failed_count}"))
+
+            if section_key == 'plants':
+                # Plants referenced by companionships, resolved once the file's own plants exist
+                plant_ids = self._load_plant_ids(plan.referenced('plants'))
+
+        # --- Post-Import Linking ---
+        # All primary objects exist now, link them to plants in one set-based pass per section
+        self.stdout.write("\n--- Starting Post-Import Linking ---")
+        plant_type_matches = self._match_plant_types(plan.referenced('plant_types'), filename)
+        for section_key, links in pending_links.items():
+            if links:
+                self.stdout.write(f"Linking relationships for section: '{section_key}'...")
+                self._link_to_plant_types(section_key, links, plant_type_matches, filename)
 
-            self.stdout.write(self.style.SUCCESS(f"Finished section '{section_key}': Imported/Updated {section_imported_count}, Failed {section_failed_count}"))
+        self.stdout.write(self.style.SUCCESS(f"--- Finished Comprehensive Import: {filename} ---"))
+
+    @staticmethod
+    def _general_plant_type(identifier):
+        """Returns the general plant type of an identifier such as 'Tomato (Solanum lycopersicum)'."""
+        return identifier.split('(')[0].strip()
+
+    def _plant_type_references(self, item_data, link_key):
+        """Returns the general plant types listed under link_key in a pest or disease item."""
+        identifiers = item_data.get(link_key)
+        if not isinstance(identifiers, list):
+            return []
+        plant_types = (self._general_plant_type(identifier) for identifier in identifiers if isinstance(identifier, str))
+        return [('plant_types', plant_type, None) for plant_type in plant_types if plant_type]
+
+    @staticmethod
+    def _companion_references(item_data):
+        """Returns the plant and interaction type references of a companionship item."""
+        references = [
+            ('plants', item_data.get(key), None)
+            for key in ('plant_subject', 'plant_object')
+            if isinstance(item_data.get(key), str)
+        ]
+        interactions_data = item_data.get('interactions')
+        if isinstance(interactions_data, list):
+            for interaction_data in interactions_data:
+                if isinstance(interaction_data, dict) and isinstance(interaction_data.get('interaction_type'), str):
+                    references.append(('interactions', interaction_data['interaction_type'], None))
+        return references
+
+    def _load_plant_ids(self, scientific_names):
+        """Maps the given scientific names to plant pks, COMPREHENSIVE_BATCH_SIZE names per query."""
+        names = list(scientific_names)
+        plant_ids = {}
+        for batch in iter_batches(names, self.COMPREHENSIVE_BATCH_SIZE):
+            plant_ids.update(Plant.objects.filter(scientific_name__in=batch).values_list('scientific_name', 'pk'))
+        return plant_ids
+
+    def _load_interaction_ids(self, interaction_types):
+        """
+        Maps each interaction type to its first pre-existing CompanionPlantingInteraction.
+        Interactions are not created by comprehensive imports.
+        """
+        interaction_ids = {}
+        if interaction_types:
+            for interaction_type, pk in CompanionPlantingInteraction.objects.filter(
+                interaction_type__in=list(interaction_types)
+            ).order_by('pk').values_list('interaction_type', 'pk'):
+                interaction_ids.setdefault(interaction_type, pk)
+        return interaction_ids
+
+    def _import_section_in_bulk(self, section_key, section_data, filename):
+        """
+        Imports the items of a section with one set-based upsert per batch.
 
-        # --- Post-Import Linking (Diseases linking moved inline) ---
-        # Iterate again after all primary objects are created/updated
-        self.stdout.write("\n--- Starting Post-Import Linking (Excluding Diseases) ---")
-        for section_key in processing_order:
-            # Skip diseases section as it's handled inline now
-            if section_key == 'diseases':
-                self.stdout.write(self.style.NOTICE(f"Skipping post-import linking for '{section_key}' (handled inline)."))
+        Returns:
+            Tuple: (imported_count, failed_count, [(object pk, plant identifiers to link)])
+        """
+        mapping = self.COMPREHENSIVE_KEYS_MAPPING[section_key]
+        model_class = mapping['model']
+        model_field = mapping['model_field']
+        # Comprehensive files identify diseases by scientific name
+        json_key = "scientific_name" if section_key == 'diseases' else mapping['json_key']
+        link_key = mapping.get('link_key')
+        valid_field_names = set(f.name for f in model_class._meta.get_fields())
+
+        imported_count = 0
+        failed_count = 0
+        links = []
+        for batch in iter_batches(section_data, self.COMPREHENSIVE_BATCH_SIZE):
+            imported, batch_failed_count = self._write_items_in_bulk(
+                model_class, batch, json_key, model_field, valid_field_names, filename
+            )
+            imported_count += len(imported)
+            failed_count += batch_failed_count
+            if link_key:
+                for item_data, obj in imported:
+                    if item_data.get(link_key):
+                        links.append((obj.pk, item_data[link_key]))
+        return imported_count, failed_count, links
+
+    def _write_items_in_bulk(self, model_class, batch, json_key, model_field, valid_field_names, filename):
+        """
+        Creates or updates a batch of items like _import_single_item would, with
+        one query loading the existing rows, one bulk_create and one bulk_update.
+        If the batch cannot be written it is imported again item by item, which
+        reports the failing items and applies the per-item conflict handling.
+
+        Returns:
+            Tuple: ([(item_data, object_instance)], failed_count)
+        """
+        failed_count = 0
+        if model_class is Plant:
+            self._plant_names = None
+        prepared = [] # (item_data, unique_field_value, defaults)
+        for item_data in batch:
+            unique_field_value, defaults, error_msg = self._build_item_defaults(
+                model_class, item_data, json_key, model_field, valid_field_names, filename
+            )
+            if error_msg:
+                failed_count += 1
+            else:
+                prepared.append((item_data, unique_field_value, defaults))
+
+        existing = {}
+        ambiguous = set() # Keys matching several rows, which update_or_create reports as errors
+        for obj in model_class.objects.filter(**{f'{model_field}__in': {value for _, value, _ in prepared}}):
+            key = getattr(obj, model_field)
+            if key in existing:
+                ambiguous.add(key)
+            existing[key] = obj
+
+        to_create = {}
+        to_update = {}
+        update_fields = set()
+        imported = []
+        replay = []
+        for item_data, unique_field_value, defaults in prepared:
+            if unique_field_value in ambiguous:
+                replay.append(item_data)
                 continue
+            try:
+                # Building an instance checks the values of relations, so a bad
+                # item is replayed on its own instead of failing its batch
+                candidate = model_class(**{model_field: unique_field_value}, **defaults)
+            except Exception:
+                replay.append(item_data)
+                continue
+            obj = to_create.get(unique_field_value) or existing.get(unique_field_value)
+            if obj is None:
+                obj = to_create[unique_field_value] = candidate
+            else:
+                for field_name, value in defaults.items():
+                    setattr(obj, field_name, value)
+                if unique_field_value not in to_create:
+                    to_update[unique_field_value] = obj
+                update_fields.update(defaults)
+            imported.append((item_data, obj))
 
-            if section_key not in data or section_key not in processed_objects:
-                continue # Skip if section wasn't present or had no successful imports
-
-            mapping = self.COMPREHENSIVE_KEYS_MAPPING.get(section_key, {})
-            link_func_name = mapping.get('link_func')
-            link_key_json = mapping.get('link_key')
-
-            # Check if this section type has linking logic defined AND is NOT diseases
-            if link_func_name and link_key_json: # No need to check section_key != 'diseases' due to continue above
-                link_function = getattr(self, link_func_name, None)
-                if link_function:
-                    self.stdout.write(f"Linking relationships for section: '{section_key}'...")
-                    section_data = data[section_key] # Get original data again for linking info
-                    default_json_key = mapping['json_key'] # Key used to identify the primary object
-
-                    items_processed_for_linking = 0
-                    for item_data in section_data:
-                        # Determine the correct JSON key based on section for lookup
-                        # (Keep original logic here, assuming it was correct for other types)
-                        current_json_key = default_json_key # Use default unless specific logic needed
-
-                        # Find the already imported object using the correct key
-                        unique_id_value = item_data.get(current_json_key)
-                        if unique_id_value is None:
-                            self.stdout.write(self.style.WARNING(f"  Skipping linking for item in section '{section_key}': Unique key '{current_json_key}' not found in item data: {item_data.keys()}"))
-                            continue # Cannot find object if key is missing
-
-                        # Retrieve the object instance stored earlier using the unique *model* field value
-                        obj_to_link = processed_objects[section_key].get(unique_id_value)
-
-                        # Get the list of identifiers to link to
-                        link_identifiers = item_data.get(link_key_json)
-
-                        if obj_to_link and link_identifiers:
-                            items_processed_for_linking += 1
-                            # Call the specific linking function (e.g., _link_pest_to_plants)
-                            link_function(obj_to_link, link_identifiers, filename)
-                        elif obj_to_link and not link_identifiers:
-                            pass # Object exists but no linking data
-                        elif not obj_to_link and link_identifiers:
-                            self.stdout.write(self.style.WARNING(f"  Cannot link for item with ID '{unique_id_value}' in section '{section_key}': Object was not successfully imported/found."))
-
-                    self.stdout.write(f"Processed linking for {items_processed_for_linking} items in section '{section_key}'.")
-                else:
-                    self.stdout.write(self.style.ERROR(f"Configured link function '{link_func_name}' not found for section '{section_key}'. Skipping linking."))
+        try:
+            with transaction.atomic():
+                model_class.objects.bulk_create(to_create.values())
+                if to_update:
+                    now = timezone.now()
+                    for obj in to_update.values():
+                        obj.updated_at = now
+                    model_class.objects.bulk_update(to_update.values(), sorted(update_fields | {'updated_at'}))
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"  Batch write failed for {len(batch)} {model_class.__name__} records in {filename} ({e}). Importing them one by one."))
+            imported = []
+            replay = [item_data for item_data, _, _ in prepared]
+
+        for item_data in replay:
+            obj, created, error = self._import_single_item(
+                model_class=model_class,
+                item_data=item_data,
+                unique_key_json=json_key,
+                unique_key_model=model_field,
+                valid_field_names=valid_field_names,
+                filename=filename
+            )
+            if obj:
+                imported.append((item_data, obj))
+            else:
+                failed_count += 1
+        return imported, failed_count
 
-        self.stdout.write(self.style.SUCCESS(f"--- Finished Comprehensive Import: {filename} ---"))
+    def _match_plant_types(self, plant_types, filename):
+        """
+        Finds the plants matching each general plant type: plants whose
+        common_name contains the type or whose scientific_name starts with it
+        (case-insensitive). Types are matched PLANT_TYPE_BATCH_SIZE at a
+        time with one query per batch.
 
-    def _link_pest_to_plants(self, pest_obj, plant_identifiers, filename):
-        """Links a Pest object to Plant objects based on identifiers."""
-        # Use the configured key from COMPREHENSIVE_KEYS_MAPPING
-        link_key_name = self.COMPREHENSIVE_KEYS_MAPPING['pests'].get('link_key', 'affected_plants') # Default if not set
+        Returns:
+            dict: general plant type -> list of plant pks
+        """
+        matches = {}
+        for batch in iter_batches(list(plant_types), self.PLANT_TYPE_BATCH_SIZE):
+            query = Q()
+            for plant_type in batch:
+                query |= Q(common_name__icontains=plant_type) | Q(scientific_name__istartswith=plant_type)
+            candidates = [
+                (pk, (common_name or '').lower(), (scientific_name or '').lower())
+                for pk, common_name, scientific_name in Plant.objects.filter(query).values_list('pk', 'common_name', 'scientific_name')
+            ]
+            for plant_type in batch:
+                needle = plant_type.lower()
+                matches[plant_type] = [
+                    pk for pk, common_name, scientific_name in candidates
+                    if needle in common_name or scientific_name.startswith(needle)
+                ]
+                if not matches[plant_type]:
+                    fuzzy_match = self._fuzzy_plant_match(plant_type, filename)
+                    if fuzzy_match:
+                        matches[plant_type] = [fuzzy_match.plant_id]
+                    else:
+                        self.stdout.write(self.style.WARNING(f"  No existing plants found matching general type '{plant_type}' in {filename}. No links created for this identifier."))
+        return matches
 
-        if not isinstance(plant_identifiers, list):
-            self.stdout.write(self.style.WARNING(f"  '{link_key_name}' is not a list for pest '{pest_obj}' in {filename}. Skipping linking."))
-            return
+    def _plant_name_index(self):
+        """
+        Returns the fuzzy plant name index of this run, built with one query on
+        first use. Importing plants resets it, so it is rebuilt with their names.
+        """
+        if self._plant_names is None:
+            self._plant_names = PlantNameIndex.from_database()
+        return self._plant_names
 
-        total_linked = 0
-        total_errors = 0
-        processed_identifiers = set()
+    def _fuzzy_plant_match(self, plant_type, filename):
+        """
+        Resolves a plant type that matched no plant by name to the most similar
+        plant name, if one is similar enough to link to.
+        """
+        match = self._plant_name_index().best(plant_type, IMPORT_SIMILARITY_THRESHOLD)
+        if match:
+            self.stdout.write(self.style.NOTICE(f"  Matched general type '{plant_type}' to plant '{match.name}' (similarity {match.similarity:.2f}) in {filename}."))
+        return match
 
-        for identifier in plant_identifiers:
-            if not isinstance(identifier, str):
-                self.stdout.write(self.style.WARNING(f"  Skipping non-string plant identifier '{identifier}' for pest '{pest_obj}'."))
-                continue
+    def _link_to_plant_types(self, section_key, links, plant_type_matches, filename):
+        """
+        Links the imported objects of a section to the plants matching their
+        plant identifiers. Missing links are inserted in bulk, existing links
+        are kept.
 
-            # Avoid processing the same general type multiple times if listed redundantly
-            general_plant_type = identifier.split('(')[0].strip()
-            if not general_plant_type or general_plant_type in processed_identifiers:
+        Args:
+            section_key (str): 'pests' or 'diseases'
+            links (list): (object pk, plant identifiers) pairs
+            plant_type_matches (dict): general plant type -> list of plant pks
+            filename (str): The source file name, for logging
+        """
+        mapping = self.COMPREHENSIVE_KEYS_MAPPING[section_key]
+        link_model = mapping['link_model']
+        owner_id_field = f"{mapping['link_field']}_id"
+
+        desired = set()
+        for owner_id, plant_identifiers in links:
+            if not isinstance(plant_identifiers, list):
+                self.stdout.write(self.style.WARNING(f"  '{mapping['link_key']}' is not a list for {section_key} record {owner_id} in {filename}. Skipping linking."))
                 continue
-            processed_identifiers.add(general_plant_type)
+            for identifier in plant_identifiers:
+                if not isinstance(identifier, str):
+                    self.stdout.write(self.style.WARNING(f"  Skipping non-string plant identifier '{identifier}' for {section_key} record {owner_id}."))
+                    continue
+                for plant_id in plant_type_matches.get(self._general_plant_type(identifier), []):
+                    desired.add((owner_id, plant_id))
+
+        existing = set()
+        for batch in iter_batches(list({owner_id for owner_id, _ in links}), self.COMPREHENSIVE_BATCH_SIZE):
+            existing.update(
+                link_model.objects.filter(**{f'{owner_id_field}__in': batch}).values_list(owner_id_field, 'plant_id')
+            )
+
+        new_links = [
+            link_model(**{owner_id_field: owner_id, 'plant_id': plant_id})
+            for owner_id, plant_id in desired - existing
+        ]
+        try:
+            link_model.objects.bulk_create(new_links, batch_size=self.COMPREHENSIVE_BATCH_SIZE, ignore_conflicts=True)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"  Error linking {section_key} to plants in {filename}: {e}"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed linking for {len(links)} items in section '{section_key}': "
+            f"{len(new_links)} links created, {len(desired) - len(new_links)} already existed."
+        ))
+
+    def _import_companionships_in_bulk(self, section_data, plant_ids, interaction_ids, filename):
+        """
+        Imports companionships like _import_companionship would, with a
+        constant number of queries per batch: plants and interactions come from
+        the pre-resolved lookups, existing pairings are loaded with one query,
+        and the companionships and their interactions are written in bulk.
+        Batches that cannot be written are imported again item by item.
+
+        Returns:
+            Tuple: (imported_count, failed_count)
+        """
+        imported_count = 0
+        failed_count = 0
+        through_model = Companionship.interactions.through
+
+        for batch in iter_batches(section_data, self.COMPREHENSIVE_BATCH_SIZE):
+            prepared = [] # ((subject pk, object pk), item_data)
+            for item_data in batch:
+                if not isinstance(item_data, dict):
+                    self.stdout.write(self.style.WARNING(f"  Skipping non-object companionship item in {filename}."))
+                    failed_count += 1
+                    continue
+                subject_identifier = item_data.get('plant_subject')
+                object_identifier = item_data.get('plant_object')
+                if not subject_identifier or not object_identifier:
+                    self.stdout.write(self.style.WARNING(f"  Skipping companionship item in {filename}: Missing 'plant_subject' ('{subject_identifier}') or 'plant_object' ('{object_identifier}')."))
+                    failed_count += 1
+                    continue
+                subject_id = plant_ids.get(subject_identifier)
+                object_id = plant_ids.get(object_identifier)
+                if subject_id is None or object_id is None:
+                    self.stdout.write(self.style.WARNING(f"  Skipping companionship in {filename}: Could not find Plant. Subject='{subject_identifier}', Object='{object_identifier}'."))
+                    failed_count += 1
+                    continue
+                prepared.append(((subject_id, object_id), item_data))
+
+            existing = {
+                (companionship.plant_subject_id, companionship.plant_object_id): companionship
+                for companionship in Companionship.objects.filter(
+                    plant_subject_id__in={subject_id for (subject_id, _), _ in prepared}
+                )
+            }
+
+            to_create = {}
+            to_update = {}
+            update_fields = set()
+            interaction_sets = {} # (subject pk, object pk) -> interaction pks replacing the current ones
+            replay = []
+            for pair, item_data in prepared:
+                defaults = self._companionship_defaults(item_data)
+                try:
+                    candidate = Companionship(plant_subject_id=pair[0], plant_object_id=pair[1], **defaults)
+                except Exception:
+                    replay.append(item_data)
+                    continue
+                companionship = to_create.get(pair) or existing.get(pair)
+                if companionship is None:
+                    companionship = to_create[pair] = candidate
+                else:
+                    for field_name, value in defaults.items():
+                        setattr(companionship, field_name, value)
+                    if pair not in to_create:
+                        to_update[pair] = companionship
+                    update_fields.update(defaults)
+
+                # Only replace interactions if the key is present in the JSON
+                interactions_data = item_data.get('interactions')
+                if interactions_data is None:
+                    continue
+                if not isinstance(interactions_data, list):
+                    self.stdout.write(self.style.WARNING(f"      Skipping interactions for {pair}: 'interactions' key exists but is not a list (type: {type(interactions_data).__name__}). Existing interactions remain unchanged."))
+                    continue
+                interaction_sets[pair] = set()
+                for interaction_data in interactions_data:
+                    if not isinstance(interaction_data, dict) or not interaction_data.get('interaction_type'):
+                        self.stdout.write(self.style.WARNING(f"      Skipping invalid interaction item: {interaction_data}"))
+                        continue
+                    interaction_type = interaction_data['interaction_type']
+                    interaction_id = interaction_ids.get(interaction_type)
+                    if interaction_id is None:
+                        self.stdout.write(self.style.WARNING(f"      Skipping interaction type '{interaction_type}': No existing CompanionPlantingInteraction record found."))
+                        continue
+                    interaction_sets[pair].add(interaction_id)
+
+                    # Append mechanism description to notes
+                    mechanism_description = interaction_data.get('mechanism_description')
+                    if mechanism_description:
+                        note = f"Interaction ({interaction_type}): {mechanism_description}"
+                        companionship.notes = f"{companionship.notes}\n{note}" if companionship.notes else note
+                        update_fields.add('notes')
 
             try:
-                # Find plants where common_name *contains* the general type (case-insensitive)
-                # Or where scientific_name *starts with* the general type (case-insensitive)
-                matching_plants = Plant.objects.filter(
-                    Q(common_name__icontains=general_plant_type) |
-                    Q(scientific_name__istartswith=general_plant_type)
-                ).distinct()
-
-                if not matching_plants.exists():
-                    self.stdout.write(self.style.WARNING(f"  No existing plants found matching general type '{general_plant_type}' for pest '{pest_obj}'. No links created for this identifier."))
+                with transaction.atomic():
+                    Companionship.objects.bulk_create(to_create.values())
+                    if to_update:
+                        now = timezone.now()
+                        for companionship in to_update.values():
+                            companionship.updated_at = now
+                        Companionship.objects.bulk_update(to_update.values(), sorted(update_fields | {'updated_at'}))
+                    if interaction_sets:
+                        companionship_ids = {pair: (to_create.get(pair) or existing[pair]).pk for pair in interaction_sets}
+                        through_model.objects.filter(companionship_id__in=companionship_ids.values()).delete()
+                        through_model.objects.bulk_create([
+                            through_model(companionship_id=companionship_ids[pair], companionplantinginteraction_id=interaction_id)
+                            for pair, interaction_pks in interaction_sets.items()
+                            for interaction_id in interaction_pks
+                        ])
+                imported_count += len(prepared) - len(replay)
+                self.stdout.write(self.style.SUCCESS(f"  Created {len(to_create)}, updated {len(to_update)} companionships."))
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"  Batch write failed for {len(prepared)} companionships in {filename} ({e}). Importing them one by one."))
+                replay = [item_data for _, item_data in prepared]
+
+            for item_data in replay:
+                success, error = self._import_companionship(item_data, filename)
+                if success:
+                    imported_count += 1
                 else:
-                    self.stdout.write(self.style.NOTICE(f"  Found {matching_plants.count()} existing plant(s) matching type '{general_plant_type}' for pest '{pest_obj}'. Linking..."))
-                    linked_count = 0
-                    link_errors = 0
-                    for plant_instance in matching_plants:
-                        try:
-                            # Use transaction.atomic for each link attempt
-                            with transaction.atomic():
-                                pp_obj, pp_created = PlantPest.objects.update_or_create(
-                                    plant=plant_instance,
-                                    pest=pest_obj,
-                                    # Add defaults for PlantPest if any are needed, e.g., severity, notes
-                                    # defaults={'severity': item_data.get('severity', 'Unknown')}
-                                )
-                                linked_count += 1
-                        except IntegrityError as e_pp_integrity:
-                            self.stdout.write(self.style.ERROR(f"    Integrity error creating relationship for {plant_instance} <-> {pest_obj}: {e_pp_integrity}"))
-                            link_errors += 1
-                        except Exception as e_pp_create:
-                            self.stdout.write(self.style.ERROR(f"    Error creating relationship for {plant_instance} <-> {pest_obj}: {e_pp_create}"))
-                            link_errors += 1
-
-                    if linked_count > 0:
-                         self.stdout.write(self.style.SUCCESS(f"    Successfully linked/updated {linked_count} plant(s) of type '{general_plant_type}' to pest '{pest_obj}'."))
-                         total_linked += linked_count
-                    if link_errors > 0:
-                         self.stdout.write(self.style.ERROR(f"    Failed to link {link_errors} plant(s) of type '{general_plant_type}' to pest '{pest_obj}' due to errors."))
-                         total_errors += link_errors
-
-            except Exception as e_plant_lookup:
-                self.stdout.write(self.style.ERROR(f"  Error querying plants matching type '{general_plant_type}' for identifier '{identifier}': {e_plant_lookup}"))
-                total_errors += 1 # Count query error as a failure
-                continue
+                    failed_count += 1
 
-        # Summary log for the specific pest object
-        self.stdout.write(f"  Finished linking plants for pest '{pest_obj}'. Total linked: {total_linked}, Total errors: {total_errors}.")
+        return imported_count, failed_count
 
     def _import_companionship(self, item_data, filename):
         """
@@ -819,18 +1085,7 @@ class Command(BaseCommand):
 
         # --- Create/Update Companionship ---
         try:
-            # Prepare defaults by transforming JSON keys (excluding subject/object/interactions)
-            defaults = {}
-            valid_comp_fields = set(f.name for f in Companionship._meta.get_fields() if f.name not in ['id', 'plant_subject', 'plant_object', 'interactions'])
-            for key, value in item_data.items():
-                if key in [subject_key, object_key, interactions_key]:
-                    continue
-                potential_field = self.transform_json_key(key)
-                if potential_field in valid_comp_fields:
-                    # Add specific type handling if necessary for Companionship fields (e.g., relationship_type enum)
-                    # field_object = Companionship._meta.get_field(potential_field)
-                    # if isinstance(field_object, ...): ...
-                    defaults[potential_field] = value
+            defaults = self._companionship_defaults(item_data)
 
             # Use transaction.atomic for the companionship and its interactions
             with transaction.atomic():
@@ -917,3 +1172,32 @@ class Command(BaseCommand):
             error_msg = f"  Error importing companionship {plant_subject} <-> {plant_object} in {filename}: {e}"
             self.stdout.write(self.style.ERROR(error_msg))
             return False, error_msg # Indicate failure
+
+
+    def _companionship_defaults(self, item_data):
+        """Prepares Companionship defaults by transforming JSON keys (excluding subject/object/interactions)."""
+        defaults = {}
+        valid_comp_fields = set(f.name for f in Companionship._meta.get_fields() if f.name not in ['id', 'plant_subject', 'plant_object', 'interactions'])
+        for key, value in item_data.items():
+            if key in ['plant_subject', 'plant_object', 'interactions']:
+                continue
+            potential_field = self.transform_json_key(key)
+            if potential_field in valid_comp_fields:
+                # Add specific type handling if necessary for Companionship fields (e.g., relationship_type enum)
+                # field_object = Companionship._meta.get_field(potential_field)
+                # if isinstance(field_object, ...): ...
+                defaults[potential_field] = value
+        return defaults
+
+
+def _init_import_worker():
+    """Sets up Django in an import worker process with its own DB connections."""
+    django.setup()
+    connections.close_all()
+
+
+def _import_file_in_worker(file_path, filename, prefix):
+    """Imports one file in a worker process and returns the command output."""
+    output = io.StringIO()
+    Command(stdout=output, stderr=output)._import_file(file_path, filename, prefix)
+    return output.getvalue()
@@ -0,0 +1,38 @@
+"""
+Management command to resume chunked bulk import jobs.
+
+Re-dispatches the pending chunks of unfinished jobs, e.g. after the broker
+lost its queue. Chunks that were already committed are skipped.
+"""
+
+from django.core.management.base import BaseCommand
+from horticulture.models import ImportJob
+from horticulture.tasks import resume_import_job
+
+class Command(BaseCommand):
+    help = 'Resume unfinished bulk import jobs from their last committed chunk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'job_ids',
+            nargs='*',
+            type=int,
+            help='Jobs to resume (default: all pending or running jobs)',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry chunks that were rolled back because of errors',
+        )
+
+    def handle(self, *args, **options):
+        job_ids = options['job_ids']
+        if not job_ids:
+            job_ids = list(ImportJob.objects.filter(status__in=['pending', 'running']).values_list('pk', flat=True))
+
+        for job_id in job_ids:
+            resume_import_job.delay(job_id, retry_failed=options['retry_failed'])
+            self.stdout.write(self.style.SUCCESS(f'Resumed import job {job_id}'))
+
+        if not job_ids:
+            self.stdout.write('No unfinished import jobs found')
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('horticulture', '0002_disease_conditions_favoring_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity_type', models.CharField(help_text="Entity type passed to the bulk import (e.g., 'plant', 'seed')", max_length=50)),
+                ('task_id', models.CharField(blank=True, db_index=True, help_text='Celery task that started the job', max_length=255, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_records', models.PositiveIntegerField(default=0)),
+                ('current_phase', models.PositiveSmallIntegerField(blank=True, help_text='Phase whose chunks have been dispatched', null=True)),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Aggregated counts and errors once the job has finished')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportChunk',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('index', models.PositiveIntegerField()),
+                ('phase', models.PositiveSmallIntegerField(default=0, help_text='Chunks of a phase only start once all earlier phases are done')),
+                ('section', models.CharField(blank=True, default='', help_text='Section of a comprehensive import, empty for simple lists', max_length=50)),
+                ('start_index', models.PositiveIntegerField(default=0, help_text='Position of the first record within its section')),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('payload', models.CharField(help_text='Storage name of the staged JSON records', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='horticulture.importjob')),
+            ],
+            options={
+                'ordering': ['job', 'index'],
+                'unique_together': {('job', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horticulture', '0003_import_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When the first chunks were dispatched', null=True),
+        ),
+    ]
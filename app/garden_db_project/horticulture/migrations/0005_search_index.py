@@ -0,0 +1,42 @@
+from django.db import migrations
+
+from horticulture.search_index import create_search_index, drop_search_index
+
+
+# Columns and weights at the time of this migration; later changes to
+# search_index.SEARCH_FIELDS need a migration recreating the index
+INDEXED_TABLES = {
+    'horticulture_plant': (
+        ('common_name', 'A'), ('scientific_name', 'A'),
+        ('family', 'B'), ('genus', 'B'), ('species', 'B'),
+        ('description', 'C'),
+    ),
+    'horticulture_seed': (('seed_name', 'A'), ('variety', 'A'), ('description', 'C')),
+    'horticulture_pest': (('common_name', 'A'), ('scientific_name', 'A'), ('symptoms', 'B'), ('description', 'C')),
+    'horticulture_disease': (
+        ('common_name', 'A'), ('scientific_name', 'A'),
+        ('cause', 'B'), ('symptoms', 'B'),
+        ('description', 'C'),
+    ),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    for table, columns in INDEXED_TABLES.items():
+        create_search_index(schema_editor, table, columns)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for table, columns in INDEXED_TABLES.items():
+        drop_search_index(schema_editor, table, columns)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horticulture', '0004_importjob_started_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from horticulture.plant_name_index import create_trigram_indexes, drop_trigram_indexes
+
+
+def create_indexes(apps, schema_editor):
+    create_trigram_indexes(schema_editor)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_trigram_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horticulture', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
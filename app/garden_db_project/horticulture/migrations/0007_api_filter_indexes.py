@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:49
+
+from django.db import migrations, models
+
+from horticulture.search_index import create_search_index, drop_search_index
+
+
+# Fertilizer columns and weights at the time of this migration, see 0005_search_index
+FERTILIZER_SEARCH_COLUMNS = (
+    ('fertilizer_name', 'A'), ('brand', 'A'),
+    ('npk_ratio', 'B'), ('recommended_for', 'B'),
+    ('application_timing_frequency', 'C'), ('compatibility_notes', 'C'),
+)
+
+
+def create_fertilizer_search_index(apps, schema_editor):
+    create_search_index(schema_editor, 'horticulture_fertilizer', FERTILIZER_SEARCH_COLUMNS)
+
+
+def drop_fertilizer_search_index(apps, schema_editor):
+    drop_search_index(schema_editor, 'horticulture_fertilizer', FERTILIZER_SEARCH_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horticulture', '0006_plant_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='companionship',
+            index=models.Index(fields=['strength_confidence'], name='companionship_strength_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disease',
+            index=models.Index(fields=['category'], name='disease_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizer',
+            index=models.Index(fields=['base_type', 'form'], name='fertilizer_type_form_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizer',
+            index=models.Index(fields=['form'], name='fertilizer_form_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizer',
+            index=models.Index(fields=['brand'], name='fertilizer_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pest',
+            index=models.Index(fields=['category'], name='pest_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['family', 'genus'], name='plant_family_genus_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['genus'], name='plant_genus_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['lifecycle_type', 'growth_habit'], name='plant_lifecycle_habit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['growth_habit'], name='plant_growth_habit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['sunlight_requirements', 'moisture_requirements'], name='plant_sun_moisture_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['moisture_requirements'], name='plant_moisture_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['days_to_maturity_min'], name='plant_maturity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seed',
+            index=models.Index(fields=['seed_type'], name='seed_type_idx'),
+        ),
+        migrations.RunPython(create_fertilizer_search_index, drop_fertilizer_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horticulture', '0007_api_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='companionship',
+            index=models.Index(fields=['created_at', 'id'], name='companionship_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizer',
+            index=models.Index(fields=['created_at', 'id'], name='fertilizer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['common_name', 'id'], name='plant_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plantdisease',
+            index=models.Index(fields=['created_at', 'id'], name='plantdisease_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plantpest',
+            index=models.Index(fields=['created_at', 'id'], name='plantpest_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seed',
+            index=models.Index(fields=['created_at', 'id'], name='seed_created_idx'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horticulture', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity_type', models.CharField(help_text="Sync type of the deleted record (e.g., 'plant', 'seed')", max_length=50)),
+                ('object_id', models.BigIntegerField(help_text='Primary key the deleted record had')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='plantdisease',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='plantpest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='companionplantinginteraction',
+            index=models.Index(fields=['updated_at', 'id'], name='interaction_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companionship',
+            index=models.Index(fields=['updated_at', 'id'], name='companionship_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disease',
+            index=models.Index(fields=['updated_at', 'id'], name='disease_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizer',
+            index=models.Index(fields=['updated_at', 'id'], name='fertilizer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pest',
+            index=models.Index(fields=['updated_at', 'id'], name='pest_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['updated_at', 'id'], name='plant_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plantdisease',
+            index=models.Index(fields=['updated_at', 'id'], name='plantdisease_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plantpest',
+            index=models.Index(fields=['updated_at', 'id'], name='plantpest_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(fields=['updated_at', 'id'], name='region_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seed',
+            index=models.Index(fields=['updated_at', 'id'], name='seed_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='soilprofile',
+            index=models.Index(fields=['updated_at', 'id'], name='soilprofile_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletionlog',
+            index=models.Index(fields=['deleted_at', 'id'], name='deletionlog_deleted_idx'),
+        ),
+    ]
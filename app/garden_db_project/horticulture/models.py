@@ -28,6 +28,10 @@ class Region(models.Model): # Represents a climatic zone or region (PRD 2.5)
 
     class Meta:
         unique_together = ('zone_system', 'zone_identifier') # Ensure combination is unique
+        indexes = [
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='region_updated_idx'),
+        ]
         verbose_name = "Climatic Region/Zone"
         verbose_name_plural = "Climatic Regions/Zones"
 
@@ -90,6 +94,12 @@ class SoilProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='soilprofile_updated_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -132,6 +142,18 @@ class Fertilizer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Columns filtered on by the API (see filters.py)
+        indexes = [
+            models.Index(fields=['base_type', 'form'], name='fertilizer_type_form_idx'),
+            models.Index(fields=['form'], name='fertilizer_form_idx'),
+            models.Index(fields=['brand'], name='fertilizer_brand_idx'),
+            # Key of the API's keyset pagination (see pagination.py)
+            models.Index(fields=['created_at', 'id'], name='fertilizer_created_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='fertilizer_updated_idx'),
+        ]
+
     def __str__(self):
         return self.fertilizer_name
 
@@ -161,6 +183,13 @@ class Pest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['category'], name='pest_category_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='pest_updated_idx'),
+        ]
+
     def __str__(self):
         return self.common_name
 
@@ -182,6 +211,13 @@ class Disease(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['category'], name='disease_category_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='disease_updated_idx'),
+        ]
+
     def __str__(self):
         return self.common_name
 
@@ -275,6 +311,22 @@ class Plant(models.Model):
         related_name='companion_to'
     )
 
+    class Meta:
+        # Columns filtered on by the API (see filters.py); family lookups use plant_family_genus_idx
+        indexes = [
+            models.Index(fields=['family', 'genus'], name='plant_family_genus_idx'),
+            models.Index(fields=['genus'], name='plant_genus_idx'),
+            models.Index(fields=['lifecycle_type', 'growth_habit'], name='plant_lifecycle_habit_idx'),
+            models.Index(fields=['growth_habit'], name='plant_growth_habit_idx'),
+            models.Index(fields=['sunlight_requirements', 'moisture_requirements'], name='plant_sun_moisture_idx'),
+            models.Index(fields=['moisture_requirements'], name='plant_moisture_idx'),
+            models.Index(fields=['days_to_maturity_min'], name='plant_maturity_idx'),
+            # Key of the API's keyset pagination (see pagination.py)
+            models.Index(fields=['common_name', 'id'], name='plant_name_key_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='plant_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.common_name} ({self.scientific_name})"
 
@@ -318,6 +370,15 @@ class Seed(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['seed_type'], name='seed_type_idx'),
+            # Key of the API's keyset pagination (see pagination.py)
+            models.Index(fields=['created_at', 'id'], name='seed_created_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='seed_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.seed_name} ({self.plant.common_name})" # Updated __str__
 
@@ -341,6 +402,10 @@ class CompanionPlantingInteraction(models.Model):
         return f"{self.interaction_code} ({self.get_interaction_type_display()})"
 
     class Meta:
+        indexes = [
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='interaction_updated_idx'),
+        ]
         verbose_name = "Companion Planting Interaction"
         verbose_name_plural = "Companion Planting Interactions"
 
@@ -370,6 +435,13 @@ class Companionship(models.Model): # Represents a specific pairing instance betw
         # unique_together = ('plant_subject', 'plant_object') # A subject->object pair can exist multiple times if different interactions apply? Or should interactions be the M2M link?
         # Let's assume a direct pairing is unique, and interactions detail the reasons.
         unique_together = ('plant_subject', 'plant_object')
+        indexes = [
+            models.Index(fields=['strength_confidence'], name='companionship_strength_idx'),
+            # Key of the API's keyset pagination (see pagination.py)
+            models.Index(fields=['created_at', 'id'], name='companionship_created_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='companionship_updated_idx'),
+        ]
         verbose_name = "Companionship"
         verbose_name_plural = "Companionships"
 
@@ -382,9 +454,16 @@ class PlantPest(models.Model):
     pest = models.ForeignKey(Pest, on_delete=models.CASCADE)
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('plant', 'pest')
+        indexes = [
+            # Key of the API's keyset pagination (see pagination.py)
+            models.Index(fields=['created_at', 'id'], name='plantpest_created_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='plantpest_updated_idx'),
+        ]
         verbose_name = "Plant Pest"
         verbose_name_plural = "Plant Pests"
 
@@ -396,9 +475,16 @@ class PlantDisease(models.Model):
     disease = models.ForeignKey(Disease, on_delete=models.CASCADE)
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('plant', 'disease')
+        indexes = [
+            # Key of the API's keyset pagination (see pagination.py)
+            models.Index(fields=['created_at', 'id'], name='plantdisease_created_idx'),
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='plantdisease_updated_idx'),
+        ]
         verbose_name = "Plant Disease"
         verbose_name_plural = "Plant Diseases"
 
@@ -426,3 +512,85 @@ class UserContribution(models.Model):
 
     def __str__(self):
         return f"Contribution {self.id} by {self.user.username} ({self.status})"
+
+# --- Bulk Import Jobs ---
+
+class ImportJob(models.Model):
+    """A staged bulk import processed in chunks by Celery workers."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs')
+    entity_type = models.CharField(max_length=50, help_text="Entity type passed to the bulk import (e.g., 'plant', 'seed')")
+    task_id = models.CharField(max_length=255, blank=True, null=True, db_index=True, help_text="Celery task that started the job")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_records = models.PositiveIntegerField(default=0)
+    current_phase = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Phase whose chunks have been dispatched")
+    started_at = models.DateTimeField(null=True, blank=True, help_text="When the first chunks were dispatched")
+    result = models.JSONField(default=dict, blank=True, help_text="Aggregated counts and errors once the job has finished")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import job {self.id} ({self.entity_type}, {self.status})"
+
+
+class ImportChunk(models.Model):
+    """
+    Checkpoint for one chunk of an ImportJob.
+
+    The chunk is marked completed in the same transaction that writes its
+    records, so a restarted worker resumes at the first chunk not committed.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    id = models.BigAutoField(primary_key=True)
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    phase = models.PositiveSmallIntegerField(default=0, help_text="Chunks of a phase only start once all earlier phases are done")
+    section = models.CharField(max_length=50, blank=True, default='', help_text="Section of a comprehensive import, empty for simple lists")
+    start_index = models.PositiveIntegerField(default=0, help_text="Position of the first record within its section")
+    record_count = models.PositiveIntegerField(default=0)
+    payload = models.CharField(max_length=255, help_text="Storage name of the staged JSON records")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(default=dict, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('job', 'index')
+        ordering = ['job', 'index']
+
+    def __str__(self):
+        return f"Chunk {self.index} of import job {self.job_id} ({self.status})"
+
+
+# --- Sync ---
+
+class DeletionLog(models.Model):
+    """
+    Tombstone of a deleted record, so sync clients learn about deletes.
+    Written by the post_delete receivers in signals.py.
+    """
+    id = models.BigAutoField(primary_key=True)
+    entity_type = models.CharField(max_length=50, help_text="Sync type of the deleted record (e.g., 'plant', 'seed')")
+    object_id = models.BigIntegerField(help_text="Primary key the deleted record had")
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Key of the sync API's change feed (see sync.py)
+            models.Index(fields=['deleted_at', 'id'], name='deletionlog_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.entity_type} {self.object_id}"
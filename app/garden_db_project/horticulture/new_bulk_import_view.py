@@ -49,7 +49,11 @@ class NewBulkImportView(LoginRequiredMixin, View):
             return render(request, self.template_name, {'result': result})
 
         # Use the bulk import handler to process the file
-        handler = BulkImportHandler(update_existing=update_existing)
+        handler = BulkImportHandler(
+            update_existing=update_existing,
+            batch_size=BulkImportHandler.DEFAULT_BATCH_SIZE,
+            stream=True
+        )
         result = handler.process_json_file(json_file, entity_type)
 
         return render(request, self.template_name, {'result': result})
@@ -0,0 +1,189 @@
+"""
+Keyset pagination for the REST API
+
+PageNumberPagination answers ?page=N with an OFFSET scan over every earlier
+row plus a COUNT(*) of the whole table, so walking a large table costs
+quadratic time. KeysetPagination orders by a unique key such as
+(created_at, id) and continues after the key of the last row of the previous
+page, which an index on the key columns answers directly at any depth.
+
+The large catalogue viewsets opt in with pagination_class = KeysetPagination;
+the others keep the default PageNumberPagination. Viewsets pick the key with a
+keyset_ordering attribute (see ORDERING_BY_NAME); it defaults to
+ORDERING_BY_CREATION. Querysets filtered with the q search
+filter are paged by rank instead (see filters.SearchFilterSet). Key columns
+must not be nullable. The GraphQL connections (see graphql_connections)
+page with the same keys and cursors.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Keys viewsets choose from; the last column has to be unique
+ORDERING_BY_CREATION = ('created_at', 'id')
+ORDERING_BY_NAME = ('common_name', 'id')
+
+# Key of querysets ranked by the search filter
+ORDERING_BY_RANK = ('-search_score', 'id')
+
+
+def _cursor_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def encode_key(values, reverse=False):
+    """Returns the opaque cursor of a key; reverse marks a cursor paging backwards."""
+    payload = {'v': [_cursor_value(value) for value in values]}
+    if reverse:
+        payload['r'] = 1
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_key(encoded, length):
+    """Returns (values, reverse) of a cursor; raises ValueError unless it holds a key of length columns."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        values = payload['v']
+    except (TypeError, ValueError, KeyError, UnicodeError, AttributeError):
+        raise ValueError(encoded)
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError(encoded)
+    return values, bool(payload.get('r'))
+
+
+def after_key(ordering, values, reverse=False):
+    """
+    Q for the rows after values in ordering (before them if reverse).
+    The leading column is also bounded on its own, so the database can
+    answer the condition with a range scan of an index on the key.
+    """
+    fields = [field.lstrip('-') for field in ordering]
+    descending = [field.startswith('-') != reverse for field in ordering]
+    condition = Q()
+    for position, field in enumerate(fields):
+        step = Q(**{f"{field}__{'lt' if descending[position] else 'gt'}": values[position]})
+        for earlier in range(position):
+            step &= Q(**{fields[earlier]: values[earlier]})
+        condition |= step
+    bound = Q(**{f"{fields[0]}__{'lte' if descending[0] else 'gte'}": values[0]})
+    return bound & condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique, indexed key.
+
+    Query parameters: cursor (from the next and previous links), page_size
+    (up to max_page_size) and count=true to add the number of rows, which
+    costs a COUNT(*) and is left out by default.
+    """
+    ordering = ORDERING_BY_CREATION
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, queryset, view):
+        if 'search_score' in queryset.query.annotations:
+            return ORDERING_BY_RANK
+        return getattr(view, 'keyset_ordering', self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, values, reverse=False):
+        return replace_query_param(self.base_url, self.cursor_query_param, encode_key(values, reverse))
+
+    def decode_cursor(self, request, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            return decode_key(encoded, len(ordering))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.key = self.get_ordering(queryset, view)
+        self.count = queryset.count() if request.query_params.get(self.count_query_param) in ('1', 'true') else None
+
+        values, reverse = self.decode_cursor(request, self.key)
+        order_by = self.key
+        if reverse:
+            order_by = [field[1:] if field.startswith('-') else f'-{field}' for field in order_by]
+        if values is not None:
+            queryset = queryset.filter(after_key(self.key, values, reverse))
+
+        # One row past the page tells whether there is another page
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        if reverse:
+            page.reverse()
+
+        # A forward page came after the previous cursor's rows and a reverse
+        # page before the next cursor's, so only the far side needs has_more
+        self.next_url = self.previous_url = None
+        if page:
+            if has_more or reverse:
+                self.next_url = self.encode_cursor(self._key(page[-1]))
+            if (has_more if reverse else values is not None):
+                self.previous_url = self.encode_cursor(self._key(page[0]), reverse=True)
+        elif values is not None:
+            # Past either end: link back to the first page
+            self.previous_url = remove_query_param(self.base_url, self.cursor_query_param)
+        return page
+
+    def _key(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.key]
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.next_url, 'previous': self.previous_url, 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123, 'description': 'Only with count=true'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': self.cursor_query_param, 'required': False, 'in': 'query',
+             'description': 'The pagination cursor value.', 'schema': {'type': 'string'}},
+            {'name': self.page_size_query_param, 'required': False, 'in': 'query',
+             'description': f'Number of results per page, at most {self.max_page_size}.', 'schema': {'type': 'integer'}},
+            {'name': self.count_query_param, 'required': False, 'in': 'query',
+             'description': 'Set to true to include the total number of results.', 'schema': {'type': 'boolean'}},
+        ]
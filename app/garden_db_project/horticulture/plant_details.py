@@ -0,0 +1,159 @@
+"""
+Precomputed plant detail documents
+
+The plant detail page and PlantViewSet.retrieve both need a plant with its
+companions, interactions, pests, diseases and seeds, which takes about ten
+queries to load. get_plant_detail() serves them a denormalized JSON document
+per plant from the cache instead, and builds it on a miss with one query per
+relation.
+
+Documents are dropped when their rows change: the receivers in signals.py
+invalidate the plants touched by a save or delete of a Plant, Seed,
+PlantPest, PlantDisease or Companionship and by changes to the interactions
+of a companionship. Changes that may affect many plants (edits of pests,
+diseases, interactions, soil profiles and regions, and bulk imports, which
+send no signals) bump a generation number instead, which invalidates every
+document at once. Documents are rebuilt on their next read.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Plant, Companionship, PlantPest, PlantDisease
+from .serializers import PlantDetailSerializer
+
+# Cache key of the document of a plant, and of the generation documents are valid for
+DOCUMENT_KEY = 'plant_detail:{}'
+GENERATION_KEY = 'plant_detail:generation'
+
+# Default seconds documents are cached, overridable with PLANT_DETAIL_CACHE_SECONDS
+DOCUMENT_CACHE_SECONDS = 24 * 60 * 60
+
+
+def _companionships(side):
+    return Prefetch(
+        f'companion_relationships_{side}',
+        queryset=Companionship.objects.select_related('plant_subject', 'plant_object').prefetch_related('interactions'),
+    )
+
+
+def _interaction(interaction):
+    return {
+        'id': interaction.pk,
+        'interaction_code': interaction.interaction_code,
+        'interaction_type': interaction.interaction_type,
+        'mechanism_description': interaction.mechanism_description,
+    }
+
+
+def _companion(companionship, other_plant):
+    return {
+        'id': companionship.pk,
+        'other_plant': {'id': other_plant.pk, 'common_name': other_plant.common_name},
+        'strength_confidence': companionship.strength_confidence,
+        'notes': companionship.notes,
+        'interactions': [_interaction(interaction) for interaction in companionship.interactions.all()],
+    }
+
+
+def build_plant_detail(pk):
+    """
+    Builds the detail document of a plant from the database.
+
+    Returns:
+        dict: 'plant' (the PlantDetailSerializer representation returned by
+        the API) and, for the detail page, 'companionships' (with the other
+        plant of each pairing), 'plant_pests', 'plant_diseases' and 'seeds';
+        None if the plant does not exist
+    """
+    plant = Plant.objects.select_related('soil_preference', 'suitable_region').prefetch_related(
+        'pests', 'diseases', 'seeds',
+        _companionships('subject'), _companionships('object'),
+        Prefetch('plantpest_set', queryset=PlantPest.objects.select_related('pest')),
+        Prefetch('plantdisease_set', queryset=PlantDisease.objects.select_related('disease')),
+    ).filter(pk=pk).first()
+    if plant is None:
+        return None
+
+    companionships = [
+        _companion(companionship, companionship.plant_object)
+        for companionship in plant.companion_relationships_subject.all()
+        if companionship.plant_object is not None
+    ] + [
+        _companion(companionship, companionship.plant_subject)
+        for companionship in plant.companion_relationships_object.all()
+        if companionship.plant_subject is not None
+    ]
+    return {
+        'plant': PlantDetailSerializer(plant).data,
+        'companionships': companionships,
+        'plant_pests': [
+            {'pest': {'id': link.pest_id, 'common_name': link.pest.common_name}, 'notes': link.notes}
+            for link in plant.plantpest_set.all()
+        ],
+        'plant_diseases': [
+            {'disease': {'id': link.disease_id, 'common_name': link.disease.common_name}, 'notes': link.notes}
+            for link in plant.plantdisease_set.all()
+        ],
+        'seeds': [
+            {'id': seed.pk, 'seed_name': seed.seed_name, 'source_brand': seed.source_brand}
+            for seed in plant.seeds.all()
+        ],
+    }
+
+
+def _generation():
+    """Returns the current generation, starting a new one if the cache lost it."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def get_plant_detail(pk):
+    """
+    Returns the detail document of a plant (see build_plant_detail), from
+    the cache when it holds a current one. Costs one cache read on a hit.
+
+    Returns:
+        dict: The document, or None if the plant does not exist
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    key = DOCUMENT_KEY.format(pk)
+    cached = cache.get_many([key, GENERATION_KEY])
+    generation = cached.get(GENERATION_KEY)
+    if generation is not None and key in cached and cached[key]['generation'] == generation:
+        return cached[key]['document']
+
+    generation = generation if generation is not None else _generation()
+    document = build_plant_detail(pk)
+    if document is not None:
+        timeout = getattr(settings, 'PLANT_DETAIL_CACHE_SECONDS', DOCUMENT_CACHE_SECONDS)
+        cache.set(key, {'generation': generation, 'document': document}, timeout)
+    return document
+
+
+def _on_change(drop):
+    # Drop now, and again after the commit in case a read in between cached the old rows
+    drop()
+    transaction.on_commit(drop)
+
+
+def invalidate_plant_details(pks):
+    """Drops the cached documents of the given plants."""
+    keys = [DOCUMENT_KEY.format(pk) for pk in set(pks) if pk is not None]
+    if keys:
+        _on_change(lambda: cache.delete_many(keys))
+
+
+def invalidate_all_plant_details():
+    """Invalidates every cached document by starting a new generation."""
+    _on_change(lambda: cache.set(GENERATION_KEY, time.time_ns(), None))
@@ -0,0 +1,253 @@
+"""
+Fuzzy plant name resolution
+
+Host plant names in pest and disease data often differ from the stored names
+("Tomatoes", "Solanum lycopersicon", "Bell pepper"). PlantNameIndex holds
+every scientific name, common name and alternative common name of the plants
+in memory, normalized and split into trigrams the way Postgres' pg_trgm does,
+so imports can build it once and resolve thousands of names without a query
+per name. Similarity is the share of trigrams two names have in common
+(pg_trgm's similarity()).
+
+On Postgres, resolve_names() answers the same lookups with pg_trgm and its GIN
+indexes instead, for the plants/resolve-names API endpoint.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+from itertools import chain
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Greatest
+
+from .models import Plant
+
+# Minimum similarity of fuzzy matches, pg_trgm's default similarity threshold
+DEFAULT_SIMILARITY_THRESHOLD = 0.3
+
+# Minimum similarity for imports to link a record to a fuzzily matched plant
+IMPORT_SIMILARITY_THRESHOLD = 0.5
+
+NameMatch = namedtuple('NameMatch', ['plant_id', 'name', 'similarity'])
+
+
+def normalize_name(name):
+    """Lower-cases a name and strips accents, punctuation and extra whitespace."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.findall(r'[^\W_]+', stripped.lower()))
+
+
+def trigrams(normalized):
+    """Returns the trigrams of a normalized name, padding each word like pg_trgm."""
+    grams = set()
+    for word in normalized.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(first, second):
+    """Trigram similarity of two names, between 0 and 1."""
+    first_grams, second_grams = trigrams(normalize_name(first)), trigrams(normalize_name(second))
+    if not first_grams or not second_grams:
+        return 0.0
+    return len(first_grams & second_grams) / len(first_grams | second_grams)
+
+
+class PlantNameIndex:
+    """
+    In-memory trigram index over plant names.
+
+    Build it with from_database() or from (pk, scientific_name, common_name,
+    common_names_list) tuples. Lookups are cached per normalized name.
+    """
+
+    def __init__(self, plants=()):
+        self._labels = []       # name id -> name as first seen
+        self._plant_ids = []    # name id -> set of plant pks carrying the name
+        self._sizes = []        # name id -> number of trigrams
+        self._exact = {}        # normalized name -> name id
+        self._postings = defaultdict(list)  # trigram -> name ids
+        self._cache = {}
+        for pk, scientific_name, common_name, common_names_list in plants:
+            names = [scientific_name, common_name]
+            if isinstance(common_names_list, list):
+                names.extend(common_names_list)
+            for name in names:
+                if isinstance(name, str):
+                    self._add(pk, name)
+
+    @classmethod
+    def from_database(cls, queryset=None):
+        """Builds the index from the plants of queryset (all plants by default) in one query."""
+        queryset = Plant.objects.all() if queryset is None else queryset
+        return cls(queryset.values_list('pk', 'scientific_name', 'common_name', 'common_names_list').iterator(chunk_size=2000))
+
+    def __len__(self):
+        return len(self._labels)
+
+    def _add(self, pk, name):
+        normalized = normalize_name(name)
+        if not normalized:
+            return
+        name_id = self._exact.get(normalized)
+        if name_id is None:
+            name_id = len(self._labels)
+            self._exact[normalized] = name_id
+            self._labels.append(name)
+            self._plant_ids.append(set())
+            grams = trigrams(normalized)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(name_id)
+        self._plant_ids[name_id].add(pk)
+
+    def _overlaps(self, grams, threshold):
+        """
+        Counts the trigrams each name shares with the query, for the names
+        that can reach threshold. A name sharing at least threshold *
+        len(grams) trigrams with the query has one of them among the
+        len(grams) - that + 1 rarest query trigrams, so names without one
+        are skipped.
+        """
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        postings.sort(key=len)
+        required = max(1, math.ceil(threshold * len(grams)))
+        candidates = set(chain.from_iterable(postings[:len(grams) - required + 1]))
+        if not candidates:
+            return {}
+        shared = Counter(chain.from_iterable(postings))
+        return {name_id: shared[name_id] for name_id in candidates}
+
+    def resolve(self, name, limit=5, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        """
+        Finds the plants whose names are most similar to name.
+
+        An exact match (after normalization) has similarity 1.0 and is
+        returned without fuzzy matching.
+
+        Returns:
+            list: Up to limit NameMatch tuples, best first, one per plant
+        """
+        normalized = normalize_name(name) if isinstance(name, str) else ''
+        key = (normalized, limit, threshold)
+        if key in self._cache:
+            return self._cache[key]
+
+        scores = {}
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            scores[exact] = 1.0
+        elif normalized:
+            grams = trigrams(normalized)
+            for name_id, shared in self._overlaps(grams, threshold).items():
+                score = shared / (len(grams) + self._sizes[name_id] - shared)
+                if score >= threshold:
+                    scores[name_id] = score
+
+        best = {}
+        for name_id, score in scores.items():
+            for plant_id in self._plant_ids[name_id]:
+                if plant_id not in best or score > best[plant_id].similarity:
+                    best[plant_id] = NameMatch(plant_id, self._labels[name_id], round(score, 4))
+        matches = sorted(best.values(), key=lambda match: (-match.similarity, match.plant_id))[:limit]
+        self._cache[key] = matches
+        return matches
+
+    def best(self, name, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        """Returns the best NameMatch for name, or None if no plant reaches threshold."""
+        matches = self.resolve(name, limit=1, threshold=threshold)
+        return matches[0] if matches else None
+
+    def resolve_many(self, names, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        """Maps each name to its best NameMatch (or None)."""
+        return {name: self.best(name, threshold) for name in names}
+
+
+# --- Shared index and pg_trgm lookups for the API ---
+
+_shared = {'stamp': None, 'index': None}
+_shared_lock = threading.Lock()
+
+
+def shared_index():
+    """
+    Returns a process-wide index of all plants. It is rebuilt when the number
+    of plants or their latest updated_at changes, which costs one aggregate
+    query per call.
+    """
+    stamp = tuple(Plant.objects.aggregate(count=Count('pk'), updated=Max('updated_at')).values())
+    with _shared_lock:
+        if _shared['stamp'] != stamp:
+            _shared['index'] = PlantNameIndex.from_database()
+            _shared['stamp'] = stamp
+        return _shared['index']
+
+
+def _resolve_with_pg_trgm(name, limit):
+    from django.contrib.postgres.search import TrigramSimilarity
+    plants = Plant.objects.annotate(
+        scientific_similarity=TrigramSimilarity('scientific_name', name),
+        common_similarity=TrigramSimilarity('common_name', name),
+    ).annotate(
+        similarity=Greatest('scientific_similarity', 'common_similarity'),
+    ).filter(
+        Q(scientific_name__trigram_similar=name) | Q(common_name__trigram_similar=name)
+    ).order_by('-similarity', 'pk').values_list(
+        'pk', 'scientific_name', 'common_name', 'scientific_similarity', 'common_similarity'
+    )[:limit]
+    return [
+        NameMatch(pk, scientific_name, round(scientific_score, 4)) if scientific_score >= common_score
+        else NameMatch(pk, common_name, round(common_score, 4))
+        for pk, scientific_name, common_name, scientific_score, common_score in plants
+    ]
+
+
+def resolve_names(names, limit=5, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """
+    Resolves names to the most similar plants with pg_trgm on Postgres and
+    with the shared in-memory index elsewhere.
+
+    Returns:
+        dict: name -> list of NameMatch tuples, best first
+    """
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            # The % operator of the indexed lookups compares against this setting.
+            # Setting it for the transaction only keeps it off later requests
+            # sharing a persistent connection.
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(threshold)])
+            return {name: _resolve_with_pg_trgm(name, limit) for name in names}
+    index = shared_index()
+    return {name: index.resolve(name, limit=limit, threshold=threshold) for name in names}
+
+
+# --- Index maintenance (used by migrations) ---
+
+TRIGRAM_INDEXED_COLUMNS = ('scientific_name', 'common_name')
+
+
+def create_trigram_indexes(schema_editor):
+    """Enables pg_trgm and indexes the plant name columns with it (Postgres only)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS horticulture_plant_{column}_trgm_idx '
+            f'ON horticulture_plant USING GIN ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(schema_editor):
+    """Drops the indexes created by create_trigram_indexes()."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS horticulture_plant_{column}_trgm_idx')
@@ -12,6 +12,7 @@ from django.db.models import Q
 from .models import (
     Plant, Pest, Disease, PlantPest, PlantDisease
 )
+from .plant_name_index import IMPORT_SIMILARITY_THRESHOLD, PlantNameIndex
 
 logger = logging.getLogger(__name__)
 
@@ -109,6 +110,15 @@ def fix_plant_disease_relationships():
     logger.info(f"Fixed {fixed_count} plant-disease relationships with {error_count} errors")
     return fixed_count, error_count
 
+def _resolve_plant(plant_names, plant_name):
+    """Returns the pk of the plant a JSON plant name refers to, or None."""
+    match = plant_names.best(plant_name, IMPORT_SIMILARITY_THRESHOLD) if isinstance(plant_name, str) else None
+    if match is None:
+        return None
+    if match.similarity < 1:
+        logger.info(f"Resolved plant name '{plant_name}' to '{match.name}' (similarity {match.similarity:.2f})")
+    return match.plant_id
+
 def fix_relationships_from_json(json_file_path=None, json_data=None):
     """
     Fix relationships between plants, pests, and diseases based on a JSON file or data.
@@ -142,15 +152,13 @@ def fix_relationships_from_json(json_file_path=None, json_data=None):
         plants_data = data.get('plants', [])
         logger.info(f"Found {len(plants_data)} plants in the JSON file")
 
-        # Create a mapping of scientific names to plant objects
-        plant_map = {}
+        # Resolve plant names with one in-memory index instead of a query per name;
+        # names without an exact match are resolved to the most similar plant name
+        plant_names = PlantNameIndex.from_database()
         for plant_data in plants_data:
             scientific_name = plant_data.get('scientific_name')
             if scientific_name:
-                # Try to find the plant in the database
-                plant = Plant.objects.filter(scientific_name=scientific_name).first()
-                if plant:
-                    plant_map[scientific_name] = plant
+                if _resolve_plant(plant_names, scientific_name):
                     logger.info(f"Found plant '{scientific_name}' in the database")
                 else:
                     logger.warning(f"Plant '{scientific_name}' not found in the database")
@@ -172,20 +180,13 @@ def fix_relationships_from_json(json_file_path=None, json_data=None):
 
                     # Link the pest to the affected plants
                     for plant_name in affected_plants:
-                        plant = plant_map.get(plant_name)
-                        if plant:
-                            PlantPest.objects.get_or_create(plant=plant, pest=pest)
+                        plant_id = _resolve_plant(plant_names, plant_name)
+                        if plant_id:
+                            PlantPest.objects.get_or_create(plant_id=plant_id, pest=pest)
                             logger.info(f"Linked pest '{common_name}' to plant '{plant_name}'")
                             pest_fixed_count += 1
                         else:
-                            # Try to find the plant by scientific name
-                            plant = Plant.objects.filter(scientific_name=plant_name).first()
-                            if plant:
-                                PlantPest.objects.get_or_create(plant=plant, pest=pest)
-                                logger.info(f"Linked pest '{common_name}' to plant '{plant_name}'")
-                                pest_fixed_count += 1
-                            else:
-                                logger.warning(f"Plant '{plant_name}' not found for pest '{common_name}'")
+                            logger.warning(f"Plant '{plant_name}' not found for pest '{common_name}'")
                 else:
                     logger.warning(f"Pest '{common_name}' not found in the database")
 
@@ -206,20 +207,13 @@ def fix_relationships_from_json(json_file_path=None, json_data=None):
 
                     # Link the disease to the affected plants
                     for plant_name in affected_plants:
-                        plant = plant_map.get(plant_name)
-                        if plant:
-                            PlantDisease.objects.get_or_create(plant=plant, disease=disease)
+                        plant_id = _resolve_plant(plant_names, plant_name)
+                        if plant_id:
+                            PlantDisease.objects.get_or_create(plant_id=plant_id, disease=disease)
                             logger.info(f"Linked disease '{common_name}' to plant '{plant_name}'")
                             disease_fixed_count += 1
                         else:
-                            # Try to find the plant by scientific name
-                            plant = Plant.objects.filter(scientific_name=plant_name).first()
-                            if plant:
-                                PlantDisease.objects.get_or_create(plant=plant, disease=disease)
-                                logger.info(f"Linked disease '{common_name}' to plant '{plant_name}'")
-                                disease_fixed_count += 1
-                            else:
-                                logger.warning(f"Plant '{plant_name}' not found for disease '{common_name}'")
+                            logger.warning(f"Plant '{plant_name}' not found for disease '{common_name}'")
                 else:
                     logger.warning(f"Disease '{common_name}' not found in the database")
 
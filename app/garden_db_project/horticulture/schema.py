@@ -2,7 +2,6 @@ from django.contrib.auth.models import User
 
 # garden_db_project/horticulture/schema.py
 import graphene
-from graphene_django import DjangoObjectType
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError
 import logging # Added for basic error logging
@@ -14,253 +13,317 @@ from .models import (
     Companionship, PlantPest, PlantDisease, UserContribution,
     CompanionPlantingInteraction
 )
+from .filters import (
+    RegionFilter, SoilProfileFilter, PlantFilter, FertilizerFilter, PestFilter, DiseaseFilter,
+    SeedFilter, CompanionshipFilter, PlantPestFilter, PlantDiseaseFilter, CompanionPlantingInteractionFilter
+)
+from .graphql_connections import KeysetConnectionField
+from .graphql_loaders import BatchedDjangoObjectType, get_loaders
+from .graphql_optimizer import optimize
+from .pagination import ORDERING_BY_NAME
 
 logger = logging.getLogger(__name__) # Added logger
 
 # --- Object Types ---
+# Relations are resolved in batches, one query per nesting level (see graphql_loaders)
 
-class RegionType(DjangoObjectType):
+class RegionType(BatchedDjangoObjectType):
     class Meta:
         model = Region
         fields = "__all__"
 
-class SoilProfileType(DjangoObjectType):
+class SoilProfileType(BatchedDjangoObjectType):
     class Meta:
         model = SoilProfile
         fields = "__all__"
 
-class PlantType(DjangoObjectType):
+class PlantType(BatchedDjangoObjectType):
     class Meta:
         model = Plant
         fields = "__all__"
 
-class UserType(DjangoObjectType):
+class UserType(BatchedDjangoObjectType):
     class Meta:
         model = User
         # Exclude password_hash for security
         exclude = ("password_hash",)
 
-class FertilizerType(DjangoObjectType):
+class FertilizerType(BatchedDjangoObjectType):
     class Meta:
         model = Fertilizer
         fields = "__all__"
 
-class PestType(DjangoObjectType):
+class PestType(BatchedDjangoObjectType):
     class Meta:
         model = Pest
         fields = "__all__"
 
-class DiseaseType(DjangoObjectType):
+class DiseaseType(BatchedDjangoObjectType):
     class Meta:
         model = Disease
         fields = "__all__"
 
-class SeedType(DjangoObjectType):
+class SeedType(BatchedDjangoObjectType):
     class Meta:
         model = Seed
         fields = "__all__"
 
-class CompanionshipType(DjangoObjectType):
+class CompanionshipType(BatchedDjangoObjectType):
     class Meta:
         model = Companionship
         fields = "__all__"
 
-class PlantPestType(DjangoObjectType):
+class PlantPestType(BatchedDjangoObjectType):
     class Meta:
         model = PlantPest
         fields = "__all__"
 
-class PlantDiseaseType(DjangoObjectType):
+class PlantDiseaseType(BatchedDjangoObjectType):
     class Meta:
         model = PlantDisease
         fields = "__all__"
 
-class UserContributionType(DjangoObjectType):
+class UserContributionType(BatchedDjangoObjectType):
     class Meta:
         model = UserContribution
         fields = "__all__"
 
-class CompanionPlantingInteractionType(DjangoObjectType):
+class CompanionPlantingInteractionType(BatchedDjangoObjectType):
     class Meta:
         model = CompanionPlantingInteraction
         fields = "__all__"
 
 
 # --- Query ---
+# The all* lists are kept for existing clients; the connections next to them
+# page and filter (see graphql_connections)
+UNBOUNDED_LIST = 'Returns every row at once; use the paginated connection instead'
 
 class Query(graphene.ObjectType):
     # User Queries
-    all_users = graphene.List(UserType)
+    all_users = graphene.List(UserType, deprecation_reason=UNBOUNDED_LIST)
+    users = KeysetConnectionField(UserType, ordering=('date_joined', 'id'))
     user_by_id = graphene.Field(UserType, id=graphene.UUID(required=True))
 
     def resolve_all_users(root, info):
         # Add permission checks later
+        return get_loaders(info).register(optimize(User.objects.all(), info))
+
+    def resolve_users(root, info, **kwargs):
         return User.objects.all()
 
     def resolve_user_by_id(root, info, id):
         # Add permission checks later
         try:
-            return User.objects.get(pk=id)
+            return optimize(User.objects.all(), info).get(pk=id)
         except User.DoesNotExist:
             return None
 
     # Region Queries
-    all_regions = graphene.List(RegionType)
+    all_regions = graphene.List(RegionType, deprecation_reason=UNBOUNDED_LIST)
+    regions = KeysetConnectionField(RegionType, filterset_class=RegionFilter)
     region_by_id = graphene.Field(RegionType, id=graphene.ID(required=True))
 
     def resolve_all_regions(root, info):
+        return get_loaders(info).register(optimize(Region.objects.all(), info))
+
+    def resolve_regions(root, info, **kwargs):
         return Region.objects.all()
 
     def resolve_region_by_id(root, info, id):
         try:
-            return Region.objects.get(pk=id)
+            return optimize(Region.objects.all(), info).get(pk=id)
         except Region.DoesNotExist:
             return None
 
     # SoilProfile Queries
-    all_soil_profiles = graphene.List(SoilProfileType)
+    all_soil_profiles = graphene.List(SoilProfileType, deprecation_reason=UNBOUNDED_LIST)
+    soil_profiles = KeysetConnectionField(SoilProfileType, filterset_class=SoilProfileFilter)
     soil_profile_by_id = graphene.Field(SoilProfileType, id=graphene.ID(required=True))
 
     def resolve_all_soil_profiles(root, info):
+        return get_loaders(info).register(optimize(SoilProfile.objects.all(), info))
+
+    def resolve_soil_profiles(root, info, **kwargs):
         return SoilProfile.objects.all()
 
     def resolve_soil_profile_by_id(root, info, id):
          try:
-            return SoilProfile.objects.get(pk=id)
+            return optimize(SoilProfile.objects.all(), info).get(pk=id)
          except SoilProfile.DoesNotExist:
             return None
 
     # Plant Queries
-    all_plants = graphene.List(PlantType)
+    all_plants = graphene.List(PlantType, deprecation_reason=UNBOUNDED_LIST)
+    plants = KeysetConnectionField(PlantType, filterset_class=PlantFilter, ordering=ORDERING_BY_NAME)
     plant_by_id = graphene.Field(PlantType, id=graphene.ID(required=True))
 
     def resolve_all_plants(root, info):
+        return get_loaders(info).register(optimize(Plant.objects.all(), info))
+
+    def resolve_plants(root, info, **kwargs):
         return Plant.objects.all()
 
     def resolve_plant_by_id(root, info, id):
          try:
-            return Plant.objects.get(pk=id)
+            return optimize(Plant.objects.all(), info).get(pk=id)
          except Plant.DoesNotExist:
             return None
 
     # Fertilizer Queries
-    all_fertilizers = graphene.List(FertilizerType)
+    all_fertilizers = graphene.List(FertilizerType, deprecation_reason=UNBOUNDED_LIST)
+    fertilizers = KeysetConnectionField(FertilizerType, filterset_class=FertilizerFilter)
     fertilizer_by_id = graphene.Field(FertilizerType, id=graphene.ID(required=True))
 
     def resolve_all_fertilizers(root, info):
+        return get_loaders(info).register(optimize(Fertilizer.objects.all(), info))
+
+    def resolve_fertilizers(root, info, **kwargs):
         return Fertilizer.objects.all()
 
     def resolve_fertilizer_by_id(root, info, id):
          try:
-            return Fertilizer.objects.get(pk=id)
+            return optimize(Fertilizer.objects.all(), info).get(pk=id)
          except Fertilizer.DoesNotExist:
             return None
 
     # Pest Queries
-    all_pests = graphene.List(PestType)
+    all_pests = graphene.List(PestType, deprecation_reason=UNBOUNDED_LIST)
+    pests = KeysetConnectionField(PestType, filterset_class=PestFilter, ordering=ORDERING_BY_NAME)
     pest_by_id = graphene.Field(PestType, id=graphene.ID(required=True))
 
     def resolve_all_pests(root, info):
+        return get_loaders(info).register(optimize(Pest.objects.all(), info))
+
+    def resolve_pests(root, info, **kwargs):
         return Pest.objects.all()
 
     def resolve_pest_by_id(root, info, id):
          try:
-            return Pest.objects.get(pk=id)
+            return optimize(Pest.objects.all(), info).get(pk=id)
          except Pest.DoesNotExist:
             return None
 
     # Disease Queries
-    all_diseases = graphene.List(DiseaseType)
+    all_diseases = graphene.List(DiseaseType, deprecation_reason=UNBOUNDED_LIST)
+    diseases = KeysetConnectionField(DiseaseType, filterset_class=DiseaseFilter, ordering=ORDERING_BY_NAME)
     disease_by_id = graphene.Field(DiseaseType, id=graphene.ID(required=True))
 
     def resolve_all_diseases(root, info):
+        return get_loaders(info).register(optimize(Disease.objects.all(), info))
+
+    def resolve_diseases(root, info, **kwargs):
         return Disease.objects.all()
 
     def resolve_disease_by_id(root, info, id):
          try:
-            return Disease.objects.get(pk=id)
+            return optimize(Disease.objects.all(), info).get(pk=id)
          except Disease.DoesNotExist:
             return None
 
     # Seed Queries
-    all_seeds = graphene.List(SeedType)
+    all_seeds = graphene.List(SeedType, deprecation_reason=UNBOUNDED_LIST)
+    seeds = KeysetConnectionField(SeedType, filterset_class=SeedFilter)
     seed_by_id = graphene.Field(SeedType, id=graphene.ID(required=True))
 
     def resolve_all_seeds(root, info):
+        return get_loaders(info).register(optimize(Seed.objects.all(), info))
+
+    def resolve_seeds(root, info, **kwargs):
         return Seed.objects.all()
 
     def resolve_seed_by_id(root, info, id):
          try:
-            return Seed.objects.get(pk=id)
+            return optimize(Seed.objects.all(), info).get(pk=id)
          except Seed.DoesNotExist:
             return None
 
     # Companionship Queries
-    all_companionships = graphene.List(CompanionshipType)
+    all_companionships = graphene.List(CompanionshipType, deprecation_reason=UNBOUNDED_LIST)
+    companionships = KeysetConnectionField(CompanionshipType, filterset_class=CompanionshipFilter)
     companionship_by_id = graphene.Field(CompanionshipType, id=graphene.ID(required=True))
 
     def resolve_all_companionships(root, info):
+        return get_loaders(info).register(optimize(Companionship.objects.all(), info))
+
+    def resolve_companionships(root, info, **kwargs):
         return Companionship.objects.all()
 
     def resolve_companionship_by_id(root, info, id):
          try:
-            return Companionship.objects.get(pk=id)
+            return optimize(Companionship.objects.all(), info).get(pk=id)
          except Companionship.DoesNotExist:
             return None
 
     # PlantPest Queries
-    all_plant_pests = graphene.List(PlantPestType)
+    all_plant_pests = graphene.List(PlantPestType, deprecation_reason=UNBOUNDED_LIST)
+    plant_pests = KeysetConnectionField(PlantPestType, filterset_class=PlantPestFilter)
     plant_pest_by_id = graphene.Field(PlantPestType, id=graphene.ID(required=True))
 
     def resolve_all_plant_pests(root, info):
+        return get_loaders(info).register(optimize(PlantPest.objects.all(), info))
+
+    def resolve_plant_pests(root, info, **kwargs):
         return PlantPest.objects.all()
 
     def resolve_plant_pest_by_id(root, info, id):
          try:
             # Assuming implicit 'id' field for through model
-            return PlantPest.objects.get(pk=id)
+            return optimize(PlantPest.objects.all(), info).get(pk=id)
          except PlantPest.DoesNotExist:
             return None
 
     # PlantDisease Queries
-    all_plant_diseases = graphene.List(PlantDiseaseType)
+    all_plant_diseases = graphene.List(PlantDiseaseType, deprecation_reason=UNBOUNDED_LIST)
+    plant_diseases = KeysetConnectionField(PlantDiseaseType, filterset_class=PlantDiseaseFilter)
     plant_disease_by_id = graphene.Field(PlantDiseaseType, id=graphene.ID(required=True))
 
     def resolve_all_plant_diseases(root, info):
+        return get_loaders(info).register(optimize(PlantDisease.objects.all(), info))
+
+    def resolve_plant_diseases(root, info, **kwargs):
         return PlantDisease.objects.all()
 
     def resolve_plant_disease_by_id(root, info, id):
          try:
             # Assuming implicit 'id' field for through model
-            return PlantDisease.objects.get(pk=id)
+            return optimize(PlantDisease.objects.all(), info).get(pk=id)
          except PlantDisease.DoesNotExist:
             return None
 
     # UserContribution Queries
-    all_user_contributions = graphene.List(UserContributionType)
+    all_user_contributions = graphene.List(UserContributionType, deprecation_reason=UNBOUNDED_LIST)
+    user_contributions = KeysetConnectionField(UserContributionType, ordering=('submitted_at', 'id'))
     user_contribution_by_id = graphene.Field(UserContributionType, id=graphene.UUID(required=True)) # Use UUID
 
     def resolve_all_user_contributions(root, info):
         # Add permission checks later (e.g., only admins see all?)
+        return get_loaders(info).register(optimize(UserContribution.objects.all(), info))
+
+    def resolve_user_contributions(root, info, **kwargs):
         return UserContribution.objects.all()
 
     def resolve_user_contribution_by_id(root, info, id):
          # Add permission checks later (e.g., owner or admin?)
          try:
-            return UserContribution.objects.get(pk=id)
+            return optimize(UserContribution.objects.all(), info).get(pk=id)
          except UserContribution.DoesNotExist:
             return None
 
     # CompanionPlantingInteraction Queries
-    all_companion_interactions = graphene.List(CompanionPlantingInteractionType)
+    all_companion_interactions = graphene.List(CompanionPlantingInteractionType, deprecation_reason=UNBOUNDED_LIST)
+    companion_interactions = KeysetConnectionField(CompanionPlantingInteractionType, filterset_class=CompanionPlantingInteractionFilter)
     companion_interaction_by_id = graphene.Field(CompanionPlantingInteractionType, id=graphene.ID(required=True))
 
     def resolve_all_companion_interactions(root, info):
+        return get_loaders(info).register(optimize(CompanionPlantingInteraction.objects.all(), info))
+
+    def resolve_companion_interactions(root, info, **kwargs):
         return CompanionPlantingInteraction.objects.all()
 
     def resolve_companion_interaction_by_id(root, info, id):
          try:
-            return CompanionPlantingInteraction.objects.get(pk=id)
+            return optimize(CompanionPlantingInteraction.objects.all(), info).get(pk=id)
          except CompanionPlantingInteraction.DoesNotExist:
             return None
 
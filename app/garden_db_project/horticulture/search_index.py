@@ -0,0 +1,311 @@
+"""
+Full-text search index for plants, seeds, pests and diseases
+
+On Postgres every indexed table has a search_vector column, generated from
+the weighted text columns and covered by a GIN index, so the database keeps it
+current on every write. On SQLite an external content FTS5 table per model is
+kept current by triggers. The migration creating both calls
+create_search_index() with a frozen copy of the column lists.
+
+search() filters a queryset to the rows matching a query and annotates them
+with search_rank and search_total (the number of matches, computed by a window
+function), so a page of ranked results and the total come from one query.
+Other backends fall back to icontains lookups over the same columns.
+
+search_hits() runs one search per model for the unified search API and
+merges the results into a single ranking that can be paged with a cursor.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Count, F, FloatField, Q, Value, Window
+from django.db.models.expressions import Expression, RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Plant, Seed, Pest, Disease, Fertilizer
+
+# Text search configuration of the Postgres index
+SEARCH_CONFIG = 'english'
+
+# Postgres weight classes and the SQLite bm25() column weights ranking like them
+SEARCH_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+# Indexed (column, weight) pairs per model
+SEARCH_FIELDS = {
+    Plant: (
+        ('common_name', 'A'), ('scientific_name', 'A'),
+        ('family', 'B'), ('genus', 'B'), ('species', 'B'),
+        ('description', 'C'),
+    ),
+    Seed: (('seed_name', 'A'), ('variety', 'A'), ('description', 'C')),
+    Pest: (('common_name', 'A'), ('scientific_name', 'A'), ('symptoms', 'B'), ('description', 'C')),
+    Disease: (
+        ('common_name', 'A'), ('scientific_name', 'A'),
+        ('cause', 'B'), ('symptoms', 'B'),
+        ('description', 'C'),
+    ),
+    Fertilizer: (
+        ('fertilizer_name', 'A'), ('brand', 'A'),
+        ('npk_ratio', 'B'), ('recommended_for', 'B'),
+        ('application_timing_frequency', 'C'), ('compatibility_notes', 'C'),
+    ),
+}
+
+# Relations whose matches also match a row, e.g. seeds are found by their plant's name
+SEARCH_RELATED = {
+    Seed: ('plant',),
+}
+
+# Entity types of the unified search API; ties in rank are broken in this order
+SEARCH_TYPES = {
+    'plant': Plant,
+    'seed': Seed,
+    'pest': Pest,
+    'disease': Disease,
+    'fertilizer': Fertilizer,
+}
+
+# Columns naming a hit of the unified search API: (name, secondary name)
+SEARCH_LABELS = {
+    Plant: ('common_name', 'scientific_name'),
+    Seed: ('seed_name', 'variety'),
+    Pest: ('common_name', 'scientific_name'),
+    Disease: ('common_name', 'scientific_name'),
+    Fertilizer: ('fertilizer_name', 'brand'),
+}
+
+
+def _terms(text):
+    """Splits a query into lower-case words; other characters are dropped."""
+    return re.findall(r'\w+', text.lower())
+
+
+def _fts_table(table):
+    return f'{table}_fts'
+
+
+# --- Index maintenance (used by migrations) ---
+
+def _postgres_statements(table, columns):
+    document = ' || '.join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+    return [
+        f'ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({document}) STORED',
+        f'CREATE INDEX {table}_search_vector_idx ON {table} USING GIN (search_vector)',
+    ], [
+        f'DROP INDEX IF EXISTS {table}_search_vector_idx',
+        f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector',
+    ]
+
+
+def _sqlite_statements(table, columns):
+    fts = _fts_table(table)
+    names = [column for column, _ in columns]
+    column_list = ', '.join(names)
+    new_values = ', '.join(f'new.{name}' for name in names)
+    old_values = ', '.join(f'old.{name}' for name in names)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END',
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f'INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ], [
+        f'DROP TRIGGER IF EXISTS {fts}_ai',
+        f'DROP TRIGGER IF EXISTS {fts}_ad',
+        f'DROP TRIGGER IF EXISTS {fts}_au',
+        f'DROP TABLE IF EXISTS {fts}',
+    ]
+
+
+def _index_statements(vendor, table, columns):
+    if vendor == 'postgresql':
+        return _postgres_statements(table, columns)
+    if vendor == 'sqlite':
+        return _sqlite_statements(table, columns)
+    return [], []
+
+
+def create_search_index(schema_editor, table, columns):
+    """Creates the search index of a table on backends that support one."""
+    for statement in _index_statements(schema_editor.connection.vendor, table, columns)[0]:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(schema_editor, table, columns):
+    """Drops the search index created by create_search_index()."""
+    for statement in _index_statements(schema_editor.connection.vendor, table, columns)[1]:
+        schema_editor.execute(statement)
+
+
+# --- Queries ---
+
+class _SearchVectorColumn(Expression):
+    """
+    The search_vector column of a query's model. The column is not a model
+    field, so it is qualified with the alias its table has in the compiled
+    query, which differs from the table name in a subquery (U0).
+    """
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.query.get_initial_alias()
+        return f'{compiler.quote_name_unless_alias(alias)}.search_vector', []
+
+
+def _postgres_document(model):
+    from django.contrib.postgres.search import SearchVectorField
+    return _SearchVectorColumn(output_field=SearchVectorField())
+
+
+def _postgres_query(terms):
+    from django.contrib.postgres.search import SearchQuery
+    # Prefix matching, so results show up while a word is being typed
+    return SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+def _sqlite_match(terms):
+    return ' AND '.join(f'"{term}"*' for term in terms)
+
+
+def _match_condition(model, terms):
+    """
+    Returns a Q matching the rows of model whose own columns match terms.
+    On Postgres the queryset has to be annotated with search_document.
+    """
+    if connection.vendor == 'postgresql':
+        return Q(search_document=_postgres_query(terms))
+    if connection.vendor == 'sqlite':
+        fts = _fts_table(model._meta.db_table)
+        return Q(pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [_sqlite_match(terms)]))
+    condition = Q()
+    for term in terms:
+        term_condition = Q()
+        for column, _ in SEARCH_FIELDS[model]:
+            term_condition |= Q(**{f'{column}__icontains': term})
+        condition &= term_condition
+    return condition
+
+
+def _indexed(queryset):
+    """Annotates a queryset with what _match_condition() and _rank() refer to."""
+    if connection.vendor == 'postgresql':
+        return queryset.annotate(search_document=_postgres_document(queryset.model))
+    return queryset
+
+
+def _rank(model, terms):
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchRank
+        # ts_rank() returns a real; as a double it survives a round trip through a cursor
+        return Cast(SearchRank(F('search_document'), _postgres_query(terms)), FloatField())
+    if connection.vendor == 'sqlite':
+        table = model._meta.db_table
+        fts = _fts_table(table)
+        weights = ', '.join(str(SEARCH_WEIGHTS[weight]) for _, weight in SEARCH_FIELDS[model])
+        # bm25() is lower for better matches
+        return RawSQL(
+            f'SELECT -bm25({fts}, {weights}) FROM {fts} WHERE {fts} MATCH %s '
+            f'AND rowid = {connection.ops.quote_name(table)}.{connection.ops.quote_name("id")}',
+            [_sqlite_match(terms)],
+            output_field=FloatField(),
+        )
+    return Value(0.0, output_field=FloatField())
+
+
+def search(queryset, text, with_total=True):
+    """
+    Filters a queryset of an indexed model to the rows matching text.
+
+    Every word of text has to match (as a prefix) one of the indexed columns,
+    or an indexed column of a relation listed in SEARCH_RELATED. Rows are
+    annotated with search_rank and, unless with_total is False,
+    search_total, and ordered by rank, best first, then by the queryset's
+    own ordering.
+
+    Returns the queryset unchanged if text has no words.
+    """
+    model = queryset.model
+    terms = _terms(text)
+    if not terms:
+        return queryset
+
+    condition = _match_condition(model, terms)
+    for relation in SEARCH_RELATED.get(model, ()):
+        related_model = model._meta.get_field(relation).related_model
+        related = _indexed(related_model._default_manager.all()).filter(_match_condition(related_model, terms))
+        condition |= Q(**{f'{relation}__in': related.values('pk')})
+
+    ordering = queryset.query.order_by or model._meta.ordering
+    queryset = _indexed(queryset).filter(condition).annotate(search_rank=_rank(model, terms))
+    if with_total:
+        queryset = queryset.annotate(search_total=Window(expression=Count('*')))
+    return queryset.order_by(F('search_rank').desc(nulls_last=True), *ordering)
+
+
+def search_scored(queryset, text):
+    """
+    Like search(), without search_total, and with search_score: the rank, or
+    0 for rows only matched through a relation, which have no rank of their
+    own. Unlike search_rank it is never NULL, so it can key a cursor.
+    """
+    queryset = search(queryset, text, with_total=False)
+    if 'search_rank' not in queryset.query.annotations:
+        return queryset
+    return queryset.annotate(search_score=Coalesce('search_rank', Value(0.0), output_field=FloatField()))
+
+
+def search_page(queryset, text, limit):
+    """
+    Returns (the first limit ranked matches, the number of matches), read
+    with one query.
+    """
+    results = list(search(queryset, text)[:limit])
+    return results, (results[0].search_total if results else 0)
+
+
+def search_hits(text, types, limit, after=None):
+    """
+    Searches several entity types at once and ranks their matches together.
+
+    Hits are ordered by rank, best first, then by the order of SEARCH_TYPES
+    and by pk, so every hit has a unique key (rank, type, pk). Passing the
+    key of the last hit of a page as after returns the next page; each type
+    reads at most limit rows past it, whatever the page number.
+
+    Args:
+        text (str): Search query
+        types (list): Names from SEARCH_TYPES
+        limit (int): Maximum number of hits
+        after (tuple): Key of the hit to continue after
+
+    Returns:
+        list: Up to limit (key, object) pairs. Objects only have their
+        SEARCH_LABELS columns loaded and are annotated with search_score.
+    """
+    if not _terms(text):
+        return []
+    order = list(SEARCH_TYPES)
+    hits = []
+    for name in types:
+        model = SEARCH_TYPES[name]
+        queryset = search_scored(model._default_manager.only(*SEARCH_LABELS[model]), text)
+        if after is not None:
+            rank, after_type, after_pk = after
+            position, after_position = order.index(name), order.index(after_type)
+            condition = Q(search_score__lt=rank)
+            if position > after_position:
+                condition |= Q(search_score=rank)
+            elif position == after_position:
+                condition |= Q(search_score=rank, pk__gt=after_pk)
+            queryset = queryset.filter(condition)
+        for obj in queryset.order_by('-search_score', 'pk')[:limit]:
+            hits.append(((obj.search_score, name, obj.pk), obj))
+    hits.sort(key=lambda hit: (-hit[0][0], order.index(hit[0][1]), hit[0][2]))
+    return hits[:limit]
@@ -0,0 +1,111 @@
+"""
+Signal receivers keeping derived data current
+
+Sync change feed (see sync.py): deletes leave a tombstone in DeletionLog, and
+changes to the interactions of a companionship bump its updated_at, since
+the M2M table has no timestamp of its own.
+
+Plant detail documents (see plant_details.py): changes drop the cached
+documents of the plants they show up in.
+
+Bulk writes send no signals, so code writing in bulk calls
+invalidate_derived_data() once it is done.
+"""
+
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from .models import (
+    Region, SoilProfile, Pest, Disease, Plant, Seed, CompanionPlantingInteraction,
+    Companionship, PlantPest, PlantDisease, DeletionLog
+)
+from .companion_graph import invalidate_companion_graph
+from .plant_details import invalidate_all_plant_details, invalidate_plant_details
+from .sync import SYNC_TYPES, type_for_model
+
+# Models whose rows belong to one plant, by the field pointing to it
+PLANT_DETAIL_PARTS = {
+    Seed: ('plant_id',),
+    PlantPest: ('plant_id',),
+    PlantDisease: ('plant_id',),
+    Companionship: ('plant_subject_id', 'plant_object_id'),
+}
+
+# Models shown in the documents of any number of plants
+PLANT_DETAIL_SHARED = (Region, SoilProfile, Pest, Disease, CompanionPlantingInteraction)
+
+
+def invalidate_derived_data():
+    """
+    Drops every cached plant detail document and the companion graph, for
+    writes that bypass the receivers below (bulk_create, bulk_update,
+    queryset updates and deletes).
+    """
+    invalidate_all_plant_details()
+    invalidate_companion_graph()
+
+
+def record_deletion(sender, instance, **kwargs):
+    DeletionLog.objects.create(entity_type=type_for_model(sender), object_id=instance.pk)
+
+
+def touch_companionships(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        pks = [instance.pk]
+    elif action == 'pre_clear':
+        pks = list(instance.plant_pairings.values_list('pk', flat=True))
+    else:
+        pks = pk_set
+    if pks:
+        Companionship.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+def plant_changed(sender, instance, created=False, **kwargs):
+    pks = [instance.pk]
+    # Companion documents show the plant too; a new plant has no companions yet
+    if not created:
+        pairs = Companionship.objects.filter(
+            Q(plant_subject_id=instance.pk) | Q(plant_object_id=instance.pk)
+        ).values_list('plant_subject_id', 'plant_object_id')
+        pks.extend(pk for pair in pairs for pk in pair)
+    invalidate_plant_details(pks)
+
+
+def plant_part_changed(sender, instance, **kwargs):
+    invalidate_plant_details(getattr(instance, field) for field in PLANT_DETAIL_PARTS[sender])
+
+
+def shared_record_changed(sender, instance, **kwargs):
+    invalidate_all_plant_details()
+
+
+def companionship_interactions_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # An interaction gained or lost pairings, possibly many
+        invalidate_all_plant_details()
+    else:
+        invalidate_plant_details([instance.plant_subject_id, instance.plant_object_id])
+
+
+def connect_signals():
+    """Connects the receivers; called from HorticultureConfig.ready()."""
+    for model, _ in SYNC_TYPES.values():
+        post_delete.connect(record_deletion, sender=model, dispatch_uid=f'sync_deletion_{model._meta.label_lower}')
+    m2m_changed.connect(touch_companionships, sender=Companionship.interactions.through, dispatch_uid='sync_companionship_interactions')
+
+    for signal in (post_save, post_delete):
+        name = 'saved' if signal is post_save else 'deleted'
+        signal.connect(plant_changed, sender=Plant, dispatch_uid=f'plant_detail_plant_{name}')
+        for model in PLANT_DETAIL_PARTS:
+            signal.connect(plant_part_changed, sender=model, dispatch_uid=f'plant_detail_{model._meta.model_name}_{name}')
+        for model in PLANT_DETAIL_SHARED:
+            signal.connect(shared_record_changed, sender=model, dispatch_uid=f'plant_detail_{model._meta.model_name}_{name}')
+    m2m_changed.connect(
+        companionship_interactions_changed, sender=Companionship.interactions.through,
+        dispatch_uid='plant_detail_companionship_interactions'
+    )
@@ -0,0 +1,172 @@
+"""
+Delta sync of the horticulture catalogue
+
+Clients keep a sync token and ask for the changes since it. The change feed
+interleaves every synced model, ordered by updated_at, then by the order of
+SYNC_TYPES and by id, with the tombstones of the deletion log (see
+signals.py) after them. A token holds the key of the last change a client
+has seen, so each request reads at most one batch per model past it through
+the (updated_at, id) indexes, costing O(changes) rather than O(catalogue).
+
+Changes from the last SETTLE_SECONDS are held back until the next sync: a
+transaction that started earlier may still commit rows with an updated_at
+before them, which a token past them would skip.
+"""
+
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import (
+    Region, SoilProfile, Fertilizer, Pest, Disease, Plant, Seed,
+    CompanionPlantingInteraction, Companionship, PlantPest, PlantDisease,
+    DeletionLog
+)
+from .serializers import (
+    RegionSerializer, SoilProfileSerializer, FertilizerSerializer, PestSerializer,
+    DiseaseSerializer, PlantSerializer, SeedSerializer, CompanionPlantingInteractionSerializer,
+    CompanionshipSerializer, PlantPestSerializer, PlantDiseaseSerializer
+)
+
+# Synced models by the type names of the bulk import API, in feed order
+SYNC_TYPES = {
+    'region': (Region, RegionSerializer),
+    'soilprofile': (SoilProfile, SoilProfileSerializer),
+    'fertilizer': (Fertilizer, FertilizerSerializer),
+    'pest': (Pest, PestSerializer),
+    'disease': (Disease, DiseaseSerializer),
+    'plant': (Plant, PlantSerializer),
+    'seed': (Seed, SeedSerializer),
+    'companioninteraction': (CompanionPlantingInteraction, CompanionPlantingInteractionSerializer),
+    'companionship': (Companionship, CompanionshipSerializer),
+    'plantpest': (PlantPest, PlantPestSerializer),
+    'plantdisease': (PlantDisease, PlantDiseaseSerializer),
+}
+
+# Relations the serializers read, prefetched per batch
+SYNC_PREFETCH = {
+    Plant: ('pests', 'diseases', 'companions'),
+    Companionship: ('interactions',),
+}
+
+# Feed positions of the deletion log and of a token that has read everything up to its time
+DELETED_POSITION = len(SYNC_TYPES)
+END_POSITION = DELETED_POSITION + 1
+
+# Default seconds of recent changes held back, overridable with SYNC_SETTLE_SECONDS
+SETTLE_SECONDS = 2
+
+DEFAULT_BATCH_SIZE = 200
+MAX_BATCH_SIZE = 1000
+
+
+class InvalidSyncToken(ValueError):
+    """Raised for a sync token that was not issued by sync_changes()."""
+
+
+def type_for_model(model):
+    """Returns the sync type name of a model, or None if it is not synced."""
+    for name, (synced_model, _) in SYNC_TYPES.items():
+        if synced_model is model:
+            return name
+    return None
+
+
+def encode_token(moment, position, pk):
+    payload = {'t': moment.isoformat(), 'p': position, 'i': pk}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_token(token):
+    """
+    Returns the (moment, position, pk) key a token continues after.
+
+    Raises:
+        InvalidSyncToken: If the token is malformed
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        moment = parse_datetime(payload['t'])
+        position, pk = int(payload['p']), int(payload['i'])
+    except (TypeError, ValueError, KeyError, UnicodeError, AttributeError):
+        raise InvalidSyncToken(token)
+    if moment is None or not 0 <= position <= END_POSITION:
+        raise InvalidSyncToken(token)
+    return moment, position, pk
+
+
+def _after(time_field, position, after):
+    """Q for the feed rows of the model at position that come after the key after."""
+    moment, after_position, after_pk = after
+    condition = Q(**{f'{time_field}__gt': moment})
+    if position > after_position:
+        condition |= Q(**{time_field: moment})
+    elif position == after_position:
+        condition |= Q(**{time_field: moment, 'pk__gt': after_pk})
+    return Q(**{f'{time_field}__gte': moment}) & condition
+
+
+def sync_changes(token=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Reads the next batch of the change feed.
+
+    Args:
+        token (str): Token of the previous batch; None starts from the beginning
+        batch_size (int): Maximum number of changes
+
+    Returns:
+        dict: 'changes' (upserts with the serialized record, and deletes),
+        'next' (the token to continue with) and 'has_more'
+
+    Raises:
+        InvalidSyncToken: If token is malformed
+    """
+    after = decode_token(token) if token else None
+    until = timezone.now() - timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', SETTLE_SECONDS))
+
+    rows = []
+    for position, (name, (model, _)) in enumerate(SYNC_TYPES.items()):
+        queryset = model._default_manager.filter(updated_at__lte=until)
+        if after is not None:
+            queryset = queryset.filter(_after('updated_at', position, after))
+        keys = queryset.order_by('updated_at', 'pk').values_list('updated_at', 'pk')[:batch_size + 1]
+        rows.extend((moment, position, pk) for moment, pk in keys)
+
+    tombstones = DeletionLog.objects.filter(deleted_at__lte=until)
+    if after is not None:
+        tombstones = tombstones.filter(_after('deleted_at', DELETED_POSITION, after))
+    deletions = {}
+    for log in tombstones.order_by('deleted_at', 'pk')[:batch_size + 1]:
+        rows.append((log.deleted_at, DELETED_POSITION, log.pk))
+        deletions[log.pk] = log
+
+    rows.sort()
+    has_more = len(rows) > batch_size
+    rows = rows[:batch_size]
+
+    # Load the records of the batch with one query per model
+    names = list(SYNC_TYPES)
+    records = {}
+    for position in {position for _, position, _ in rows if position != DELETED_POSITION}:
+        model, serializer_class = SYNC_TYPES[names[position]]
+        pks = [pk for _, row_position, pk in rows if row_position == position]
+        objects = list(model._default_manager.filter(pk__in=pks).prefetch_related(*SYNC_PREFETCH.get(model, ())))
+        for obj, data in zip(objects, serializer_class(objects, many=True).data):
+            records[(position, obj.pk)] = data
+
+    changes = []
+    for moment, position, pk in rows:
+        if position == DELETED_POSITION:
+            log = deletions[pk]
+            changes.append({'type': log.entity_type, 'id': log.object_id, 'op': 'delete', 'at': moment})
+        elif (position, pk) in records:
+            changes.append({'type': names[position], 'id': pk, 'op': 'upsert', 'at': moment, 'data': records[(position, pk)]})
+
+    # Without more changes, the next sync continues after everything up to until
+    next_token = encode_token(*rows[-1]) if has_more else encode_token(until, END_POSITION, 0)
+    return {'changes': changes, 'next': next_token, 'has_more': has_more}
@@ -1,21 +1,73 @@
+import json
+import time
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
 from celery.result import AsyncResult
 
+from .import_jobs import job_progress
+from .models import ImportJob
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets clients negotiate a server-sent events stream
+    (Accept: text/event-stream or ?format=sse).
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f"data: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode(self.charset)
+
+
 class TaskStatusView(APIView):
     """
     View to check the status of a Celery task.
+    Running bulk imports report their progress: records processed,
+    created/updated/failed per entity type, throughput and ETA.
+    Request text/event-stream to receive status updates as server-sent events.
+    A stream is short-lived, so it does not hold a worker for long: EventSource
+    clients reconnect after stream_retry and get the current status again.
     """
     permission_classes = [IsAuthenticated]
-    
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer]
+
+    # Seconds between status checks and maximum lifetime of an event stream
+    stream_interval = 1.0
+    stream_timeout = 45
+    # Milliseconds EventSource clients wait before reconnecting to an ended stream
+    stream_retry = 5000
+
     def get(self, request, task_id, format=None):
         """
         Get the status of a task by its ID.
         """
+        if isinstance(request.accepted_renderer, EventStreamRenderer):
+            response = StreamingHttpResponse(self._event_stream(task_id), content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+            return response
+
+        return Response(self.get_task_status(task_id))
+
+    def get_task_status(self, task_id):
+        """
+        Returns the status payload of a task. Staged import jobs are reported
+        from their checkpoints, other tasks from the Celery result backend.
+        """
+        job = ImportJob.objects.filter(task_id=task_id).first()
+        if job is not None:
+            return self._job_status(job)
+
         task = AsyncResult(task_id)
-        
+
         if task.state == 'PENDING':
             # Task is pending or does not exist
             response = {
@@ -35,11 +87,57 @@ class TaskStatusView(APIView):
                 'status': 'completed',
                 'result': task.result
             }
+        elif task.state == 'PROGRESS':
+            # Task published a progress state (see tasks.process_bulk_import)
+            response = {
+                'status': 'progress',
+                'message': 'Task is in progress',
+                'progress': task.info
+            }
         else:
             # Task is in progress
             response = {
                 'status': task.state.lower(),
                 'message': 'Task is in progress'
             }
-        
-        return Response(response)
+
+        return response
+
+    def _job_status(self, job):
+        response = {
+            'job_id': job.pk,
+            'progress': job_progress(job),
+        }
+        if job.status == 'pending':
+            response.update(status='pending', message='Import job is queued')
+        elif job.status == 'running':
+            response.update(status='progress', message='Import job is in progress')
+        elif job.status == 'completed':
+            response.update(status='completed', result=job.result)
+        else:
+            response.update(status='failed', message='Import job finished with errors', result=job.result)
+        return response
+
+    def _event_stream(self, task_id):
+        """
+        Yields an event whenever the task status changes, until the task has
+        finished or the stream timed out. Celery reports unknown tasks as
+        pending, so a pending task without an import job ends the stream after
+        its first event, leaving the client to poll by reconnecting.
+        """
+        renderer = EventStreamRenderer()
+        deadline = time.monotonic() + self.stream_timeout
+        last = None
+        yield f'retry: {self.stream_retry}\n\n'.encode(renderer.charset)
+        while True:
+            payload = self.get_task_status(task_id)
+            if payload != last:
+                yield renderer.render(payload)
+                last = payload
+            else:
+                yield b': keep-alive\n\n'
+            if payload['status'] in ('completed', 'failed') or time.monotonic() >= deadline:
+                return
+            if payload['status'] == 'pending' and 'job_id' not in payload:
+                return
+            time.sleep(self.stream_interval)
@@ -1,13 +1,18 @@
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Min
 from django.utils import timezone
 import logging
 
 import re # Added for parsing scientific name
+from .import_jobs import ImportProgress, is_complex_plant_import, load_chunk_records, delete_chunk_payload
+from .import_validators import compiled_validator
 from .models import (
     Plant, Seed, Fertilizer, Region, SoilProfile, Pest, Disease, Companionship,
-    CompanionPlantingInteraction, PlantPest, PlantDisease
+    CompanionPlantingInteraction, PlantPest, PlantDisease, ImportJob, ImportChunk
 )
+from .signals import invalidate_derived_data
 # Import serializers for simple import case
 from .serializers import (
     PlantSerializer, SeedSerializer, FertilizerSerializer, RegionSerializer, SoilProfileSerializer,
@@ -28,24 +33,549 @@ def parse_scientific_name(name_str):
         return base_name, cultivar
     return name_str.strip(), None
 
-@shared_task
-def process_bulk_import(entity_type, data_list, user_id=None):
+# Serializers used for simple list imports, keyed by entity type
+SIMPLE_IMPORT_SERIALIZERS = {
+    'plant': PlantSerializer,
+    'seed': SeedSerializer,
+    'fertilizer': FertilizerSerializer,
+    'region': RegionSerializer,
+    'soilprofile': SoilProfileSerializer,
+    'pest': PestSerializer,
+    'disease': DiseaseSerializer,
+    'companionship': CompanionshipSerializer,
+    'companioninteraction': CompanionPlantingInteractionSerializer,
+}
+
+# Counters reported by the complex plant import
+COMPLEX_IMPORT_COUNTS = ('plant', 'pest', 'disease', 'companionship', 'interaction', 'plant_pest', 'plant_disease')
+
+# Records validated and inserted together by the simple import fast path
+SIMPLE_IMPORT_BATCH_SIZE = 500
+
+# Companionships written per bulk insert; keeps the pair lookups within SQLite's parameter limit
+COMPANION_BATCH_SIZE = 500
+
+
+def _import_complex_plants(plants_data, created_plants, errors, success_counts, progress=None):
+    """Creates or updates the plants of a complex import, caching them by their JSON name."""
+    logger.info(f"Processing {len(plants_data)} plants...")
+    progress = progress or ImportProgress()
+    for plant_item in _tracked(plants_data, progress):
+        sci_name_raw = plant_item.get('scientific_name')
+        if not sci_name_raw:
+            errors.append({"type": "plant", "error": "Missing scientific_name", "data": plant_item})
+            progress.record('plant', 'failed')
+            continue
+
+        base_sci_name, cultivar = parse_scientific_name(sci_name_raw)
+
+        plant_defaults = {
+            'common_name': plant_item.get('common_name'),
+            'description': plant_item.get('description'),
+            'family': plant_item.get('family'),
+            'genus': plant_item.get('genus'),
+            'species': plant_item.get('species'),
+            'subspecies_cultivar': cultivar, # Parsed cultivar
+            'lifecycle_type': plant_item.get('lifecycle_type'),
+            'growth_habit': plant_item.get('growth_habit'),
+            'avg_height_inches': plant_item.get('avg_height_inches'),
+            'avg_spread_inches': plant_item.get('avg_spread_inches'),
+            'days_to_maturity_min': plant_item.get('days_to_maturity_min'),
+            'days_to_maturity_max': plant_item.get('days_to_maturity_max'),
+            'sunlight_requirements': plant_item.get('sunlight_requirements'),
+            'moisture_requirements': plant_item.get('moisture_requirements'),
+            'soil_ph_min': plant_item.get('soil_ph_min'),
+            'soil_ph_max': plant_item.get('soil_ph_max'),
+            'temperature_tolerance_min_f': plant_item.get('temperature_tolerance_min_f'),
+            'temperature_tolerance_max_f': plant_item.get('temperature_tolerance_max_f'),
+            'npk_preference': plant_item.get('npk_preference'),
+            'root_system_type': plant_item.get('root_system_type'),
+            'harvest_seasonality': plant_item.get('harvest_seasonality'),
+            'yield_estimates': plant_item.get('yield_estimates'),
+            'common_names_list': plant_item.get('common_names_list', []),
+            # Add other fields if needed, ensure they exist in model
+        }
+        # Remove None values to avoid overwriting existing data with None during update
+        plant_defaults = {k: v for k, v in plant_defaults.items() if v is not None}
+
+        try:
+            plant_obj, created = Plant.objects.update_or_create(
+                scientific_name=base_sci_name, # Use base name for lookup
+                defaults=plant_defaults
+            )
+            created_plants[sci_name_raw] = plant_obj # Store using original name from JSON for lookup
+            if created:
+                success_counts['plant'] += 1
+            progress.record('plant', 'created' if created else 'updated')
+            logger.debug(f"Processed plant: {plant_obj.scientific_name} (Created: {created})")
+        except Exception as e:
+            logger.error(f"Error creating/updating plant '{sci_name_raw}': {e}")
+            errors.append({"type": "plant", "name": sci_name_raw, "error": str(e)})
+            progress.record('plant', 'failed')
+
+
+def _import_complex_pests(pests_data, created_pests, errors, success_counts, progress=None):
+    """Creates or updates the pests of a complex import."""
+    logger.info(f"Processing {len(pests_data)} pests...")
+    progress = progress or ImportProgress()
+    for pest_item in _tracked(pests_data, progress):
+        sci_name = pest_item.get('scientific_name')
+        common_name = pest_item.get('common_name')
+        if not common_name: # Use common name as primary identifier if sci_name missing
+             errors.append({"type": "pest", "error": "Missing common_name", "data": pest_item})
+             progress.record('pest', 'failed')
+             continue
+
+        pest_defaults = {
+            'scientific_name': sci_name,
+            'description': pest_item.get('description'),
+            'category': pest_item.get('category'),
+            'symptoms': pest_item.get('symptoms'),
+            # Assuming control/prevention are JSON fields in model now
+            'treatment_strategies': pest_item.get('control_methods', []), # Map JSON key to model field
+            'prevention_strategies': [], # Add if present in JSON
+            # Add other fields
+        }
+        pest_defaults = {k: v for k, v in pest_defaults.items() if v is not None}
+
+        try:
+            pest_obj, created = Pest.objects.update_or_create(
+                common_name=common_name, # Use common name for lookup
+                defaults=pest_defaults
+            )
+            created_pests[sci_name or common_name] = pest_obj # Store by sci_name if available, else common
+            if created:
+                success_counts['pest'] += 1
+            progress.record('pest', 'created' if created else 'updated')
+            logger.debug(f"Processed pest: {pest_obj.common_name} (Created: {created})")
+        except Exception as e:
+            logger.error(f"Error creating/updating pest '{common_name}': {e}")
+            errors.append({"type": "pest", "name": common_name, "error": str(e)})
+            progress.record('pest', 'failed')
+
+
+def _import_complex_diseases(diseases_data, created_diseases, errors, success_counts, progress=None):
+    """Creates or updates the diseases of a complex import."""
+    logger.info(f"Processing {len(diseases_data)} diseases...")
+    progress = progress or ImportProgress()
+    for disease_item in _tracked(diseases_data, progress):
+        sci_name = disease_item.get('scientific_name')
+        common_name = disease_item.get('common_name')
+        if not common_name: # Use common name as primary identifier if sci_name missing
+             errors.append({"type": "disease", "error": "Missing common_name", "data": disease_item})
+             progress.record('disease', 'failed')
+             continue
+
+        disease_defaults = {
+            'scientific_name': sci_name,
+            'description': disease_item.get('description'),
+            'category': disease_item.get('category'),
+            'cause': disease_item.get('cause'),
+            'symptoms': disease_item.get('symptoms'),
+            # Assuming treatment/prevention are JSON fields in model
+            'treatment_strategies': disease_item.get('treatment_methods', []), # Map JSON key to model field
+            'prevention_strategies': disease_item.get('prevention_methods', []), # Add if present in JSON
+            # Add other fields
+        }
+        disease_defaults = {k: v for k, v in disease_defaults.items() if v is not None}
+
+        try:
+            disease_obj, created = Disease.objects.update_or_create(
+                common_name=common_name, # Use common name for lookup
+                defaults=disease_defaults
+            )
+            created_diseases[sci_name or common_name] = disease_obj # Store by sci_name if available, else common
+            if created:
+                success_counts['disease'] += 1
+            progress.record('disease', 'created' if created else 'updated')
+            logger.debug(f"Processed disease: {disease_obj.common_name} (Created: {created})")
+        except Exception as e:
+            logger.error(f"Error creating/updating disease '{common_name}': {e}")
+            errors.append({"type": "disease", "name": common_name, "error": str(e)})
+            progress.record('disease', 'failed')
+
+
+def _interaction_code(interaction_type, mechanism_description):
+    """Generates the code an interaction is stored under."""
+    return f"{interaction_type}_{mechanism_description[:20]}".replace(" ", "_").upper()
+
+
+def _warm_interaction_cache(interactions, created_interactions, success_counts):
+    """
+    Makes sure created_interactions holds every interaction in interactions
+    (code -> (interaction_type, mechanism_description)). Existing rows are
+    loaded with one query, missing ones created with a single bulk insert.
+    """
+    missing = [code for code in interactions if code not in created_interactions]
+    if not missing:
+        return
+    created_interactions.update(CompanionPlantingInteraction.objects.in_bulk(missing, field_name='interaction_code'))
+
+    new_interactions = [
+        CompanionPlantingInteraction(
+            interaction_code=code,
+            interaction_type=interactions[code][0],
+            mechanism_description=interactions[code][1],
+        )
+        for code in missing
+        if code not in created_interactions
+    ]
+    if new_interactions:
+        CompanionPlantingInteraction.objects.bulk_create(new_interactions, ignore_conflicts=True)
+        # Conflict-handling inserts don't return primary keys, so fetch them
+        created_interactions.update(CompanionPlantingInteraction.objects.in_bulk(
+            [interaction.interaction_code for interaction in new_interactions], field_name='interaction_code'
+        ))
+        success_counts['interaction'] += len(new_interactions)
+
+
+def _import_complex_companions(companions_data, created_plants, created_interactions, errors, success_counts, progress=None):
+    """
+    Creates companionships and their interactions between already imported plants.
+
+    created_interactions caches interactions by code and is warmed for all
+    relationships up front. Companionships are written COMPANION_BATCH_SIZE
+    pairs at a time with bulk_create, leaving existing pairs untouched, and
+    their interactions are added with one bulk insert of through rows.
+    """
+    logger.info(f"Processing {len(companions_data)} companion relationships...")
+    progress = progress or ImportProgress()
+
+    referenced = {}
+    for comp_item in companions_data:
+        for inter_item in comp_item.get('interactions', []):
+            inter_type = inter_item.get('interaction_type')
+            inter_desc = inter_item.get('mechanism_description')
+            if inter_type and inter_desc:
+                referenced.setdefault(_interaction_code(inter_type, inter_desc), (inter_type, inter_desc))
+    try:
+        _warm_interaction_cache(referenced, created_interactions, success_counts)
+    except Exception as e:
+        logger.error(f"Error creating interactions: {e}")
+        errors.append({"type": "interaction", "error": str(e)})
+        for _ in _tracked(companions_data, progress):
+            progress.record('companionship', 'failed')
+        return
+
+    pairs = {} # (subject pk, object pk) -> (notes, interaction pks), in input order
+    for comp_item in _tracked(companions_data, progress):
+        subject_name = comp_item.get('plant_subject')
+        object_name = comp_item.get('plant_object')
+        subject_plant = created_plants.get(subject_name)
+        object_plant = created_plants.get(object_name)
+
+        if not subject_plant or not object_plant:
+            errors.append({
+                "type": "companionship",
+                "error": f"Could not find plants for relationship: '{subject_name}' -> '{object_name}'",
+                "data": comp_item
+            })
+            progress.record('companionship', 'failed')
+            continue
+
+        interaction_ids = {
+            created_interactions[_interaction_code(inter_type, inter_desc)].pk
+            for inter_type, inter_desc in (
+                (inter_item.get('interaction_type'), inter_item.get('mechanism_description'))
+                for inter_item in comp_item.get('interactions', [])
+            )
+            if inter_type and inter_desc
+        }
+        if not interaction_ids:
+            continue
+
+        pair = (subject_plant.pk, object_plant.pk)
+        if pair in pairs:
+            # Later duplicates only add interactions, like get_or_create + add
+            pairs[pair][1].update(interaction_ids)
+        else:
+            pairs[pair] = (comp_item.get('notes'), interaction_ids)
+
+    pair_list = list(pairs)
+    for start in range(0, len(pair_list), COMPANION_BATCH_SIZE):
+        _write_companion_batch(
+            {pair: pairs[pair] for pair in pair_list[start:start + COMPANION_BATCH_SIZE]},
+            errors, success_counts, progress
+        )
+
+
+def _write_companion_batch(pairs, errors, success_counts, progress):
+    """
+    Writes one batch of companionships with a constant number of queries.
+
+    Args:
+        pairs (dict): (subject pk, object pk) -> (notes, interaction pks)
+    """
+    through_model = Companionship.interactions.through
+    subject_ids = {subject_id for subject_id, _ in pairs}
+    try:
+        with transaction.atomic():
+            existing = {
+                (subject_id, object_id)
+                for subject_id, object_id in Companionship.objects.filter(
+                    plant_subject_id__in=subject_ids
+                ).values_list('plant_subject_id', 'plant_object_id')
+                if (subject_id, object_id) in pairs
+            }
+            Companionship.objects.bulk_create(
+                [
+                    Companionship(plant_subject_id=subject_id, plant_object_id=object_id, notes=notes)
+                    for (subject_id, object_id), (notes, _) in pairs.items()
+                    if (subject_id, object_id) not in existing
+                ],
+                ignore_conflicts=True, # Pairs are unique on (plant_subject, plant_object)
+            )
+            # Conflict-handling inserts don't return primary keys, so fetch them
+            companionship_ids = {
+                (subject_id, object_id): pk
+                for subject_id, object_id, pk in Companionship.objects.filter(
+                    plant_subject_id__in=subject_ids
+                ).values_list('plant_subject_id', 'plant_object_id', 'pk')
+            }
+            through_model.objects.bulk_create(
+                [
+                    through_model(companionship_id=companionship_ids[pair], companionplantinginteraction_id=interaction_id)
+                    for pair, (_, interaction_ids) in pairs.items()
+                    for interaction_id in interaction_ids
+                ],
+                ignore_conflicts=True,
+            )
+    except Exception as e:
+        logger.error(f"Error creating/updating {len(pairs)} companionships: {e}")
+        errors.append({"type": "companionship", "error": str(e), "count": len(pairs)})
+        for _ in pairs:
+            progress.record('companionship', 'failed')
+        return
+
+    for pair in pairs:
+        created = pair not in existing
+        if created:
+            success_counts['companionship'] += 1
+        progress.record('companionship', 'created' if created else 'updated')
+    logger.debug(f"Processed {len(pairs)} companionships ({len(pairs) - len(existing)} created)")
+
+
+def _link_complex_pests(pests_data, created_plants, created_pests, errors, success_counts):
+    """Links pests to plants using the affected_plants field in pest data."""
+    logger.info(f"Linking {len(pests_data)} pests to affected plants...")
+    for pest_item in pests_data:
+        pest_name = pest_item.get('scientific_name') or pest_item.get('common_name')
+        pest_obj = created_pests.get(pest_name)
+        affected_plants_names = pest_item.get('affected_plants', [])
+
+        if not pest_obj:
+            # Error already logged during pest creation
+            continue
+
+        for plant_name in affected_plants_names:
+            plant_obj = created_plants.get(plant_name)
+            # Logging removed - issue is earlier
+            if plant_obj and pest_obj:
+                try:
+                    _, created = PlantPest.objects.get_or_create(
+                        plant=plant_obj,
+                        pest=pest_obj
+                    )
+                    # Logging removed
+                    if created:
+                         success_counts['plant_pest'] += 1
+                    logger.debug(f"Linked pest '{pest_name}' to plant '{plant_name}' (Created: {created})") # Restore original debug log
+
+                except Exception as e:
+                    # Logging removed
+                    logger.error(f"Error linking pest '{pest_name}' to plant '{plant_name}': {e}")
+                    errors.append({"type": "plant_pest_link", "pest": pest_name, "plant": plant_name, "error": str(e)})
+            else:
+                 # Keep this error reporting for the case where plant_obj is None
+                 errors.append({"type": "plant_pest_link", "pest": pest_name, "plant": plant_name, "error": "Affected plant not found in created plants list."})
+
+
+def _link_complex_diseases(diseases_data, created_plants, created_diseases, errors, success_counts):
+    """Links diseases to plants using the affected_plants field in disease data."""
+    logger.info("Linking diseases to plants...")
+    for disease_item in diseases_data:
+        disease_name = disease_item.get('scientific_name') or disease_item.get('common_name')
+        affected_plants = disease_item.get('affected_plants', [])
+
+        disease_obj = created_diseases.get(disease_name)
+        if not disease_obj:
+            errors.append({"type": "plant_disease_link", "disease": disease_name, "error": "Disease not found in created diseases list."})
+            continue
+
+        for plant_name in affected_plants:
+            plant_obj = created_plants.get(plant_name)
+            if plant_obj:
+                try:
+                    # Create the many-to-many relationship
+                    PlantDisease.objects.get_or_create(plant=plant_obj, disease=disease_obj)
+                    success_counts['plant_disease'] += 1
+                except Exception as e:
+                    logger.error(f"Error linking disease '{disease_name}' to plant '{plant_name}': {e}")
+                    errors.append({"type": "plant_disease_link", "disease": disease_name, "plant": plant_name, "error": str(e)})
+            else:
+                 errors.append({"type": "plant_disease_link", "disease": disease_name, "plant": plant_name, "error": "Affected plant not found in created plants list."})
+
+
+def _import_simple_items(entity_type, items, errors, results, start_index=0, progress=None, use_serializer=None):
+    """
+    Validates and saves a list of records.
+    Record indexes in results and errors are offset by start_index.
+    Returns the number of records saved.
+
+    Records are checked by the model's compiled validator and written with
+    bulk_create unless BULK_IMPORT_FAST_PATH is disabled or use_serializer is
+    set, in which case every record goes through the entity's serializer.
+    """
+    if use_serializer is None:
+        use_serializer = not getattr(settings, 'BULK_IMPORT_FAST_PATH', True)
+    progress = progress or ImportProgress()
+    if use_serializer:
+        return _serialize_simple_items(entity_type, items, errors, results, start_index, progress)
+
+    success_count = 0
+    for offset in range(0, len(items), SIMPLE_IMPORT_BATCH_SIZE):
+        batch = items[offset:offset + SIMPLE_IMPORT_BATCH_SIZE]
+        success_count += _bulk_insert_simple_items(entity_type, batch, errors, results, start_index + offset, progress)
+        progress.advance(len(batch))
+    return success_count
+
+
+def _prepare_simple_item(entity_type, item_data):
+    """Special handling for plant scientific name parsing even in simple import."""
+    if entity_type == 'plant' and isinstance(item_data, dict) and 'scientific_name' in item_data:
+        base_sci_name, cultivar = parse_scientific_name(item_data['scientific_name'])
+        item_data['scientific_name'] = base_sci_name # Modify data for validation
+        if cultivar:
+             item_data['subspecies_cultivar'] = cultivar # Add cultivar if found
+
+
+def _bulk_insert_simple_items(entity_type, batch, errors, results, start_index, progress):
+    """
+    Validates one batch with the compiled validator and writes the valid
+    records with bulk_create. If the batch cannot be written it is saved again
+    record by record through the serializer, which reports the failing rows.
+    """
+    model = SIMPLE_IMPORT_SERIALIZERS[entity_type].Meta.model
+    validator = compiled_validator(model)
+    for item_data in batch:
+        _prepare_simple_item(entity_type, item_data)
+
+    cleaned, batch_errors = validator.validate(batch)
+    built = [(position, validator.build(values)) for position, values in enumerate(cleaned) if values is not None]
+
+    try:
+        with transaction.atomic():
+            instances = model.objects.bulk_create([instance for _, (instance, _) in built])
+            if any(instance.pk is None for instance in instances):
+                raise RuntimeError("The database did not return the primary keys of the inserted rows")
+            related_rows = {}
+            for _, (instance, many) in built:
+                for field, pks in many.items():
+                    through = field.remote_field.through
+                    related_rows.setdefault(through, []).extend(
+                        through(**{f'{field.m2m_field_name()}_id': instance.pk, f'{field.m2m_reverse_field_name()}_id': pk})
+                        for pk in set(pks)
+                    )
+            for through, rows in related_rows.items():
+                through.objects.bulk_create(rows)
+    except Exception as e:
+        logger.warning(f"Bulk insert of {len(built)} simple {entity_type} records failed, saving them one by one: {str(e)}")
+        success_count = 0
+        for position, _ in built:
+            success_count += _serialize_simple_items(
+                entity_type, [batch[position]], errors, results, start_index + position, progress, track=False
+            )
+    else:
+        success_count = len(built)
+        for position, (instance, _) in built:
+            progress.record(entity_type, 'created')
+            results.append({
+                "index": start_index + position,
+                "id": instance.pk,
+                "status": "success"
+            })
+
+    for position, record_errors in batch_errors.items():
+        index = start_index + position
+        logger.error(f"Validation error for simple {entity_type} record at index {index}: {record_errors}")
+        errors.append({"index": index, "error": record_errors, "data": batch[position]})
+        progress.record(entity_type, 'failed')
+    return success_count
+
+
+def _serialize_simple_items(entity_type, items, errors, results, start_index, progress, track=True):
+    """
+    Validates and saves records one by one with the entity's serializer.
+    Returns the number of records saved.
+    """
+    serializer_class = SIMPLE_IMPORT_SERIALIZERS[entity_type]
+    success_count = 0
+    for index, item_data in enumerate(_tracked(items, progress) if track else items, start=start_index):
+        _prepare_simple_item(entity_type, item_data)
+
+        serializer = serializer_class(data=item_data)
+        if serializer.is_valid():
+            try:
+                instance = serializer.save()
+                success_count += 1
+                progress.record(entity_type, 'created')
+                results.append({
+                    "index": index,
+                    "id": instance.pk,
+                    "status": "success"
+                })
+            except Exception as e:
+                logger.error(f"Error saving simple {entity_type} record at index {index}: {str(e)}")
+                errors.append({"index": index, "error": f"Error saving record: {str(e)}", "data": item_data})
+                progress.record(entity_type, 'failed')
+        else:
+            logger.error(f"Validation error for simple {entity_type} record at index {index}: {serializer.errors}")
+            errors.append({"index": index, "error": serializer.errors, "data": item_data})
+            progress.record(entity_type, 'failed')
+    return success_count
+
+
+def _tracked(items, progress):
+    """Yields items, counting each one as processed once the loop body is done with it."""
+    for item in items:
+        yield item
+        progress.advance()
+
+
+def _load_plants_by_name(names):
+    """Maps scientific names as written in import data to existing plants."""
+    base_names = {name: parse_scientific_name(name)[0] for name in names if name}
+    plants = Plant.objects.in_bulk(set(base_names.values()), field_name='scientific_name')
+    return {name: plants[base] for name, base in base_names.items() if base in plants}
+
+def _publish_task_progress(task):
+    """Returns a callback storing progress as the PROGRESS state of a running task."""
+    def report(progress):
+        # Called directly or eagerly (synchronous imports) there is no task state to update
+        if not task.request.id or task.request.is_eager:
+            return
+        try:
+            task.update_state(state='PROGRESS', meta=progress)
+        except Exception as e:
+            # Progress is informational, never fail the import because of it
+            logger.warning(f"Could not publish progress of task {task.request.id}: {e}")
+    return report
+
+
+@shared_task(bind=True)
+def process_bulk_import(self, entity_type, data_list, user_id=None):
     """
     Process bulk import of data in a background task.
     Handles simple lists or complex structures like beefsteak.json for 'plant' type.
+    Everything runs in one transaction; large imports should be staged with
+    import_jobs.stage_import_job and run by start_import_job instead.
+    While running, the task publishes ImportProgress snapshots as its PROGRESS state.
     """
     logger.info(f"Starting bulk import task for entity type '{entity_type}' with {len(data_list)} top-level item(s)")
+    report = _publish_task_progress(self)
 
     # --- Handle Complex Plant Import (like beefsteak.json) ---
-    # Check if data_list looks like the complex structure (has 'plants' key)
-    is_complex_plant_import = (
-        entity_type == 'plant' and
-        isinstance(data_list, list) and len(data_list) == 1 and
-        isinstance(data_list[0], dict) and
-        'plants' in data_list[0] # Key indicator
-    )
-
-    if is_complex_plant_import:
+    if is_complex_plant_import(entity_type, data_list):
         logger.info("Detected complex plant import structure (like beefsteak.json).")
         complex_data = data_list[0] # The single item in the list is the dict with 'plants', 'pests', etc.
         plants_data = complex_data.get('plants', [])
@@ -58,255 +588,33 @@ def process_bulk_import(entity_type, data_list, user_id=None):
         created_diseases = {} # Store created diseases by scientific name
         created_interactions = {} # Store created interactions by code/description hash
         errors = []
-        success_counts = {'plant': 0, 'pest': 0, 'disease': 0, 'companionship': 0, 'interaction': 0, 'plant_pest': 0, 'plant_disease': 0}
+        success_counts = dict.fromkeys(COMPLEX_IMPORT_COUNTS, 0)
+        progress = ImportProgress(
+            total=len(plants_data) + len(pests_data) + len(diseases_data) + len(companions_data),
+            report=report
+        )
 
         try:
             with transaction.atomic():
                 # 1. Process Plants
-                logger.info(f"Processing {len(plants_data)} plants...")
-                for plant_item in plants_data:
-                    sci_name_raw = plant_item.get('scientific_name')
-                    if not sci_name_raw:
-                        errors.append({"type": "plant", "error": "Missing scientific_name", "data": plant_item})
-                        continue
-
-                    base_sci_name, cultivar = parse_scientific_name(sci_name_raw)
-
-                    plant_defaults = {
-                        'common_name': plant_item.get('common_name'),
-                        'description': plant_item.get('description'),
-                        'family': plant_item.get('family'),
-                        'genus': plant_item.get('genus'),
-                        'species': plant_item.get('species'),
-                        'subspecies_cultivar': cultivar, # Parsed cultivar
-                        'lifecycle_type': plant_item.get('lifecycle_type'),
-                        'growth_habit': plant_item.get('growth_habit'),
-                        'avg_height_inches': plant_item.get('avg_height_inches'),
-                        'avg_spread_inches': plant_item.get('avg_spread_inches'),
-                        'days_to_maturity_min': plant_item.get('days_to_maturity_min'),
-                        'days_to_maturity_max': plant_item.get('days_to_maturity_max'),
-                        'sunlight_requirements': plant_item.get('sunlight_requirements'),
-                        'moisture_requirements': plant_item.get('moisture_requirements'),
-                        'soil_ph_min': plant_item.get('soil_ph_min'),
-                        'soil_ph_max': plant_item.get('soil_ph_max'),
-                        'temperature_tolerance_min_f': plant_item.get('temperature_tolerance_min_f'),
-                        'temperature_tolerance_max_f': plant_item.get('temperature_tolerance_max_f'),
-                        'npk_preference': plant_item.get('npk_preference'),
-                        'root_system_type': plant_item.get('root_system_type'),
-                        'harvest_seasonality': plant_item.get('harvest_seasonality'),
-                        'yield_estimates': plant_item.get('yield_estimates'),
-                        'common_names_list': plant_item.get('common_names_list', []),
-                        # Add other fields if needed, ensure they exist in model
-                    }
-                    # Remove None values to avoid overwriting existing data with None during update
-                    plant_defaults = {k: v for k, v in plant_defaults.items() if v is not None}
-
-                    try:
-                        plant_obj, created = Plant.objects.update_or_create(
-                            scientific_name=base_sci_name, # Use base name for lookup
-                            defaults=plant_defaults
-                        )
-                        created_plants[sci_name_raw] = plant_obj # Store using original name from JSON for lookup
-                        if created:
-                            success_counts['plant'] += 1
-                        logger.debug(f"Processed plant: {plant_obj.scientific_name} (Created: {created})")
-                    except Exception as e:
-                        logger.error(f"Error creating/updating plant '{sci_name_raw}': {e}")
-                        errors.append({"type": "plant", "name": sci_name_raw, "error": str(e)})
+                _import_complex_plants(plants_data, created_plants, errors, success_counts, progress)
 
                 # 2. Process Pests (Create Pest records first)
-                logger.info(f"Processing {len(pests_data)} pests...")
-                for pest_item in pests_data:
-                    sci_name = pest_item.get('scientific_name')
-                    common_name = pest_item.get('common_name')
-                    if not common_name: # Use common name as primary identifier if sci_name missing
-                         errors.append({"type": "pest", "error": "Missing common_name", "data": pest_item})
-                         continue
-
-                    pest_defaults = {
-                        'scientific_name': sci_name,
-                        'description': pest_item.get('description'),
-                        'category': pest_item.get('category'),
-                        'symptoms': pest_item.get('symptoms'),
-                        # Assuming control/prevention are JSON fields in model now
-                        'treatment_strategies': pest_item.get('control_methods', []), # Map JSON key to model field
-                        'prevention_strategies': [], # Add if present in JSON
-                        # Add other fields
-                    }
-                    pest_defaults = {k: v for k, v in pest_defaults.items() if v is not None}
-
-                    try:
-                        pest_obj, created = Pest.objects.update_or_create(
-                            common_name=common_name, # Use common name for lookup
-                            defaults=pest_defaults
-                        )
-                        created_pests[sci_name or common_name] = pest_obj # Store by sci_name if available, else common
-                        if created:
-                            success_counts['pest'] += 1
-                        logger.debug(f"Processed pest: {pest_obj.common_name} (Created: {created})")
-                    except Exception as e:
-                        logger.error(f"Error creating/updating pest '{common_name}': {e}")
-                        errors.append({"type": "pest", "name": common_name, "error": str(e)})
+                _import_complex_pests(pests_data, created_pests, errors, success_counts, progress)
 
                 # 3. Process Diseases (Create Disease records)
-                logger.info(f"Processing {len(diseases_data)} diseases...")
-                for disease_item in diseases_data:
-                    sci_name = disease_item.get('scientific_name')
-                    common_name = disease_item.get('common_name')
-                    if not common_name: # Use common name as primary identifier if sci_name missing
-                         errors.append({"type": "disease", "error": "Missing common_name", "data": disease_item})
-                         continue
-
-                    disease_defaults = {
-                        'scientific_name': sci_name,
-                        'description': disease_item.get('description'),
-                        'category': disease_item.get('category'),
-                        'cause': disease_item.get('cause'),
-                        'symptoms': disease_item.get('symptoms'),
-                        # Assuming treatment/prevention are JSON fields in model
-                        'treatment_strategies': disease_item.get('treatment_methods', []), # Map JSON key to model field
-                        'prevention_strategies': disease_item.get('prevention_methods', []), # Add if present in JSON
-                        # Add other fields
-                    }
-                    disease_defaults = {k: v for k, v in disease_defaults.items() if v is not None}
-
-                    try:
-                        disease_obj, created = Disease.objects.update_or_create(
-                            common_name=common_name, # Use common name for lookup
-                            defaults=disease_defaults
-                        )
-                        created_diseases[sci_name or common_name] = disease_obj # Store by sci_name if available, else common
-                        if created:
-                            success_counts['disease'] += 1
-                        logger.debug(f"Processed disease: {disease_obj.common_name} (Created: {created})")
-                    except Exception as e:
-                        logger.error(f"Error creating/updating disease '{common_name}': {e}")
-                        errors.append({"type": "disease", "name": common_name, "error": str(e)})
+                _import_complex_diseases(diseases_data, created_diseases, errors, success_counts, progress)
 
                 # 4. Process Companion Relationships
-                logger.info(f"Processing {len(companions_data)} companion relationships...")
-                for comp_item in companions_data:
-                    subject_name = comp_item.get('plant_subject')
-                    object_name = comp_item.get('plant_object')
-                    interactions_data = comp_item.get('interactions', [])
-                    notes = comp_item.get('notes')
-
-                    subject_plant = created_plants.get(subject_name)
-                    object_plant = created_plants.get(object_name)
-
-                    if not subject_plant or not object_plant:
-                        errors.append({
-                            "type": "companionship",
-                            "error": f"Could not find plants for relationship: '{subject_name}' -> '{object_name}'",
-                            "data": comp_item
-                        })
-                        continue
-
-                    interaction_objs = []
-                    for inter_item in interactions_data:
-                        inter_type = inter_item.get('interaction_type')
-                        inter_desc = inter_item.get('mechanism_description')
-                        # Removed hash-based key generation
-
-                        if inter_type and inter_desc:
-                            try:
-                                # Generate a simple code first
-                                inter_code = f"{inter_type}_{inter_desc[:20]}".replace(" ", "_").upper()
-
-                                # Check cache using the generated inter_code
-                                if inter_code in created_interactions:
-                                    interaction_objs.append(created_interactions[inter_code])
-                                else:
-                                    # Use interaction_code for lookup, others in defaults
-                                    interaction_obj, created = CompanionPlantingInteraction.objects.get_or_create(
-                                        interaction_code=inter_code,
-                                        defaults={
-                                            'interaction_type': inter_type,
-                                            'mechanism_description': inter_desc
-                                        }
-                                    )
-                                    # Add to cache using inter_code as key
-                                    created_interactions[inter_code] = interaction_obj
-                                interaction_objs.append(interaction_obj)
-                                if created:
-                                    success_counts['interaction'] += 1
-                                logger.debug(f"Processed interaction: {interaction_obj.interaction_code} (Created: {created})")
-                            except Exception as e:
-                                logger.error(f"Error creating/getting interaction '{inter_type}': {e}")
-                                errors.append({"type": "interaction", "data": inter_item, "error": str(e)})
-
-                    if interaction_objs:
-                        try:
-                            comp_obj, created = Companionship.objects.get_or_create(
-                                plant_subject=subject_plant,
-                                plant_object=object_plant,
-                                defaults={'notes': notes} # Add other defaults if needed
-                            )
-                            comp_obj.interactions.add(*interaction_objs) # Add interactions
-                            if created:
-                                success_counts['companionship'] += 1
-                            logger.debug(f"Processed companionship: {subject_plant} -> {object_plant} (Created: {created})")
-                        except Exception as e:
-                            logger.error(f"Error creating/updating companionship '{subject_name}' -> '{object_name}': {e}")
-                            errors.append({"type": "companionship", "subject": subject_name, "object": object_name, "error": str(e)})
-
-                # 5. Link Pests to Plants (using affected_plants field in pest data)
-                logger.info(f"Linking {len(pests_data)} pests to affected plants...")
-                for pest_item in pests_data:
-                    pest_name = pest_item.get('scientific_name') or pest_item.get('common_name')
-                    pest_obj = created_pests.get(pest_name)
-                    affected_plants_names = pest_item.get('affected_plants', [])
-
-                    if not pest_obj:
-                        # Error already logged during pest creation
-                        continue
-
-                    for plant_name in affected_plants_names:
-                        plant_obj = created_plants.get(plant_name)
-                        # Logging removed - issue is earlier
-                        if plant_obj and pest_obj:
-                            try:
-                                _, created = PlantPest.objects.get_or_create(
-                                    plant=plant_obj,
-                                    pest=pest_obj
-                                )
-                                # Logging removed
-                                if created:
-                                     success_counts['plant_pest'] += 1
-                                logger.debug(f"Linked pest '{pest_name}' to plant '{plant_name}' (Created: {created})") # Restore original debug log
-
-                            except Exception as e:
-                                # Logging removed
-                                logger.error(f"Error linking pest '{pest_name}' to plant '{plant_name}': {e}")
-                                errors.append({"type": "plant_pest_link", "pest": pest_name, "plant": plant_name, "error": str(e)})
-                        else:
-                             # Keep this error reporting for the case where plant_obj is None
-                             errors.append({"type": "plant_pest_link", "pest": pest_name, "plant": plant_name, "error": "Affected plant not found in created plants list."})
-
-                # 6. Link Diseases to Plants (using affected_plants field in disease data)
-                logger.info("Linking diseases to plants...")
-                for disease_item in diseases_data:
-                    disease_name = disease_item.get('scientific_name') or disease_item.get('common_name')
-                    affected_plants = disease_item.get('affected_plants', [])
-
-                    disease_obj = created_diseases.get(disease_name)
-                    if not disease_obj:
-                        errors.append({"type": "plant_disease_link", "disease": disease_name, "error": "Disease not found in created diseases list."})
-                        continue
-
-                    for plant_name in affected_plants:
-                        plant_obj = created_plants.get(plant_name)
-                        if plant_obj:
-                            try:
-                                # Create the many-to-many relationship
-                                PlantDisease.objects.get_or_create(plant=plant_obj, disease=disease_obj)
-                                success_counts['plant_disease'] += 1
-                            except Exception as e:
-                                logger.error(f"Error linking disease '{disease_name}' to plant '{plant_name}': {e}")
-                                errors.append({"type": "plant_disease_link", "disease": disease_name, "plant": plant_name, "error": str(e)})
-                        else:
-                             errors.append({"type": "plant_disease_link", "disease": disease_name, "plant": plant_name, "error": "Affected plant not found in created plants list."})
+                _import_complex_companions(companions_data, created_plants, created_interactions, errors, success_counts, progress)
+
+                # 5. Link Pests to Plants
+                _link_complex_pests(pests_data, created_plants, created_pests, errors, success_counts)
+
+                # 6. Link Diseases to Plants
+                _link_complex_diseases(diseases_data, created_plants, created_diseases, errors, success_counts)
 
+                invalidate_derived_data()
 
                 # If any errors occurred during the complex import, raise exception to rollback
                 if errors:
@@ -319,6 +627,7 @@ def process_bulk_import(entity_type, data_list, user_id=None):
                 "success": True,
                 "message": msg,
                 "details": success_counts, # Provide counts instead of individual results for complex import
+                "progress": progress.as_dict(),
                 "timestamp": timezone.now().isoformat()
             }
 
@@ -329,58 +638,24 @@ def process_bulk_import(entity_type, data_list, user_id=None):
                 "message": "Complex bulk import failed. Transaction rolled back.",
                 "errors": errors,
                 "exception": str(e),
+                "progress": progress.as_dict(),
                 "timestamp": timezone.now().isoformat()
             }
 
     # --- Handle Simple List Import (Original Logic - slightly adapted) ---
     else:
         logger.info(f"Processing simple list import for {entity_type}.")
-        # Map entity types to their serializers (needed for simple import)
-        serializer_map = {
-            'plant': PlantSerializer, # Keep serializers needed for simple case
-            'seed': SeedSerializer,
-            'fertilizer': FertilizerSerializer,
-            'region': RegionSerializer,
-            'soilprofile': SoilProfileSerializer,
-            'pest': PestSerializer,
-            'disease': DiseaseSerializer,
-            'companionship': CompanionshipSerializer,
-            'companioninteraction': CompanionPlantingInteractionSerializer,
-        }
-        if entity_type not in serializer_map:
+        if entity_type not in SIMPLE_IMPORT_SERIALIZERS:
              return {"success": False, "message": f"Unknown entity type for simple import: {entity_type}"}
 
-        serializer_class = serializer_map[entity_type]
-        success_count = 0
         errors = []
         results = []
+        progress = ImportProgress(total=len(data_list), report=report)
 
         try:
             with transaction.atomic():
-                for index, item_data in enumerate(data_list):
-                    # Special handling for plant scientific name parsing even in simple import
-                    if entity_type == 'plant' and 'scientific_name' in item_data:
-                        base_sci_name, cultivar = parse_scientific_name(item_data['scientific_name'])
-                        item_data['scientific_name'] = base_sci_name # Modify data for serializer
-                        if cultivar:
-                             item_data['subspecies_cultivar'] = cultivar # Add cultivar if found
-
-                    serializer = serializer_class(data=item_data)
-                    if serializer.is_valid():
-                        try:
-                            instance = serializer.save()
-                            success_count += 1
-                            results.append({
-                                "index": index,
-                                "id": instance.pk,
-                                "status": "success"
-                            })
-                        except Exception as e:
-                            logger.error(f"Error saving simple {entity_type} record at index {index}: {str(e)}")
-                            errors.append({"index": index, "error": f"Error saving record: {str(e)}", "data": item_data})
-                    else:
-                        logger.error(f"Validation error for simple {entity_type} record at index {index}: {serializer.errors}")
-                        errors.append({"index": index, "error": serializer.errors, "data": item_data})
+                success_count = _import_simple_items(entity_type, data_list, errors, results, progress=progress)
+                invalidate_derived_data()
 
                 # If any errors occurred, roll back the transaction
                 if errors:
@@ -392,6 +667,7 @@ def process_bulk_import(entity_type, data_list, user_id=None):
                 "success": True,
                 "message": f"Successfully imported {success_count} simple {entity_type} records",
                 "details": results,
+                "progress": progress.as_dict(),
                 "timestamp": timezone.now().isoformat()
             }
 
@@ -402,5 +678,177 @@ def process_bulk_import(entity_type, data_list, user_id=None):
                 "message": "Simple bulk import failed. Transaction rolled back.",
                 "errors": errors,
                 "exception": str(e),
+                "progress": progress.as_dict(),
                 "timestamp": timezone.now().isoformat()
             }
+
+
+# --- Chunked import jobs ---
+
+def _run_import_chunk(entity_type, section, records, start_index, errors, progress):
+    """
+    Imports the records of one staged chunk and returns its counters.
+    Plants referenced by pests, diseases and companionships are loaded from
+    the database since they were committed by earlier chunks.
+    """
+    if not section:
+        results = []
+        return {'imported': _import_simple_items(entity_type, records, errors, results, start_index, progress)}
+
+    success_counts = dict.fromkeys(COMPLEX_IMPORT_COUNTS, 0)
+    if section == 'plants':
+        _import_complex_plants(records, {}, errors, success_counts, progress)
+    elif section == 'pests':
+        created_pests = {}
+        _import_complex_pests(records, created_pests, errors, success_counts, progress)
+        created_plants = _load_plants_by_name(name for item in records for name in item.get('affected_plants', []))
+        _link_complex_pests(records, created_plants, created_pests, errors, success_counts)
+    elif section == 'diseases':
+        created_diseases = {}
+        _import_complex_diseases(records, created_diseases, errors, success_counts, progress)
+        created_plants = _load_plants_by_name(name for item in records for name in item.get('affected_plants', []))
+        _link_complex_diseases(records, created_plants, created_diseases, errors, success_counts)
+    elif section == 'companion_relationships':
+        created_plants = _load_plants_by_name(
+            name for item in records for name in (item.get('plant_subject'), item.get('plant_object'))
+        )
+        _import_complex_companions(records, created_plants, {}, errors, success_counts, progress)
+    return success_counts
+
+
+def _dispatch_import_phase(job, phase):
+    """Queues the pending chunks of a phase once the current transaction commits."""
+    job.status = 'running'
+    job.current_phase = phase
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=['status', 'current_phase', 'started_at', 'updated_at'])
+    chunk_ids = list(job.chunks.filter(status='pending', phase=phase).values_list('pk', flat=True))
+    logger.info(f"Import job {job.pk}: dispatching {len(chunk_ids)} chunks of phase {phase}")
+    transaction.on_commit(lambda: [process_import_chunk.delay(chunk_id) for chunk_id in chunk_ids])
+
+
+def _finish_import_job(job):
+    """Aggregates the chunk checkpoints into the job result."""
+    totals = {}
+    errors = []
+    failed_chunks = []
+    chunks = list(job.chunks.all())
+    for chunk in chunks:
+        for name, value in chunk.result.get('counts', {}).items():
+            totals[name] = totals.get(name, 0) + value
+        if chunk.status == 'failed':
+            failed_chunks.append(chunk.index)
+            errors.extend(chunk.result.get('errors', []) or [{"chunk": chunk.index, "error": chunk.result.get('exception')}])
+
+    if failed_chunks:
+        msg = f"Import job {job.pk} finished with {len(failed_chunks)} of {len(chunks)} chunks rolled back."
+    else:
+        msg = f"Import job {job.pk} imported {job.total_records} {job.entity_type} records in {len(chunks)} chunks."
+    logger.info(msg)
+    job.status = 'failed' if failed_chunks else 'completed'
+    job.result = {
+        "success": not failed_chunks,
+        "message": msg,
+        "details": totals,
+        "failed_chunks": failed_chunks,
+        "errors": errors,
+        "timestamp": timezone.now().isoformat()
+    }
+    job.save(update_fields=['status', 'result', 'updated_at'])
+
+    # Failed chunks keep their payload so they can be retried
+    completed = [chunk for chunk in chunks if chunk.status == 'completed']
+    transaction.on_commit(lambda: [delete_chunk_payload(chunk) for chunk in completed])
+
+
+def _advance_import_job(job_id):
+    """
+    Moves a job forward after one of its chunks finished: dispatches the next
+    phase once the current one is done, or finishes the job.
+    """
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update().get(pk=job_id)
+        if job.status in ('completed', 'failed'):
+            return
+        next_phase = job.chunks.filter(status='pending').aggregate(phase=Min('phase'))['phase']
+        if next_phase is None:
+            _finish_import_job(job)
+        elif next_phase != job.current_phase:
+            _dispatch_import_phase(job, next_phase)
+
+
+@shared_task
+def start_import_job(job_id):
+    """
+    Starts a job staged with import_jobs.stage_import_job by dispatching the
+    chunks of its first phase.
+    """
+    _advance_import_job(job_id)
+    return {
+        "success": True,
+        "message": f"Import job {job_id} started.",
+        "job_id": job_id,
+        "timestamp": timezone.now().isoformat()
+    }
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def process_import_chunk(chunk_id):
+    """
+    Imports one chunk of a job in its own transaction.
+
+    The checkpoint is marked completed in the same transaction as the
+    records, so a chunk redelivered after a worker crash is either skipped or
+    replayed from scratch. A chunk with errors is rolled back and marked failed
+    without stopping the rest of the job.
+    """
+    chunk = ImportChunk.objects.select_related('job').get(pk=chunk_id)
+    if chunk.status == 'pending':
+        errors = []
+        progress = ImportProgress(total=chunk.record_count)
+        try:
+            records = load_chunk_records(chunk)
+            with transaction.atomic():
+                locked = ImportChunk.objects.select_for_update().get(pk=chunk_id)
+                if locked.status == 'pending':
+                    counts = _run_import_chunk(chunk.job.entity_type, chunk.section, records, chunk.start_index, errors, progress)
+                    invalidate_derived_data()
+                    if errors:
+                        raise Exception(f"Errors occurred in chunk {chunk.index} of import job {chunk.job_id}")
+                    locked.status = 'completed'
+                    locked.result = {"counts": counts, "entities": progress.entities}
+                    locked.completed_at = timezone.now()
+                    locked.save(update_fields=['status', 'result', 'completed_at'])
+        except Exception as e:
+            logger.error(f"Import chunk {chunk.index} of job {chunk.job_id} failed: {str(e)}")
+            ImportChunk.objects.filter(pk=chunk_id, status='pending').update(
+                status='failed',
+                result={"errors": errors, "exception": str(e)},
+                completed_at=timezone.now()
+            )
+    _advance_import_job(chunk.job_id)
+
+
+@shared_task
+def resume_import_job(job_id, retry_failed=False):
+    """
+    Re-dispatches the pending chunks of a job, e.g. after the broker lost its
+    messages. Chunks already committed are never replayed.
+
+    Args:
+        job_id: The ImportJob to resume
+        retry_failed (bool): Also reset failed chunks to pending and retry them
+    """
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update().get(pk=job_id)
+        if retry_failed:
+            job.chunks.filter(status='failed').update(status='pending', result={}, completed_at=None)
+        elif job.status in ('completed', 'failed'):
+            return {"success": False, "message": f"Import job {job_id} has already finished."}
+
+        next_phase = job.chunks.filter(status='pending').aggregate(phase=Min('phase'))['phase']
+        if next_phase is None:
+            _finish_import_job(job)
+        else:
+            _dispatch_import_phase(job, next_phase)
+    return {"success": True, "message": f"Import job {job_id} resumed.", "job_id": job_id}
@@ -1,12 +1,41 @@
-from django.test import TestCase
+import copy
+import io
+import json
+import shutil
+import tempfile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
-from .models import Plant, Fertilizer, Region, SoilProfile
+from .models import (
+    Plant, Fertilizer, Region, SoilProfile, Pest, Disease, PlantPest, PlantDisease,
+    Companionship, CompanionPlantingInteraction, ImportJob, ImportChunk
+)
+from .benchmark_data import generate_dataset
+from .bulk_import_handler import BulkImportHandler
+from .import_benchmarks import IMPORT_PATHS, compare_results, run_benchmarks
+from .import_planner import plan_import
+from .json_stream import JSONStream, StreamedSection, iter_batches
+from .import_jobs import ImportProgress, stage_import_job
+from .tasks import (
+    process_bulk_import, start_import_job, process_import_chunk, resume_import_job, _import_complex_companions,
+    _import_simple_items
+)
+from .management.commands.import_json_data import Command as ImportJsonDataCommand
+from .task_views import TaskStatusView
+from garden_db_project.celery import app as celery_app
 
 User = get_user_model()
 
+
+class _Rollback(Exception):
+    """Raised to roll back an import inside a test."""
+
+
 class BulkImportTests(APITestCase):
     """Tests for the bulk import functionality."""
     
@@ -184,3 +213,803 @@ class BulkImportTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('errors', response.data)
         self.assertEqual(Plant.objects.count(), 0)  # No plants created
+
+
+class BulkImportHandlerBatchTests(TestCase):
+    """Tests for the batched upsert mode of BulkImportHandler."""
+
+    def _import(self, entity_type, data, update_existing=False, batch_size=50):
+        handler = BulkImportHandler(update_existing=update_existing, batch_size=batch_size)
+        return handler.process_json_file(io.BytesIO(json.dumps(data).encode('utf-8')), entity_type)
+
+    def _plants(self, count):
+        return [
+            {'scientific_name': f'Batchia testus {i}', 'common_name': f'Batch Plant {i}'}
+            for i in range(count)
+        ]
+
+    def test_batched_counters_match_per_record_mode(self):
+        """Test that batched and per-record mode report the same counters and errors."""
+        data = self._plants(5) + [{'common_name': 'No Name'}, {'scientific_name': 'Batchia testus 0', 'common_name': 'Duplicate'}]
+        batched = self._import('plant', data)
+        Plant.objects.all().delete()
+        per_record = self._import('plant', data, batch_size=None)
+
+        for key in ('created', 'updated', 'skipped', 'total', 'errors'):
+            self.assertEqual(batched[key], per_record[key], key)
+        self.assertEqual(batched['created'], 5)
+        self.assertEqual(batched['skipped'], 2)
+
+    def test_batched_update_existing(self):
+        """Test that existing plants are updated in batched mode."""
+        self._import('plant', self._plants(3))
+        data = [dict(item, family='Updatedaceae') for item in self._plants(3)]
+        result = self._import('plant', data, update_existing=True)
+
+        self.assertEqual(result['updated'], 3)
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(Plant.objects.filter(family='Updatedaceae').count(), 3)
+
+    def test_batched_invalid_field_reports_record_error(self):
+        """Test that a record with an unknown field is skipped with a per-record error."""
+        data = self._plants(2) + [{'scientific_name': 'Batchia brokenus', 'not_a_field': 1}]
+        result = self._import('plant', data)
+
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['skipped'], 1)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertTrue(result['errors'][0].startswith('Error processing plant:'))
+
+    def test_batched_non_object_records_are_skipped(self):
+        """Test that records that are not objects are skipped with a per-record error in batched mode."""
+        data = self._plants(2) + ['Batchia stringus', {'scientific_name': ['Batchia listus']}]
+        result = self._import('plant', data)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['skipped'], 2)
+        self.assertEqual(len(result['errors']), 2)
+        self.assertTrue(all(error.startswith('Error processing plant:') for error in result['errors']))
+
+        result = self._import('comprehensive', {
+            'plants': self._plants(2),
+            'companion_relationships': [
+                'Batchia testus 0',
+                {'plant_subject': ['Batchia testus 0'], 'plant_object': 'Batchia testus 1'},
+                {'plant_subject': 'Batchia testus 0', 'plant_object': 'Batchia testus 1', 'interactions': 5},
+                {'plant_subject': 'Batchia testus 1', 'plant_object': 'Batchia testus 0', 'interactions': [
+                    {'interaction_type': 'BEN', 'mechanism_description': 5},
+                    {'interaction_type': 'BEN', 'mechanism_description': 'Attracts pollinators'},
+                ]},
+            ],
+        })
+
+        self.assertTrue(result['success'])
+        self.assertEqual(len(result['errors']), 4)
+        self.assertEqual(Companionship.objects.count(), 2)
+        self.assertEqual(Companionship.interactions.through.objects.count(), 1)
+
+    def test_batched_pests_are_linked_to_plants(self):
+        """Test that pests imported in batched mode are linked to their affected plants."""
+        data = {
+            'plants': self._plants(2),
+            'pests': [{'common_name': 'Batch Aphid', 'affected_plants': ['Batchia testus 0', 'Batchia testus 1']}],
+        }
+        result = self._import('comprehensive', data)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(Pest.objects.get(common_name='Batch Aphid').plants.count(), 2)
+
+    def test_batched_query_count_is_independent_of_record_count(self):
+        """Test that the number of queries does not grow with the number of records."""
+        with CaptureQueriesContext(connection) as small:
+            self._import('plant', self._plants(10), batch_size=500)
+        Plant.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self._import('plant', self._plants(200), batch_size=500)
+
+        # SQLite splits large inserts by its parameter limit, so allow some slack
+        self.assertLess(len(large), len(small) + 15)
+
+
+class BulkImportHandlerLinkTests(TestCase):
+    """Tests for linking pests and diseases to their affected plants."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tomato = Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato')
+        cls.pepper = Plant.objects.create(scientific_name='Capsicum annuum', common_name='Pepper')
+        cls.bean = Plant.objects.create(scientific_name='Phaseolus vulgaris', common_name='Bean')
+
+    def _import(self, entity_type, data, batch_size=None):
+        handler = BulkImportHandler(update_existing=True, batch_size=batch_size)
+        return handler.process_json_file(io.BytesIO(json.dumps(data).encode('utf-8')), entity_type)
+
+    def test_links_are_diffed_against_existing_rows(self):
+        """Test that unchanged links are kept, stale links removed and new links added."""
+        pest = Pest.objects.create(common_name='Aphid')
+        kept = PlantPest.objects.create(plant=self.tomato, pest=pest, notes='Seen every summer')
+        PlantPest.objects.create(plant=self.bean, pest=pest)
+
+        result = self._import('pest', [
+            {'common_name': 'Aphid', 'affected_plants': ['Solanum lycopersicum', 'Capsicum annuum']}
+        ])
+
+        self.assertTrue(result['success'])
+        self.assertEqual(
+            set(PlantPest.objects.filter(pest=pest).values_list('plant__common_name', flat=True)),
+            {'Tomato', 'Pepper'}
+        )
+        kept.refresh_from_db()
+        self.assertEqual(kept.notes, 'Seen every summer')
+
+    def test_unknown_plant_is_reported(self):
+        """Test that an unknown affected plant is reported as an error."""
+        result = self._import('disease', [
+            {'common_name': 'Blight', 'affected_plants': ['Solanum lycopersicum', 'Nonexistus plantus']}
+        ])
+
+        self.assertEqual(result['errors'], ['Plant not found for disease Blight: Nonexistus plantus'])
+        self.assertEqual(PlantDisease.objects.filter(disease__common_name='Blight').count(), 1)
+
+    def test_link_queries_do_not_grow_with_host_count(self):
+        """Test that linking a pest to many plants costs a constant number of queries."""
+        hosts = [
+            Plant(scientific_name=f'Hostia plantae {i}', common_name=f'Host {i}') for i in range(300)
+        ]
+        Plant.objects.bulk_create(hosts)
+        data = [{'common_name': 'Whitefly', 'affected_plants': [p.scientific_name for p in hosts]}]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self._import('pest', data, batch_size=500)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(PlantPest.objects.filter(pest__common_name='Whitefly').count(), 300)
+        self.assertLess(len(queries), 30)
+
+
+class JSONStreamTests(TestCase):
+    """Tests for the incremental JSON reader used by the importers."""
+
+    def _stream(self, data, chunk_size=7):
+        # A tiny chunk size makes values straddle buffer boundaries
+        return JSONStream(io.BytesIO(json.dumps(data).encode('utf-8')), chunk_size=chunk_size)
+
+    def test_root_list_is_streamed(self):
+        """Test that the elements of a root array are yielded in order."""
+        data = [{'name': 'Basil é', 'size': 12345}, 3.5, None, [1, [2]], 'x']
+        stream = self._stream(data)
+
+        self.assertEqual(stream.root_type, 'list')
+        self.assertEqual(list(stream.items()), data)
+        # Sections can be iterated more than once
+        self.assertEqual(list(stream.items()), data)
+
+    def test_root_object_sections(self):
+        """Test that array members become streamed sections and others are decoded."""
+        data = {'meta': {'version': 2}, 'plants': [{'n': 1}, {'n': 2}], 'pests': [], 'count': 10}
+        stream = self._stream(data)
+        sections = stream.sections()
+
+        self.assertEqual(stream.root_type, 'dict')
+        self.assertEqual(sections['meta'], {'version': 2})
+        self.assertEqual(sections['count'], 10)
+        self.assertIsInstance(sections['plants'], StreamedSection)
+        self.assertEqual(list(sections['plants']), [{'n': 1}, {'n': 2}])
+        self.assertEqual(list(sections['pests']), [])
+
+    def test_invalid_json_raises_decode_error(self):
+        """Test that malformed documents raise json.JSONDecodeError."""
+        for payload in (b'', b'[{"a": 1},', b'[1 2]', b'{"plants": [1]} extra'):
+            stream = JSONStream(io.BytesIO(payload), chunk_size=4)
+            with self.assertRaises(json.JSONDecodeError, msg=payload):
+                if stream.root_type == 'dict':
+                    stream.sections()
+                else:
+                    list(stream.items())
+
+    def test_iter_batches(self):
+        """Test that batches have the requested size except for the last one."""
+        self.assertEqual(list(iter_batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(iter_batches([], 2)), [])
+
+
+class BulkImportHandlerStreamTests(TestCase):
+    """Tests for the streaming mode of BulkImportHandler."""
+
+    def _import(self, entity_type, data, stream, batch_size=2):
+        handler = BulkImportHandler(update_existing=True, batch_size=batch_size, stream=stream)
+        return handler.process_json_file(io.BytesIO(json.dumps(data).encode('utf-8')), entity_type)
+
+    def test_stream_mode_matches_parsed_mode(self):
+        """Test that streaming reports the same result as parsing the whole file."""
+        data = {
+            'pests': [{'common_name': 'Stream Aphid', 'affected_plants': ['Streamia prima']}],
+            'plants': [
+                {'scientific_name': f'Streamia {name}', 'common_name': name.title()}
+                for name in ('prima', 'secunda', 'tertia')
+            ] + [{'common_name': 'No Name'}],
+        }
+        streamed = self._import('comprehensive', data, stream=True)
+        Plant.objects.all().delete()
+        Pest.objects.all().delete()
+        parsed = self._import('comprehensive', data, stream=False)
+
+        for key in ('success', 'created', 'updated', 'skipped', 'total', 'errors'):
+            self.assertEqual(streamed[key], parsed[key], key)
+        self.assertEqual(streamed['total'], 5)
+        self.assertEqual(Pest.objects.get(common_name='Stream Aphid').plants.count(), 1)
+
+    def test_stream_mode_keeps_shape_detection(self):
+        """Test that list roots work for comprehensive imports and dict roots are not imported as simple lists."""
+        plants = [{'scientific_name': 'Streamia listia', 'common_name': 'List Plant'}]
+        result = self._import('comprehensive', plants, stream=True)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['created'], 1)
+
+        streamed = self._import('plant', {'plants': plants}, stream=True)
+        parsed = self._import('plant', {'plants': plants}, stream=False)
+        self.assertEqual(streamed, parsed)
+        self.assertEqual(streamed['total'], 0)
+
+    def test_stream_mode_reports_invalid_json(self):
+        """Test that a truncated file is reported as invalid JSON and nothing is imported."""
+        handler = BulkImportHandler(batch_size=1, stream=True)
+        payload = b'[{"scientific_name": "Streamia brokenus", "common_name": "Broken"}, {"scientific_name": '
+        result = handler.process_json_file(io.BytesIO(payload), 'plant')
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['message'], 'Invalid JSON format. Could not parse the file.')
+        self.assertFalse(Plant.objects.filter(scientific_name='Streamia brokenus').exists())
+
+
+class ImportJobTests(TestCase):
+    """Tests for the staged, chunked background import pipeline."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', eager)
+
+    def _complex_payload(self):
+        return [{
+            'plants': [
+                {'scientific_name': f'Chunkia plantae {i}', 'common_name': f'Chunk Plant {i}'}
+                for i in range(5)
+            ],
+            'pests': [{'common_name': 'Chunk Aphid', 'affected_plants': ['Chunkia plantae 0', 'Chunkia plantae 4']}],
+            'companion_relationships': [{
+                'plant_subject': 'Chunkia plantae 1',
+                'plant_object': 'Chunkia plantae 2',
+                'interactions': [{'interaction_type': 'BENEFICIAL', 'mechanism_description': 'Shade'}],
+            }],
+        }]
+
+    def _run(self, job):
+        with self.captureOnCommitCallbacks(execute=True):
+            start_import_job.delay(job.pk)
+        job.refresh_from_db()
+        return job
+
+    def test_api_stages_complex_imports(self):
+        """Test that the import API runs a large complex import as a staged background job."""
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpassword')
+        self.client.force_login(admin)
+        data = self._complex_payload()
+        data[0]['plants'] += [
+            {'scientific_name': f'Chunkia extra {i}', 'common_name': f'Extra Plant {i}'} for i in range(6)
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('api-bulk-import'), {'entity_type': 'plant', 'data': data}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.total_records, 13)
+        self.assertEqual(set(job.chunks.values_list('section', flat=True)), {'plants', 'pests', 'companion_relationships'})
+        self.assertEqual(Plant.objects.filter(scientific_name__startswith='Chunkia').count(), 11)
+
+    def test_stage_splits_payload_into_phased_chunks(self):
+        """Test that a complex payload is staged as chunk files ordered by phase."""
+        job = stage_import_job('plant', self._complex_payload(), chunk_size=2)
+
+        chunks = list(job.chunks.values_list('section', 'phase', 'start_index', 'record_count'))
+        self.assertEqual(chunks, [
+            ('plants', 0, 0, 2), ('plants', 0, 2, 2), ('plants', 0, 4, 1),
+            ('pests', 1, 0, 1), ('companion_relationships', 2, 0, 1),
+        ])
+        self.assertEqual(job.total_records, 7)
+        self.assertTrue(all(default_storage.exists(chunk.payload) for chunk in job.chunks.all()))
+
+    def test_complex_job_imports_every_chunk(self):
+        """Test that running a job imports all sections and removes the staged files."""
+        job = self._run(stage_import_job('plant', self._complex_payload(), chunk_size=2))
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.result['details']['plant'], 5)
+        self.assertEqual(Plant.objects.filter(scientific_name__startswith='Chunkia').count(), 5)
+        self.assertEqual(Pest.objects.get(common_name='Chunk Aphid').plants.count(), 2)
+        self.assertTrue(Companionship.objects.filter(plant_subject__common_name='Chunk Plant 1').exists())
+        self.assertFalse(any(default_storage.exists(chunk.payload) for chunk in job.chunks.all()))
+
+    def test_resume_skips_committed_chunks(self):
+        """Test that resuming a job only replays chunks that were not committed."""
+        data = [{'name': f'Chunk Soil {i}', 'soil_type': 'LO'} for i in range(4)]
+        job = stage_import_job('soilprofile', data, chunk_size=2)
+        first = job.chunks.get(index=0)
+        # Simulate a worker that committed the first chunk and then crashed
+        with self.captureOnCommitCallbacks(execute=False):
+            process_import_chunk.delay(first.pk)
+        SoilProfile.objects.filter(name='Chunk Soil 0').update(description='committed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resume_import_job.delay(job.pk)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(SoilProfile.objects.filter(name__startswith='Chunk Soil').count(), 4)
+        self.assertEqual(SoilProfile.objects.get(name='Chunk Soil 0').description, 'committed')
+
+    def test_failed_chunk_is_rolled_back_alone(self):
+        """Test that a chunk with errors is rolled back without affecting other chunks."""
+        data = [{'name': 'Good Soil', 'soil_type': 'LO'}, {'name': 'Bad Soil', 'soil_type': 'NOT_A_TYPE'}]
+        job = self._run(stage_import_job('soilprofile', data, chunk_size=1))
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.result['failed_chunks'], [1])
+        self.assertEqual(job.result['errors'][0]['index'], 1)
+        self.assertTrue(SoilProfile.objects.filter(name='Good Soil').exists())
+        self.assertFalse(SoilProfile.objects.filter(name='Bad Soil').exists())
+        # The payload of the failed chunk is kept for a retry
+        self.assertTrue(default_storage.exists(job.chunks.get(index=1).payload))
+
+
+class ImportProgressTests(TestCase):
+    """Tests for import progress reporting."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', eager)
+        self.user = User.objects.create_superuser('progress_admin', 'progress@example.com', 'password123')
+        self.client.force_login(self.user)
+
+    def test_progress_counts_outcomes_and_reports(self):
+        """Test that ImportProgress counts outcomes per entity and reports snapshots."""
+        snapshots = []
+        progress = ImportProgress(total=4, report=snapshots.append, interval=3600)
+        progress.record('plant', 'created')
+        progress.record('plant', 'failed')
+        progress.advance(2)
+        progress.advance(1)
+
+        state = progress.as_dict()
+        self.assertEqual(len(snapshots), 1)  # Throttled by the interval
+        self.assertEqual(state['records_processed'], 3)
+        self.assertEqual(state['percent'], 75.0)
+        self.assertEqual(state['entities'], {'plant': {'created': 1, 'updated': 0, 'failed': 1}})
+        self.assertIn('eta_seconds', state)
+
+    def test_bulk_import_result_includes_progress(self):
+        """Test that process_bulk_import reports per-entity counts."""
+        data = [{'plants': [
+            {'scientific_name': 'Progressia prima', 'common_name': 'Progress One'},
+            {'common_name': 'No Name'},
+        ]}]
+        result = process_bulk_import('plant', data)
+
+        self.assertEqual(result['progress']['records_processed'], 2)
+        self.assertEqual(result['progress']['entities']['plant'], {'created': 1, 'updated': 0, 'failed': 1})
+
+    def test_task_status_reports_job_progress(self):
+        """Test that TaskStatusView reports the progress of a staged import job."""
+        data = [{'name': f'Progress Soil {i}', 'soil_type': 'LO'} for i in range(3)]
+        job = stage_import_job('soilprofile', data, task_id='progress-task', chunk_size=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            start_import_job.delay(job.pk)
+
+        response = self.client.get(reverse('task-status', args=['progress-task']))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'completed')
+        progress = response.json()['progress']
+        self.assertEqual(progress['records_processed'], 3)
+        self.assertEqual(progress['entities']['soilprofile']['created'], 3)
+
+    def test_task_status_event_stream(self):
+        """Test that TaskStatusView streams server-sent events until the task has finished."""
+        job = stage_import_job('soilprofile', [{'name': 'Stream Soil', 'soil_type': 'LO'}], task_id='stream-task')
+        with self.captureOnCommitCallbacks(execute=True):
+            start_import_job.delay(job.pk)
+
+        response = self.client.get(reverse('task-status', args=['stream-task']), HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = b''.join(response.streaming_content).decode('utf-8').strip().split('\n\n')
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0], 'retry: 5000')
+        self.assertTrue(events[1].startswith('data: '))
+        self.assertEqual(json.loads(events[1][len('data: '):])['status'], 'completed')
+
+    def test_task_status_event_stream_ends_for_unknown_task(self):
+        """Test that the event stream of a task Celery does not know ends after its first event."""
+        view = TaskStatusView()
+        # What the Celery result backend answers for a task id it has never seen
+        view.get_task_status = lambda task_id: {'status': 'pending', 'message': 'Task is pending or does not exist'}
+        view.stream_interval = 60
+
+        events = b''.join(view._event_stream('no-such-task')).decode('utf-8').strip().split('\n\n')
+        self.assertEqual(len(events), 2)
+        self.assertEqual(json.loads(events[1][len('data: '):])['status'], 'pending')
+
+
+class ImportJsonDataPlanTests(TestCase):
+    """Tests for the staged directory import of the import_json_data command."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def _write(self, filename, data):
+        with open(f'{self.directory}/{filename}', 'w', encoding='utf-8') as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+
+    def test_linking_files_are_planned_after_their_dependencies(self):
+        """Test that comprehensive and plant-linking files run after independent files."""
+        self._write('diseases_blight.json', [{'scientific_name': 'Blightus'}])
+        self._write('comprehensive.json', {'plants': [], 'companion_relationships': []})
+        self._write('seeds_a.json', [{'name': 'Seed A'}])
+        self._write('plants_a.json', [{'scientific_name': 'Planta a'}])
+        self._write('unknown.json', [])
+        self._write('broken_a.json', '{')
+        self._write('notes.txt', 'not json')
+
+        command = ImportJsonDataCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        stages = command._plan_directory_import(self.directory)
+
+        planned = [([(filename, prefix) for _, filename, prefix in files], parallel) for files, parallel in stages]
+        self.assertEqual(planned, [
+            ([('plants_a.json', 'plants'), ('seeds_a.json', 'seeds')], True),
+            ([('comprehensive.json', None)], False),
+            ([('diseases_blight.json', 'diseases')], True),
+        ])
+
+    def test_disease_file_links_host_plants_in_bulk(self):
+        """Test that a disease file links its host plants with a constant number of plant and link queries."""
+        def import_diseases(count):
+            self._write('diseases_blight.json', {'disease_list': [
+                {
+                    'Scientific Name (Pathogen)': f'Blightus {i}',
+                    'common_name': f'Blight {i}',
+                    'Affected Host Plants': ['Tomato (Solanum lycopersicum)', 'Tomato', 'Pepper', 'Unknownia'],
+                }
+                for i in range(count)
+            ]})
+            command = ImportJsonDataCommand(stdout=io.StringIO(), stderr=io.StringIO())
+            with CaptureQueriesContext(connection) as queries:
+                command.import_data(f'{self.directory}/diseases_blight.json', Disease, 'Scientific Name (Pathogen)', 'scientific_name', 'diseases_blight.json', force_single_type=True)
+            return [query['sql'] for query in queries.captured_queries if 'horticulture_plant' in query['sql']]
+
+        Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato')
+        Plant.objects.create(scientific_name='Solanum pimpinellifolium', common_name='Currant Tomato')
+        Plant.objects.create(scientific_name='Capsicum annuum', common_name='Bell Pepper')
+        small = import_diseases(2)
+        self.assertEqual(PlantDisease.objects.count(), 6)
+        self.assertEqual(
+            set(PlantDisease.objects.filter(disease__scientific_name='Blightus 0').values_list('plant__common_name', flat=True)),
+            {'Tomato', 'Currant Tomato', 'Bell Pepper'}
+        )
+
+        PlantDisease.objects.all().delete()
+        large = import_diseases(20)
+        self.assertEqual(PlantDisease.objects.count(), 60)
+        self.assertEqual(len(large), len(small))
+
+
+class ComprehensiveImportPlannerTests(TestCase):
+    """Tests for the dependency-aware planning of comprehensive imports."""
+
+    def _document(self, count):
+        plants = [
+            {'scientific_name': f'Plannia testus {i}', 'common_name': f'Planned Plant {i}'}
+            for i in range(count)
+        ]
+        return {
+            'companion_relationships': [
+                {
+                    'plant_subject': plants[i]['scientific_name'],
+                    'plant_object': plants[(i + 1) % count]['scientific_name'],
+                    'interactions': [{'interaction_type': 'BEN', 'mechanism_description': 'Attracts pollinators'}],
+                }
+                for i in range(count)
+            ],
+            'pests': [
+                {'common_name': f'Planned Aphid {i}', 'scientific_name': f'Aphis plannus {i}', 'affected_plants': [plants[i]['scientific_name']]}
+                for i in range(count)
+            ],
+            'plants': plants,
+        }
+
+    def _handler_import(self, data, batch_size=50):
+        handler = BulkImportHandler(update_existing=True, batch_size=batch_size)
+        return handler.process_json_file(io.BytesIO(json.dumps(data).encode('utf-8')), 'comprehensive')
+
+    def _command_import(self, data):
+        ImportJsonDataCommand(stdout=io.StringIO(), stderr=io.StringIO())._import_comprehensive_data(data, 'comprehensive.json')
+
+    def test_plan_orders_sections_and_collects_references(self):
+        """Test that referenced sections come first and references are collected once."""
+        plan = plan_import(self._document(3), {
+            'pests': BulkImportHandler._affected_plant_references,
+            'companion_relationships': BulkImportHandler._companion_references,
+        })
+
+        self.assertEqual(plan.steps.index('plants'), 0)
+        self.assertLess(plan.steps.index('interactions'), plan.steps.index('companion_relationships'))
+        self.assertEqual(len(plan.referenced('plants')), 3)
+        self.assertEqual(len(plan.referenced('interactions')), 1)
+
+    def test_handler_imports_sections_in_dependency_order(self):
+        """Test that companionships listed before their plants are imported with their interactions."""
+        result = self._handler_import(self._document(5))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(Companionship.objects.count(), 5)
+        self.assertEqual(CompanionPlantingInteraction.objects.count(), 1)
+        self.assertEqual(Companionship.interactions.through.objects.count(), 5)
+        self.assertEqual(PlantPest.objects.count(), 5)
+
+    def test_handler_batched_companionships_match_per_record_mode(self):
+        """Test that batched companionships report the same counters as per-record mode."""
+        data = self._document(4)
+        data['companion_relationships'].append({'plant_subject': 'Unknownia', 'plant_object': 'Plannia testus 0'})
+        batched = self._handler_import(data)
+        Plant.objects.all().delete()
+        Pest.objects.all().delete()
+        CompanionPlantingInteraction.objects.all().delete()
+        per_record = self._handler_import(data, batch_size=None)
+
+        for key in ('created', 'updated', 'skipped', 'total', 'errors'):
+            self.assertEqual(batched[key], per_record[key], key)
+
+    def test_handler_query_count_is_independent_of_record_count(self):
+        """Test that a comprehensive import runs a constant number of queries per batch."""
+        with CaptureQueriesContext(connection) as small:
+            self._handler_import(self._document(10), batch_size=500)
+        Plant.objects.all().delete()
+        Pest.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self._handler_import(self._document(150), batch_size=500)
+
+        # SQLite splits large inserts by its parameter limit, so allow some slack
+        self.assertLess(len(large), len(small) + 15)
+
+    def test_command_links_and_query_count(self):
+        """Test the command's comprehensive import wires relationships with a constant number of queries."""
+        CompanionPlantingInteraction.objects.create(interaction_code='BEN_POLLINATORS', interaction_type='BEN')
+        with CaptureQueriesContext(connection) as small:
+            self._command_import(self._document(10))
+        self.assertEqual(Companionship.objects.count(), 10)
+        self.assertEqual(Companionship.interactions.through.objects.count(), 10)
+        self.assertEqual(
+            Companionship.objects.get(plant_subject__scientific_name='Plannia testus 0').notes,
+            'Interaction (BEN): Attracts pollinators'
+        )
+        self.assertTrue(PlantPest.objects.filter(pest__common_name='Planned Aphid 0', plant__scientific_name='Plannia testus 0').exists())
+
+        Plant.objects.all().delete()
+        Pest.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self._command_import(self._document(150))
+
+        self.assertEqual(Companionship.objects.count(), 150)
+        self.assertLess(len(large), len(small) + 15)
+
+    def test_command_bad_record_fails_alone(self):
+        """Test that a record with an invalid relation value fails on its own without dropping its section."""
+        data = self._document(2)
+        data['plants'].append({'scientific_name': 'Badia testus', 'common_name': 'Bad Plant', 'soil_preference': 3})
+        output = io.StringIO()
+        ImportJsonDataCommand(stdout=output, stderr=io.StringIO())._import_comprehensive_data(data, 'comprehensive.json')
+
+        self.assertIn("Finished section 'plants': Imported/Updated 2, Failed 1", output.getvalue())
+        self.assertEqual(Plant.objects.count(), 2)
+        self.assertEqual(Pest.objects.count(), 2)
+        self.assertEqual(Companionship.objects.count(), 2)
+
+
+class ComplexCompanionImportTests(TestCase):
+    """Tests for the bulk companionship path of process_bulk_import."""
+
+    def _payload(self, count):
+        plants = [
+            {'scientific_name': f'Companio testus {i}', 'common_name': f'Companion Plant {i}'}
+            for i in range(count)
+        ]
+        companions = [
+            {
+                'plant_subject': plants[i]['scientific_name'],
+                'plant_object': plants[(i + 1) % count]['scientific_name'],
+                'notes': f'Pair {i}',
+                'interactions': [
+                    {'interaction_type': 'BEN', 'mechanism_description': 'Attracts pollinators'},
+                    {'interaction_type': 'BEN', 'mechanism_description': f'Mechanism {i % 3}'},
+                ],
+            }
+            for i in range(count)
+        ]
+        return [{'plants': plants, 'companion_relationships': companions}]
+
+    def test_companionships_and_interactions_are_bulk_created(self):
+        """Test that interactions are created once and linked through bulk-inserted rows."""
+        result = process_bulk_import('plant', self._payload(6))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['details']['companionship'], 6)
+        self.assertEqual(result['details']['interaction'], 4)
+        self.assertEqual(CompanionPlantingInteraction.objects.count(), 4)
+        self.assertEqual(Companionship.interactions.through.objects.count(), 12)
+        self.assertEqual(result['progress']['entities']['companionship'], {'created': 6, 'updated': 0, 'failed': 0})
+
+    def test_existing_companionship_keeps_notes_and_gains_interactions(self):
+        """Test that existing pairs are not overwritten, only get the new interactions added."""
+        subject = Plant.objects.create(scientific_name='Companio testus 0', common_name='Existing')
+        target = Plant.objects.create(scientific_name='Companio testus 1', common_name='Existing Too')
+        companionship = Companionship.objects.create(plant_subject=subject, plant_object=target, notes='Keep me')
+
+        result = process_bulk_import('plant', self._payload(3))
+
+        self.assertTrue(result['success'])
+        companionship.refresh_from_db()
+        self.assertEqual(companionship.notes, 'Keep me')
+        self.assertEqual(companionship.interactions.count(), 2)
+        self.assertEqual(result['details']['companionship'], 2)
+
+    def test_companion_query_count_is_independent_of_edge_count(self):
+        """Test that companionships are written with a constant number of queries."""
+        small_payload = self._payload(10)
+        large_payload = self._payload(200)
+        Plant.objects.bulk_create([Plant(**item) for item in large_payload[0]['plants']])
+        plants = {plant.scientific_name: plant for plant in Plant.objects.all()}
+
+        with CaptureQueriesContext(connection) as small:
+            _import_complex_companions(small_payload[0]['companion_relationships'], plants, {}, [], dict(companionship=0, interaction=0))
+        Companionship.objects.all().delete()
+        CompanionPlantingInteraction.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            _import_complex_companions(large_payload[0]['companion_relationships'], plants, {}, [], dict(companionship=0, interaction=0))
+
+        self.assertEqual(Companionship.objects.count(), 200)
+        # SQLite splits large inserts by its parameter limit, so allow some slack
+        self.assertLess(len(large), len(small) + 10)
+
+
+class CompiledValidatorTests(TestCase):
+    """Tests for the serializer-free fast path of simple list imports."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.plant = Plant.objects.create(scientific_name='Validia existens', common_name='Existing')
+        cls.interaction = CompanionPlantingInteraction.objects.create(interaction_code='VALID_CODE')
+
+    def _import(self, entity_type, data, use_serializer):
+        errors, results = [], []
+        try:
+            with transaction.atomic():
+                saved = _import_simple_items(entity_type, copy.deepcopy(data), errors, results, use_serializer=use_serializer)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return saved, {error['index']: sorted(error['error']) for error in errors}, [result['index'] for result in results]
+
+    def test_fast_path_reports_the_serializer_errors(self):
+        """Test that both paths save the same rows and key the same field errors by row index."""
+        cases = {
+            'plant': [
+                {'scientific_name': 'Validia nova', 'common_name': 'New'},
+                {'common_name': 'No scientific name'},
+                {'scientific_name': 'Validia existens'},
+                {'scientific_name': 'Validia nova'},
+                {'scientific_name': 'Validia choicea', 'lifecycle_type': 'XX'},
+                {'scientific_name': 'Validia numerica', 'avg_height_inches': 'tall'},
+                {'scientific_name': 'Validia decimalis', 'soil_ph_min': 6.3, 'soil_ph_max': 6.125},
+                {'scientific_name': 'Validia relata', 'soil_preference': 999},
+                {'scientific_name': 'x' * 300},
+                {'scientific_name': 'Validia blanca', 'common_name': ''},
+                "not an object",
+            ],
+            'region': [{'zone_identifier': '8a'}, {'zone_identifier': '8a'}, {'name': 'Default zone'}],
+            'companionship': [
+                {'plant_subject': self.plant.pk, 'plant_object': self.plant.pk, 'interactions': [self.interaction.pk]},
+                {'plant_subject': self.plant.pk, 'plant_object': self.plant.pk, 'interactions': [self.interaction.pk]},
+                {'plant_subject': 'abc', 'plant_object': self.plant.pk, 'interactions': [999]},
+                {'plant_subject': self.plant.pk, 'interactions': []},
+            ],
+        }
+        for entity_type, data in cases.items():
+            with self.subTest(entity_type=entity_type):
+                self.assertEqual(
+                    self._import(entity_type, data, use_serializer=False),
+                    self._import(entity_type, data, use_serializer=True),
+                )
+
+    def test_fast_path_writes_many_to_many_rows(self):
+        """Test that many-to-many values are written as through rows."""
+        errors, results = [], []
+        _import_simple_items('companionship', [
+            {'plant_subject': self.plant.pk, 'plant_object': self.plant.pk, 'interactions': [self.interaction.pk]},
+        ], errors, results, use_serializer=False)
+
+        self.assertEqual(errors, [])
+        companionship = Companionship.objects.get(pk=results[0]['id'])
+        self.assertEqual(list(companionship.interactions.all()), [self.interaction])
+
+    def test_fast_path_query_count_is_independent_of_record_count(self):
+        """Test that the fast path runs a constant number of queries per batch."""
+        def plants(count, prefix):
+            return [{'scientific_name': f'{prefix} {i}', 'common_name': f'Plant {i}'} for i in range(count)]
+
+        with CaptureQueriesContext(connection) as small:
+            _import_simple_items('plant', plants(10, 'Validia parva'), [], [], use_serializer=False)
+        with CaptureQueriesContext(connection) as large:
+            _import_simple_items('plant', plants(300, 'Validia magna'), [], [], use_serializer=False)
+
+        # SQLite splits large inserts by its parameter limit, so allow some slack
+        self.assertLess(len(large), len(small) + 15)
+
+
+class ImportBenchmarkSuiteTests(TestCase):
+    """Tests for the synthetic dataset generator and the import benchmark suite."""
+
+    def test_generated_dataset_is_deterministic_and_consistent(self):
+        """Test that datasets only depend on the seed and reference their own plants."""
+        dataset = generate_dataset(50, seed=3)
+        self.assertEqual(dataset, generate_dataset(50, seed=3))
+        self.assertNotEqual(dataset, generate_dataset(50, seed=4))
+
+        names = {plant['scientific_name'] for plant in dataset['plants']}
+        self.assertEqual(len(names), 50)
+        self.assertEqual((len(dataset['pests']), len(dataset['diseases']), len(dataset['companion_relationships'])), (5, 5, 50))
+        for item in dataset['pests'] + dataset['diseases']:
+            self.assertTrue(set(item['affected_plants']) <= names)
+        for relationship in dataset['companion_relationships']:
+            self.assertIn(relationship['plant_subject'], names)
+            self.assertIn(relationship['plant_object'], names)
+
+    def test_every_import_path_imports_the_dataset_and_rolls_back(self):
+        """Test that each path imports the dataset without errors and leaves no rows behind."""
+        results = run_benchmarks([('tiny', generate_dataset(20))], list(IMPORT_PATHS), isolate=False)
+
+        self.assertEqual([result['path'] for result in results], list(IMPORT_PATHS))
+        for result in results:
+            with self.subTest(path=result['path']):
+                self.assertEqual(result['errors'], 0)
+                self.assertEqual(result['records'], 44)
+                self.assertGreater(result['queries'], 0)
+                self.assertGreater(result['peak_rss_kb'], 0)
+        self.assertFalse(Plant.objects.exists())
+        self.assertFalse(User.objects.filter(username='import-benchmark').exists())
+
+    def test_compare_results_flags_regressions(self):
+        """Test that metrics growing beyond the threshold are reported as regressions."""
+        def report(vendor, wall_time, queries):
+            return {
+                'metadata': {'vendor': vendor},
+                'results': [{'path': 'handler', 'scale': '1k', 'wall_time_s': wall_time, 'queries': queries, 'peak_rss_kb': 1000}],
+            }
+
+        comparisons = compare_results(report('sqlite', 1.0, 100), report('sqlite', 1.1, 150), threshold=0.2)
+        self.assertEqual(comparisons[0]['regressions'], ['queries'])
+        self.assertEqual(comparisons[0]['ratios']['wall_time_s'], 1.1)
+        self.assertEqual(compare_results(report('postgresql', 1.0, 100), report('sqlite', 1.0, 100)), [])
@@ -0,0 +1,123 @@
+import random
+import time
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from .companion_graph import BENEFICIAL, DETRIMENTAL, NEUTRAL, companion_graph, invalidate_companion_graph, solve_beds
+from .models import Plant, Companionship, CompanionPlantingInteraction
+from .testing import SuperuserTestCase
+
+
+class BedSolverTests(SuperuserTestCase):
+    """Tests for the in-memory companion graph and the garden bed solver."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tomato, cls.basil, cls.fennel, cls.carrot, cls.dill = [
+            Plant.objects.create(scientific_name=f'Plantae {name}', common_name=name)
+            for name in ('Tomato', 'Basil', 'Fennel', 'Carrot', 'Dill')
+        ]
+        cls.helps = CompanionPlantingInteraction.objects.create(interaction_code='HELPS', interaction_type='BEN')
+        cls.harms = CompanionPlantingInteraction.objects.create(interaction_code='HARMS', interaction_type='DET')
+        cls.pair(cls.basil, cls.tomato, cls.helps)
+        cls.pair(cls.tomato, cls.carrot, cls.helps)
+        cls.pair(cls.fennel, cls.tomato, cls.harms)
+        cls.pair(cls.dill, cls.carrot, cls.harms)
+        cls.pair(cls.dill, cls.fennel, cls.helps)
+
+    @staticmethod
+    def pair(subject, target, interaction):
+        companionship = Companionship.objects.create(plant_subject=subject, plant_object=target)
+        companionship.interactions.add(interaction)
+        return companionship
+
+    def setUp(self):
+        # The graph outlives the rolled back rows of other tests
+        cache.clear()
+        companion_graph.reset()
+        self.addCleanup(companion_graph.reset)
+
+    def bed_of(self, result, plant):
+        return next(bed['plants'] for bed in result['beds'] if plant.pk in bed['plants'])
+
+    def test_solver_keeps_detrimental_pairs_apart(self):
+        """Test that beneficial partners share a bed and detrimental ones do not."""
+        plants = [self.tomato.pk, self.basil.pk, self.fennel.pk, self.carrot.pk, self.dill.pk]
+        result = solve_beds(plants)
+
+        self.assertEqual(sorted(self.bed_of(result, self.tomato)), sorted([self.tomato.pk, self.basil.pk, self.carrot.pk]))
+        self.assertEqual(sorted(self.bed_of(result, self.fennel)), sorted([self.fennel.pk, self.dill.pk]))
+        self.assertEqual((result['beneficial_pairs'], result['detrimental_pairs']), (3, 0))
+        self.assertEqual(result['matrix'][0], [NEUTRAL, BENEFICIAL, DETRIMENTAL, BENEFICIAL, NEUTRAL])
+
+    def test_bed_limits(self):
+        """Test that bed_size and beds bound the grouping."""
+        plants = [self.tomato.pk, self.basil.pk, self.carrot.pk]
+        self.assertTrue(all(len(bed['plants']) <= 2 for bed in solve_beds(plants, bed_size=2)['beds']))
+
+        result = solve_beds([self.tomato.pk, self.fennel.pk], beds=1)
+        self.assertEqual(len(result['beds']), 1)
+        self.assertEqual(result['detrimental_pairs'], 1)
+
+    def test_graph_is_refreshed_incrementally(self):
+        """Test that new, changed and deleted pairings show up without reloading the graph."""
+        solve_beds([self.tomato.pk])
+        generation = companion_graph.generation
+
+        onion = Plant.objects.create(scientific_name='Allium cepa', common_name='Onion')
+        self.pair(onion, self.carrot, self.helps)
+        self.helps.interaction_type = 'DET'
+        self.helps.save()
+        Companionship.objects.get(plant_subject=self.fennel).delete()
+
+        matrix = solve_beds([self.tomato.pk, self.basil.pk, self.fennel.pk, onion.pk, self.carrot.pk])['matrix']
+        self.assertEqual(matrix[0], [NEUTRAL, DETRIMENTAL, NEUTRAL, NEUTRAL, DETRIMENTAL])
+        self.assertEqual(matrix[3][4], DETRIMENTAL)
+        self.assertEqual(companion_graph.generation, generation)
+
+        invalidate_companion_graph()
+        self.assertEqual(solve_beds([self.tomato.pk, self.basil.pk])['matrix'][0][1], DETRIMENTAL)
+        self.assertNotEqual(companion_graph.generation, generation)
+
+    def test_200_plants_are_grouped_within_a_second(self):
+        """Test the solver on 200 candidates with dense random pairings."""
+        rng = random.Random(0)
+        plants = Plant.objects.bulk_create([
+            Plant(scientific_name=f'Synthetic {index}', common_name=f'Synthetic {index}') for index in range(200)
+        ])
+        pairs = rng.sample([(a, b) for a in range(200) for b in range(a + 1, 200)], 4000)
+        companionships = Companionship.objects.bulk_create([
+            Companionship(plant_subject=plants[a], plant_object=plants[b]) for a, b in pairs
+        ])
+        Companionship.interactions.through.objects.bulk_create([
+            Companionship.interactions.through(
+                companionship=companionship, companionplantinginteraction=rng.choice((self.helps, self.helps, self.harms))
+            )
+            for companionship in companionships
+        ])
+        invalidate_companion_graph()
+        companion_graph.refresh()
+
+        started = time.monotonic()
+        result = solve_beds([plant.pk for plant in plants], bed_size=12)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(sorted(pk for bed in result['beds'] for pk in bed['plants']), sorted(plant.pk for plant in plants))
+        self.assertTrue(all(len(bed['plants']) <= 12 for bed in result['beds']))
+        self.assertGreater(result['beneficial_pairs'], 0)
+
+    def test_solver_api(self):
+        """Test the solver endpoint and its validation."""
+        url = reverse('api-bed-solve')
+        response = self.client.post(url, {'plants': [self.tomato.pk, self.fennel.pk, 0], 'include_matrix': False}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['plants'], [self.tomato.pk, self.fennel.pk])
+        self.assertEqual(len(data['beds']), 2)
+        self.assertEqual(data['not_found'], [0])
+        self.assertNotIn('matrix', data)
+
+        self.assertEqual(self.client.post(url, {'plants': 'all'}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'plants': [1], 'beds': 0}, content_type='application/json').status_code, 400)
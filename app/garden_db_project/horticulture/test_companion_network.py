@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from .companion_graph import companion_graph
+from .companion_network import components, neighborhood, shared_partners
+from .compatibility import InteractionType
+from .models import Plant, Companionship, CompanionPlantingInteraction
+from .testing import SuperuserTestCase
+
+
+class CompanionNetworkTests(SuperuserTestCase):
+    """
+    Tests for the companion network traversals. Every traversal is checked
+    with both the recursive CTEs (portable enough to run on SQLite) and the
+    in-memory graph.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.plants = {
+            name: Plant.objects.create(scientific_name=f'Plantae {name}', common_name=name)
+            for name in ('Tomato', 'Basil', 'Carrot', 'Onion', 'Fennel', 'Dill', 'Mint')
+        }
+        helps = CompanionPlantingInteraction.objects.create(interaction_code='HELPS', interaction_type='BEN')
+        harms = CompanionPlantingInteraction.objects.create(interaction_code='HARMS', interaction_type='DET')
+        # Tomato - Basil - Onion - Carrot - Tomato in a beneficial cycle, Fennel
+        # harming Tomato and helping Dill, and Mint paired both ways with Onion
+        for subject, target, interaction in (
+            ('Tomato', 'Basil', helps), ('Basil', 'Onion', helps), ('Onion', 'Carrot', helps),
+            ('Carrot', 'Tomato', helps), ('Fennel', 'Tomato', harms), ('Fennel', 'Dill', helps),
+            ('Mint', 'Onion', helps), ('Onion', 'Mint', harms),
+        ):
+            Companionship.objects.create(
+                plant_subject=cls.plants[subject], plant_object=cls.plants[target]
+            ).interactions.add(interaction)
+
+    def setUp(self):
+        # The graph outlives the rolled back rows of other tests
+        cache.clear()
+        companion_graph.reset()
+        self.addCleanup(companion_graph.reset)
+
+    def pks(self, *names):
+        return [self.plants[name].pk for name in names]
+
+    def test_neighborhood(self):
+        """Test k-hop neighborhoods over any and over beneficial links."""
+        tomato = self.plants['Tomato'].pk
+        for sql in (True, False):
+            with self.subTest(sql=sql):
+                self.assertEqual(neighborhood(tomato, 1, sql=sql), dict.fromkeys(self.pks('Basil', 'Carrot', 'Fennel'), 1))
+                two_hops = neighborhood(tomato, 2, InteractionType.BENEFICIAL, sql=sql)
+                self.assertEqual(two_hops, {**dict.fromkeys(self.pks('Basil', 'Carrot'), 1), self.plants['Onion'].pk: 2})
+                # The Mint pairings are detrimental in one direction, so the link is
+                self.assertNotIn(self.plants['Mint'].pk, neighborhood(tomato, 4, InteractionType.BENEFICIAL, sql=sql))
+                self.assertEqual(neighborhood(tomato, 4, InteractionType.DETRIMENTAL, sql=sql), {self.plants['Fennel'].pk: 1})
+
+    def test_shared_partners(self):
+        """Test the plants sharing beneficial partners with a plant."""
+        tomato = self.plants['Tomato'].pk
+        for sql in (True, False):
+            with self.subTest(sql=sql):
+                self.assertEqual(
+                    shared_partners(tomato, InteractionType.BENEFICIAL, sql=sql),
+                    {self.plants['Onion'].pk: sorted(self.pks('Basil', 'Carrot'))},
+                )
+                self.assertIn(self.plants['Dill'].pk, shared_partners(tomato, sql=sql))
+
+    def test_components(self):
+        """Test connected components by interaction type, of the network and of a plant."""
+        beneficial = components(InteractionType.BENEFICIAL, sql=False)
+        self.assertEqual(beneficial, [sorted(self.pks('Tomato', 'Basil', 'Carrot', 'Onion')), sorted(self.pks('Fennel', 'Dill'))])
+        self.assertEqual(len(components()), 1)
+        for sql in (True, False):
+            with self.subTest(sql=sql):
+                self.assertEqual(components(InteractionType.BENEFICIAL, plant_id=self.plants['Dill'].pk, sql=sql), [sorted(self.pks('Fennel', 'Dill'))])
+                self.assertEqual(components(InteractionType.NEUTRAL, plant_id=self.plants['Dill'].pk, sql=sql), [])
+
+    def test_network_api(self):
+        """Test the neighborhood, shared partner and component endpoints."""
+        tomato = self.plants['Tomato']
+        response = self.client.get(reverse('plant-neighborhood', args=[tomato.pk]), {'hops': 2, 'type': 'beneficial'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['common_name'] for result in response.json()['results']][-1], 'Onion')
+
+        response = self.client.get(reverse('plant-shared-partners', args=[tomato.pk]), {'type': 'beneficial'})
+        self.assertEqual(response.json()['results'][0]['common_name'], 'Onion')
+        self.assertEqual(len(response.json()['results'][0]['shared_partners']), 2)
+
+        response = self.client.get(reverse('plant-components'), {'type': 'beneficial'})
+        self.assertEqual([result['size'] for result in response.json()['results']], [4, 2])
+
+        self.assertEqual(self.client.get(reverse('plant-neighborhood', args=[tomato.pk]), {'hops': 9}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('plant-components'), {'type': 'friendly'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('plant-neighborhood', args=[0])).status_code, 404)
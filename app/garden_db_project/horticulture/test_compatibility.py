@@ -0,0 +1,66 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Plant, Companionship, CompanionPlantingInteraction
+from .testing import SuperuserTestCase
+
+
+class PlantCompatibilityTests(SuperuserTestCase):
+    """Tests for the single and batch plant compatibility endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tomato = Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato', soil_ph_min='6.0', soil_ph_max='6.8')
+        cls.basil = Plant.objects.create(scientific_name='Ocimum basilicum', common_name='Basil')
+        cls.fennel = Plant.objects.create(scientific_name='Foeniculum vulgare', common_name='Fennel')
+        cls.carrot = Plant.objects.create(scientific_name='Daucus carota', common_name='Carrot')
+        repels = CompanionPlantingInteraction.objects.create(interaction_code='PEST_REPEL', interaction_type='BEN')
+        inhibits = CompanionPlantingInteraction.objects.create(interaction_code='ALLELOPATHY', interaction_type='DET')
+        shades = CompanionPlantingInteraction.objects.create(interaction_code='SHADE', interaction_type='BEN')
+        Companionship.objects.create(plant_subject=cls.basil, plant_object=cls.tomato, notes='Repels hornworms.').interactions.add(repels)
+        Companionship.objects.create(plant_subject=cls.tomato, plant_object=cls.fennel).interactions.add(shades, inhibits)
+        Companionship.objects.create(plant_subject=cls.carrot, plant_object=cls.tomato)
+
+    def test_compatibility_of_a_plant(self):
+        """Test that pairings in either direction are split into companions and antagonists."""
+        response = self.client.get(reverse('plant-compatibility', args=[self.tomato.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['common_name'], 'Tomato')
+        self.assertEqual(float(data['ph_minimum']), 6.0)
+        self.assertEqual(
+            [(companion['companion_common_name'], companion['interaction_type']) for companion in data['companions']],
+            [('Basil', 'Beneficial'), ('Carrot', 'Neutral')],
+        )
+        self.assertEqual(data['companions'][0]['notes'], 'Repels hornworms.')
+        self.assertEqual(data['antagonists'][0]['antagonist_plant_id'], self.fennel.pk)
+        self.assertEqual(data['antagonists'][0]['interaction_type'], 'Detrimental')
+        self.assertEqual(len(data['antagonists'][0]['interactions']), 2)
+        self.assertEqual(self.client.get(reverse('plant-compatibility', args=[0])).status_code, 404)
+
+    def test_batch_compatibility(self):
+        """Test that ?ids= returns every plant in order and lists unknown ids."""
+        ids = f'{self.fennel.pk},{self.basil.pk},0,{self.fennel.pk}'
+        response = self.client.get(reverse('plant-compatibility-batch'), {'ids': ids})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([result['plant_id'] for result in data['results']], [self.fennel.pk, self.basil.pk])
+        self.assertEqual(data['results'][0]['antagonists'][0]['antagonist_common_name'], 'Tomato')
+        self.assertEqual(data['results'][1]['companions'][0]['companion_plant_id'], self.tomato.pk)
+        self.assertEqual(data['not_found'], [0])
+
+        self.assertEqual(self.client.get(reverse('plant-compatibility-batch'), {'ids': '1,x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('plant-compatibility-batch')).status_code, 400)
+
+    def test_batch_queries_do_not_grow_with_the_plants(self):
+        """Test that a batch costs the same three queries as a single plant."""
+        ids = ','.join(str(plant.pk) for plant in (self.tomato, self.basil, self.fennel, self.carrot))
+        self.client.get(reverse('plant-compatibility-batch'), {'ids': ids})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('plant-compatibility-batch'), {'ids': ids})
+        self.assertEqual(len(queries), 3)
@@ -0,0 +1,408 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from registration.middleware import superuser_exists
+
+from .graphql_documents import parse_and_validate
+from .models import Plant, Pest, Seed, PlantPest, Companionship, CompanionPlantingInteraction, ProblemCategory
+from .testing import SuperuserTestCase
+
+DEEP_QUERY = '''
+query {
+  allPlants {
+    commonName
+    seeds { seedName }
+    pests { commonName }
+    companionRelationshipsSubject {
+      interactions { interactionCode }
+      plantObject {
+        commonName
+        pests { commonName plants { commonName } }
+      }
+    }
+  }
+}
+'''
+
+
+class GraphQLBatchingTests(SuperuserTestCase):
+    """Tests for the batched loading of relations in the GraphQL API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.aphid = Pest.objects.create(common_name='Aphid', category=ProblemCategory.INSECT)
+        cls.hornworm = Pest.objects.create(common_name='Hornworm', category=ProblemCategory.INSECT)
+        cls.helps = CompanionPlantingInteraction.objects.create(interaction_code='HELPS', interaction_type='BEN')
+
+    def add_plants(self, count):
+        plants = [
+            Plant.objects.create(scientific_name=f'Plantae {len(self.plants) + n}', common_name=f'Plant {len(self.plants) + n}')
+            for n in range(count)
+        ]
+        for plant in plants:
+            Seed.objects.create(plant=plant, seed_name=f'{plant.common_name} seed')
+            PlantPest.objects.create(plant=plant, pest=self.aphid)
+            PlantPest.objects.create(plant=plant, pest=self.hornworm)
+            if self.plants:
+                Companionship.objects.create(plant_subject=plant, plant_object=self.plants[-1]).interactions.add(self.helps)
+            self.plants.append(plant)
+
+    def setUp(self):
+        self.plants = []
+        # Table sizes priced by an earlier query would be stale
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def execute(self, query):
+        response = self.client.post('/graphql', {'query': query}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertNotIn('errors', data)
+        return data['data']
+
+    def test_deep_query_costs_one_query_per_relation(self):
+        """Test that the queries of a deep query do not grow with the rows it returns."""
+        counts = []
+        for added in (2, 10):
+            self.add_plants(added)
+            with CaptureQueriesContext(connection) as queries:
+                data = self.execute(DEEP_QUERY)
+            # Pricing the query counts the rows of the tables it reads
+            counts.append(len([query for query in queries if not query['sql'].startswith('SELECT COUNT(*)')]))
+        self.assertEqual(len(data['allPlants']), 12)
+
+        # Plants, seeds, pests, companionships joined with their plant objects,
+        # interactions, pests of the plant objects and the plants of those pests
+        self.assertEqual(counts, [7, 7])
+
+    def test_batched_relations_match_the_rows(self):
+        """Test that every row gets its own related rows from a batch."""
+        self.add_plants(3)
+        plants = {plant['commonName']: plant for plant in self.execute(DEEP_QUERY)['allPlants']}
+
+        self.assertEqual(plants['Plant 0']['companionRelationshipsSubject'], [])
+        self.assertEqual([seed['seedName'] for seed in plants['Plant 1']['seeds']], ['Plant 1 seed'])
+        self.assertEqual(sorted(pest['commonName'] for pest in plants['Plant 2']['pests']), ['Aphid', 'Hornworm'])
+        companionship = plants['Plant 2']['companionRelationshipsSubject'][0]
+        self.assertEqual(companionship['plantObject']['commonName'], 'Plant 1')
+        self.assertEqual(companionship['interactions'], [{'interactionCode': 'HELPS'}])
+        self.assertEqual(
+            sorted(plant['commonName'] for plant in companionship['plantObject']['pests'][0]['plants']),
+            ['Plant 0', 'Plant 1', 'Plant 2'],
+        )
+
+    def test_single_row_resolvers_use_the_loaders(self):
+        """Test that relations of a plant fetched by id resolve too."""
+        self.add_plants(2)
+        data = self.execute(f'query {{ plantById(id: {self.plants[1].pk}) {{ seeds {{ seedName }} companionTo {{ commonName }} }} }}')
+
+        self.assertEqual(data['plantById']['seeds'], [{'seedName': 'Plant 1 seed'}])
+        self.assertEqual(data['plantById']['companionTo'], [])
+
+
+class GraphQLOptimizerTests(SuperuserTestCase):
+    """Tests for the selection set driven querysets of the GraphQL resolvers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tomato = Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato', description='Tall vine')
+        cls.basil = Plant.objects.create(scientific_name='Ocimum basilicum', common_name='Basil')
+        Seed.objects.create(plant=cls.tomato, seed_name='Beefsteak')
+        Companionship.objects.create(plant_subject=cls.basil, plant_object=cls.tomato, notes='Repels hornworms.')
+
+    def setUp(self):
+        # Keep the superuser check of the middleware out of the counted queries
+        superuser_exists()
+
+    def execute(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql', {'query': query}, content_type='application/json')
+        data = response.json()
+        self.assertNotIn('errors', data)
+        # Pricing the query counts the rows of the tables it reads
+        return data['data'], [query['sql'] for query in queries if not query['sql'].startswith('SELECT COUNT(*)')]
+
+    def test_only_selected_columns_are_read(self):
+        """Test that a list of plants reads the selected columns and no others."""
+        data, queries = self.execute('query { allPlants { id commonName } }')
+
+        self.assertEqual(sorted(plant['commonName'] for plant in data['allPlants']), ['Basil', 'Tomato'])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('common_name', queries[0])
+        self.assertNotIn('description', queries[0])
+        self.assertNotIn('npk_preference', queries[0])
+
+    def test_foreign_keys_are_joined(self):
+        """Test that selected FKs are read in the query of their rows, fragments included."""
+        data, queries = self.execute('''
+            query { allCompanionships { notes ...Plants } }
+            fragment Plants on CompanionshipType { plantSubject { commonName } plantObject { commonName } }
+        ''')
+
+        self.assertEqual(data['allCompanionships'], [
+            {'notes': 'Repels hornworms.', 'plantSubject': {'commonName': 'Basil'}, 'plantObject': {'commonName': 'Tomato'}},
+        ])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0])
+
+    def test_reverse_relations_are_prefetched(self):
+        """Test that reverse relations are prefetched with their own selected columns."""
+        data, queries = self.execute('query { plantById(id: %d) { commonName seeds { seedName } } }' % self.tomato.pk)
+
+        self.assertEqual(data['plantById'], {'commonName': 'Tomato', 'seeds': [{'seedName': 'Beefsteak'}]})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('germination', queries[1])
+
+    def test_aliased_relations_share_one_prefetch(self):
+        """Test that a relation selected under two aliases is prefetched once with both selections."""
+        data, queries = self.execute(
+            'query { allPlants { commonName a: seeds { id } b: seeds { seedName } '
+            'c: companionRelationshipsSubject { plantObject { commonName } } '
+            'd: companionRelationshipsSubject { plantObject { scientificName } } } }'
+        )
+
+        tomato = next(plant for plant in data['allPlants'] if plant['commonName'] == 'Tomato')
+        basil = next(plant for plant in data['allPlants'] if plant['commonName'] == 'Basil')
+        self.assertEqual(tomato['b'], [{'seedName': 'Beefsteak'}])
+        self.assertEqual(len(tomato['a']), 1)
+        self.assertEqual(basil['d'], [{'plantObject': {'scientificName': 'Solanum lycopersicum'}}])
+        # Plants, seeds and companionships joined with their plant objects
+        self.assertEqual(len(queries), 3)
+
+    def test_relations_selected_by_fragments_share_one_prefetch(self):
+        """Test that a relation selected directly and through a fragment is prefetched once."""
+        data, queries = self.execute(
+            'query { allPlants { seeds { id } ...Seeds } } fragment Seeds on PlantType { seeds { seedName } }'
+        )
+
+        self.assertIn([{'id': str(Seed.objects.get().pk), 'seedName': 'Beefsteak'}], [plant['seeds'] for plant in data['allPlants']])
+        self.assertEqual(len(queries), 2)
+
+
+class GraphQLConnectionTests(SuperuserTestCase):
+    """Tests for the paginated, filtered connections of the GraphQL API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for name in ('Basil', 'Carrot', 'Dill', 'Fennel', 'Mint', 'Tomato'):
+            Plant.objects.create(scientific_name=f'Plantae {name}', common_name=name, lifecycle_type='AN' if name != 'Mint' else 'PE')
+        Pest.objects.create(common_name='Aphid', category=ProblemCategory.INSECT)
+
+    def setUp(self):
+        # Keep the superuser check of the middleware out of the counted queries
+        superuser_exists()
+
+    def execute(self, query):
+        response = self.client.post('/graphql', {'query': query}, content_type='application/json')
+        return response.json()
+
+    def page(self, arguments):
+        data = self.execute(f'''query {{
+            plants({arguments}) {{
+                edges {{ cursor node {{ commonName }} }}
+                pageInfo {{ hasNextPage hasPreviousPage startCursor endCursor }}
+            }}
+        }}''')
+        self.assertNotIn('errors', data)
+        connection = data['data']['plants']
+        return [edge['node']['commonName'] for edge in connection['edges']], connection['pageInfo']
+
+    def test_pages_follow_the_cursors(self):
+        """Test that first/after walk forward and last/before walk back through the same pages."""
+        names, page_info = self.page('first: 4')
+        self.assertEqual(names, ['Basil', 'Carrot', 'Dill', 'Fennel'])
+        self.assertTrue(page_info['hasNextPage'])
+        self.assertFalse(page_info['hasPreviousPage'])
+
+        names, page_info = self.page(f'first: 4, after: "{page_info["endCursor"]}"')
+        self.assertEqual(names, ['Mint', 'Tomato'])
+        self.assertFalse(page_info['hasNextPage'])
+        self.assertTrue(page_info['hasPreviousPage'])
+
+        names, page_info = self.page(f'last: 3, before: "{page_info["startCursor"]}"')
+        self.assertEqual(names, ['Carrot', 'Dill', 'Fennel'])
+        self.assertTrue(page_info['hasPreviousPage'])
+
+    def test_page_size_is_capped(self):
+        """Test that first is cut down to the largest page size and costs one query."""
+        with self.settings(GRAPHQL_MAX_PAGE_SIZE=2):
+            with CaptureQueriesContext(connection) as queries:
+                names, page_info = self.page('first: 1000')
+        self.assertEqual(names, ['Basil', 'Carrot'])
+        self.assertTrue(page_info['hasNextPage'])
+        self.assertEqual(len(queries), 1)
+
+    def test_filters(self):
+        """Test that the FilterSet arguments filter the rows, enums included."""
+        names, _ = self.page('lifecycleType: PE')
+        self.assertEqual(names, ['Mint'])
+
+        data = self.execute('query { pests(category: INS) { edges { node { commonName } } } }')
+        self.assertEqual(data['data']['pests']['edges'], [{'node': {'commonName': 'Aphid'}}])
+
+    def test_invalid_arguments(self):
+        """Test that bad cursors and page sizes are reported as errors."""
+        for arguments in ('after: "nonsense"', 'first: -1', 'first: 1, last: 1'):
+            self.assertIn('errors', self.execute(f'query {{ plants({arguments}) {{ edges {{ cursor }} }} }}'), arguments)
+
+    def test_lists_are_deprecated(self):
+        """Test that the unbounded list fields are marked deprecated."""
+        data = self.execute('query { __type(name: "Query") { fields(includeDeprecated: true) { name isDeprecated } } }')
+        fields = {field['name']: field['isDeprecated'] for field in data['data']['__type']['fields']}
+        self.assertTrue(fields['allPlants'])
+        self.assertFalse(fields['plants'])
+
+
+class GraphQLLimitTests(SuperuserTestCase):
+    """Tests for the depth and cost limits of the GraphQL endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        tomato = Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato')
+        basil = Plant.objects.create(scientific_name='Ocimum basilicum', common_name='Basil')
+        aphid = Pest.objects.create(common_name='Aphid', category=ProblemCategory.INSECT)
+        PlantPest.objects.create(plant=tomato, pest=aphid)
+        PlantPest.objects.create(plant=basil, pest=aphid)
+        Companionship.objects.create(plant_subject=tomato, plant_object=basil)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def execute(self, query, variables=None):
+        body = {'query': query, 'variables': variables or {}}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql', body, content_type='application/json')
+        self.queries = [query['sql'] for query in queries if 'horticulture_' in query['sql']]
+        return response
+
+    def test_cost_is_reported(self):
+        """Test that the cost of a query is reported in its extensions."""
+        response = self.execute(
+            'query { plants(first: 10) { edges { node { commonName pests { commonName } } } pageInfo { hasNextPage } } }'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['data']['plants']['edges']), 2)
+        # 10 plants and 20 pests for each of them, but no more than the 2 rows linking plants to pests
+        self.assertEqual(data['extensions']['cost'], {'requested': 12, 'maximum': 10000})
+
+    def test_unbounded_lists_cost_their_table(self):
+        """Test that the deprecated all* lists are priced by the rows of their table."""
+        response = self.execute('query { allPlants { commonName pests { commonName } } }')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['extensions']['cost'], {'requested': 2 + 2, 'maximum': 10000})
+
+        # The size of a table is counted once and reused
+        response = self.execute('query { allPlants { commonName pests { commonName } } }')
+        self.assertFalse([sql for sql in self.queries if sql.startswith('SELECT COUNT(*)')])
+
+    def test_costly_query_is_rejected_before_execution(self):
+        """Test that a query over the cost limit is rejected without reading any rows."""
+        with self.settings(GRAPHQL_MAX_QUERY_COST=100):
+            response = self.execute('''query { plants(first: 100) { edges { node {
+                companionRelationshipsSubject { plantObject { pests { plants { commonName } } } }
+            } } } }''')
+
+        self.assertEqual(response.status_code, 400)
+        data = response.json()
+        self.assertNotIn('data', data)
+        self.assertIn('maximum query cost', data['errors'][0]['message'])
+        # 100 plants, then as many rows as the companionship and plant pest tables hold
+        self.assertEqual(data['extensions']['cost']['requested'], 100 + 1 + 1 + 2 + 2)
+        self.assertTrue(all(sql.startswith('SELECT COUNT(*)') for sql in self.queries))
+
+    def test_variables_count_as_the_largest_page(self):
+        """Test that a page size passed as a variable costs the largest page."""
+        with self.settings(GRAPHQL_MAX_QUERY_COST=50):
+            response = self.execute(
+                'query Page($size: Int) { plants(first: $size) { edges { node { commonName } } } }', {'size': 1}
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['extensions']['cost'], {'requested': 100, 'maximum': 50})
+
+    def test_deep_query_is_rejected(self):
+        """Test that a query nested deeper than the depth limit is rejected."""
+        with self.settings(GRAPHQL_MAX_DEPTH=3):
+            self.assertEqual(self.execute('query { plantById(id: 0) { pests { plants { commonName } } } }').status_code, 200)
+            response = self.execute('query { plantById(id: 0) { pests { plants { pests { commonName } } } } }')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exceeds maximum operation depth of 3', response.json()['errors'][0]['message'])
+        self.assertEqual(self.queries, [])
+
+
+class GraphQLPersistedQueryTests(SuperuserTestCase):
+    """Tests for the persisted queries and cached documents of the GraphQL endpoint."""
+
+    QUERY = 'query { plants(first: 5) { edges { node { commonName } } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.extensions = {'persistedQuery': {'version': 1, 'sha256Hash': hashlib.sha256(self.QUERY.encode()).hexdigest()}}
+
+    def get(self, extensions):
+        return self.client.get('/graphql', {'extensions': json.dumps(extensions)}, HTTP_ACCEPT='application/json')
+
+    def test_persisted_query_round_trip(self):
+        """Test that an unknown hash is asked for, registered with its query and then served by hash."""
+        response = self.get(self.extensions)
+        self.assertEqual(response.json()['errors'][0]['message'], 'PersistedQueryNotFound')
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+
+        response = self.client.post('/graphql', {'query': self.QUERY, 'extensions': self.extensions}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Cache-Control', response)
+
+        response = self.get(self.extensions)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['plants']['edges'], [{'node': {'commonName': 'Tomato'}}])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertIn('Accept', response['Vary'])
+
+        # Responses that depend on the user are not shared
+        self.client.force_login(self.admin)
+        self.assertNotIn('Cache-Control', self.get(self.extensions))
+
+    def test_hash_must_match_the_query(self):
+        """Test that a query sent with the hash of another query is rejected and not registered."""
+        response = self.client.post('/graphql', {
+            'query': 'query { allUsers { password } }', 'extensions': self.extensions,
+        }, content_type='application/json')
+        self.assertEqual(response.json()['errors'][0]['message'], 'provided sha does not match query')
+        self.assertEqual(self.get(self.extensions).json()['errors'][0]['message'], 'PersistedQueryNotFound')
+
+        self.assertEqual(self.get({'persistedQuery': {'version': 2, 'sha256Hash': 'x'}}).status_code, 400)
+
+    def test_documents_are_parsed_once(self):
+        """Test that repeated queries reuse their parsed and validated document."""
+        self.client.post('/graphql', {'query': self.QUERY}, content_type='application/json')
+        hits = parse_and_validate.cache_info().hits
+
+        response = self.client.post('/graphql', {'query': self.QUERY}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(parse_and_validate.cache_info().hits, hits + 1)
+
+        # Invalid documents are cached with their errors
+        for _ in range(2):
+            response = self.client.post('/graphql', {'query': 'query { nothing }'}, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(parse_and_validate.cache_info().hits, hits + 2)
@@ -0,0 +1,129 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import Plant, Region, Seed
+from .pagination import KeysetPagination
+from .testing import SuperuserTestCase
+from .urls import router
+
+
+class KeysetPaginationTests(SuperuserTestCase):
+    """Tests for the keyset pagination of the REST list endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        names = ['Tomato', 'Basil', 'Carrot', 'Basil', 'Onion', 'Leek', 'Kale']
+        cls.plants = [
+            Plant.objects.create(scientific_name=f'Plantae {index}', common_name=name)
+            for index, name in enumerate(names)
+        ]
+        for index, plant in enumerate(cls.plants[:5]):
+            Seed.objects.create(seed_name=f'Seed {index}', plant=plant)
+
+    def walk(self, url, params):
+        """Follows the next links from url and returns the pages."""
+        pages = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            url, params = pages[-1]['next'], None
+        return pages
+
+    def test_walks_plants_by_name_and_id(self):
+        """Test that following next links returns every plant once, ordered by (common_name, id)."""
+        pages = self.walk(reverse('plant-list'), {'page_size': 3})
+
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        seen = [(plant['common_name'], plant['id']) for page in pages for plant in page['results']]
+        self.assertEqual(seen, sorted((plant.common_name, plant.pk) for plant in self.plants))
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_default_key_is_creation_order(self):
+        """Test that viewsets without keyset_ordering page by (created_at, id)."""
+        pages = self.walk(reverse('seed-list'), {'page_size': 2})
+
+        self.assertEqual(
+            [seed['seed_name'] for page in pages for seed in page['results']],
+            [f'Seed {index}' for index in range(5)],
+        )
+
+    def test_pages_use_no_offset_or_count(self):
+        """Test that a deep page is read with a keyset condition instead of OFFSET and COUNT."""
+        first = self.client.get(reverse('seed-list'), {'page_size': 2}).json()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first['next'])
+
+        seed_queries = [query['sql'] for query in queries if 'FROM "horticulture_seed"' in query['sql']]
+        self.assertEqual(len(seed_queries), 1)
+        self.assertNotIn('OFFSET', seed_queries[0])
+        self.assertNotIn('COUNT(', seed_queries[0])
+
+    def test_count_is_optional(self):
+        """Test that count=true adds the number of matching rows."""
+        response = self.client.get(reverse('plant-list'), {'count': 'true', 'page_size': 2})
+
+        self.assertEqual(response.json()['count'], 7)
+        response = self.client.get(reverse('seed-list'), {'count': 'true', 'plant': self.plants[0].pk})
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_previous_link_returns_the_previous_page(self):
+        """Test that the previous link of a page leads back to the page before it."""
+        first = self.client.get(reverse('plant-list'), {'page_size': 2}).json()
+        second = self.client.get(first['next']).json()
+        third = self.client.get(second['next']).json()
+
+        back = self.client.get(third['previous']).json()
+        self.assertEqual(back['results'], second['results'])
+        self.assertEqual(self.client.get(back['previous']).json()['results'], first['results'])
+        self.assertIsNone(self.client.get(back['previous']).json()['previous'])
+
+    def test_page_size_is_capped(self):
+        """Test that client page sizes are limited to max_page_size."""
+        pagination = KeysetPagination()
+        request = type('Request', (), {'query_params': {'page_size': '100000'}})()
+
+        self.assertEqual(pagination.get_page_size(request), KeysetPagination.max_page_size)
+
+    def test_invalid_cursor_is_not_found(self):
+        """Test that a tampered cursor is rejected."""
+        response = self.client.get(reverse('plant-list'), {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_results_page_by_rank(self):
+        """Test that q filtered lists are paged in rank order."""
+        Plant.objects.filter(pk=self.plants[1].pk).update(description='Goes well with tomato.')
+        pages = self.walk(reverse('plant-list'), {'q': 'tomato', 'page_size': 1})
+
+        self.assertEqual(
+            [plant['id'] for page in pages for plant in page['results']],
+            [self.plants[0].pk, self.plants[1].pk],
+        )
+
+    def test_other_lists_page_by_number(self):
+        """Test that viewsets without KeysetPagination keep page numbers and the total count."""
+        for index in range(12):
+            Region.objects.create(name=f'Region {index}', zone_system='USDA', zone_identifier=str(index))
+        response = self.client.get(reverse('region-list'), {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 12)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIsNotNone(response.json()['previous'])
+
+    def test_every_list_endpoint_pages(self):
+        """Test that every router-registered list endpoint pages and that keysets name columns of their model."""
+        admin = self.admin
+        # The permissions read a role the User model does not store yet
+        admin.role = 'admin'
+        for prefix, viewset, basename in router.registry:
+            with self.subTest(prefix):
+                request = APIRequestFactory().get(reverse(f'{basename}-list'), {'page_size': 1})
+                force_authenticate(request, user=admin)
+                response = viewset.as_view({'get': 'list'})(request)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import (
+    Plant, Pest, Disease, Seed, PlantPest, PlantDisease, Companionship, CompanionPlantingInteraction
+)
+from .plant_details import get_plant_detail, invalidate_all_plant_details
+from .testing import SuperuserTestCase
+
+
+class PlantDetailDocumentTests(SuperuserTestCase):
+    """Tests for the cached plant detail documents of the detail page and API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tomato = Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato')
+        cls.basil = Plant.objects.create(scientific_name='Ocimum basilicum', common_name='Basil')
+        cls.aphid = Pest.objects.create(common_name='Aphid')
+        cls.blight = Disease.objects.create(common_name='Early Blight')
+        PlantPest.objects.create(plant=cls.tomato, pest=cls.aphid, notes='Check leaf undersides.')
+        PlantDisease.objects.create(plant=cls.tomato, disease=cls.blight)
+        Seed.objects.create(seed_name='Brandywine', plant=cls.tomato)
+        cls.repels = CompanionPlantingInteraction.objects.create(
+            interaction_code='PEST_REPEL', interaction_type='BEN', mechanism_description='Repels thrips'
+        )
+        cls.companionship = Companionship.objects.create(plant_subject=cls.basil, plant_object=cls.tomato)
+        cls.companionship.interactions.add(cls.repels)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_document_holds_the_plant_and_its_relations(self):
+        """Test that the document carries companions from either side, pests, diseases and seeds."""
+        document = get_plant_detail(self.tomato.pk)
+
+        self.assertEqual(document['plant']['common_name'], 'Tomato')
+        self.assertEqual(document['companionships'][0]['other_plant'], {'id': self.basil.pk, 'common_name': 'Basil'})
+        self.assertEqual(document['companionships'][0]['interactions'][0]['interaction_type'], 'BEN')
+        self.assertEqual(document['plant_pests'], [{'pest': {'id': self.aphid.pk, 'common_name': 'Aphid'}, 'notes': 'Check leaf undersides.'}])
+        self.assertEqual(document['plant_diseases'][0]['disease']['common_name'], 'Early Blight')
+        self.assertEqual([seed['seed_name'] for seed in document['seeds']], ['Brandywine'])
+        self.assertIsNone(get_plant_detail(0))
+        self.assertIsNone(get_plant_detail('not-a-pk'))
+
+    def test_cached_page_views_cost_no_queries(self):
+        """Test that the detail page and the retrieve endpoint are served from the cached document."""
+        page_url = reverse('plant_detail', args=[self.tomato.pk])
+        api_url = reverse('plant-detail', args=[self.tomato.pk])
+        self.client.get(page_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(page_url)
+        self.assertContains(response, 'Basil')
+        self.assertContains(response, 'Repels thrips')
+        self.assertContains(response, 'Aphid')
+        self.assertContains(response, 'Early Blight')
+        self.assertContains(response, 'Brandywine')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(api_url)
+        self.assertEqual(response.json()['pests'][0]['common_name'], 'Aphid')
+        self.assertEqual(self.client.get(reverse('plant-detail', args=[0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('plant_detail', args=[0])).status_code, 404)
+
+    def test_changes_drop_the_documents_they_show_up_in(self):
+        """Test that saves, deletes and interaction changes rebuild the affected documents."""
+        get_plant_detail(self.tomato.pk)
+        get_plant_detail(self.basil.pk)
+
+        self.tomato.common_name = 'Garden Tomato'
+        self.tomato.save()
+        self.assertEqual(get_plant_detail(self.basil.pk)['companionships'][0]['other_plant']['common_name'], 'Garden Tomato')
+
+        PlantPest.objects.create(plant=self.basil, pest=self.aphid)
+        self.assertEqual(len(get_plant_detail(self.basil.pk)['plant_pests']), 1)
+
+        self.companionship.interactions.remove(self.repels)
+        self.assertEqual(get_plant_detail(self.tomato.pk)['companionships'][0]['interactions'], [])
+
+        self.aphid.common_name = 'Green Aphid'
+        self.aphid.save()
+        self.assertEqual(get_plant_detail(self.tomato.pk)['plant_pests'][0]['pest']['common_name'], 'Green Aphid')
+
+        self.basil.delete()
+        self.assertIsNone(get_plant_detail(self.basil.pk))
+        self.assertEqual(get_plant_detail(self.tomato.pk)['companionships'], [])
+
+    def test_bulk_writes_are_invalidated_by_generation(self):
+        """Test that invalidate_all_plant_details drops documents changed without signals."""
+        get_plant_detail(self.tomato.pk)
+        Plant.objects.filter(pk=self.tomato.pk).update(description='Updated in bulk.')
+        self.assertIsNone(get_plant_detail(self.tomato.pk)['plant']['description'])
+
+        invalidate_all_plant_details()
+        self.assertEqual(get_plant_detail(self.tomato.pk)['plant']['description'], 'Updated in bulk.')
@@ -0,0 +1,109 @@
+import io
+
+from django.db import connection
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .management.commands.import_json_data import Command as ImportCommand
+from .models import Plant, Pest, PlantPest
+from .plant_name_index import PlantNameIndex, similarity
+from .relationship_fixer import fix_relationships_from_json
+from .testing import SuperuserTestCase
+
+
+class PlantNameIndexTests(SuperuserTestCase):
+    """Tests for fuzzy plant name resolution."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tomato = Plant.objects.create(
+            scientific_name='Solanum lycopersicum', common_name='Tomato', common_names_list=['Love apple']
+        )
+        cls.pepper = Plant.objects.create(scientific_name='Capsicum annuum', common_name='Bell Pepper')
+        cls.basil = Plant.objects.create(scientific_name='Ocimum basilicum', common_name='Basil')
+
+    def test_similarity_matches_pg_trgm(self):
+        """Test that similarity is the share of padded word trigrams two names have in common."""
+        # pg_trgm: similarity('word', 'two words') = 0.363636
+        self.assertAlmostEqual(similarity('word', 'two words'), 4 / 11)
+        self.assertEqual(similarity('Tomato', 'tomato!'), 1.0)
+        self.assertEqual(similarity('', 'tomato'), 0.0)
+
+    def test_resolves_exact_and_misspelled_names(self):
+        """Test that exact names score 1.0 and typos, plurals and alternative names resolve."""
+        index = PlantNameIndex.from_database()
+
+        self.assertEqual(index.best('solanum  LYCOPERSICUM').similarity, 1.0)
+        self.assertEqual(index.best('Solanum lycopersicon').plant_id, self.tomato.pk)
+        self.assertEqual(index.best('Tomatoes').plant_id, self.tomato.pk)
+        self.assertEqual(index.best('love apples').plant_id, self.tomato.pk)
+        self.assertEqual(index.best('bell peppers').plant_id, self.pepper.pk)
+        self.assertIsNone(index.best('Daucus carota'))
+
+    def test_resolve_ranks_matches_and_applies_limit_and_threshold(self):
+        """Test that matches are ordered by similarity and filtered by threshold."""
+        index = PlantNameIndex.from_database()
+        matches = index.resolve('Basil tomato', limit=5, threshold=0.1)
+
+        self.assertEqual({match.plant_id for match in matches}, {self.tomato.pk, self.basil.pk})
+        self.assertEqual(matches, sorted(matches, key=lambda match: -match.similarity))
+        self.assertEqual(len(index.resolve('Basil tomato', limit=1, threshold=0.1)), 1)
+        self.assertEqual(index.resolve('Basil tomato', threshold=0.9), [])
+
+    def test_resolve_names_api(self):
+        """Test the plants/resolve-names endpoint with GET and POST."""
+        client = APIClient()
+        url = reverse('plant-resolve-names')
+
+        response = client.get(url, {'name': ['Tomatoe', 'Basill'], 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['name'] for result in results], ['Tomatoe', 'Basill'])
+        self.assertEqual(results[0]['matches'][0]['plant_id'], self.tomato.pk)
+        self.assertEqual(results[1]['matches'][0]['plant_id'], self.basil.pk)
+        self.assertEqual(len(results[0]['matches']), 1)
+
+        response = client.post(url, {'names': ['capsicum anuum']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['matches'][0]['plant_id'], self.pepper.pk)
+
+    def test_resolve_names_api_rejects_invalid_input(self):
+        """Test that missing names and out-of-range parameters are rejected."""
+        client = APIClient()
+        url = reverse('plant-resolve-names')
+
+        self.assertEqual(client.get(url).status_code, 400)
+        self.assertEqual(client.get(url, {'name': 'Tomato', 'threshold': 2}).status_code, 400)
+        self.assertEqual(client.get(url, {'name': 'Tomato', 'limit': 'many'}).status_code, 400)
+        self.assertEqual(client.post(url, {'names': 'Tomato'}, format='json').status_code, 400)
+
+    def test_import_command_falls_back_to_fuzzy_plant_types(self):
+        """Test that plant types without a name match are linked to a similar plant."""
+        command = ImportCommand(stdout=io.StringIO())
+        matches = command._match_plant_types({'Tomatoes', 'Capsicum anuum', 'Cucumber'}, 'pests.json')
+
+        self.assertEqual(matches['Tomatoes'], [self.tomato.pk])
+        self.assertEqual(matches['Capsicum anuum'], [self.pepper.pk])
+        self.assertEqual(matches['Cucumber'], [])
+
+    def test_relationship_fixer_resolves_misspelled_plants(self):
+        """Test that affected plants are linked by similar names with one plant query."""
+        pest = Pest.objects.create(common_name='Aphid', scientific_name='Aphidoidea')
+
+        with CaptureQueriesContext(connection) as queries:
+            fix_relationships_from_json(json_data={
+                'plants': [],
+                'pests': [{
+                    'common_name': 'Aphid',
+                    'affected_plants': ['Solanum lycopersicon', 'Ocimum basilicum', 'Daucus carota'],
+                }],
+            })
+
+        plant_reads = [query for query in queries if 'FROM "horticulture_plant"' in query['sql']]
+        self.assertEqual(len(plant_reads), 1)
+        self.assertEqual(
+            set(PlantPest.objects.filter(pest=pest).values_list('plant_id', flat=True)),
+            {self.tomato.pk, self.basil.pk},
+        )
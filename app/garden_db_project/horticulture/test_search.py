@@ -0,0 +1,151 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from . import search_index
+from .models import Plant, Seed, Pest, Disease, Fertilizer, Companionship
+from .search_index import SEARCH_TYPES, search, search_hits, search_page
+from .testing import SuperuserTestCase
+
+
+class SearchIndexTests(SuperuserTestCase):
+    """Tests for the full-text search index and the views using it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tomato = Plant.objects.create(
+            scientific_name='Solanum lycopersicum', common_name='Tomato', family='Solanaceae',
+            description='Annual with red fruits.'
+        )
+        cls.basil = Plant.objects.create(
+            scientific_name='Ocimum basilicum', common_name='Basil', family='Lamiaceae',
+            description='Aromatic herb, a classic companion for tomatoes.'
+        )
+        cls.carrot = Plant.objects.create(scientific_name='Daucus carota', common_name='Carrot', family='Apiaceae')
+        Seed.objects.create(seed_name='Heirloom mix', plant=cls.tomato)
+        Pest.objects.create(common_name='Tomato hornworm', scientific_name='Manduca quinquemaculata')
+        Disease.objects.create(common_name='Early blight', cause='Alternaria solani', symptoms='Target spots on tomato leaves')
+        Fertilizer.objects.create(fertilizer_name='Tomato feed', brand='Grow Well', npk_ratio='4-2-6')
+
+    def test_results_are_ranked_by_weighted_columns(self):
+        """Test that name matches rank above description matches."""
+        results = search(Plant.objects.all(), 'tomato')
+
+        self.assertEqual([plant.common_name for plant in results], ['Tomato', 'Basil'])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_words_match_as_prefixes_and_all_words_must_match(self):
+        """Test that partially typed words match and every word narrows the results."""
+        self.assertEqual([plant.common_name for plant in search(Plant.objects.all(), 'solan')], ['Tomato'])
+        self.assertEqual([plant.common_name for plant in search(Plant.objects.all(), 'tomato herb')], ['Basil'])
+        self.assertEqual(list(search(Plant.objects.all(), 'cucumber')), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test that the index is kept current when rows change."""
+        self.carrot.description = 'Sweet roots, good next to tomatoes.'
+        self.carrot.save()
+        self.assertIn(self.carrot, search(Plant.objects.all(), 'tomato'))
+
+        self.basil.delete()
+        self.assertNotIn('Basil', [plant.common_name for plant in search(Plant.objects.all(), 'tomato')])
+
+    def test_seeds_are_found_by_their_plant(self):
+        """Test that seeds match through the indexed plant columns."""
+        self.assertEqual([seed.seed_name for seed in search(Seed.objects.all(), 'lycopersicum')], ['Heirloom mix'])
+
+    def test_postgres_seed_search_refers_to_the_subquery_alias(self):
+        """Test that the Postgres SQL of a seed search reads search_vector from the aliases of its tables."""
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        # Compiled, never run: the SQL a Postgres connection would send
+        postgres = DatabaseWrapper({**connection.settings_dict, 'ENGINE': 'django.db.backends.postgresql'}, 'postgres-sql')
+        self.addCleanup(setattr, search_index, 'connection', search_index.connection)
+        search_index.connection = postgres
+        sql, _ = search(Seed.objects.all(), 'tomato').query.get_compiler(connection=postgres).as_sql()
+
+        self.assertIn('"horticulture_seed".search_vector', sql)
+        self.assertIn('FROM "horticulture_plant" U0 WHERE U0.search_vector @@', sql)
+        self.assertNotIn('"horticulture_plant".search_vector', sql)
+
+    def test_search_page_reads_results_and_total_in_one_query(self):
+        """Test that a page of results and the number of matches come from one query."""
+        with CaptureQueriesContext(connection) as queries:
+            results, total = search_page(Plant.objects.all(), 'tomato', 1)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([plant.common_name for plant in results], ['Tomato'])
+        self.assertEqual(total, 2)
+
+    def test_search_view_lists_each_model(self):
+        """Test that the search page shows ranked results and totals per model."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('search'), {'q': 'tomato'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([plant.common_name for plant in response.context['plants']], ['Tomato', 'Basil'])
+        self.assertEqual(response.context['plants_count'], 2)
+        self.assertEqual(response.context['seeds_count'], 1)
+        self.assertEqual(response.context['pests_count'], 1)
+        self.assertEqual(response.context['diseases_count'], 1)
+        search_queries = [query for query in queries if 'search_total' in query['sql']]
+        self.assertEqual(len(search_queries), 4)
+
+    def test_list_view_filters_by_search(self):
+        """Test that the plant list applies the search together with its filters."""
+        response = self.client.get(reverse('plant_list'), {'q': 'tomato'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([plant.common_name for plant in response.context['plants']], ['Tomato', 'Basil'])
+
+    def test_search_hits_rank_across_types(self):
+        """Test that hits of every type are merged into one ranking with unique keys."""
+        hits = search_hits('tomato', ['plant', 'seed', 'pest', 'disease', 'fertilizer'], 10)
+
+        self.assertEqual({key[1] for key, _ in hits}, {'plant', 'seed', 'pest', 'disease', 'fertilizer'})
+        ranks = [key[0] for key, _ in hits]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertEqual(len({key for key, _ in hits}), len(hits))
+
+    def test_search_api_pages_with_cursor(self):
+        """Test that walking the cursor returns every hit once, in rank order."""
+        expected = [(key[1], key[2]) for key, _ in search_hits('tomato', list(SEARCH_TYPES), 100)]
+        seen = []
+        url, params = reverse('api-search'), {'q': 'tomato', 'page_size': 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 2)
+            seen.extend((hit['type'], hit['id']) for hit in data['results'])
+            url, params = data['next'], None
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 6)
+
+    def test_search_api_filters_types_and_rejects_invalid_input(self):
+        """Test the type parameter and the validation of the search API."""
+        response = self.client.get(reverse('api-search'), {'q': 'tomato', 'type': 'pest,fertilizer'})
+        self.assertEqual([hit['type'] for hit in response.json()['results']], ['pest', 'fertilizer'])
+        self.assertEqual(response.json()['results'][1]['name'], 'Tomato feed')
+
+        self.assertEqual(self.client.get(reverse('api-search')).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api-search'), {'q': 'tomato', 'type': 'tree'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api-search'), {'q': 'tomato', 'cursor': 'bad'}).status_code, 400)
+
+    def test_viewsets_filter_with_filtersets(self):
+        """Test that list endpoints filter on indexed columns and the search index."""
+        Companionship.objects.create(plant_subject=self.basil, plant_object=self.tomato)
+
+        response = self.client.get(reverse('plant-list'), {'family': 'Lamiaceae'})
+        self.assertEqual([plant['common_name'] for plant in response.json()['results']], ['Basil'])
+
+        response = self.client.get(reverse('plant-list'), {'q': 'tomato'})
+        self.assertEqual([plant['common_name'] for plant in response.json()['results']], ['Tomato', 'Basil'])
+
+        response = self.client.get(reverse('fertilizer-list'), {'q': 'grow'})
+        self.assertEqual([fertilizer['fertilizer_name'] for fertilizer in response.json()['results']], ['Tomato feed'])
+
+        response = self.client.get(reverse('companionship-list'), {'plant': self.tomato.pk})
+        self.assertEqual(len(response.json()['results']), 1)
+        response = self.client.get(reverse('companionship-list'), {'plant': self.carrot.pk})
+        self.assertEqual(response.json()['results'], [])
@@ -0,0 +1,108 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import (
+    Plant, Pest, Seed, PlantPest, Companionship, CompanionPlantingInteraction, DeletionLog
+)
+from .sync import sync_changes
+from .testing import SuperuserTestCase
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(SuperuserTestCase):
+    """Tests for the delta sync change feed and API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tomato = Plant.objects.create(scientific_name='Solanum lycopersicum', common_name='Tomato')
+        cls.basil = Plant.objects.create(scientific_name='Ocimum basilicum', common_name='Basil')
+        cls.aphid = Pest.objects.create(common_name='Aphid')
+        PlantPest.objects.create(plant=cls.tomato, pest=cls.aphid)
+        cls.repels = CompanionPlantingInteraction.objects.create(interaction_code='PEST_REPEL', interaction_type='BEN')
+        cls.companionship = Companionship.objects.create(plant_subject=cls.basil, plant_object=cls.tomato)
+
+    def walk(self, token=None, batch_size=200):
+        """Syncs until has_more is false and returns (changes, token)."""
+        changes = []
+        while True:
+            batch = sync_changes(token, batch_size=batch_size)
+            changes.extend(batch['changes'])
+            token = batch['next']
+            if not batch['has_more']:
+                return changes, token
+
+    def test_full_sync_returns_every_record_once(self):
+        """Test that a sync without token returns all records in order of change, across batches."""
+        changes, _ = self.walk(batch_size=2)
+
+        self.assertEqual(
+            [(change['type'], change['id']) for change in changes],
+            [('plant', self.tomato.pk), ('plant', self.basil.pk), ('pest', self.aphid.pk),
+             ('plantpest', PlantPest.objects.get().pk), ('companioninteraction', self.repels.pk),
+             ('companionship', self.companionship.pk)],
+        )
+        self.assertEqual(changes[0]['data']['common_name'], 'Tomato')
+        self.assertEqual(changes[0]['data']['pests'], [self.aphid.pk])
+
+    def test_incremental_sync_returns_only_changes_and_deletes(self):
+        """Test that a token only yields what changed after it, including tombstones."""
+        _, token = self.walk()
+
+        self.basil.description = 'Aromatic herb.'
+        self.basil.save()
+        seed = Seed.objects.create(seed_name='Genovese', plant=self.basil)
+        aphid_pk, link_pk = self.aphid.pk, PlantPest.objects.get().pk
+        self.aphid.delete()
+
+        changes, token = self.walk(token)
+        self.assertEqual(
+            [(change['type'], change['id'], change['op']) for change in changes],
+            [('plant', self.basil.pk, 'upsert'), ('seed', seed.pk, 'upsert'),
+             ('plantpest', link_pk, 'delete'), ('pest', aphid_pk, 'delete')],
+        )
+        self.assertEqual(self.walk(token)[0], [])
+
+    def test_interaction_changes_touch_the_companionship(self):
+        """Test that adding an interaction puts its companionship back in the feed."""
+        _, token = self.walk()
+
+        self.companionship.interactions.add(self.repels)
+
+        changes, _ = self.walk(token)
+        self.assertEqual([(change['type'], change['id']) for change in changes], [('companionship', self.companionship.pk)])
+        self.assertEqual(changes[0]['data']['interactions'], [self.repels.pk])
+
+    def test_recent_changes_settle_before_they_are_synced(self):
+        """Test that changes within SYNC_SETTLE_SECONDS are held back for the next sync."""
+        with override_settings(SYNC_SETTLE_SECONDS=3600):
+            self.assertEqual(sync_changes()['changes'], [])
+
+    def test_batch_queries_do_not_grow_with_the_catalogue(self):
+        """Test that a batch costs one key query per model plus one load per model in it."""
+        for index in range(20):
+            Plant.objects.create(scientific_name=f'Plantae {index}', common_name=f'Plant {index}')
+
+        with CaptureQueriesContext(connection) as queries:
+            batch = sync_changes(batch_size=50)
+
+        self.assertEqual(len(batch['changes']), 26)
+        # 12 key queries, 5 loads and 4 prefetches (plant M2Ms and companionship interactions)
+        self.assertLessEqual(len(queries), 12 + 5 + 4)
+
+    def test_sync_api(self):
+        """Test the sync endpoint and its token validation."""
+        response = self.client.get(reverse('api-sync'), {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['changes']), 3)
+        self.assertTrue(data['has_more'])
+
+        response = self.client.get(reverse('api-sync'), {'since': data['next']})
+        self.assertEqual(len(response.json()['changes']), 3)
+        self.assertFalse(response.json()['has_more'])
+
+        self.assertEqual(self.client.get(reverse('api-sync'), {'since': 'garbage'}).status_code, 400)
+        self.assertEqual(DeletionLog.objects.count(), 0)
@@ -0,0 +1,19 @@
+"""
+Shared fixtures of the horticulture tests
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+
+class SuperuserTestCase(TestCase):
+    """
+    TestCase with a superuser, admin, created once per class. The first
+    admin middleware of the registration app redirects every request until
+    a superuser exists, so tests requesting pages or the API need one.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = get_user_model().objects.create_superuser(username='admin', email='admin@example.com', password='adminpassword')
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
-from .views import BulkImportView
+from .views import BedSolverView, BulkImportView, SearchAPIView, SyncView
 from .task_views import TaskStatusView
 from .new_bulk_import_view import NewBulkImportView
 from .web_views import FixRelationshipsView
@@ -24,8 +24,12 @@ router.register(r'companion-interactions', views.CompanionPlantingInteractionVie
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
+    path('beds/solve/', BedSolverView.as_view(), name='api-bed-solve'),
     path('bulk-import/', NewBulkImportView.as_view(), name='bulk-import'),
     path('fix-relationships/', FixRelationshipsView.as_view(), name='fix_relationships'),
+    path('imports/', BulkImportView.as_view(), name='api-bulk-import'),
+    path('search/', SearchAPIView.as_view(), name='api-search'),
+    path('sync/', SyncView.as_view(), name='api-sync'),
     path('tasks/<str:task_id>/', TaskStatusView.as_view(), name='task-status'),
     path('', include(router.urls)), # Keep router include last
 ]
\ No newline at end of file
@@ -2,8 +2,9 @@ from django.contrib.auth.models import User
 from rest_framework import viewsets
 from rest_framework.decorators import action # Added
 from rest_framework.response import Response # Added
-from rest_framework.permissions import IsAdminUser # Added
+from rest_framework.permissions import AllowAny, IsAdminUser # Added
 from rest_framework.views import APIView # Added import
+from rest_framework.exceptions import NotFound
 from django.utils import timezone # Added
 from django.db import transaction # New import
 from rest_framework import status # New import
@@ -21,6 +22,19 @@ from .serializers import (
     UserContributionSerializer, CompanionPlantingInteractionSerializer
 )
 from .permissions import IsAuthenticatedCreateOrAdminReadUpdateDelete # Import the new class
+from .filters import (
+    RegionFilter, SoilProfileFilter, PlantFilter, FertilizerFilter, PestFilter,
+    DiseaseFilter, SeedFilter, CompanionshipFilter, PlantPestFilter,
+    PlantDiseaseFilter, CompanionPlantingInteractionFilter
+)
+from .companion_network import (
+    INTERACTION_TYPES as NETWORK_TYPES, MAX_HOPS, components as network_components,
+    neighborhood as network_neighborhood, plant_names, shared_partners as network_shared_partners
+)
+from .compatibility import MAX_BATCH_PLANTS, plant_compatibility
+from .pagination import ORDERING_BY_NAME, KeysetPagination
+from .plant_details import get_plant_detail
+from .plant_name_index import DEFAULT_SIMILARITY_THRESHOLD, resolve_names as resolve_plant_names
 
 # Create your views here.
 
@@ -30,6 +44,7 @@ class RegionViewSet(viewsets.ModelViewSet):
     """
     queryset = Region.objects.all()
     serializer_class = RegionSerializer
+    filterset_class = RegionFilter
     # Add permission_classes later if needed
 
 class SoilProfileViewSet(viewsets.ModelViewSet):
@@ -38,6 +53,7 @@ class SoilProfileViewSet(viewsets.ModelViewSet):
     """
     queryset = SoilProfile.objects.all()
     serializer_class = SoilProfileSerializer
+    filterset_class = SoilProfileFilter
     # Add permission_classes later if needed
 
 class PlantViewSet(viewsets.ModelViewSet):
@@ -53,6 +69,9 @@ class PlantViewSet(viewsets.ModelViewSet):
     ).select_related('soil_preference', 'suitable_region') # Optimize query
     # Default serializer_class remains PlantSerializer for list view etc.
     serializer_class = PlantSerializer
+    filterset_class = PlantFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ORDERING_BY_NAME
     # Add permission_classes later if needed
 
     def get_serializer_class(self):
@@ -63,42 +82,190 @@ class PlantViewSet(viewsets.ModelViewSet):
             return PlantDetailSerializer
         return super().get_serializer_class() # Use default (PlantSerializer) for other actions
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns the PlantDetailSerializer representation from the cached
+        plant detail document (see plant_details) instead of loading the
+        plant and its relations on every request.
+        """
+        document = get_plant_detail(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if document is None:
+            raise NotFound()
+        return Response(document['plant'])
+
+
+    # Names resolved per resolve-names request
+    RESOLVE_NAMES_MAX = 100
+
+    # POST only carries a longer list of names; it is a lookup like GET
+    @action(detail=False, methods=['get', 'post'], url_path='resolve-names', permission_classes=[AllowAny])
+    def resolve_names(self, request):
+        """
+        Resolves plant names that may not match exactly (typos, plurals,
+        alternative common names) to the most similar plants by trigram
+        similarity. Uses pg_trgm on Postgres and an in-memory index elsewhere.
+
+        GET takes ?name= (repeatable), POST a JSON body {"names": [...]}.
+        Both accept limit (matches per name, default 5) and threshold
+        (minimum similarity, default 0.3).
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        names = params.get('names') if request.method == 'POST' else request.query_params.getlist('name')
+        if not isinstance(names, list) or not names or not all(isinstance(name, str) for name in names):
+            return Response({"error": "Provide one or more plant names to resolve."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(names) > self.RESOLVE_NAMES_MAX:
+            return Response({"error": f"At most {self.RESOLVE_NAMES_MAX} names can be resolved per request."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(params.get('limit', 5)), 1), 50)
+            threshold = float(params.get('threshold', DEFAULT_SIMILARITY_THRESHOLD))
+        except (TypeError, ValueError):
+            return Response({"error": "limit must be an integer and threshold a number."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= threshold <= 1:
+            return Response({"error": "threshold must be between 0 and 1."}, status=status.HTTP_400_BAD_REQUEST)
+
+        resolved = resolve_plant_names(names, limit=limit, threshold=threshold)
+        return Response({
+            "results": [
+                {"name": name, "matches": [match._asdict() for match in resolved[name]]}
+                for name in names
+            ]
+        })
 
     @action(detail=True, methods=['get'])
     def compatibility(self, request, pk=None):
         """
         Returns compatibility data for a specific plant, including pH range
-        and companion planting information.
+        and companion planting information (see compatibility.plant_compatibility).
         """
-        plant = self.get_object()
-        companions_data = []
-
-        # Query for companionships where the plant is plant1
-        companionships1 = Companionship.objects.filter(plant1=plant).select_related('plant2', 'interaction_type')
-        for comp in companionships1:
-            companions_data.append({
-                'companion_plant_name': comp.plant2.name,
-                'interaction_type': comp.interaction_type.name
-            })
-
-        # Query for companionships where the plant is plant2
-        companionships2 = Companionship.objects.filter(plant2=plant).select_related('plant1', 'interaction_type')
-        for comp in companionships2:
-            companions_data.append({
-                'companion_plant_name': comp.plant1.name,
-                'interaction_type': comp.interaction_type.name
-            })
+        try:
+            plant_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+        result = plant_compatibility([plant_id]).get(plant_id)
+        if result is None:
+            raise NotFound()
+        return Response(result)
+
+    @action(detail=False, methods=['get'], url_path='compatibility', url_name='compatibility-batch')
+    def batch_compatibility(self, request):
+        """
+        Returns the compatibility data of many plants at once, e.g. every
+        plant of a bed layout, with the same number of queries as for one.
+        Takes ?ids=1,2,3; results follow the order of ids, and ids of plants
+        that do not exist are listed under not_found.
+        """
+        try:
+            plant_ids = list(dict.fromkeys(int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()))
+        except ValueError:
+            return Response({"error": "ids must be a comma separated list of plant ids."}, status=status.HTTP_400_BAD_REQUEST)
+        if not plant_ids:
+            return Response({"error": "Provide the plant ids as ?ids=1,2,3."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(plant_ids) > MAX_BATCH_PLANTS:
+            return Response({"error": f"At most {MAX_BATCH_PLANTS} plants can be checked per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = plant_compatibility(plant_ids)
+        return Response({
+            "results": [results[plant_id] for plant_id in plant_ids if plant_id in results],
+            "not_found": [plant_id for plant_id in plant_ids if plant_id not in results],
+        })
+
+    # --- Companion network ---
+
+    @staticmethod
+    def _network_type(request):
+        """Interaction type of the type query parameter; raises ValueError if unknown."""
+        name = request.query_params.get('type', 'any')
+        if name not in NETWORK_TYPES:
+            raise ValueError(f"type must be one of: {', '.join(NETWORK_TYPES)}.")
+        return NETWORK_TYPES[name]
+
+    def _network_plant(self, pk):
+        try:
+            plant_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+        if not Plant.objects.filter(pk=plant_id).exists():
+            raise NotFound()
+        return plant_id
 
-        response_data = {
-            'plant_id': plant.pk,
-            'plant_name': plant.name,
-            'soil_ph_min': plant.soil_ph_min,
-            'soil_ph_max': plant.soil_ph_max,
-            'companions': companions_data
-        }
+    @action(detail=True, methods=['get'])
+    def neighborhood(self, request, pk=None):
+        """
+        Returns the plants within hops companion links of a plant (default 1,
+        at most 4), nearest first. type restricts the links followed to
+        beneficial, detrimental or neutral ones (default any).
+        """
+        plant_id = self._network_plant(pk)
+        try:
+            interaction_type = self._network_type(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            hops = int(request.query_params.get('hops', 1))
+        except ValueError:
+            hops = 0
+        if not 1 <= hops <= MAX_HOPS:
+            return Response({"error": f"hops must be an integer between 1 and {MAX_HOPS}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        distances = network_neighborhood(plant_id, hops, interaction_type)
+        names = plant_names(distances)
+        return Response({
+            "plant_id": plant_id,
+            "hops": hops,
+            "results": [
+                {"plant_id": other, "common_name": names.get(other), "distance": distance}
+                for other, distance in sorted(distances.items(), key=lambda item: (item[1], item[0]))
+            ],
+        })
+
+    @action(detail=True, methods=['get'], url_path='shared-partners')
+    def shared_partners(self, request, pk=None):
+        """
+        Returns the plants that share companion partners with a plant, most
+        shared partners first. type restricts the links to beneficial,
+        detrimental or neutral ones (default any), e.g. type=beneficial for
+        plants that benefit from the same partners.
+        """
+        plant_id = self._network_plant(pk)
+        try:
+            interaction_type = self._network_type(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        shared = network_shared_partners(plant_id, interaction_type)
+        names = plant_names({*shared, *(partner for partners in shared.values() for partner in partners)})
+        return Response({
+            "plant_id": plant_id,
+            "results": [
+                {
+                    "plant_id": other,
+                    "common_name": names.get(other),
+                    "shared_partners": [{"plant_id": partner, "common_name": names.get(partner)} for partner in partners],
+                }
+                for other, partners in sorted(shared.items(), key=lambda item: (-len(item[1]), item[0]))
+            ],
+        })
 
-        return Response(response_data)
-        # pass # Placeholder to indicate the rest of the method is unchanged
+    @action(detail=False, methods=['get'])
+    def components(self, request):
+        """
+        Returns the connected components of the companion network with two
+        or more plants, largest first. type restricts the links to
+        beneficial, detrimental or neutral ones (default any); plant returns
+        only the component of that plant.
+        """
+        try:
+            interaction_type = self._network_type(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        plant_id = request.query_params.get('plant')
+        if plant_id is not None:
+            plant_id = self._network_plant(plant_id)
+
+        groups = network_components(interaction_type, plant_id=plant_id)
+        return Response({
+            "results": [{"size": len(members), "plants": members} for members in groups],
+        })
 
 # --- Added ViewSets ---
 
@@ -110,36 +277,52 @@ class UserViewSet(viewsets.ModelViewSet):
 class FertilizerViewSet(viewsets.ModelViewSet):
     queryset = Fertilizer.objects.all()
     serializer_class = FertilizerSerializer
+    filterset_class = FertilizerFilter
+    pagination_class = KeysetPagination
     # Add permission_classes later if needed
 
 class PestViewSet(viewsets.ModelViewSet):
     queryset = Pest.objects.all()
     serializer_class = PestSerializer
+    filterset_class = PestFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ORDERING_BY_NAME
     # Add permission_classes later if needed
 
 class DiseaseViewSet(viewsets.ModelViewSet):
     queryset = Disease.objects.all()
     serializer_class = DiseaseSerializer
+    filterset_class = DiseaseFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ORDERING_BY_NAME
     # Add permission_classes later if needed
 
 class SeedViewSet(viewsets.ModelViewSet):
     queryset = Seed.objects.all()
     serializer_class = SeedSerializer
+    filterset_class = SeedFilter
+    pagination_class = KeysetPagination
     # Add permission_classes later if needed
 
 class CompanionshipViewSet(viewsets.ModelViewSet):
     queryset = Companionship.objects.all()
     serializer_class = CompanionshipSerializer
+    filterset_class = CompanionshipFilter
+    pagination_class = KeysetPagination
     # Add permission_classes later if needed
 
 class PlantPestViewSet(viewsets.ModelViewSet):
     queryset = PlantPest.objects.all()
     serializer_class = PlantPestSerializer
+    filterset_class = PlantPestFilter
+    pagination_class = KeysetPagination
     # Add permission_classes later if needed
 
 class PlantDiseaseViewSet(viewsets.ModelViewSet):
     queryset = PlantDisease.objects.all()
     serializer_class = PlantDiseaseSerializer
+    filterset_class = PlantDiseaseFilter
+    pagination_class = KeysetPagination
     # Add permission_classes later if needed
 
 class UserContributionViewSet(viewsets.ModelViewSet):
@@ -172,17 +355,166 @@ class UserContributionViewSet(viewsets.ModelViewSet):
 class CompanionPlantingInteractionViewSet(viewsets.ModelViewSet):
     queryset = CompanionPlantingInteraction.objects.all()
     serializer_class = CompanionPlantingInteractionSerializer
+    filterset_class = CompanionPlantingInteractionFilter
     # Add permission_classes later if needed
 
+# --- Unified Search API ---
+
+import base64
+import json
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
+from .search_index import SEARCH_LABELS, SEARCH_TYPES, search_hits
+
+class SearchAPIView(APIView):
+    """
+    Searches plants, seeds, pests, diseases and fertilizers at once.
+
+    Query parameters: q (required), type (comma separated subset of the
+    entity types), page_size (default 20, at most 100) and cursor (from the
+    next link of the previous page). Hits are ranked across types; the
+    cursor holds the rank, type and id of the last hit, so every page costs
+    the same whatever its depth.
+    """
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+
+    @staticmethod
+    def _encode_cursor(key):
+        return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        rank, type_name, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(rank, (int, float)) or type_name not in SEARCH_TYPES or not isinstance(pk, int):
+            raise ValueError(cursor)
+        return float(rank), type_name, pk
+
+    def get(self, request, format=None):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({"error": "The 'q' parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        types = [name for name in request.query_params.get('type', '').split(',') if name] or list(SEARCH_TYPES)
+        unknown = [name for name in types if name not in SEARCH_TYPES]
+        if unknown:
+            return Response({
+                "error": f"Unknown entity type: {', '.join(unknown)}",
+                "supported_types": list(SEARCH_TYPES)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page_size = min(max(int(request.query_params.get('page_size', self.DEFAULT_PAGE_SIZE)), 1), self.MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "page_size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        after = None
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                after = self._decode_cursor(cursor)
+            except (ValueError, TypeError, UnicodeError):
+                return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One row past the page tells whether there is a next page
+        hits = search_hits(text, types, page_size + 1, after=after)
+        page, has_next = hits[:page_size], len(hits) > page_size
+
+        results = []
+        for (rank, type_name, pk), obj in page:
+            name_field, detail_field = SEARCH_LABELS[SEARCH_TYPES[type_name]]
+            results.append({
+                'type': type_name,
+                'id': pk,
+                'name': getattr(obj, name_field),
+                'detail': getattr(obj, detail_field),
+                'rank': rank,
+                'url': reverse(f'{type_name}-detail', args=[pk], request=request),
+            })
+
+        next_url = None
+        if has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', self._encode_cursor(page[-1][0]))
+        return Response({'next': next_url, 'results': results})
+
+# --- Delta Sync API ---
+
+from .sync import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, InvalidSyncToken, sync_changes
+
+class SyncView(APIView):
+    """
+    Returns the changes to the catalogue since a sync token.
+
+    Query parameters: since (the next token of the previous response; leave
+    it out for a full sync) and limit (changes per batch, default 200, at
+    most 1000). Upserts carry the serialized record, deletes only type and
+    id. While has_more is true, call again with next right away; otherwise
+    keep next for the following sync.
+    """
+
+    def get(self, request, format=None):
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_BATCH_SIZE)), 1), MAX_BATCH_SIZE)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(sync_changes(request.query_params.get('since') or None, batch_size=limit))
+        except InvalidSyncToken:
+            return Response({"error": "Invalid sync token. Start a full sync without 'since'."}, status=status.HTTP_400_BAD_REQUEST)
+
+# --- Garden Bed Solver API ---
+
+from .companion_graph import MAX_SOLVER_PLANTS, solve_beds
+
+class BedSolverView(APIView):
+    """
+    Groups candidate plants into garden beds (see companion_graph.solve_beds).
+
+    Takes a JSON body {"plants": [ids], "bed_size": n, "beds": n,
+    "include_matrix": true}; bed_size and beds are optional limits. Returns
+    the beds, keeping detrimental pairs apart and beneficial pairs together,
+    and the pairwise compatibility matrix of the plants in the order given
+    (1 beneficial, -1 detrimental, 0 neutral or unpaired). Ids of plants
+    that do not exist are listed under not_found.
+    """
+    # Answers a question about the catalogue like a GET; POST only carries the longer list
+    permission_classes = [AllowAny]
+
+    def post(self, request, format=None):
+        data = request.data if isinstance(request.data, dict) else {}
+        plants = data.get('plants')
+        if not isinstance(plants, list) or not plants or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in plants):
+            return Response({"error": "Provide the candidate plant ids as a list under 'plants'."}, status=status.HTTP_400_BAD_REQUEST)
+        plant_ids = list(dict.fromkeys(plants))
+        if len(plant_ids) > MAX_SOLVER_PLANTS:
+            return Response({"error": f"At most {MAX_SOLVER_PLANTS} plants can be grouped per request."}, status=status.HTTP_400_BAD_REQUEST)
+        limits = {}
+        for name in ('bed_size', 'beds'):
+            value = data.get(name)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+                return Response({"error": f"{name} must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+            limits[name] = value
+
+        existing = set(Plant.objects.filter(pk__in=plant_ids).values_list('pk', flat=True))
+        found = [pk for pk in plant_ids if pk in existing]
+        result = solve_beds(found, include_matrix=bool(data.get('include_matrix', True)), **limits) if found else {
+            'beds': [], 'beneficial_pairs': 0, 'detrimental_pairs': 0, 'matrix': []
+        }
+        return Response({'plants': found, **result, 'not_found': [pk for pk in plant_ids if pk not in existing]})
+
 # --- Added Bulk Import View ---
 
-from .tasks import process_bulk_import
+import uuid
+from .import_jobs import import_record_count, stage_import_job
+from .tasks import process_bulk_import, start_import_job
 
 class BulkImportView(APIView):
     """
     View to handle bulk import of data via JSON upload.
     Restricted to admin users.
     Handles imports for all entity types using Celery for large imports.
+    Large payloads are staged to storage in chunks and only the job id is sent
+    to the workers.
     """
     permission_classes = [IsAdminUser]
 
@@ -214,17 +546,22 @@ class BulkImportView(APIView):
                 "supported_types": supported_types
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check if this is a large import that should use Celery
-        use_celery = len(data_list) > 10  # Use Celery for imports with more than 10 items
+        # Check if this is a large import that should use Celery. A complex
+        # plant import is a single item holding its sections, so count their records
+        record_count = import_record_count(entity_type, data_list)
+        use_celery = record_count > 10  # Use Celery for imports with more than 10 records
 
         if use_celery:
-            # Process in background with Celery
-            user_id = str(request.user.id) if request.user.is_authenticated else None
-            task = process_bulk_import.delay(entity_type, data_list, user_id)
+            # Stage the payload and process it in background chunks with Celery
+            user = request.user if request.user.is_authenticated else None
+            task_id = str(uuid.uuid4())
+            job = stage_import_job(entity_type, data_list, user=user, task_id=task_id)
+            start_import_job.apply_async(args=[job.pk], task_id=task_id)
 
             return Response({
-                "message": f"Bulk import of {len(data_list)} {entity_type} records started.",
-                "task_id": task.id,
+                "message": f"Bulk import of {record_count} {entity_type} records started.",
+                "task_id": task_id,
+                "job_id": job.pk,
                 "status": "processing"
             }, status=status.HTTP_202_ACCEPTED)
         else:
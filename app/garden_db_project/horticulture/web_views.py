@@ -7,11 +7,14 @@ from django.views.generic import ListView, DetailView, TemplateView, View
 from django.db.models import Q
 from django.contrib import messages
 from django.db import transaction
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect
 from django.urls import reverse
 from django.conf import settings
 from .models import Plant, Seed, Pest, Disease, Companionship, Region, SoilProfile, Fertilizer, CompanionPlantingInteraction, PlantPest, PlantDisease
 from .relationship_fixer import fix_all_relationships, fix_relationships_from_json
+from .json_stream import JSONStream, StreamedSection, iter_batches
+from .plant_details import get_plant_detail
+from .search_index import search, search_page
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
@@ -52,65 +55,36 @@ class PlantListView(ListView):
         if growth_habit:
             queryset = queryset.filter(growth_habit=growth_habit)
 
-        # Search functionality
+        # Search functionality, ranked by the full-text index
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(
-                Q(common_name__icontains=query) |
-                Q(scientific_name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(family__icontains=query) |
-                Q(genus__icontains=query) |
-                Q(species__icontains=query)
-            )
+            queryset = search(queryset, query)
 
         return queryset
 
 class PlantDetailView(DetailView):
-    model = Plant
+    """
+    Renders the precomputed detail document of a plant (see plant_details),
+    so a cached page view costs no queries.
+    """
     template_name = 'horticulture/plant_detail.html'
     context_object_name = 'plant'
 
+    def get_object(self, queryset=None):
+        self.document = get_plant_detail(self.kwargs['pk'])
+        if self.document is None:
+            raise Http404("No plant found matching the query")
+        return self.document['plant']
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         plant = self.object
-        logger.info(f"Fetching details for Plant ID: {plant.id}, Name: {plant.common_name}") # LOGGING ADDED
-
-        # Fetch companion plants
-        context['companionships'] = Companionship.objects.filter(
-            Q(plant_subject=plant) | Q(plant_object=plant)
-        ).select_related(
-            'plant_subject', 'plant_object'
-        ).prefetch_related('interactions') # Prefetch interactions
-
-        # Fetch pests associated with this plant
-        plant_pests_qs = PlantPest.objects.filter(
-            plant=plant
-        ).select_related('pest')
-        logger.info(f"Found {plant_pests_qs.count()} PlantPest records for Plant ID {plant.id}") # LOGGING ADDED
-        # Log the actual pest names if any found
-        if plant_pests_qs.exists():
-             pest_names = [pp.pest.common_name for pp in plant_pests_qs]
-             logger.info(f"Pest names: {pest_names}")
-        else:
-             logger.info("No pests found via PlantPest query.")
-
-        context['plant_pests'] = plant_pests_qs
-
-        # Fetch diseases associated with this plant
-        plant_diseases_qs = PlantDisease.objects.filter(
-            plant=plant
-        ).select_related('disease')
-        logger.info(f"Found {plant_diseases_qs.count()} PlantDisease records for Plant ID {plant.id}") # LOGGING ADDED
-        # Log the actual disease names if any found
-        if plant_diseases_qs.exists():
-             disease_names = [pd.disease.common_name for pd in plant_diseases_qs]
-             logger.info(f"Disease names: {disease_names}")
-        else:
-             logger.info("No diseases found via PlantDisease query.")
-
-        context['plant_diseases'] = plant_diseases_qs
+        logger.info(f"Fetching details for Plant ID: {plant['id']}, Name: {plant['common_name']}")
 
+        context['companionships'] = self.document['companionships']
+        context['plant_pests'] = self.document['plant_pests']
+        context['plant_diseases'] = self.document['plant_diseases']
+        context['seeds'] = self.document['seeds']
         return context
 
 class SeedListView(ListView):
@@ -127,16 +101,10 @@ class SeedListView(ListView):
         if seed_type:
             queryset = queryset.filter(seed_type=seed_type)
 
-        # Search functionality
+        # Search functionality, ranked by the full-text index
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(
-                Q(seed_name__icontains=query) |
-                Q(variety__icontains=query) |
-                Q(description__icontains=query) |
-                Q(plant__common_name__icontains=query) |
-                Q(plant__scientific_name__icontains=query)
-            )
+            queryset = search(queryset, query)
 
         return queryset
 
@@ -159,15 +127,10 @@ class PestListView(ListView):
         if category:
             queryset = queryset.filter(category=category)
 
-        # Search functionality
+        # Search functionality, ranked by the full-text index
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(
-                Q(common_name__icontains=query) |
-                Q(scientific_name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(symptoms__icontains=query)
-            )
+            queryset = search(queryset, query)
 
         return queryset
 
@@ -190,16 +153,10 @@ class DiseaseListView(ListView):
         if category:
             queryset = queryset.filter(category=category)
 
-        # Search functionality
+        # Search functionality, ranked by the full-text index
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(
-                Q(common_name__icontains=query) |
-                Q(scientific_name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(symptoms__icontains=query) |
-                Q(cause__icontains=query)
-            )
+            queryset = search(queryset, query)
 
         return queryset
 
@@ -244,6 +201,24 @@ class CompanionListView(ListView):
 
 class SearchView(TemplateView):
     template_name = 'horticulture/search_results.html'
+    # Results shown per model; the totals link to the list views
+    RESULTS_PER_MODEL = 6
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        context['query'] = query
+
+        if query:
+            # One ranked query per model, returning its page and total
+            context['plants'], context['plants_count'] = search_page(Plant.objects.all(), query, self.RESULTS_PER_MODEL)
+            context['seeds'], context['seeds_count'] = search_page(
+                Seed.objects.select_related('plant'), query, self.RESULTS_PER_MODEL
+            )
+            context['pests'], context['pests_count'] = search_page(Pest.objects.all(), query, self.RESULTS_PER_MODEL)
+            context['diseases'], context['diseases_count'] = search_page(Disease.objects.all(), query, self.RESULTS_PER_MODEL)
+
+        return context
 
 
 class FixRelationshipsView(View):
@@ -330,60 +305,11 @@ class FixRelationshipsView(View):
 
         return render(request, self.template_name, {'result': result, 'json_files': json_files})
 
-    # Remove the get_context_data method as it's not needed for this view
-    # def get_context_data(self, **kwargs):
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        query = self.request.GET.get('q', '')
-        context['query'] = query
-
-        if query:
-            # Get results from each model
-            plants = Plant.objects.filter(
-                Q(common_name__icontains=query) |
-                Q(scientific_name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(family__icontains=query)
-            ).order_by('common_name')
-
-            seeds = Seed.objects.filter(
-                Q(seed_name__icontains=query) |
-                Q(variety__icontains=query) |
-                Q(description__icontains=query) |
-                Q(plant__common_name__icontains=query)
-            ).order_by('seed_name')
-
-            pests = Pest.objects.filter(
-                Q(common_name__icontains=query) |
-                Q(scientific_name__icontains=query) |
-                Q(description__icontains=query)
-            ).order_by('common_name')
-
-            diseases = Disease.objects.filter(
-                Q(common_name__icontains=query) |
-                Q(scientific_name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(cause__icontains=query)
-            ).order_by('common_name')
-
-            # Store counts
-            context['plants_count'] = plants.count()
-            context['seeds_count'] = seeds.count()
-            context['pests_count'] = pests.count()
-            context['diseases_count'] = diseases.count()
-
-            # Limit results for display
-            context['plants'] = plants[:6]
-            context['seeds'] = seeds[:6]
-            context['pests'] = pests[:6]
-            context['diseases'] = diseases[:6]
-
-        return context
-
 
 class BulkImportView(View):
     template_name = 'horticulture/bulk_import.html'
+    # Number of records parsed from the upload before they are imported
+    IMPORT_BATCH_SIZE = 500
 
     def get(self, request):
         return render(request, self.template_name)
@@ -408,13 +334,19 @@ class BulkImportView(View):
             return render(request, self.template_name, {'result': result})
 
         try:
-            # Read and parse JSON file
-            data = json.loads(json_file.read().decode('utf-8'))
-            logger.info(f"Parsed JSON data type: {type(data).__name__}")
+            # Parse the JSON file incrementally; arrays are streamed in batches
+            stream = JSONStream(json_file)
+            if stream.root_type == 'list':
+                data = stream.items()
+            elif stream.root_type == 'dict':
+                data = stream.sections()
+            else:
+                data = stream.load()
+            logger.info(f"Parsed JSON data type: {stream.root_type}")
 
             # If this is a comprehensive import but the data is a list, wrap it in a dict
             # This handles the case where the JSON file is a list but the entity_type is 'comprehensive'
-            if entity_type == 'comprehensive' and isinstance(data, list):
+            if entity_type == 'comprehensive' and isinstance(data, StreamedSection):
                 logger.info("Converting list data to comprehensive format")
                 data = {"plants": data}
                 logger.info(f"Converted data keys: {list(data.keys())}")
@@ -422,58 +354,50 @@ class BulkImportView(View):
             # Process the data based on entity type
             with transaction.atomic():
                 if entity_type == 'plant':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_plants(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_plants, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
                 elif entity_type == 'seed':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_seeds(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_seeds, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
                 elif entity_type == 'pest':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_pests(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_pests, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
                 elif entity_type == 'disease':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_diseases(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_diseases, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
                 elif entity_type == 'region':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_regions(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_regions, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
                 elif entity_type == 'soil_profile':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_soil_profiles(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_soil_profiles, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
                 elif entity_type == 'fertilizer':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_fertilizers(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_fertilizers, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
                 elif entity_type == 'companionship':
-                    if isinstance(data, list):
-                        result['total'] = len(data)
-                        self._import_companionships(data, update_existing, result)
+                    if isinstance(data, StreamedSection):
+                        self._import_in_batches(data, self._import_companionships, update_existing, result)
                     else:
                         result['message'] = 'Invalid JSON format. Expected a list of objects.'
                         return render(request, self.template_name, {'result': result})
@@ -483,40 +407,21 @@ class BulkImportView(View):
                         # Log the keys in the data for debugging
                         logger.info(f"Comprehensive import data keys: {list(data.keys())}")
 
-                        plants_data = data.get('plants', [])
-                        logger.info(f"Found {len(plants_data)} plants in the import data")
-
-                        companionships_data = data.get('companion_relationships', [])
-                        logger.info(f"Found {len(companionships_data)} companion relationships in the import data")
-
-                        pests_data = data.get('pests', [])
-                        logger.info(f"Found {len(pests_data)} pests in the import data")
-                        if pests_data:
-                            logger.info(f"First pest: {pests_data[0].get('common_name')}")
-                            logger.info(f"First pest affected plants: {pests_data[0].get('affected_plants', [])}")
-
-                        diseases_data = data.get('diseases', [])
-                        logger.info(f"Found {len(diseases_data)} diseases in the import data")
-
                         # Import plants first
-                        if plants_data:
-                            result['total'] += len(plants_data)
-                            self._import_plants(plants_data, update_existing, result)
+                        count = self._import_in_batches(data.get('plants', []), self._import_plants, update_existing, result)
+                        logger.info(f"Processed {count} plants from the import data")
 
                         # Import pests
-                        if pests_data:
-                            result['total'] += len(pests_data)
-                            self._import_pests(pests_data, update_existing, result)
+                        count = self._import_in_batches(data.get('pests', []), self._import_pests, update_existing, result)
+                        logger.info(f"Processed {count} pests from the import data")
 
                         # Import diseases
-                        if diseases_data:
-                            result['total'] += len(diseases_data)
-                            self._import_diseases(diseases_data, update_existing, result)
+                        count = self._import_in_batches(data.get('diseases', []), self._import_diseases, update_existing, result)
+                        logger.info(f"Processed {count} diseases from the import data")
 
                         # Import companionships last (since they depend on plants)
-                        if companionships_data:
-                            result['total'] += len(companionships_data)
-                            self._import_companionships(companionships_data, update_existing, result)
+                        count = self._import_in_batches(data.get('companion_relationships', []), self._import_companionships, update_existing, result)
+                        logger.info(f"Processed {count} companion relationships from the import data")
                     else:
                         result['message'] = 'Invalid JSON format for comprehensive import. Expected an object with plants, companion_relationships, pests, and diseases arrays.'
                         return render(request, self.template_name, {'result': result})
@@ -535,6 +440,15 @@ class BulkImportView(View):
 
         return render(request, self.template_name, {'result': result})
 
+    def _import_in_batches(self, items, import_func, update_existing, result):
+        # Feed a list or streamed section to import_func one batch at a time
+        count = 0
+        for batch in iter_batches(items, self.IMPORT_BATCH_SIZE):
+            count += len(batch)
+            result['total'] += len(batch)
+            import_func(batch, update_existing, result)
+        return count
+
     def _import_plants(self, data, update_existing, result):
         for item in data:
             try:
@@ -0,0 +1,81 @@
+"""
+Management command to benchmark FirstAdminMiddleware.
+
+Runs requests through the middleware in front of an empty view, once with
+the superuser check cached and once querying the database on every request,
+and reports p50/p95 latency and queries per request. A superuser is created
+for the run if none exists; it is rolled back afterwards.
+"""
+
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from registration.middleware import FirstAdminMiddleware, clear_superuser_cache
+
+
+class _Rollback(Exception):
+    """Raised to roll back a benchmark run."""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the p50 latency of FirstAdminMiddleware with and without its superuser cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Requests per run')
+        parser.add_argument('--path', type=str, default='/api/v1/plants/', help='Path of the requests')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if not get_user_model().objects.filter(is_superuser=True).exists():
+                    get_user_model().objects.create_superuser(
+                        username='middleware-benchmark', email='middleware-benchmark@example.com', password='benchmark'
+                    )
+                results = {
+                    'uncached': self.run(options['requests'], options['path'], cache_seconds=0),
+                    'cached': self.run(options['requests'], options['path'], cache_seconds=300),
+                }
+                raise _Rollback()
+        except _Rollback:
+            pass
+        clear_superuser_cache()
+
+        self.stdout.write(f"{'run':<10}{'p50 (us)':>10}{'p95 (us)':>10}{'queries/request':>17}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10}{result['p50_us']:>10.1f}{result['p95_us']:>10.1f}{result['queries_per_request']:>17.2f}"
+            )
+        speedup = results['uncached']['p50_us'] / max(results['cached']['p50_us'], 1e-9)
+        self.stdout.write(self.style.SUCCESS(f'Cached p50 is {speedup:.1f}x faster'))
+
+    def run(self, requests, path, cache_seconds):
+        middleware = FirstAdminMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get(path)
+        queries = 0
+        timings = []
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with override_settings(FIRST_ADMIN_CACHE_SECONDS=cache_seconds), connection.execute_wrapper(count_queries):
+            clear_superuser_cache()
+            middleware(request)  # Warm up the cache and the connection
+            queries = 0
+            for _ in range(requests):
+                started = time.perf_counter()
+                middleware(request)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        return {
+            'p50_us': statistics.median(timings) * 1e6,
+            'p95_us': timings[int(len(timings) * 0.95)] * 1e6,
+            'queries_per_request': queries / requests,
+        }
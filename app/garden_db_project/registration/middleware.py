@@ -3,11 +3,66 @@ from django.shortcuts import redirect
 from django.urls import reverse, NoReverseMatch
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Shared cache key of the "a superuser exists" state
+SUPERUSER_CACHE_KEY = 'registration:superuser_exists'
+
+# Default seconds the state is cached, overridable with FIRST_ADMIN_CACHE_SECONDS (0 disables caching)
+SUPERUSER_CACHE_SECONDS = 300
+
+# Process memory copy of the shared cache entry: (expires at, in time.monotonic() seconds)
+_superuser_seen = {'expires': 0.0}
+
+
+def superuser_exists():
+    """
+    Returns whether any superuser exists.
+
+    Only a positive answer is cached, in process memory and in the shared
+    cache, so once the first admin is registered a request costs no query.
+    Without a superuser every request still asks the database, so the
+    registration in one process is seen by all the others right away.
+    The receivers in registration.signals clear the cache when users change.
+    """
+    timeout = getattr(settings, 'FIRST_ADMIN_CACHE_SECONDS', SUPERUSER_CACHE_SECONDS)
+    if not timeout:
+        return User.objects.filter(is_superuser=True).exists()
+
+    now = time.monotonic()
+    if now < _superuser_seen['expires']:
+        return True
+    if not cache.get(SUPERUSER_CACHE_KEY):
+        if not User.objects.filter(is_superuser=True).exists():
+            return False
+        cache.set(SUPERUSER_CACHE_KEY, True, timeout)
+    _superuser_seen['expires'] = now + timeout
+    return True
+
+
+def clear_superuser_cache():
+    """Forgets the cached state, in this process and in the shared cache."""
+    _superuser_seen['expires'] = 0.0
+    cache.delete(SUPERUSER_CACHE_KEY)
+
+
+def invalidate_superuser_cache():
+    """
+    Clears the cached state now and again once the current transaction
+    commits, so a request that read the old state before the commit cannot
+    cache it past the change. Other processes keep their memory copy for at
+    most FIRST_ADMIN_CACHE_SECONDS.
+    """
+    clear_superuser_cache()
+    transaction.on_commit(clear_superuser_cache)
+
+
 class FirstAdminMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -25,8 +80,8 @@ class FirstAdminMiddleware:
         # Code to be executed for each request before
         # the view (and later middleware) are called.
 
-        # Check if any superuser exists
-        has_superuser = User.objects.filter(is_superuser=True).exists()
+        # Check if any superuser exists (cached, see superuser_exists)
+        has_superuser = superuser_exists()
 
         if not has_superuser and self.register_admin_url:
             # Define paths that should always be accessible, even without a superuser
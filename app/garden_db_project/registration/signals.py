@@ -0,0 +1,16 @@
+# app/garden_db_project/registration/signals.py
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from .middleware import invalidate_superuser_cache
+
+
+def user_changed(sender, instance, **kwargs):
+    # Any save may grant or revoke is_superuser, so the cached state is dropped
+    invalidate_superuser_cache()
+
+
+def connect_signals():
+    """Connects the receivers; called from RegistrationConfig.ready()."""
+    post_save.connect(user_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='registration_user_saved')
+    post_delete.connect(user_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='registration_user_deleted')
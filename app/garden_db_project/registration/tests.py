@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .middleware import FirstAdminMiddleware, clear_superuser_cache, superuser_exists
+
+User = get_user_model()
+
+
+@override_settings(FIRST_ADMIN_CACHE_SECONDS=300)
+class FirstAdminMiddlewareTests(TestCase):
+    """Tests for the first admin redirect and its cached superuser check."""
+
+    def setUp(self):
+        # The cache outlives the rolled back users of other tests
+        clear_superuser_cache()
+        self.addCleanup(clear_superuser_cache)
+        self.middleware = FirstAdminMiddleware(lambda request: HttpResponse('ok'))
+        self.request = RequestFactory().get('/api/v1/plants/')
+
+    def test_redirects_until_a_superuser_exists(self):
+        """Test that requests are redirected to the registration page without a superuser."""
+        response = self.middleware(self.request)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('register_admin'))
+
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpassword')
+        self.assertEqual(self.middleware(self.request).status_code, 200)
+
+    def test_steady_state_requests_cost_no_queries(self):
+        """Test that once a superuser was seen, requests do not query the database."""
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpassword')
+        self.middleware(self.request)
+
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(10):
+                self.assertEqual(self.middleware(self.request).status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+    def test_user_changes_clear_the_cache(self):
+        """Test that demoting or deleting the superuser is seen by the next request."""
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpassword')
+        self.assertTrue(superuser_exists())
+
+        admin.is_superuser = False
+        admin.save()
+        self.assertFalse(superuser_exists())
+
+        admin.is_superuser = True
+        admin.save()
+        self.assertTrue(superuser_exists())
+        admin.delete()
+        self.assertEqual(self.middleware(self.request).status_code, 302)
+
+    @override_settings(FIRST_ADMIN_CACHE_SECONDS=0)
+    def test_cache_can_be_disabled(self):
+        """Test that FIRST_ADMIN_CACHE_SECONDS=0 checks the database on every request."""
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpassword')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.middleware(self.request)
+            self.middleware(self.request)
+        self.assertEqual(len(queries), 2)